@@ -1,23 +1,84 @@
+import os
+import queue
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 # from flask_cors import CORS
 
 from meal_max.models import kitchen_model
-from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.models.arena_registry import DEFAULT_ARENA, ArenaRegistry
+from meal_max.models.battle_model import SharedBattleModel
+from meal_max.models.battle_queue import BATTLE_JOB_MAX_WAIT, BattleJobQueue
+from meal_max.models.meal_name_index import MealNameIndex
+from meal_max.utils.health import InFlightRequests, ReadinessProbe
+from meal_max.utils.json_provider import FastJSONProvider, PreEncodedJSON, iter_ndjson
+from meal_max.utils.metrics import PROMETHEUS_CONTENT_TYPE, SharedMetrics, instrument_app, metrics
+from meal_max.utils.random_utils import breaker as random_org_breaker
+from meal_max.utils.shared_state import SharedStateStore
+from meal_max.utils.sql_utils import statement_stats, use_request_connections
 
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+instrument_app(app)
+# Model calls made while serving a request share one database connection
+use_request_connections(app)
+
+# Readiness is checked against the database at most every READINESS_TTL seconds, in the background,
+# and reports how many of the process's request threads are busy
+readiness = ReadinessProbe(["meals"])
+in_flight_requests = InFlightRequests(int(os.getenv("WEB_THREADS", "4")))
+in_flight_requests.track(app)
+readiness.register_gauge("requests", in_flight_requests.gauge)
+readiness.register_gauge("random_org", random_org_breaker.snapshot)
+
 # This bypasses standard security stuff we'll talk about later
 # If you get errors that use words like cross origin or flight,
 # uncomment this
 # CORS(app)
 
-# Initialize the BattleModel
-battle_model = BattleModel()
+# Each arena battles its own combatants, created on first use and dropped once idle.
+# Pre-fork workers keep the in-flight combatants in the shared state database so they all agree on them;
+# the default arena keeps the namespace used before there were arenas. Each worker drops arenas by its own
+# idle time, so a dropped arena's namespace is only deleted once no worker has written to it for as long,
+# and the table does not keep a row for every arena ever opened
+if os.getenv("SERVER_MODE") == "prefork":
+    arenas = ArenaRegistry(
+        lambda arena_id: SharedBattleModel(
+            SharedStateStore("battle" if arena_id == DEFAULT_ARENA else f"battle:{arena_id}")
+        ),
+        on_evict=lambda arena_id, battle_model: battle_model.store.clear(idle_for=arenas.idle_timeout),
+    )
+else:
+    arenas = ArenaRegistry()
+readiness.register_gauge("arenas", arenas.snapshot)
+
+# Battles submitted to /api/battle-jobs are resolved in batches by background workers.
+# Pre-fork workers share each job's status, so it can be polled from any worker
+if os.getenv("SERVER_MODE") == "prefork":
+    battle_jobs = BattleJobQueue(store_factory=lambda job_id: SharedStateStore(f"battle_job:{job_id}"))
+else:
+    battle_jobs = BattleJobQueue()
+readiness.register_gauge("battle_jobs", battle_jobs.snapshot)
+
+# Pre-fork workers each count their own requests, so /api/metrics merges the snapshots every worker
+# writes to the shared state database
+if os.getenv("SERVER_MODE") == "prefork":
+    exported_metrics = SharedMetrics(metrics, SharedStateStore("metrics"))
+    exported_metrics.start()
+else:
+    exported_metrics = metrics
+
+# Sorted meal names for autocomplete, loaded on first use and kept current by meal writes
+meal_name_index = MealNameIndex()
+
+# Bodies of responses that never change are encoded once
+HEALTHY = PreEncodedJSON({'status': 'healthy'})
+DATABASE_HEALTHY = PreEncodedJSON({'database_status': 'healthy'})
+
 
 ####################################################
 #
@@ -35,28 +96,53 @@ def healthcheck() -> Response:
         JSON response indicating the health status of the service.
     """
     app.logger.info('Health check')
-    return make_response(jsonify({'status': 'healthy'}), 200)
+    return HEALTHY.response(app, 200)
 
 @app.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
     Route to check if the database connection and meals table are functional.
+    Served from the readiness probe's cached result.
 
     Returns:
         JSON response indicating the database health status.
     Raises:
         404 error if there is an issue with the database.
     """
-    try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if meals table exists...")
-        check_table_exists("meals")
-        app.logger.info("meals table exists.")
-        return make_response(jsonify({'database_status': 'healthy'}), 200)
-    except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
+    app.logger.info("Checking database readiness...")
+    status = readiness.status()
+    if status['ready']:
+        return DATABASE_HEALTHY.response(app, 200)
+    return make_response(jsonify({'error': status['error']}), 404)
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check() -> Response:
+    """
+    Readiness route for orchestrator probes, separate from the /api/health liveness route.
+
+    The database check is cached for READINESS_TTL seconds and refreshed in the background,
+    so probes add no database load.
+
+    Returns:
+        JSON response with the readiness, the database status and the current load.
+        503 status if the service is not ready.
+    """
+    status = readiness.status()
+    return make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics() -> Response:
+    """
+    Route to expose request, database and random.org metrics in Prometheus text format.
+
+    Pre-fork workers each count their own requests; the response merges every worker's
+    metrics, the other workers' as of their last snapshot, up to METRICS_PUBLISH_INTERVAL old.
+
+    Returns:
+        Plain text response with the current metric values.
+    """
+    return Response(exported_metrics.render(), status=200, content_type=PROMETHEUS_CONTENT_TYPE)
 
 
 ##########################################################
@@ -178,6 +264,81 @@ def get_meal_by_name(meal_name: str) -> Response:
         app.logger.error(f"Error retrieving meal by name: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/meal-autocomplete', methods=['GET'])
+def meal_autocomplete() -> Response:
+    """
+    Route to suggest meal names starting with the given prefix, ignoring case.
+
+    Query Parameters:
+        - q (str): The start of the meal name.
+        - limit (int, optional): The maximum number of suggestions, at most 50. Default is 10.
+
+    Returns:
+        JSON response with the matching meal names in alphabetical order.
+    Raises:
+        400 error if the prefix is missing or the limit is invalid.
+        500 error if there is an issue loading the meal names.
+    """
+    try:
+        prefix = request.args.get('q', '')
+        if not prefix:
+            return make_response(jsonify({'error': 'Query parameter q is required'}), 400)
+
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return make_response(jsonify({'error': 'Limit must be an integer'}), 400)
+
+        if not 1 <= limit <= 50:
+            return make_response(jsonify({'error': 'Limit must be between 1 and 50'}), 400)
+
+        meals = meal_name_index.complete(prefix, limit)
+        return make_response(jsonify({'status': 'success', 'query': prefix, 'meals': meals}), 200)
+    except Exception as e:
+        app.logger.error(f"Error completing meal names: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/meals-by-score', methods=['GET'])
+def get_meals_by_score() -> Response:
+    """
+    Route to get the meals whose battle score lies in a range, lowest score first.
+
+    Query Parameters:
+        - min (float): The lowest battle score, inclusive.
+        - max (float): The highest battle score, inclusive.
+        - limit (int, optional): The maximum number of meals, at most 1000. Default is 100.
+
+    Returns:
+        JSON response with the meals in the range.
+    Raises:
+        400 error if a bound is missing or invalid, or the limit is invalid.
+        500 error if there is an issue retrieving the meals.
+    """
+    try:
+        try:
+            min_score = float(request.args['min'])
+            max_score = float(request.args['max'])
+        except (KeyError, ValueError):
+            return make_response(jsonify({'error': 'Query parameters min and max must be numbers'}), 400)
+
+        try:
+            limit = int(request.args.get('limit', kitchen_model.MEALS_BY_SCORE_LIMIT))
+        except ValueError:
+            return make_response(jsonify({'error': 'Limit must be an integer'}), 400)
+
+        if not 1 <= limit <= 1000:
+            return make_response(jsonify({'error': 'Limit must be between 1 and 1000'}), 400)
+
+        app.logger.info("Retrieving meals scoring between %s and %s", min_score, max_score)
+        try:
+            meals = kitchen_model.get_meals_by_score(min_score, max_score, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'meals': meals}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meals by score: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ############################################################
 #
@@ -186,16 +347,32 @@ def get_meal_by_name(meal_name: str) -> Response:
 ############################################################
 
 
+def get_arena_id() -> str:
+    """
+    Returns the arena named by the request's 'arena' query parameter, or the default arena.
+    """
+    return request.args.get('arena') or DEFAULT_ARENA
+
+
 @app.route('/api/battle', methods=['GET'])
 def battle() -> Response:
     """
     Route to initiate a battle between the two currently prepared meals.
 
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
     Returns:
         JSON response indicating the result of the battle and the winner.
     Raises:
+        400 error if the arena id is invalid.
         500 error if there is an issue during the battle.
     """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
     try:
         app.logger.info('Two meals enter, one meal leaves!')
 
@@ -206,16 +383,96 @@ def battle() -> Response:
         app.logger.error(f"Battle error: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/battle-jobs', methods=['POST'])
+def submit_battle_job() -> Response:
+    """
+    Route to queue a battle between the two currently prepared meals, resolved in the background.
+
+    The response is sent as soon as the battle is queued; poll /api/battle-jobs/<job_id> for
+    the winner. Battles queued together share one random.org request and one transaction.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response with the job id and status.
+    Raises:
+        400 error if the arena id is invalid, fewer than two combatants are prepared,
+            or they are already queued for a battle that has not finished.
+        503 error if too many battles are already queued.
+        500 error if there is an issue queuing the battle.
+    """
+    try:
+        arena_id = get_arena_id()
+        battle_model = arenas.get(arena_id)
+
+        job = battle_jobs.submit(battle_model, arena_id)
+
+        return make_response(jsonify(job.to_dict()), 202)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except queue.Full:
+        return make_response(jsonify({'error': 'Too many battles are queued, try again later'}), 503)
+    except Exception as e:
+        app.logger.error(f"Error queuing battle: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/battle-jobs/<job_id>', methods=['GET'])
+def get_battle_job(job_id: str) -> Response:
+    """
+    Route to get the status of a queued battle and, once it is complete, its winner.
+
+    Path Parameter:
+        - job_id (str): The id returned when the battle was queued.
+
+    Query Parameters:
+        - wait (float, optional): Seconds to wait for the battle to finish before answering,
+          at most BATTLE_JOB_MAX_WAIT. Defaults to 0, answering at once.
+
+    Returns:
+        JSON response with the job's status, and its winner or error once finished.
+    Raises:
+        400 error if 'wait' is not a non-negative number.
+        404 error if the job is unknown or its result has expired.
+        500 error if the job's shared status cannot be read.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1
+    if not wait >= 0:
+        return make_response(jsonify({'error': 'wait must be a non-negative number of seconds'}), 400)
+    wait = min(wait, BATTLE_JOB_MAX_WAIT)
+
+    try:
+        job = battle_jobs.poll(job_id, wait)
+    except Exception as e:
+        app.logger.error(f"Error reading battle job {job_id}: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+    if job is None:
+        return make_response(jsonify({'error': f'Battle job {job_id} not found'}), 404)
+
+    return make_response(jsonify(job), 200)
+
 @app.route('/api/clear-combatants', methods=['POST'])
 def clear_combatants() -> Response:
     """
     Route to clear the list of combatants for the battle.
 
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
     Returns:
         JSON response indicating success of the operation.
     Raises:
+        400 error if the arena id is invalid.
         500 error if there is an issue clearing combatants.
     """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
     try:
         app.logger.info('Clearing all combatants...')
         battle_model.clear_combatants()
@@ -230,9 +487,17 @@ def get_combatants() -> Response:
     """
     Route to get the list of combatants for the battle.
 
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
     Returns:
         JSON response with the list of combatants.
     """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
     try:
         app.logger.info('Getting combatants...')
         combatants = battle_model.get_combatants()
@@ -249,11 +514,20 @@ def prep_combatant() -> Response:
     Parameters:
         - meal (str): The name of the meal
 
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
     Returns:
         JSON response indicating the success of combatant preparation.
     Raises:
+        400 error if the arena id is invalid.
         500 error if there is an issue preparing combatants.
     """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
     try:
         data = request.json
         meal = data.get('meal')
@@ -275,6 +549,56 @@ def prep_combatant() -> Response:
         app.logger.error("Failed to prepare combatants: %s", str(e))
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/matchmake', methods=['POST'])
+def matchmake() -> Response:
+    """
+    Route to find the meals whose battle score is closest to a meal's, and prep the meal
+    and its closest opponent as the arena's combatants, replacing any already prepped.
+
+    Parameters:
+        - meal (str): The name of the meal.
+        - k (int, optional): The number of opponents to return, at most 100. Default is 5.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response with the opponents, closest first, and the prepped combatants.
+    Raises:
+        400 error if the arena id, meal or k is invalid, or no opponent exists.
+        500 error if there is an issue finding opponents.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        data = request.json
+        meal = data.get('meal')
+        if not meal:
+            return make_response(jsonify({'error': 'You must name a meal'}), 400)
+
+        k = data.get('k', kitchen_model.NEAREST_MEALS_DEFAULT)
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 100:
+            return make_response(jsonify({'error': 'k must be an integer between 1 and 100'}), 400)
+
+        app.logger.info("Matchmaking %s against %d opponents", meal, k)
+        try:
+            meal = kitchen_model.get_meal_by_name(meal)
+            opponents = kitchen_model.get_nearest_meals(meal, k)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        if not opponents:
+            return make_response(jsonify({'error': f"No opponents available for {meal.meal}"}), 400)
+
+        battle_model.prep_match(meal, opponents[0])
+        combatants = battle_model.get_combatants()
+        return make_response(jsonify({'status': 'match prepared', 'opponents': opponents, 'combatants': combatants}), 200)
+    except Exception as e:
+        app.logger.error("Failed to matchmake: %s", str(e))
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 ############################################################
 #
@@ -307,6 +631,117 @@ def get_leaderboard() -> Response:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/export-leaderboard', methods=['GET'])
+def export_leaderboard() -> Response:
+    """
+    Route to stream the leaderboard as newline-delimited JSON, one meal per line.
+
+    Meals are read from the database in chunks while the response is sent, so memory use does
+    not grow with the number of meals. An error after the first chunk has been sent ends the
+    stream early.
+
+    Query Parameters:
+        - sort (str): The field to sort by ('wins' or 'win_pct'). Default is 'wins'.
+
+    Returns:
+        NDJSON response streaming the leaderboard.
+    Raises:
+        400 error if the sort field is invalid.
+        500 error if there is an issue reading the leaderboard.
+    """
+    try:
+        sort_by = request.args.get('sort', 'wins')
+        app.logger.info("Exporting leaderboard sorted by %s", sort_by)
+
+        leaderboard = kitchen_model.iter_leaderboard(sort_by)
+
+        return Response(stream_with_context(iter_ndjson(app, leaderboard)), status=200, mimetype='application/x-ndjson')
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error exporting leaderboard: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/meal-stats', methods=['GET'])
+def get_meal_stats() -> Response:
+    """
+    Route to get battle statistics aggregated by cuisine or difficulty.
+
+    Query Parameters:
+        - by (str): The grouping ('cuisine' or 'difficulty'). Default is 'cuisine'.
+
+    Returns:
+        JSON response with the battles, wins, win percentage and average price of each group.
+    Raises:
+        400 error if the grouping is invalid.
+        500 error if there is an issue retrieving the statistics.
+    """
+    try:
+        dimension = request.args.get('by', 'cuisine')
+        app.logger.info("Retrieving meal stats by %s", dimension)
+
+        stats = kitchen_model.get_meal_stats(dimension)
+
+        return make_response(jsonify({'status': 'success', 'by': dimension, 'stats': stats}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid meal stats request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meal stats: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Admin
+#
+############################################################
+
+@app.route('/api/admin/sql-stats', methods=['GET'])
+def get_sql_stats() -> Response:
+    """
+    Route to get per-statement timing statistics and recent slow queries.
+    Statements are only timed on connections opened with tracing enabled (SQL_TRACE=true).
+
+    Query Parameters:
+        - reset (bool, optional): If true, clear the statistics after returning them.
+
+    Returns:
+        JSON response with the statement summary (count, total, average and p95 in ms)
+        and the slow-query log.
+    """
+    try:
+        app.logger.info("Retrieving SQL statement statistics")
+        statements = statement_stats.summary()
+        slow_queries = list(statement_stats.slow_queries)
+
+        if request.args.get('reset', 'false').lower() == 'true':
+            app.logger.info("Resetting SQL statement statistics")
+            statement_stats.reset()
+
+        return make_response(jsonify({'status': 'success', 'statements': statements, 'slow_queries': slow_queries}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL statistics: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/admin/rebuild-meal-stats', methods=['POST'])
+def rebuild_meal_stats() -> Response:
+    """
+    Route to recompute the per-cuisine and per-difficulty statistics from the meals table.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue rebuilding the statistics.
+    """
+    try:
+        app.logger.info("Rebuilding meal stats")
+        kitchen_model.rebuild_meal_stats()
+        return make_response(jsonify({'status': 'meal stats rebuilt'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error rebuilding meal stats: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,738 @@
+"""
+ASGI variant of app.py with the same routes, for serving many slow requests from one process.
+
+Handlers are coroutines: SQLite work runs on a bounded thread pool (async_sql_utils.run_db) and
+random.org is called through a shared async HTTP client (async_random_utils), so a request
+waiting on entropy holds no thread. Serve it with an ASGI server, e.g.
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import queue
+
+from dotenv import load_dotenv
+from quart import Quart, jsonify, make_response, Response, request
+# from flask_cors import CORS
+
+from meal_max.models import kitchen_model
+from meal_max.models.arena_registry import DEFAULT_ARENA, ArenaRegistry
+from meal_max.models.battle_queue import BATTLE_JOB_MAX_WAIT, BattleJobQueue
+from meal_max.models.meal_name_index import MealNameIndex
+from meal_max.utils.async_random_utils import close_client, get_random
+from meal_max.utils.async_sql_utils import db_pool_stats, iterate_db, run_db
+from meal_max.utils.health import ReadinessProbe
+from meal_max.utils.json_provider import FastJSONProvider, PreEncodedJSON, encode_ndjson
+from meal_max.utils.metrics import PROMETHEUS_CONTENT_TYPE, instrument_asgi_app, metrics
+from meal_max.utils.random_utils import breaker as random_org_breaker
+from meal_max.utils.sql_utils import statement_stats
+
+
+# Load environment variables from .env file
+load_dotenv()
+
+app = Quart(__name__)
+app.json = FastJSONProvider(app)
+instrument_asgi_app(app)
+
+
+@app.after_serving
+async def _close_http_client() -> None:
+    await close_client()
+# This bypasses standard security stuff we'll talk about later
+# If you get errors that use words like cross origin or flight,
+# uncomment this
+# CORS(app)
+
+# Readiness is checked against the database at most every READINESS_TTL seconds, in the background
+readiness = ReadinessProbe(["meals"])
+readiness.register_gauge("db_pool", db_pool_stats)
+readiness.register_gauge("random_org", random_org_breaker.snapshot)
+
+# Each arena battles its own combatants, created on first use and dropped once idle
+arenas = ArenaRegistry()
+readiness.register_gauge("arenas", arenas.snapshot)
+
+# Battles submitted to /api/battle-jobs are resolved in batches by background workers
+battle_jobs = BattleJobQueue()
+readiness.register_gauge("battle_jobs", battle_jobs.snapshot)
+
+# Sorted meal names for autocomplete, loaded on first use and kept current by meal writes
+meal_name_index = MealNameIndex()
+
+# Bodies of responses that never change are encoded once
+HEALTHY = PreEncodedJSON({'status': 'healthy'})
+DATABASE_HEALTHY = PreEncodedJSON({'database_status': 'healthy'})
+
+
+####################################################
+#
+# Healthchecks
+#
+####################################################
+
+
+@app.route('/api/health', methods=['GET'])
+async def healthcheck() -> Response:
+    """
+    Health check route to verify the service is running.
+
+    Returns:
+        JSON response indicating the health status of the service.
+    """
+    app.logger.info('Health check')
+    return HEALTHY.response(app, 200)
+
+@app.route('/api/db-check', methods=['GET'])
+async def db_check() -> Response:
+    """
+    Route to check if the database connection and meals table are functional.
+    Served from the readiness probe's cached result.
+
+    Returns:
+        JSON response indicating the database health status.
+    Raises:
+        404 error if there is an issue with the database.
+    """
+    app.logger.info("Checking database readiness...")
+    if readiness.checked_at is None:
+        await run_db(readiness.refresh)
+    status = readiness.status()
+    if status['ready']:
+        return DATABASE_HEALTHY.response(app, 200)
+    return await make_response(jsonify({'error': status['error']}), 404)
+
+@app.route('/api/ready', methods=['GET'])
+async def readiness_check() -> Response:
+    """
+    Readiness route for orchestrator probes, separate from the /api/health liveness route.
+
+    The database check is cached for READINESS_TTL seconds and refreshed in the background,
+    so probes add no database load.
+
+    Returns:
+        JSON response with the readiness, the database status and the current load.
+        503 status if the service is not ready.
+    """
+    if readiness.checked_at is None:
+        await run_db(readiness.refresh)
+    status = readiness.status()
+    return await make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def get_metrics() -> Response:
+    """
+    Route to expose request, database and random.org metrics in Prometheus text format.
+
+    Returns:
+        Plain text response with the current metric values.
+    """
+    return Response(metrics.render(), status=200, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+##########################################################
+#
+# Meals
+#
+##########################################################
+
+
+@app.route('/api/create-meal', methods=['POST'])
+async def add_meal() -> Response:
+    """
+    Route to add a new meal to the database.
+
+    Expected JSON Input:
+        - meal (str): The name of the combatant (meal).
+        - cuisine (str): The cuisine type of the combatant (e.g., Italian, Chinese).
+        - price (float): The price of the combatant.
+        - difficulty (str): The preparation difficulty (HIGH, MED, LOW).
+
+    Returns:
+        JSON response indicating the success of the combatant addition.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue adding the combatant to the database.
+    """
+    app.logger.info('Creating new meal')
+    try:
+        # Get the JSON data from the request
+        data = await request.get_json()
+
+        # Extract and validate required fields
+        meal = data.get('meal')
+        cuisine = data.get('cuisine')
+        price = data.get('price')
+        difficulty = data.get('difficulty')
+
+        if not meal or not cuisine or price is None or difficulty not in ['HIGH', 'MED', 'LOW']:
+            return await make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
+
+        # Check that price is a float and has at most two decimal places
+        try:
+            price = float(price)
+            if round(price, 2) != price:
+                raise ValueError("Price has more than two decimal places")
+        except ValueError as e:
+            return await make_response(jsonify({'error': 'Price must be a valid float with at most two decimal places'}), 400)
+
+        # Call the kitchen_model function to add the combatant to the database
+        app.logger.info('Adding meal: %s, %s, %.2f, %s', meal, cuisine, price, difficulty)
+        await run_db(kitchen_model.create_meal, meal, cuisine, price, difficulty)
+
+        app.logger.info("Combatant added: %s", meal)
+        return await make_response(jsonify({'status': 'combatant added', 'combatant': meal}), 201)
+    except Exception as e:
+        app.logger.error("Failed to add combatant: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
+async def delete_meal(meal_id: int) -> Response:
+    """
+    Route to delete a meal by its ID. This performs a soft delete by marking it as deleted.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal to delete.
+
+    Returns:
+        JSON response indicating success of the operation or error message.
+    """
+    try:
+        app.logger.info(f"Deleting meal by ID: {meal_id}")
+
+        await run_db(kitchen_model.delete_meal, meal_id)
+        return await make_response(jsonify({'status': 'meal deleted'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error deleting meal: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
+async def get_meal_by_id(meal_id: int) -> Response:
+    """
+    Route to get a meal by its ID.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Returns:
+        JSON response with the meal details or error message.
+    """
+    try:
+        app.logger.info(f"Retrieving meal by ID: {meal_id}")
+
+        meal = await run_db(kitchen_model.get_meal_by_id, meal_id)
+        return await make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meal by ID: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-meal-by-name/<string:meal_name>', methods=['GET'])
+async def get_meal_by_name(meal_name: str) -> Response:
+    """
+    Route to get a meal by its name.
+
+    Path Parameter:
+        - meal_name (str): The name of the meal.
+
+    Returns:
+        JSON response with the meal details or error message.
+    """
+    try:
+        app.logger.info(f"Retrieving meal by name: {meal_name}")
+
+        if not meal_name:
+            return await make_response(jsonify({'error': 'Meal name is required'}), 400)
+
+        meal = await run_db(kitchen_model.get_meal_by_name, meal_name)
+        return await make_response(jsonify({'status': 'success', 'meal': meal}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meal by name: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/meal-autocomplete', methods=['GET'])
+async def meal_autocomplete() -> Response:
+    """
+    Route to suggest meal names starting with the given prefix, ignoring case.
+
+    Query Parameters:
+        - q (str): The start of the meal name.
+        - limit (int, optional): The maximum number of suggestions, at most 50. Default is 10.
+
+    Returns:
+        JSON response with the matching meal names in alphabetical order.
+    Raises:
+        400 error if the prefix is missing or the limit is invalid.
+        500 error if there is an issue loading the meal names.
+    """
+    try:
+        prefix = request.args.get('q', '')
+        if not prefix:
+            return await make_response(jsonify({'error': 'Query parameter q is required'}), 400)
+
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return await make_response(jsonify({'error': 'Limit must be an integer'}), 400)
+
+        if not 1 <= limit <= 50:
+            return await make_response(jsonify({'error': 'Limit must be between 1 and 50'}), 400)
+
+        # Only a (re)load touches the database; lookups are in memory and run on the event loop
+        if meal_name_index.is_stale():
+            await run_db(meal_name_index.refresh)
+        meals = meal_name_index.complete(prefix, limit)
+        return await make_response(jsonify({'status': 'success', 'query': prefix, 'meals': meals}), 200)
+    except Exception as e:
+        app.logger.error(f"Error completing meal names: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/meals-by-score', methods=['GET'])
+async def get_meals_by_score() -> Response:
+    """
+    Route to get the meals whose battle score lies in a range, lowest score first.
+
+    Query Parameters:
+        - min (float): The lowest battle score, inclusive.
+        - max (float): The highest battle score, inclusive.
+        - limit (int, optional): The maximum number of meals, at most 1000. Default is 100.
+
+    Returns:
+        JSON response with the meals in the range.
+    Raises:
+        400 error if a bound is missing or invalid, or the limit is invalid.
+        500 error if there is an issue retrieving the meals.
+    """
+    try:
+        try:
+            min_score = float(request.args['min'])
+            max_score = float(request.args['max'])
+        except (KeyError, ValueError):
+            return await make_response(jsonify({'error': 'Query parameters min and max must be numbers'}), 400)
+
+        try:
+            limit = int(request.args.get('limit', kitchen_model.MEALS_BY_SCORE_LIMIT))
+        except ValueError:
+            return await make_response(jsonify({'error': 'Limit must be an integer'}), 400)
+
+        if not 1 <= limit <= 1000:
+            return await make_response(jsonify({'error': 'Limit must be between 1 and 1000'}), 400)
+
+        app.logger.info("Retrieving meals scoring between %s and %s", min_score, max_score)
+        try:
+            meals = await run_db(kitchen_model.get_meals_by_score, min_score, max_score, limit)
+        except ValueError as e:
+            return await make_response(jsonify({'error': str(e)}), 400)
+        return await make_response(jsonify({'status': 'success', 'meals': meals}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meals by score: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Battle
+#
+############################################################
+
+
+def get_arena_id() -> str:
+    """
+    Returns the arena named by the request's 'arena' query parameter, or the default arena.
+    """
+    return request.args.get('arena') or DEFAULT_ARENA
+
+
+@app.route('/api/battle', methods=['GET'])
+async def battle() -> Response:
+    """
+    Route to initiate a battle between the two currently prepared meals.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response indicating the result of the battle and the winner.
+    Raises:
+        400 error if the arena id is invalid.
+        500 error if there is an issue during the battle.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        app.logger.info('Two meals enter, one meal leaves!')
+
+        # Only the database work runs on the executor; the random.org call is awaited on the event loop
+        combatant_1, combatant_2, delta = battle_model.prepare_battle()
+        random_number = await get_random()
+        winner = await run_db(battle_model.resolve_battle, combatant_1, combatant_2, delta, random_number)
+
+        return await make_response(jsonify({'status': 'battle complete', 'winner': winner}), 200)
+    except Exception as e:
+        app.logger.error(f"Battle error: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/battle-jobs', methods=['POST'])
+async def submit_battle_job() -> Response:
+    """
+    Route to queue a battle between the two currently prepared meals, resolved in the background.
+
+    The response is sent as soon as the battle is queued; poll /api/battle-jobs/<job_id> for
+    the winner. Battles queued together share one random.org request and one transaction.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response with the job id and status.
+    Raises:
+        400 error if the arena id is invalid, fewer than two combatants are prepared,
+            or they are already queued for a battle that has not finished.
+        503 error if too many battles are already queued.
+        500 error if there is an issue queuing the battle.
+    """
+    try:
+        arena_id = get_arena_id()
+        battle_model = arenas.get(arena_id)
+
+        job = battle_jobs.submit(battle_model, arena_id)
+
+        return await make_response(jsonify(job.to_dict()), 202)
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except queue.Full:
+        return await make_response(jsonify({'error': 'Too many battles are queued, try again later'}), 503)
+    except Exception as e:
+        app.logger.error(f"Error queuing battle: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/battle-jobs/<job_id>', methods=['GET'])
+async def get_battle_job(job_id: str) -> Response:
+    """
+    Route to get the status of a queued battle and, once it is complete, its winner.
+
+    Path Parameter:
+        - job_id (str): The id returned when the battle was queued.
+
+    Query Parameters:
+        - wait (float, optional): Seconds to wait for the battle to finish before answering,
+          at most BATTLE_JOB_MAX_WAIT. Defaults to 0, answering at once.
+
+    Returns:
+        JSON response with the job's status, and its winner or error once finished.
+    Raises:
+        400 error if 'wait' is not a non-negative number.
+        404 error if the job is unknown or its result has expired.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1
+    if not wait >= 0:
+        return await make_response(jsonify({'error': 'wait must be a non-negative number of seconds'}), 400)
+    wait = min(wait, BATTLE_JOB_MAX_WAIT)
+
+    job = battle_jobs.get(job_id)
+    if job is None:
+        return await make_response(jsonify({'error': f'Battle job {job_id} not found'}), 404)
+
+    if wait and job.finished_at is None:
+        # The worker thread resolves the job's future; waiting on it holds no thread
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), wait)
+        except asyncio.TimeoutError:
+            pass
+
+    return await make_response(jsonify(job.to_dict()), 200)
+
+@app.route('/api/clear-combatants', methods=['POST'])
+async def clear_combatants() -> Response:
+    """
+    Route to clear the list of combatants for the battle.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        400 error if the arena id is invalid.
+        500 error if there is an issue clearing combatants.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        app.logger.info('Clearing all combatants...')
+        battle_model.clear_combatants()
+        app.logger.info('Combatants cleared.')
+        return await make_response(jsonify({'status': 'combatants cleared'}), 200)
+    except Exception as e:
+        app.logger.error("Failed to clear combatants: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-combatants', methods=['GET'])
+async def get_combatants() -> Response:
+    """
+    Route to get the list of combatants for the battle.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response with the list of combatants.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        app.logger.info('Getting combatants...')
+        combatants = battle_model.get_combatants()
+        return await make_response(jsonify({'status': 'success', 'combatants': combatants}), 200)
+    except Exception as e:
+        app.logger.error("Failed to get combatants: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/prep-combatant', methods=['POST'])
+async def prep_combatant() -> Response:
+    """
+    Route to prepare a prep a meal making it a combatant for a battle.
+
+    Parameters:
+        - meal (str): The name of the meal
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response indicating the success of combatant preparation.
+    Raises:
+        400 error if the arena id is invalid.
+        500 error if there is an issue preparing combatants.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        data = await request.get_json()
+        meal = data.get('meal')
+        app.logger.info("Preparing combatant: %s", meal)
+
+        if not meal:
+            return await make_response(jsonify({'error': 'You must name a combatant'}), 400)
+
+        try:
+            meal = await run_db(kitchen_model.get_meal_by_name, meal)
+            battle_model.prep_combatant(meal)
+            combatants = battle_model.get_combatants()
+        except Exception as e:
+            app.logger.error("Failed to prepare combatant: %s", str(e))
+            return await make_response(jsonify({'error': str(e)}), 500)
+        return await make_response(jsonify({'status': 'combatant prepared', 'combatants': combatants}), 200)
+
+    except Exception as e:
+        app.logger.error("Failed to prepare combatants: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/matchmake', methods=['POST'])
+async def matchmake() -> Response:
+    """
+    Route to find the meals whose battle score is closest to a meal's, and prep the meal
+    and its closest opponent as the arena's combatants, replacing any already prepped.
+
+    Parameters:
+        - meal (str): The name of the meal.
+        - k (int, optional): The number of opponents to return, at most 100. Default is 5.
+
+    Query Parameters:
+        - arena (str, optional): The arena. Defaults to the default arena.
+
+    Returns:
+        JSON response with the opponents, closest first, and the prepped combatants.
+    Raises:
+        400 error if the arena id, meal or k is invalid, or no opponent exists.
+        500 error if there is an issue finding opponents.
+    """
+    try:
+        battle_model = arenas.get(get_arena_id())
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+
+    try:
+        data = await request.get_json()
+        meal = data.get('meal')
+        if not meal:
+            return await make_response(jsonify({'error': 'You must name a meal'}), 400)
+
+        k = data.get('k', kitchen_model.NEAREST_MEALS_DEFAULT)
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= 100:
+            return await make_response(jsonify({'error': 'k must be an integer between 1 and 100'}), 400)
+
+        app.logger.info("Matchmaking %s against %d opponents", meal, k)
+        try:
+            meal = await run_db(kitchen_model.get_meal_by_name, meal)
+            opponents = await run_db(kitchen_model.get_nearest_meals, meal, k)
+        except ValueError as e:
+            return await make_response(jsonify({'error': str(e)}), 400)
+        if not opponents:
+            return await make_response(jsonify({'error': f"No opponents available for {meal.meal}"}), 400)
+
+        battle_model.prep_match(meal, opponents[0])
+        combatants = battle_model.get_combatants()
+        return await make_response(jsonify({'status': 'match prepared', 'opponents': opponents, 'combatants': combatants}), 200)
+    except Exception as e:
+        app.logger.error("Failed to matchmake: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Leaderboard
+#
+############################################################
+
+
+@app.route('/api/leaderboard', methods=['GET'])
+async def get_leaderboard() -> Response:
+    """
+    Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
+
+    Query Parameters:
+        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+
+    Returns:
+        JSON response with a sorted leaderboard of meals.
+    Raises:
+        500 error if there is an issue generating the leaderboard.
+    """
+    try:
+        sort_by = request.args.get('sort', 'wins')  # Default sort by wins
+        app.logger.info("Generating leaderboard sorted by %s", sort_by)
+
+        leaderboard_data = await run_db(kitchen_model.get_leaderboard, sort_by)
+
+        return await make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+    except Exception as e:
+        app.logger.error(f"Error generating leaderboard: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/export-leaderboard', methods=['GET'])
+async def export_leaderboard() -> Response:
+    """
+    Route to stream the leaderboard as newline-delimited JSON, one meal per line.
+
+    Meals are read from the database in chunks while the response is sent, so memory use does
+    not grow with the number of meals. An error after the first chunk has been sent ends the
+    stream early.
+
+    Query Parameters:
+        - sort (str): The field to sort by ('wins' or 'win_pct'). Default is 'wins'.
+
+    Returns:
+        NDJSON response streaming the leaderboard.
+    Raises:
+        400 error if the sort field is invalid.
+    """
+    sort_by = request.args.get('sort', 'wins')
+    if sort_by not in ('wins', 'win_pct'):
+        return await make_response(jsonify({'error': f"Invalid sort_by parameter: {sort_by}"}), 400)
+    app.logger.info("Exporting leaderboard sorted by %s", sort_by)
+
+    async def stream_leaderboard():
+        async for meals in iterate_db(kitchen_model.iter_leaderboard, sort_by):
+            yield encode_ndjson(app, meals)
+
+    return Response(stream_leaderboard(), status=200, mimetype='application/x-ndjson')
+
+@app.route('/api/meal-stats', methods=['GET'])
+async def get_meal_stats() -> Response:
+    """
+    Route to get battle statistics aggregated by cuisine or difficulty.
+
+    Query Parameters:
+        - by (str): The grouping ('cuisine' or 'difficulty'). Default is 'cuisine'.
+
+    Returns:
+        JSON response with the battles, wins, win percentage and average price of each group.
+    Raises:
+        400 error if the grouping is invalid.
+        500 error if there is an issue retrieving the statistics.
+    """
+    try:
+        dimension = request.args.get('by', 'cuisine')
+        app.logger.info("Retrieving meal stats by %s", dimension)
+
+        stats = await run_db(kitchen_model.get_meal_stats, dimension)
+
+        return await make_response(jsonify({'status': 'success', 'by': dimension, 'stats': stats}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid meal stats request: {e}")
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meal stats: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Admin
+#
+############################################################
+
+@app.route('/api/admin/sql-stats', methods=['GET'])
+async def get_sql_stats() -> Response:
+    """
+    Route to get per-statement timing statistics and recent slow queries.
+    Statements are only timed on connections opened with tracing enabled (SQL_TRACE=true).
+
+    Query Parameters:
+        - reset (bool, optional): If true, clear the statistics after returning them.
+
+    Returns:
+        JSON response with the statement summary (count, total, average and p95 in ms)
+        and the slow-query log.
+    """
+    try:
+        app.logger.info("Retrieving SQL statement statistics")
+        statements = statement_stats.summary()
+        slow_queries = list(statement_stats.slow_queries)
+
+        if request.args.get('reset', 'false').lower() == 'true':
+            app.logger.info("Resetting SQL statement statistics")
+            statement_stats.reset()
+
+        return await make_response(jsonify({'status': 'success', 'statements': statements, 'slow_queries': slow_queries}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL statistics: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/admin/rebuild-meal-stats', methods=['POST'])
+async def rebuild_meal_stats() -> Response:
+    """
+    Route to recompute the per-cuisine and per-difficulty statistics from the meals table.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue rebuilding the statistics.
+    """
+    try:
+        app.logger.info("Rebuilding meal stats")
+        await run_db(kitchen_model.rebuild_meal_stats)
+        return await make_response(jsonify({'status': 'meal stats rebuilt'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error rebuilding meal stats: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
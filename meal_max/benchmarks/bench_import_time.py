@@ -0,0 +1,53 @@
+"""
+Cold start benchmarks: each round imports a module in a fresh interpreter, as a new container
+or worker process does, under `python -X importtime`.
+
+The benchmark time is the whole interpreter run. extra_info records the cumulative import
+time of the module itself and the modules with the highest self time, to spot which
+dependency a regression comes from.
+"""
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Modules a process imports at startup: the WSGI and ASGI apps, and the models on their own
+# as loadgen and the benchmarks use them
+MODULES = ["app", "asgi_app", "meal_max.models.kitchen_model", "meal_max.models.battle_model"]
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parses `-X importtime` output into {module: (self microseconds, cumulative microseconds)}.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_time(benchmark, tmp_path, module):
+    """Benchmark importing the module in a fresh interpreter."""
+    env = dict(os.environ, DB_PATH=str(tmp_path / "cold_start.db"), PYTHONDONTWRITEBYTECODE="1")
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+
+    def cold_start():
+        return subprocess.run(command, cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+
+    result = benchmark.pedantic(cold_start, rounds=5, iterations=1, warmup_rounds=1)
+
+    times = parse_importtime(result.stderr)
+    heaviest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    benchmark.extra_info["import_ms"] = times[module][1] / 1000
+    benchmark.extra_info["heaviest_modules_ms"] = {name: self_us / 1000 for name, (self_us, _) in heaviest}
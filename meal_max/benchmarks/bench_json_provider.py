@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from meal_max.models.kitchen_model import get_leaderboard
+from meal_max.utils import json_provider
+from meal_max.utils.json_provider import FastJSONProvider
+
+
+@pytest.fixture(params=["default", "fast", "fast_stdlib"])
+def json_app(request, mocker):
+    """Fixture providing an app with Flask's default provider, FastJSONProvider, or FastJSONProvider without orjson."""
+    app = Flask(__name__)
+    if request.param == "default":
+        app.json = DefaultJSONProvider(app)
+    else:
+        app.json = FastJSONProvider(app)
+    if request.param == "fast_stdlib":
+        mocker.patch.object(json_provider, "orjson", None)
+    return app
+
+
+def test_leaderboard_response(benchmark, meals_db, json_app):
+    """Benchmark encoding the /api/leaderboard response."""
+    leaderboard = get_leaderboard("wins")
+    with json_app.app_context():
+        response = benchmark(json_app.json.response, {'status': 'success', 'leaderboard': leaderboard})
+    assert response.status_code == 200
@@ -0,0 +1,77 @@
+import random
+import sqlite3
+import time
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from meal_max.models.kitchen_model import (
+    get_leaderboard, get_meal_by_id, get_meal_stats, get_meals_by_score, get_nearest_meals, iter_leaderboard, update_meal_stats
+)
+
+
+@pytest.mark.parametrize("sort_by", ["wins", "win_pct"])
+def test_get_leaderboard(benchmark, meals_db, sort_by):
+    """Benchmark building the leaderboard."""
+    leaderboard = benchmark(get_leaderboard, sort_by)
+    assert leaderboard
+
+@pytest.mark.parametrize("streamed", [False, True], ids=["list", "streamed"])
+def test_leaderboard_memory(benchmark, meals_db, streamed):
+    """Benchmark reading the whole leaderboard as a list or streamed, recording the peak memory and the time to the first meal."""
+    load = (lambda: iter_leaderboard("wins")) if streamed else (lambda: get_leaderboard("wins"))
+
+    tracemalloc.start()
+    for _ in load():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_bytes"] = peak
+
+    start = time.perf_counter()
+    next(iter(load()))
+    benchmark.extra_info["first_meal_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    benchmark(lambda: sum(1 for _ in load()))
+
+@pytest.mark.parametrize("dimension", ["cuisine", "difficulty"])
+def test_get_meal_stats(benchmark, meals_db, dimension):
+    """Benchmark reading the trigger-maintained per-group statistics."""
+    stats = benchmark(get_meal_stats, dimension)
+    assert stats
+
+@pytest.mark.parametrize("width", [1, 10])
+def test_get_meals_by_score(benchmark, meals_db, width):
+    """Benchmark finding the meals within 'width' points of a random score, through the battle score index."""
+    rng = random.Random(0)
+
+    def meals_near_score():
+        score = rng.uniform(0, 400)
+        return get_meals_by_score(score - width, score + width)
+
+    meals = benchmark(meals_near_score)
+    assert isinstance(meals, list)
+
+@pytest.mark.parametrize("k", [1, 10])
+def test_get_nearest_meals(benchmark, meals_db, k):
+    """Benchmark matchmaking: finding the k live meals scoring closest to a live meal."""
+    conn = sqlite3.connect(meals_db)
+    live_ids = [row[0] for row in conn.execute("SELECT id FROM meals WHERE deleted = FALSE LIMIT 1000")]
+    conn.close()
+    meals = [get_meal_by_id(meal_id) for meal_id in live_ids]
+    rng = random.Random(0)
+
+    opponents = benchmark(lambda: get_nearest_meals(rng.choice(meals), k))
+    assert len(opponents) == k
+
+@pytest.mark.parametrize("result", ["win", "loss"])
+def test_update_meal_stats(benchmark, writable_meals_db, result):
+    """Benchmark recording a battle result for live meals."""
+    conn = sqlite3.connect(writable_meals_db)
+    live_ids = [row[0] for row in conn.execute("SELECT id FROM meals WHERE deleted = FALSE")]
+    conn.close()
+    rng = random.Random(0)
+
+    benchmark(lambda: update_meal_stats(rng.choice(live_ids), result))
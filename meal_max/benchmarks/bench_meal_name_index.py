@@ -0,0 +1,37 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from meal_max.models.meal_name_index import MealNameIndex
+
+
+def test_meal_name_index_load(benchmark, meals_db):
+    """Benchmark loading the names of all live meals into the index."""
+    index = MealNameIndex()
+    benchmark(index.refresh)
+    index.close()
+
+@pytest.mark.parametrize("probe", ["common", "last", "short"])
+def test_meal_name_index_complete(benchmark, meals_db, meals_rows, probe):
+    """Benchmark a prefix lookup against the loaded index: a prefix shared by a few early meals,
+    one shared by the last meals generated, and a single letter matching them all."""
+    prefix = {"common": "meal 12", "last": f"meal {(meals_rows - 1) // 10}", "short": "m"}[probe]
+    index = MealNameIndex()
+    index.refresh()
+    names = benchmark(index.complete, prefix, 10)
+    index.close()
+    assert names
+
+def test_meal_name_like_query(benchmark, meals_db):
+    """Benchmark the equivalent LIKE prefix query, as a baseline for the index."""
+    conn = sqlite3.connect(meals_db)
+
+    def like():
+        return conn.execute(
+            "SELECT meal FROM meals WHERE deleted = FALSE AND meal LIKE ? ORDER BY meal LIMIT 10", ("meal 12%",)
+        ).fetchall()
+
+    assert benchmark(like)
+    conn.close()
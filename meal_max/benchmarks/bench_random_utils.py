@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from meal_max.utils import random_utils
+
+
+def test_get_random(benchmark, random_org):
+    """Benchmark one random.org draw against the stand-in, over the pooled session."""
+    number = benchmark(random_utils.get_random)
+    assert 0 <= number <= 1
+
+def test_get_random_burst(benchmark, random_org):
+    """Benchmark 50 concurrent draws, as during a burst of battles."""
+    with ThreadPoolExecutor(max_workers=random_utils.RANDOM_ORG_POOL_SIZE) as executor:
+        numbers = benchmark(lambda: list(executor.map(lambda _: random_utils.get_random(), range(50))))
+    assert len(numbers) == 50
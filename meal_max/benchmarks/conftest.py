@@ -0,0 +1,130 @@
+"""
+Fixtures for the kitchen_model micro-benchmarks.
+
+The benchmarks run against real SQLite databases generated from sql/create_meal_table.sql,
+so they measure actual query cost rather than mocked connections. They need pytest-benchmark
+and are not collected by a plain `pytest` run; run them explicitly:
+
+    python -m pytest benchmarks/bench_*.py --benchmark-json=bench_results.json
+
+and compare runs across commits with --benchmark-autosave / --benchmark-compare.
+
+Environment:
+    BENCH_SIZES: Comma-separated meal table sizes in rows. Defaults to 10000,100000,1000000.
+    BENCH_DB_DIR: Directory in which generated databases are cached between runs.
+        Defaults to a pytest temporary directory.
+    BENCH_RANDOM_ORG_LATENCY: Semicolon-separated latency specs of the local random.org stand-in
+        (see random_org_standin.parse_latency). Defaults to fixed:0;lognormal:80,0.5.
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+import random
+import shutil
+import sqlite3
+
+import pytest
+
+from meal_max.utils import random_utils
+from meal_max.utils.circuit_breaker import CircuitBreaker
+from meal_max.utils.random_org_standin import RandomOrgStandIn, StandInConfig
+
+
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "10000,100000,1000000").split(",")]
+
+RANDOM_ORG_LATENCIES = os.getenv("BENCH_RANDOM_ORG_LATENCY", "fixed:0;lognormal:80,0.5").split(";")
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_meal_table.sql"
+CUISINES = ["Italian", "Chinese", "Mexican", "Indian", "French", "Japanese", "Thai", "Greek"]
+
+
+def generate_meals(db_path: Path, rows: int, seed: int = 411) -> None:
+    """
+    Creates a meals table with the given number of synthetic rows.
+
+    Args:
+        db_path (Path): Where to create the database.
+        rows (int): The number of meals to insert.
+        seed (int): The random seed, so every run benchmarks the same data.
+    """
+    rng = random.Random(seed)
+
+    def meal_rows():
+        for i in range(rows):
+            battles = rng.randint(0, 200)
+            yield (
+                f"Meal {i}",
+                rng.choice(CUISINES),
+                round(rng.uniform(5, 50), 2),
+                rng.choice(["HIGH", "MED", "LOW"]),
+                battles,
+                rng.randint(0, battles),
+                rng.random() < 0.02,
+            )
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.executemany(
+            "INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins, deleted) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            meal_rows(),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logging():
+    """Silence INFO logging so the benchmarks measure query cost rather than log I/O."""
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}_rows")
+def meals_rows(request) -> int:
+    """Fixture providing the number of meals in the generated database, one of BENCH_SIZES."""
+    return request.param
+
+@pytest.fixture(scope="session")
+def meals_path(meals_rows, tmp_path_factory) -> Path:
+    """Fixture providing the path of a generated meals database, once per size per session."""
+    rows = meals_rows
+    cache_dir = os.getenv("BENCH_DB_DIR")
+    db_dir = Path(cache_dir) if cache_dir else tmp_path_factory.mktemp("meals")
+    db_dir.mkdir(parents=True, exist_ok=True)
+    # Keyed by the schema too, so a cached database is regenerated when the schema changes
+    schema_digest = hashlib.sha1(SCHEMA_PATH.read_bytes()).hexdigest()[:8]
+    db_path = db_dir / f"meal_max_{rows}_{schema_digest}.db"
+    if not db_path.exists():
+        generate_meals(db_path, rows)
+    return db_path
+
+@pytest.fixture
+def meals_db(meals_path, mocker) -> Path:
+    """Fixture pointing kitchen_model at a generated meals database."""
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(meals_path))
+    return meals_path
+
+@pytest.fixture
+def writable_meals_db(meals_path, tmp_path, mocker) -> Path:
+    """Fixture pointing kitchen_model at a fresh copy of a generated meals database, for benchmarks that write."""
+    db_path = tmp_path / meals_path.name
+    shutil.copyfile(meals_path, db_path)
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture(scope="session")
+def random_org_standin():
+    """Fixture running the local random.org stand-in for the whole session."""
+    with RandomOrgStandIn() as standin:
+        yield standin
+
+@pytest.fixture(params=RANDOM_ORG_LATENCIES)
+def random_org(request, random_org_standin, mocker) -> RandomOrgStandIn:
+    """Fixture pointing random_utils at the stand-in, once per configured latency."""
+    random_org_standin.config = StandInConfig(latency=request.param, seed=411)
+    mocker.patch.object(random_utils, "RANDOM_ORG_BASE_URL", random_org_standin.base_url)
+    mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org"))
+    return random_org_standin
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for the pre-fork serving mode (SERVER_MODE=prefork in entrypoint.sh).
+
+Each worker is a separate process with its own copy of the app, so app.py switches the
+in-flight state to the shared state database when SERVER_MODE is prefork.
+"""
+import multiprocessing
+import os
+
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("WEB_THREADS", "4"))
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+
+# Keep-alive lets load balancers and clients reuse connections between requests
+keepalive = 5
+
+# Workers import the app after forking, so no SQLite connection is shared across processes
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,282 @@
+"""
+Concurrent HTTP load generator replaying meal battle scenarios against the meal_max API.
+
+By default it starts the app locally on a fresh database, with random.org replaced by the local
+stand-in in meal_max.utils.random_org_standin, and runs the scenario from several workers at once.
+The --random-org-* options make the stand-in slow or failing, and --battle-jobs battles through
+the background job queue instead of /battle. Point --base-url at an already running API to load
+test that instead.
+
+Usage:
+    python loadgen.py --concurrency 16 --iterations 50
+    python loadgen.py --concurrency 32 --rate 200 --duration 60 --json results.json
+    python loadgen.py --concurrency 64 --iterations 20 --battle-jobs --random-org-latency fixed:200
+    python loadgen.py --base-url http://localhost:5000/api --concurrency 8
+"""
+import argparse
+from collections import defaultdict
+import json
+import math
+import os
+from pathlib import Path
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from meal_max.utils.random_org_standin import RandomOrgStandIn, StandInConfig
+
+
+APP_DIR = Path(__file__).resolve().parent
+SCHEMA_PATH = APP_DIR / "sql" / "create_meal_table.sql"
+
+
+############################################################
+#
+# Local app
+#
+############################################################
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_app(db_path: str, random_org_url: str) -> tuple:
+    """
+    Creates a fresh database and starts the app on a free port.
+
+    Returns:
+        tuple: The app process and the API base URL.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+
+    port = free_port()
+    env = dict(os.environ, DB_PATH=db_path, RANDOM_ORG_BASE_URL=random_org_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads", "--no-reload"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.exceptions.ConnectionError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The app did not become healthy")
+
+
+############################################################
+#
+# Load generation
+#
+############################################################
+
+class RateLimiter:
+    """Spaces requests evenly across all workers to hold a global rate (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Recorder:
+    """Collects per-endpoint latencies and errors from all workers."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> dict:
+        def percentile(samples, p):
+            return samples[max(math.ceil(len(samples) * p / 100) - 1, 0)]
+
+        endpoints = {}
+        with self._lock:
+            for endpoint, samples in sorted(self.latencies.items()):
+                samples = sorted(samples)
+                endpoints[endpoint] = {
+                    'requests': len(samples),
+                    'errors': self.errors[endpoint],
+                    'throughput_rps': round(len(samples) / elapsed, 2),
+                    'p50_ms': round(percentile(samples, 50) * 1000, 2),
+                    'p95_ms': round(percentile(samples, 95) * 1000, 2),
+                    'p99_ms': round(percentile(samples, 99) * 1000, 2),
+                }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+            'throughput_rps': round(total / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+
+class Client:
+    """A worker's keep-alive HTTP session that records every call."""
+
+    def __init__(self, base_url: str, recorder: Recorder, limiter: RateLimiter):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.limiter = limiter
+        self.session = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        self.limiter.wait()
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=30, **kwargs)
+            ok = response.ok
+            body = response.json() if ok else None
+        except (requests.exceptions.RequestException, ValueError):
+            ok, body = False, None
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return body
+
+
+def run_scenario(client: Client, worker: int, iteration: int, battle_jobs: bool = False) -> None:
+    """
+    Creates two meals unique to this worker and iteration, preps them and battles them
+    in the worker's own arena, so concurrent workers do not share combatants. With
+    'battle_jobs', the battle is queued and its result long-polled.
+    """
+    tag = f"w{worker}i{iteration}"
+    arena = {'arena': f"w{worker}"}
+    meals = [
+        {'meal': f"Spaghetti {tag}", 'cuisine': "Italian", 'price': 12.5, 'difficulty': "MED"},
+        {'meal': f"Dumplings {tag}", 'cuisine': "Chinese", 'price': 9.99, 'difficulty': "HIGH"},
+    ]
+
+    for meal in meals:
+        client.call("POST /create-meal", "POST", "/create-meal", json=meal)
+    meal = client.call("GET /get-meal-by-name/<name>", "GET", f"/get-meal-by-name/{meals[0]['meal']}")
+    if meal:
+        client.call("GET /get-meal-by-id/<id>", "GET", f"/get-meal-by-id/{meal['meal']['id']}")
+
+    client.call("POST /clear-combatants", "POST", "/clear-combatants", params=arena)
+    for meal in meals:
+        client.call("POST /prep-combatant", "POST", "/prep-combatant", params=arena, json={'meal': meal['meal']})
+    client.call("GET /get-combatants", "GET", "/get-combatants", params=arena)
+    if battle_jobs:
+        job = client.call("POST /battle-jobs", "POST", "/battle-jobs", params=arena)
+        if job:
+            client.call("GET /battle-jobs/<id>", "GET", f"/battle-jobs/{job['job_id']}", params={'wait': 10})
+    else:
+        client.call("GET /battle", "GET", "/battle", params=arena)
+    client.call("GET /leaderboard", "GET", "/leaderboard", params={'sort': random.choice(["wins", "win_pct"])})
+
+
+def generate_load(base_url: str, concurrency: int, rate: float, iterations: int, duration: float, battle_jobs: bool = False) -> dict:
+    """
+    Runs the scenario from 'concurrency' workers until each has done 'iterations'
+    iterations or 'duration' seconds have passed, whichever comes first.
+
+    Returns:
+        dict: The throughput and per-endpoint latency report.
+    """
+    recorder = Recorder()
+    limiter = RateLimiter(rate)
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(worker_id: int):
+        client = Client(base_url, recorder, limiter)
+        iteration = 0
+        while (not iterations or iteration < iterations) and (deadline is None or time.monotonic() < deadline):
+            run_scenario(client, worker_id, iteration, battle_jobs)
+            iteration += 1
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.monotonic() - start)
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors")
+    print(f"{'endpoint':48} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:48} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="API base URL of a running app; if omitted the app is started locally")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of concurrent workers")
+    parser.add_argument("--rate", type=float, default=0, help="global request rate limit in req/s (0 = unlimited)")
+    parser.add_argument("--iterations", type=int, default=20, help="scenario iterations per worker (0 = until --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    parser.add_argument("--random-org-latency", default="fixed:0", help="latency of the local random.org stand-in, e.g. lognormal:80,0.5")
+    parser.add_argument("--random-org-error-rate", type=float, default=0.0, help="share of stand-in requests answered with 503")
+    parser.add_argument("--battle-jobs", action="store_true", help="queue battles with /battle-jobs and long-poll their results")
+    parser.add_argument("--random-org-quota", type=int, help="stand-in requests served before it answers 503 for exhausted quota")
+    args = parser.parse_args()
+
+    if not args.iterations and not args.duration:
+        parser.error("one of --iterations or --duration must be non-zero")
+
+    process = stub = None
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            stub = RandomOrgStandIn(StandInConfig(
+                latency=args.random_org_latency, error_rate=args.random_org_error_rate, quota=args.random_org_quota
+            )).start()
+            db_path = os.path.join(tempfile.mkdtemp(prefix="loadgen_"), "meal_max.db")
+            process, base_url = start_app(db_path, stub.base_url)
+
+        report = generate_load(base_url, args.concurrency, args.rate, args.iterations, args.duration, args.battle_jobs)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if stub is not None:
+            stub.stop()
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
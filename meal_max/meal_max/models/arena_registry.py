@@ -0,0 +1,160 @@
+from collections import OrderedDict
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("battle_arenas_evicted_total", "counter", "Battle arenas dropped from the registry, by reason.")
+
+
+# The arena used by requests that do not name one, so single-operator clients keep working unchanged
+DEFAULT_ARENA = "default"
+
+# Arenas unused for this many seconds are dropped with their combatants
+ARENA_IDLE_TIMEOUT = float(os.getenv("ARENA_IDLE_TIMEOUT", "1800"))
+
+# Past this many arenas the least recently used one is dropped
+ARENA_MAX_COUNT = int(os.getenv("ARENA_MAX_COUNT", "10000"))
+
+ARENA_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def validate_arena_id(arena_id: str) -> str:
+    """ Checks that an arena id is 1 to 64 letters, digits, '-' or '_'.
+
+        Args:
+            arena_id (str): The arena id from the request.
+        Returns:
+            str: The arena id.
+        Raises:
+            ValueError: If the arena id is invalid.
+    """
+    if not isinstance(arena_id, str) or not ARENA_ID_PATTERN.fullmatch(arena_id):
+        logger.error("Invalid arena id: %s", arena_id)
+        raise ValueError(f"Invalid arena id: {arena_id}. Must be 1 to 64 letters, digits, '-' or '_'.")
+    return arena_id
+
+
+class ArenaRegistry:
+    """ Battle models keyed by arena id, so independent battles can be prepped and run at once.
+
+        An arena's model is created by the factory on first use. Arenas are kept in least
+        recently used order: each lookup drops the arenas idle for longer than idle_timeout,
+        and creating an arena beyond max_arenas drops the least recently used one. The default
+        arena is never dropped, since requests that do not name an arena expect it to last. Dropping
+        an arena discards its combatants, which is cheap to redo, and calls on_evict so state
+        kept outside the process can be discarded too.
+
+        Attributes:
+            factory (Callable[[str], BattleModel]): Creates the model of an arena from its id.
+            on_evict (Callable[[str, BattleModel], None], optional): Called with the id and model
+                of each dropped arena, outside the registry lock. Errors are logged and ignored.
+            idle_timeout (float): Seconds after which an unused arena is dropped.
+            max_arenas (int): The maximum number of arenas kept.
+    """
+
+    def __init__(self, factory: Optional[Callable[[str], BattleModel]] = None,
+                 idle_timeout: Optional[float] = None, max_arenas: Optional[int] = None,
+                 on_evict: Optional[Callable[[str, BattleModel], None]] = None):
+        self.factory = factory or (lambda arena_id: BattleModel())
+        self.on_evict = on_evict
+        self.idle_timeout = ARENA_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.max_arenas = ARENA_MAX_COUNT if max_arenas is None else max_arenas
+        self._lock = threading.Lock()
+        # arena id -> [model, last used]; least recently used first
+        self._arenas: "OrderedDict[str, list]" = OrderedDict()
+
+    def get(self, arena_id: str = DEFAULT_ARENA) -> BattleModel:
+        """ Returns the model of an arena, creating it if needed.
+
+            Args:
+                arena_id (str): The arena id. Defaults to DEFAULT_ARENA.
+            Returns:
+                BattleModel: The arena's model.
+            Raises:
+                ValueError: If the arena id is invalid.
+        """
+        validate_arena_id(arena_id)
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._evict_idle(now)
+
+            entry = self._arenas.get(arena_id)
+            if entry is not None:
+                entry[1] = now
+                self._arenas.move_to_end(arena_id)
+                model = entry[0]
+            else:
+                evicted_id = next((id_ for id_ in self._arenas if id_ != DEFAULT_ARENA), None)
+                if len(self._arenas) >= self.max_arenas and evicted_id is not None:
+                    evicted_model, _ = self._arenas.pop(evicted_id)
+                    evicted.append((evicted_id, evicted_model))
+                    metrics.inc("battle_arenas_evicted_total", reason="capacity")
+                    logger.warning("Arena limit of %d reached, dropped least recently used arena %s", self.max_arenas, evicted_id)
+
+                model = self.factory(arena_id)
+                self._arenas[arena_id] = [model, now]
+                logger.info("Opened arena %s", arena_id)
+
+        self._notify_evicted(evicted)
+        return model
+
+    def _evict_idle(self, now: float) -> List[Tuple[str, BattleModel]]:
+        """ Drops the arenas idle for longer than idle_timeout and returns them. Must be called with the lock held.
+        """
+        evicted = []
+        for arena_id, (model, last_used) in list(self._arenas.items()):
+            if arena_id == DEFAULT_ARENA:
+                continue
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._arenas[arena_id]
+            evicted.append((arena_id, model))
+            metrics.inc("battle_arenas_evicted_total", reason="idle")
+            logger.info("Dropped arena %s after %.0f idle seconds", arena_id, now - last_used)
+        return evicted
+
+    def _notify_evicted(self, evicted: List[Tuple[str, BattleModel]]) -> None:
+        """ Calls on_evict for each dropped arena. Must be called without the lock held.
+        """
+        if self.on_evict is None:
+            return
+        for arena_id, model in evicted:
+            try:
+                self.on_evict(arena_id, model)
+            except Exception as e:
+                logger.error("Could not discard the state of dropped arena %s: %s", arena_id, str(e))
+
+    def close(self, arena_id: str) -> bool:
+        """ Drops an arena and its combatants.
+
+            Args:
+                arena_id (str): The arena id.
+            Returns:
+                bool: Whether the arena existed.
+        """
+        with self._lock:
+            entry = self._arenas.pop(arena_id, None)
+        if entry is None:
+            return False
+        self._notify_evicted([(arena_id, entry[0])])
+        return True
+
+    def __len__(self) -> int:
+        return len(self._arenas)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Returns the number of open arenas and the limit, for monitoring.
+        """
+        count = len(self._arenas)
+        return {'open': count, 'max': self.max_arenas, 'saturation': round(count / self.max_arenas, 3)}
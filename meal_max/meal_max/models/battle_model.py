@@ -1,13 +1,22 @@
+from dataclasses import asdict
 import logging
-from typing import List
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from meal_max.models.kitchen_model import Meal, update_meal_stats
-from meal_max.utils.logger import configure_logger
+from meal_max.utils.logger import LOG_SAMPLE_LIMIT, configure_logger
 from meal_max.utils.random_utils import get_random
+from meal_max.utils.shared_state import SharedStateStore, shared_method
 
 
 logger = logging.getLogger(__name__)
-configure_logger(logger)
+configure_logger(logger, sample_limit=LOG_SAMPLE_LIMIT)
+
+
+# Seconds after which combatants reserved for a battle job count as released, in case the process
+# running the job died before releasing them; must exceed the time a job waits in the queue and runs
+BATTLE_CLAIM_LEASE = float(os.getenv("BATTLE_CLAIM_LEASE", "300"))
 
 
 class BattleModel:
@@ -15,12 +24,16 @@ class BattleModel:
 
         Attributes: 
             combatants (List[Meal]): List of meals ready to participate in a battle.
+            claimed_by (str, optional): The queued battle job the combatants are reserved for.
+            claimed_at (float, optional): The time.time() of the reservation, which lapses after BATTLE_CLAIM_LEASE seconds.
     """
 
     def __init__(self):
         """ Initializes the BattleModel with an ampty combatants list.
         """
         self.combatants: List[Meal] = []
+        self.claimed_by: Optional[str] = None
+        self.claimed_at: Optional[float] = None
 
     def battle(self) -> str:
         """Conducts a battle between two meals and returns the winner's name.
@@ -32,10 +45,33 @@ class BattleModel:
         """
         logger.info("Two meals enter, one meal leaves!")
 
+        combatant_1, combatant_2, delta = self.prepare_battle()
+
+        # Get random number from random.org
+        random_number = get_random()
+
+        return self.resolve_battle(combatant_1, combatant_2, delta, random_number)
+
+    def prepare_battle(self) -> Tuple[Meal, Meal, float]:
+        """Scores the two current combatants ahead of a battle.
+
+            Returns:
+                Tuple[Meal, Meal, float]: Both combatants and the normalized delta between their scores.
+            Raises:
+                ValueError: If fewer than two combatants are available for battle,
+                    or they are reserved for a queued battle.
+        """
         if len(self.combatants) < 2:
             logger.error("Not enough combatants to start a battle.")
             raise ValueError("Two combatants must be prepped for a battle.")
 
+        if self.claimed_by is not None:
+            if time.time() - (self.claimed_at or 0) < BATTLE_CLAIM_LEASE:
+                logger.error("The combatants are already queued for battle job %s.", self.claimed_by)
+                raise ValueError("The combatants are already queued for a battle.")
+            logger.warning("The reservation of battle job %s has lapsed, releasing the combatants.", self.claimed_by)
+            self.claimed_by = self.claimed_at = None
+
         combatant_1 = self.combatants[0]
         combatant_2 = self.combatants[1]
 
@@ -56,9 +92,51 @@ class BattleModel:
         # Log the delta and normalized delta
         logger.info("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
-        random_number = get_random()
+        return combatant_1, combatant_2, delta
+
+    def claim_battle(self, job_id: str) -> Tuple[Meal, Meal, float]:
+        """Prepares a battle for a battle job and reserves the combatants for it, so the
+            same pair cannot battle again until the job releases them.
 
+            Args:
+                job_id (str): The battle job the combatants are reserved for.
+            Returns:
+                Tuple[Meal, Meal, float]: Both combatants and the normalized delta between their scores.
+            Raises:
+                ValueError: If fewer than two combatants are available for battle,
+                    or they are already reserved.
+        """
+        combatant_1, combatant_2, delta = self.prepare_battle()
+        self.claimed_by = job_id
+        self.claimed_at = time.time()
+        return combatant_1, combatant_2, delta
+
+    def release_battle(self, job_id: str, loser: Optional[Meal] = None) -> None:
+        """Releases the combatants reserved for a battle job and removes its loser, if any.
+
+            Nothing changes if the combatants were cleared or replaced since the job claimed them.
+
+            Args:
+                job_id (str): The battle job that claimed the combatants.
+                loser (Meal, optional): The losing combatant, if the battle was decided.
+        """
+        if self.claimed_by != job_id:
+            return
+        self.claimed_by = self.claimed_at = None
+        if loser is not None:
+            self.remove_loser(loser)
+
+    def pick_winner(self, combatant_1: Meal, combatant_2: Meal, delta: float, random_number: float) -> Tuple[Meal, Meal]:
+        """Decides a prepared battle with the given random number, without recording it.
+
+            Args:
+                combatant_1 (Meal): The first combatant, as returned by prepare_battle.
+                combatant_2 (Meal): The second combatant, as returned by prepare_battle.
+                delta (float): The normalized score delta, as returned by prepare_battle.
+                random_number (float): A random number between 0 and 1.
+            Returns:
+                Tuple[Meal, Meal]: The winner and the loser.
+        """
         # Log the random number
         logger.info("Random number from random.org: %.3f", random_number)
 
@@ -73,12 +151,36 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
+        return winner, loser
+
+    def remove_loser(self, loser: Meal) -> None:
+        """Removes the loser of a battle from the combatants, unless it was cleared meanwhile.
+
+            Args:
+                loser (Meal): The losing combatant, as returned by pick_winner.
+        """
+        if loser in self.combatants:
+            self.combatants.remove(loser)
+
+    def resolve_battle(self, combatant_1: Meal, combatant_2: Meal, delta: float, random_number: float) -> str:
+        """Decides a prepared battle with the given random number, records the result
+            and removes the loser from the combatants.
+
+            Args:
+                combatant_1 (Meal): The first combatant, as returned by prepare_battle.
+                combatant_2 (Meal): The second combatant, as returned by prepare_battle.
+                delta (float): The normalized score delta, as returned by prepare_battle.
+                random_number (float): A random number between 0 and 1.
+            Returns:
+                str: The name of the meal that won the battle.
+        """
+        winner, loser = self.pick_winner(combatant_1, combatant_2, delta, random_number)
+
         # Update stats for both combatants
         update_meal_stats(winner.id, 'win')
         update_meal_stats(loser.id, 'loss')
 
-        # Remove the losing combatant from combatants
-        self.combatants.remove(loser)
+        self.remove_loser(loser)
 
         return winner.meal
 
@@ -87,25 +189,34 @@ class BattleModel:
         """
         logger.info("Clearing the combatants list.")
         self.combatants.clear()
+        self.claimed_by = self.claimed_at = None
 
-    def get_battle_score(self, combatant: Meal) -> float:
-        """ Calculates the score of a combatant based on its attributes.
+    def prep_match(self, combatant_1: Meal, combatant_2: Meal) -> None:
+        """ Replaces the combatants with the two given meals, as matchmaking does.
 
             Args:
-                combatant (Meal): The meal for which to calculate the score.
-            Returns:
-                float: The calculated score of the given combatant.
+                combatant_1 (Meal): The first combatant.
+                combatant_2 (Meal): The second combatant.
         """
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
+        logger.info("Matching %s against %s", combatant_1.meal, combatant_2.meal)
+        self.combatants[:] = [combatant_1, combatant_2]
+        self.claimed_by = self.claimed_at = None
 
-        # Log the calculation process
-        logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
-                    combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
+    def get_battle_score(self, combatant: Meal) -> float:
+        """ Returns the score of a combatant: its price times the length of its cuisine,
+            minus a modifier for its difficulty.
 
-        # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
+            Meals loaded from the database carry the score stored in the meals table,
+            so it is not recomputed every battle.
 
-        # Log the calculated score
+            Args:
+                combatant (Meal): The meal whose score to return.
+            Returns:
+                float: The score of the given combatant.
+        """
+        score = combatant.battle_score
+
+        # Log the score
         logger.info("Battle score for %s: %.3f", combatant.meal, score)
 
         return score
@@ -138,3 +249,51 @@ class BattleModel:
 
         # Log the current state of combatants
         logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
+
+
+class SharedBattleModel(BattleModel):
+    """ A BattleModel whose combatants live in a SharedStateStore, so that every worker
+        process of a pre-fork server battles the same combatants.
+
+        Preparing and resolving a battle are separate transactions, so the shared state
+        is not locked while waiting on random.org.
+
+        Attributes:
+            store (SharedStateStore): The store holding the combatants.
+    """
+
+    def __init__(self, store: Optional[SharedStateStore] = None):
+        """ Initializes the SharedBattleModel on the given store, or on the default shared state database.
+        """
+        super().__init__()
+        self.store = store or SharedStateStore("battle")
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """ Replaces the combatants with the shared state.
+
+            The combatants were loaded from the meals table, so they are rebuilt as from its rows,
+            keeping their stored battle scores.
+        """
+        self.combatants = [
+            Meal.from_row((meal["id"], meal["meal"], meal["cuisine"], meal["price"], meal["difficulty"], meal["battle_score"]))
+            for meal in state.get("combatants", [])
+        ]
+        self.claimed_by = state.get("claimed_by")
+        self.claimed_at = state.get("claimed_at")
+
+    def save_state(self, state: Dict[str, Any]) -> None:
+        """ Writes the combatants into the shared state.
+        """
+        state["combatants"] = [dict(asdict(meal), battle_score=meal.battle_score) for meal in self.combatants]
+        state["claimed_by"] = self.claimed_by
+        state["claimed_at"] = self.claimed_at
+
+    prepare_battle = shared_method(write=False)(BattleModel.prepare_battle)
+    resolve_battle = shared_method()(BattleModel.resolve_battle)
+    remove_loser = shared_method()(BattleModel.remove_loser)
+    claim_battle = shared_method()(BattleModel.claim_battle)
+    release_battle = shared_method()(BattleModel.release_battle)
+    clear_combatants = shared_method()(BattleModel.clear_combatants)
+    get_combatants = shared_method(write=False)(BattleModel.get_combatants)
+    prep_combatant = shared_method()(BattleModel.prep_combatant)
+    prep_match = shared_method()(BattleModel.prep_match)
@@ -0,0 +1,324 @@
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import uuid
+
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
+from meal_max.utils import random_utils
+from meal_max.utils.shared_state import SharedStateStore
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("battle_jobs_total", "counter", "Battle jobs by outcome: complete, failed or rejected.")
+metrics.describe("battle_job_batches_total", "counter", "Batches of battle jobs resolved with one entropy fetch.")
+metrics.describe("battle_job_seconds", "histogram", "Time from submitting a battle job to its result.")
+
+
+# Threads resolving battle jobs; each fetches entropy and writes results for a batch at a time
+BATTLE_JOB_WORKERS = int(os.getenv("BATTLE_JOB_WORKERS", "2"))
+
+# Jobs waiting for a worker before submissions are rejected
+BATTLE_JOB_QUEUE_SIZE = int(os.getenv("BATTLE_JOB_QUEUE_SIZE", "1000"))
+
+# The most jobs a worker resolves with one random.org request and one transaction
+BATTLE_JOB_BATCH_SIZE = int(os.getenv("BATTLE_JOB_BATCH_SIZE", "50"))
+
+# Seconds a finished job's result can still be polled
+BATTLE_JOB_RESULT_TTL = float(os.getenv("BATTLE_JOB_RESULT_TTL", "300"))
+
+# The longest a poll may wait for a job to finish
+BATTLE_JOB_MAX_WAIT = float(os.getenv("BATTLE_JOB_MAX_WAIT", "30"))
+
+# Seconds between reads of the shared state while waiting on a job another worker accepted
+BATTLE_JOB_POLL_INTERVAL = float(os.getenv("BATTLE_JOB_POLL_INTERVAL", "0.1"))
+
+
+class BattleJob:
+    """ A battle prepared in an arena and waiting to be resolved by a worker.
+
+        Attributes:
+            id (str): The job id.
+            arena (str): The arena the battle was prepared in.
+            status (str): 'queued', 'running', 'complete' or 'failed'.
+            winner (str, optional): The winning meal once complete.
+            error (str, optional): Why the battle failed.
+            future (Future): Resolves to the job once it is complete or failed.
+    """
+
+    def __init__(self, job_id: str, arena: str, battle_model: BattleModel, combatant_1: Meal, combatant_2: Meal, delta: float):
+        self.id = job_id
+        self.arena = arena
+        self.battle_model = battle_model
+        self.combatants = (combatant_1, combatant_2)
+        self.delta = delta
+        self.status = "queued"
+        self.winner: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ Returns the job's status and, once finished, its winner or error.
+        """
+        job = {'job_id': self.id, 'arena': self.arena, 'status': self.status}
+        if self.winner is not None:
+            job['winner'] = self.winner
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+
+class BattleJobQueue:
+    """ Resolves battles in the background, so submitting one does not wait on random.org.
+
+        Submitting prepares the battle at once, so a battle without two combatants is rejected
+        immediately, reserves the combatants for the job until it finishes, and queues it. A bounded pool of worker threads, started on the first
+        submission, takes up to batch_size queued jobs at a time, fetches their random numbers
+        in a single random.org request and records all their results in one transaction.
+        Results are kept in memory for result_ttl seconds after the job finishes.
+
+        Jobs are resolved by the process that accepted them. Behind a pre-fork server, pass a
+        store_factory: each job's status is then also written to its own shared state namespace
+        when it is queued and when it finishes, so any worker can poll it, and the namespace is
+        cleared once the result expires.
+
+        Attributes:
+            workers (int): The number of worker threads.
+            max_pending (int): The number of queued jobs at which submissions are rejected.
+            batch_size (int): The most jobs resolved together.
+            result_ttl (float): Seconds a finished job can still be polled.
+            store_factory (Callable[[str], SharedStateStore], optional): Returns the store sharing a job's status, given its id.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 batch_size: Optional[int] = None, result_ttl: Optional[float] = None,
+                 store_factory: Optional[Callable[[str], SharedStateStore]] = None):
+        self.workers = BATTLE_JOB_WORKERS if workers is None else workers
+        self.max_pending = BATTLE_JOB_QUEUE_SIZE if max_pending is None else max_pending
+        self.batch_size = BATTLE_JOB_BATCH_SIZE if batch_size is None else batch_size
+        self.result_ttl = BATTLE_JOB_RESULT_TTL if result_ttl is None else result_ttl
+        self.store_factory = store_factory
+        self._queue: "queue.Queue[BattleJob]" = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        # job id -> job, oldest submission first
+        self._jobs: "OrderedDict[str, BattleJob]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, battle_model: BattleModel, arena: str) -> BattleJob:
+        """ Prepares the arena's current battle and queues it.
+
+            Args:
+                battle_model (BattleModel): The arena's model.
+                arena (str): The arena id, reported with the job.
+            Returns:
+                BattleJob: The queued job.
+            Raises:
+                ValueError: If fewer than two combatants are available for battle, or they
+                    are already queued for a battle that has not finished.
+                queue.Full: If max_pending jobs are already waiting.
+        """
+        job_id = uuid.uuid4().hex
+        combatant_1, combatant_2, delta = battle_model.claim_battle(job_id)
+        job = BattleJob(job_id, arena, battle_model, combatant_1, combatant_2, delta)
+
+        self._start_workers()
+        # Published before a worker can take the job, so its finished status is written last
+        self._publish(job)
+        expired: List[str] = []
+        try:
+            with self._lock:
+                expired = self._purge_expired(time.monotonic())
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    metrics.inc("battle_jobs_total", status="rejected")
+                    logger.error("Battle job queue is full, rejected battle in arena %s", arena)
+                    battle_model.release_battle(job.id)
+                    expired.append(job.id)
+                    raise
+                self._jobs[job.id] = job
+        finally:
+            self._unpublish(expired)
+
+        logger.info("Queued battle job %s between %s and %s", job.id, combatant_1.meal, combatant_2.meal)
+        return job
+
+    def get(self, job_id: str) -> Optional[BattleJob]:
+        """ Returns a job by id, or None if it is unknown or its result has expired.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job: BattleJob, timeout: float) -> BattleJob:
+        """ Waits up to 'timeout' seconds for a job to finish and returns it, finished or not.
+        """
+        wait([job.future], timeout=timeout)
+        return job
+
+    def poll(self, job_id: str, timeout: float = 0) -> Optional[Dict[str, Any]]:
+        """ Waits up to 'timeout' seconds for a job to finish and returns its status, finished or not.
+
+            A job accepted by another worker is read from the shared state, if there is a store_factory.
+
+            Args:
+                job_id (str): The job id.
+                timeout (float): Seconds to wait for the job to finish. Defaults to 0.
+            Returns:
+                Dict[str, Any], optional: The job as BattleJob.to_dict() returns it, or None if it is
+                    unknown or its result has expired.
+            Raises:
+                sqlite3.Error: If the shared state cannot be read.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return self.wait(job, timeout).to_dict()
+        if self.store_factory is None:
+            return None
+
+        store = self.store_factory(job_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            with store.transaction(write=False) as state:
+                shared_job = state.get("job")
+            if shared_job is None or shared_job['status'] in ("complete", "failed") or time.monotonic() >= deadline:
+                return shared_job
+            time.sleep(min(BATTLE_JOB_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """ Returns the queue depth, the capacity and their ratio, for monitoring.
+        """
+        queued = self._queue.qsize()
+        return {'queued': queued, 'capacity': self.max_pending, 'workers': self.workers,
+                'saturation': round(queued / self.max_pending, 3)}
+
+    def _start_workers(self) -> None:
+        # Started on first use, so a pre-fork server starts them in each worker rather than the parent
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"battle-job-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _purge_expired(self, now: float) -> List[str]:
+        """ Drops the oldest finished jobs whose results expired and returns their ids. Must be called with the lock held.
+        """
+        expired = []
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.finished_at is None or now - job.finished_at <= self.result_ttl:
+                break
+            del self._jobs[job.id]
+            expired.append(job.id)
+        return expired
+
+    def _publish(self, job: BattleJob) -> None:
+        """ Writes a job's status to the shared state, if there is a store_factory.
+        """
+        if self.store_factory is None:
+            return
+        try:
+            with self.store_factory(job.id).transaction() as state:
+                state["job"] = job.to_dict()
+        except sqlite3.Error as e:
+            logger.error("Could not share the status of battle job %s: %s", job.id, str(e))
+
+    def _unpublish(self, job_ids: List[str]) -> None:
+        """ Deletes expired jobs from the shared state, if there is a store_factory.
+        """
+        if self.store_factory is None:
+            return
+        for job_id in job_ids:
+            try:
+                self.store_factory(job_id).clear()
+            except sqlite3.Error as e:
+                logger.error("Could not delete the shared status of battle job %s: %s", job_id, str(e))
+
+    def _next_batch(self) -> List[BattleJob]:
+        """ Waits for a job, then takes whatever else is already queued, up to batch_size.
+        """
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._resolve(batch)
+            except Exception as e:
+                for job in batch:
+                    if job.finished_at is None:
+                        self._finish(job, error=str(e))
+
+    def _resolve(self, batch: List[BattleJob]) -> None:
+        """ Resolves a batch with one random.org request and, normally, one transaction.
+        """
+        for job in batch:
+            job.status = "running"
+        metrics.inc("battle_job_batches_total")
+
+        try:
+            random_numbers = random_utils.get_random_batch(len(batch))
+        except (RuntimeError, ValueError) as e:
+            logger.error("Could not fetch random numbers for %d battles: %s", len(batch), str(e))
+            for job in batch:
+                self._finish(job, error=str(e))
+            return
+
+        decided = [
+            (job, *job.battle_model.pick_winner(*job.combatants, job.delta, random_number))
+            for job, random_number in zip(batch, random_numbers)
+        ]
+
+        try:
+            kitchen_model.record_battle_results([(winner.id, loser.id) for _, winner, loser in decided])
+        except Exception as e:
+            # One battle whose meal was deleted since it was prepped must not fail the rest
+            logger.warning("Recording %d battles together failed (%s), recording them one by one", len(decided), e)
+            for job, winner, loser in decided:
+                try:
+                    kitchen_model.record_battle_results([(winner.id, loser.id)])
+                except Exception as e:
+                    self._finish(job, error=str(e))
+                else:
+                    self._finish(job, winner=winner, loser=loser)
+            return
+
+        for job, winner, loser in decided:
+            self._finish(job, winner=winner, loser=loser)
+
+    def _finish(self, job: BattleJob, winner: Optional[Meal] = None, loser: Optional[Meal] = None, error: Optional[str] = None) -> None:
+        if error is None:
+            job.winner = winner.meal
+            job.status = "complete"
+        else:
+            job.error = error
+            job.status = "failed"
+        try:
+            job.battle_model.release_battle(job.id, loser)
+        except Exception as e:
+            logger.error("Could not release the combatants of battle job %s: %s", job.id, str(e))
+        job.finished_at = time.monotonic()
+        self._publish(job)
+        metrics.inc("battle_jobs_total", status=job.status)
+        metrics.observe("battle_job_seconds", job.finished_at - job.submitted_at)
+        job.future.set_result(job)
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import logging
 import sqlite3
-from typing import Any
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
 
 from meal_max.utils.sql_utils import get_db_connection
 from meal_max.utils.logger import configure_logger
@@ -10,6 +10,21 @@ from meal_max.utils.logger import configure_logger
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Default rows fetched per round trip by iter_leaderboard
+LEADERBOARD_STREAM_FETCH_SIZE = 500
+
+# Most meals returned by get_meals_by_score when no limit is given
+MEALS_BY_SCORE_LIMIT = 100
+
+# Opponents returned by get_nearest_meals when no count is given
+NEAREST_MEALS_DEFAULT = 5
+
+# Subtracted from a meal's battle score by difficulty; mirrors the battle_score column in sql/create_meal_table.sql
+DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+
+# Callbacks told about committed meal writes, see register_listener
+_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
 
 @dataclass
 class Meal:
@@ -21,10 +36,15 @@ class Meal:
         cuisine (str): The type of cuisine for the meal.
         price (float): The cost of the meal, which has to be positive.
         difficulty (str): Preparation difficulty level, expected to be 'LOW', 'MED', or 'HIGH'.
+        battle_score (float): price * len(cuisine) minus the difficulty modifier. Not a dataclass
+            field: read from the stored column for loaded meals, computed for new ones.
         
     Raises:
         ValueError: If 'price' is neative or 'difficulty' is not one of the valid levels.
     """
+    # No per-instance __dict__, to keep combatants and bulk results small
+    __slots__ = ("id", "meal", "cuisine", "price", "difficulty", "battle_score")
+
     id: int
     meal: str
     cuisine: str
@@ -41,6 +61,50 @@ class Meal:
             raise ValueError("Price must be a positive value.")
         if self.difficulty not in ['LOW', 'MED', 'HIGH']:
             raise ValueError("Difficulty must be 'LOW', 'MED', or 'HIGH'.")
+        self.battle_score = self.price * len(self.cuisine) - DIFFICULTY_MODIFIER[self.difficulty]
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Meal":
+        """ Builds a meal from a row starting with (id, meal, cuisine, price, difficulty, battle_score),
+        skipping __post_init__ since the table's CHECK constraints already hold for stored rows.
+
+        Args:
+            row (Sequence[Any]): The database row.
+
+        Returns:
+            Meal: The meal.
+        """
+        meal = object.__new__(cls)
+        meal.id, meal.meal, meal.cuisine, meal.price, meal.difficulty, meal.battle_score = row[:6]
+        return meal
+
+
+def register_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """ Registers a callback to be told about every committed write to the meals table, so
+    in-memory indexes over the meals can update incrementally instead of reloading them.
+
+    The listener is called as listener(event, data) after the commit, where event is
+    'create' (data holds the new meal's id and columns) or 'delete' (data holds the id).
+
+    Args:
+        listener (Callable[[str, Dict[str, Any]], None]): The callback.
+    """
+    _listeners.append(listener)
+
+def unregister_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """ Removes a callback added with register_listener, if it is registered.
+    """
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def _notify_listeners(event: str, data: Dict[str, Any]) -> None:
+    """ Calls every registered listener. A failing listener is logged and never fails the write.
+    """
+    for listener in list(_listeners):
+        try:
+            listener(event, data)
+        except Exception as e:
+            logger.error("Meal listener %r failed on %s: %s", listener, event, str(e))
 
 
 def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
@@ -73,6 +137,8 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
 
             logger.info("Meal successfully added to the database: %s", meal)
 
+        _notify_listeners("create", {"id": cursor.lastrowid, "meal": meal, "cuisine": cuisine, "price": price, "difficulty": difficulty})
+
     except sqlite3.IntegrityError:
         logger.error("Duplicate meal name: %s", meal)
         raise ValueError(f"Meal with name '{meal}' already exists")
@@ -110,23 +176,17 @@ def delete_meal(meal_id: int) -> None:
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
 
+        _notify_listeners("delete", {"id": meal_id})
+
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
-    """ Retrieves a sorted leaderboard of meals based on either wins or win percentage.
-
-        Args:
-            sort_by (str, optional): Specifies the sorting criterion ('wins' or 'win_pct').
-                Defaults to 'wins'. 
-
-        Returns:
-            List[dict]: A list of dictionaries representing meals on the leaderboard.
+def _leaderboard_query(sort_by: str) -> str:
+    """ Builds the leaderboard query for the sort criterion.
 
         Raises:
-            ValueError: If 'sort_by' is neither 'wins' nor 'win_pct'. 
-            sqlite3.Error: For any general database-related error.  
+            ValueError: If 'sort_by' is neither 'wins' nor 'win_pct'.
     """
     query = """
         SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
@@ -140,6 +200,35 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
     else:
         logger.error("Invalid sort_by parameter: %s", sort_by)
         raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    return query
+
+def _leaderboard_row_to_dict(row: Sequence[Any]) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'meal': row[1],
+        'cuisine': row[2],
+        'price': row[3],
+        'difficulty': row[4],
+        'battles': row[5],
+        'wins': row[6],
+        'win_pct': round(row[7] * 100, 1)  # Convert to percentage
+    }
+
+def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+    """ Retrieves a sorted leaderboard of meals based on either wins or win percentage.
+
+        Args:
+            sort_by (str, optional): Specifies the sorting criterion ('wins' or 'win_pct').
+                Defaults to 'wins'. 
+
+        Returns:
+            List[dict]: A list of dictionaries representing meals on the leaderboard.
+
+        Raises:
+            ValueError: If 'sort_by' is neither 'wins' nor 'win_pct'. 
+            sqlite3.Error: For any general database-related error.  
+    """
+    query = _leaderboard_query(sort_by)
 
     try:
         with get_db_connection() as conn:
@@ -147,19 +236,7 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
             cursor.execute(query)
             rows = cursor.fetchall()
 
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
-            }
-            leaderboard.append(meal)
+        leaderboard = [_leaderboard_row_to_dict(row) for row in rows]
 
         logger.info("Leaderboard retrieved successfully")
         return leaderboard
@@ -168,6 +245,128 @@ def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
         logger.error("Database error: %s", str(e))
         raise e
 
+def iter_leaderboard(sort_by: str = "wins", chunk_size: int = LEADERBOARD_STREAM_FETCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """ Streams the leaderboard in the order get_leaderboard returns it.
+
+        Rows are fetched 'chunk_size' at a time, so memory use does not grow with the number
+        of meals and the first entry is available once the first chunk is read. The database
+        connection stays open until the iterator is exhausted or closed.
+
+        Args:
+            sort_by (str, optional): Specifies the sorting criterion ('wins' or 'win_pct').
+                Defaults to 'wins'.
+            chunk_size (int, optional): The number of rows fetched per round trip.
+
+        Returns:
+            Iterator[dict]: The meals on the leaderboard.
+
+        Raises:
+            ValueError: If 'sort_by' is invalid or 'chunk_size' is not positive.
+            sqlite3.Error: For any general database-related error, raised while iterating.
+    """
+    query = _leaderboard_query(sort_by)
+    if chunk_size < 1:
+        logger.error("Invalid chunk size: %s", chunk_size)
+        raise ValueError(f"Invalid chunk size: {chunk_size}. Must be a positive integer.")
+    return _stream_leaderboard(query, chunk_size)
+
+def _stream_leaderboard(query: str, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            count = 0
+            rows = cursor.fetchmany(chunk_size)
+            while rows:
+                for row in rows:
+                    yield _leaderboard_row_to_dict(row)
+                count += len(rows)
+                rows = cursor.fetchmany(chunk_size)
+
+        logger.info("Leaderboard of %d meals streamed successfully", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def get_meal_stats(dimension: str = "cuisine") -> List[Dict[str, Any]]:
+    """ Retrieves the battle statistics of the non-deleted meals grouped by cuisine or difficulty.
+
+        The totals are kept current by triggers on the meals table (see sql/create_meal_table.sql),
+        so this reads one row per group instead of scanning the meals.
+
+        Args:
+            dimension (str, optional): The grouping, 'cuisine' or 'difficulty'. Defaults to 'cuisine'.
+
+        Returns:
+            List[dict]: One entry per group with its meals, battles, wins, win percentage and
+                average price, sorted by battles descending.
+
+        Raises:
+            ValueError: If 'dimension' is neither 'cuisine' nor 'difficulty'.
+            sqlite3.Error: For any general database-related error.
+    """
+    if dimension not in ("cuisine", "difficulty"):
+        logger.error("Invalid stats dimension: %s", dimension)
+        raise ValueError(f"Invalid dimension: {dimension}. Must be 'cuisine' or 'difficulty'.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT value, meals, total_price, battles, wins
+                FROM meal_stats
+                WHERE dimension = ? AND meals > 0
+                ORDER BY battles DESC, value
+            """, (dimension,))
+            rows = cursor.fetchall()
+
+        stats = [
+            {
+                dimension: value,
+                'meals': meals,
+                'battles': battles,
+                'wins': wins,
+                'win_pct': round(wins * 100 / battles, 1) if battles else 0.0,
+                'avg_price': round(total_price / meals, 2)
+            }
+            for value, meals, total_price, battles, wins in rows
+        ]
+
+        logger.info("Meal stats by %s retrieved successfully", dimension)
+        return stats
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def rebuild_meal_stats() -> None:
+    """ Recomputes the per-cuisine and per-difficulty statistics from the meals table, e.g. for
+        a database created before the statistics existed.
+
+        Raises:
+            sqlite3.Error: For any general database-related error.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM meal_stats")
+            for dimension in ("cuisine", "difficulty"):
+                cursor.execute(f"""
+                    INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+                    SELECT '{dimension}', {dimension}, COUNT(*), SUM(price), SUM(battles), SUM(wins)
+                    FROM meals
+                    WHERE deleted = FALSE
+                    GROUP BY {dimension}
+                """)
+            conn.commit()
+
+            logger.info("Meal stats rebuilt from the meals table")
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
 def get_meal_by_id(meal_id: int) -> Meal:
     """ Retrieves a meal from the database by its ID. 
         Args: 
@@ -181,14 +380,14 @@ def get_meal_by_id(meal_id: int) -> Meal:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE id = ?", (meal_id,))
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty, battle_score, deleted FROM meals WHERE id = ?", (meal_id,))
             row = cursor.fetchone()
 
             if row:
-                if row[5]:
+                if row[6]:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return Meal.from_row(row)
             else:
                 logger.info("Meal with ID %s not found", meal_id)
                 raise ValueError(f"Meal with ID {meal_id} not found")
@@ -211,14 +410,14 @@ def get_meal_by_name(meal_name: str) -> Meal:
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, meal, cuisine, price, difficulty, deleted FROM meals WHERE meal = ?", (meal_name,))
+            cursor.execute("SELECT id, meal, cuisine, price, difficulty, battle_score, deleted FROM meals WHERE meal = ?", (meal_name,))
             row = cursor.fetchone()
 
             if row:
-                if row[5]:
+                if row[6]:
                     logger.info("Meal with name %s has been deleted", meal_name)
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
-                return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                return Meal.from_row(row)
             else:
                 logger.info("Meal with name %s not found", meal_name)
                 raise ValueError(f"Meal with name {meal_name} not found")
@@ -228,6 +427,97 @@ def get_meal_by_name(meal_name: str) -> Meal:
         raise e
 
 
+def get_meals_by_score(min_score: float, max_score: float, limit: int = MEALS_BY_SCORE_LIMIT) -> List[Meal]:
+    """ Retrieves the meals whose battle score lies between two bounds, lowest score first.
+        The range is read from the battle score index, so it costs the same however many meals exist.
+        Args:
+            min_score (float): The lowest battle score, inclusive.
+            max_score (float): The highest battle score, inclusive.
+            limit (int, optional): The most meals returned. Defaults to MEALS_BY_SCORE_LIMIT.
+        Returns:
+            List[Meal]: The non-deleted meals in the range.
+        Raises:
+            ValueError: If 'min_score' is above 'max_score' or 'limit' is not positive.
+            sqlite3.Error: For any general database-related error.
+    """
+    if min_score > max_score:
+        logger.error("Invalid score range: %s to %s", min_score, max_score)
+        raise ValueError(f"Invalid score range: {min_score} to {max_score}. The minimum must not exceed the maximum.")
+    if limit < 1:
+        logger.error("Invalid limit: %s", limit)
+        raise ValueError(f"Invalid limit: {limit}. Must be a positive integer.")
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, meal, cuisine, price, difficulty, battle_score FROM meals
+                WHERE deleted = FALSE AND battle_score BETWEEN ? AND ?
+                ORDER BY battle_score LIMIT ?
+            """, (min_score, max_score, limit))
+            meals = [Meal.from_row(row) for row in cursor.fetchall()]
+
+        logger.info("Retrieved %d meals scoring between %s and %s", len(meals), min_score, max_score)
+        return meals
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_nearest_meals(meal: Meal, k: int = NEAREST_MEALS_DEFAULT) -> List[Meal]:
+    """ Retrieves the k live meals whose battle score is closest to a meal's, closest first.
+        Two scans of the battle score index, one upward and one downward from the meal's score,
+        read at most k meals each, so the cost is O(log n + k) however many meals exist.
+        Args:
+            meal (Meal): The meal to find opponents for. It is never among the results.
+            k (int, optional): The number of meals to return. Defaults to NEAREST_MEALS_DEFAULT.
+        Returns:
+            List[Meal]: Up to k meals, by increasing distance from the meal's score.
+        Raises:
+            ValueError: If 'k' is not positive.
+            sqlite3.Error: For any general database-related error.
+    """
+    if k < 1:
+        logger.error("Invalid number of opponents: %s", k)
+        raise ValueError(f"Invalid number of opponents: {k}. Must be a positive integer.")
+
+    score = meal.battle_score
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, meal, cuisine, price, difficulty, battle_score FROM meals
+                WHERE deleted = FALSE AND battle_score >= ? AND id != ?
+                ORDER BY battle_score LIMIT ?
+            """, (score, meal.id, k))
+            above = [Meal.from_row(row) for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT id, meal, cuisine, price, difficulty, battle_score FROM meals
+                WHERE deleted = FALSE AND battle_score < ? AND id != ?
+                ORDER BY battle_score DESC LIMIT ?
+            """, (score, meal.id, k))
+            below = [Meal.from_row(row) for row in cursor.fetchall()]
+
+        # Both lists run away from the score, so merging their heads yields the closest first
+        nearest = []
+        i = j = 0
+        while len(nearest) < k and (i < len(above) or j < len(below)):
+            if j == len(below) or (i < len(above) and above[i].battle_score - score <= score - below[j].battle_score):
+                nearest.append(above[i])
+                i += 1
+            else:
+                nearest.append(below[j])
+                j += 1
+
+        logger.info("Found %d meals scoring closest to %s", len(nearest), meal.meal)
+        return nearest
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
 def update_meal_stats(meal_id: int, result: str) -> None:
     """ Updates the battle stats for a meal, incrementing battles or wins.
         Args: 
@@ -263,3 +553,41 @@ def update_meal_stats(meal_id: int, result: str) -> None:
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
+
+def record_battle_results(results: Sequence[Tuple[int, int]]) -> None:
+    """ Records the outcome of several battles in one transaction, crediting each winner
+        with a win and a battle and each loser with a battle.
+
+        Args:
+            results (Sequence[Tuple[int, int]]): The (winner id, loser id) of each battle.
+
+        Raises:
+            ValueError: If any of the meals is marked as deleted or cannot be found; nothing is recorded.
+            sqlite3.Error: For any general database-related error.
+    """
+    meal_ids = {meal_id for result in results for meal_id in result}
+    if not meal_ids:
+        return
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" * len(meal_ids))
+            cursor.execute(f"SELECT id, deleted FROM meals WHERE id IN ({placeholders})", tuple(meal_ids))
+            found = dict(cursor.fetchall())
+            for meal_id in meal_ids:
+                if meal_id not in found:
+                    logger.info("Meal with ID %s not found", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} not found")
+                if found[meal_id]:
+                    logger.info("Meal with ID %s has been deleted", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+            cursor.executemany("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ?", [(winner_id,) for winner_id, _ in results])
+            cursor.executemany("UPDATE meals SET battles = battles + 1 WHERE id = ?", [(loser_id,) for _, loser_id in results])
+            conn.commit()
+            logger.info("Recorded the results of %d battles", len(results))
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
@@ -0,0 +1,114 @@
+from bisect import bisect_left
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from meal_max.models import kitchen_model
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# An index older than this is reloaded in full, to pick up meals written by other processes
+MEAL_INDEX_MAX_AGE = float(os.getenv("MEAL_INDEX_MAX_AGE", "60"))
+
+
+class MealNameIndex:
+    """ A sorted array of live meal names for case-insensitive prefix lookups with bisect.
+
+    The index is loaded on first use, then kept current by kitchen_model's write
+    listeners: created meals are inserted in order and deleted meals removed. Meals
+    written by other processes are picked up by a full reload once the index is older
+    than max_age seconds.
+
+    Attributes:
+        max_age (float): Seconds after which the index is reloaded in full.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = MEAL_INDEX_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        # Parallel sorted arrays: casefolded names for bisect, and the (casefolded name, name) entries
+        self._keys: List[str] = []
+        self._entries: List[tuple] = []
+        self._names_by_id: Dict[int, str] = {}
+        kitchen_model.register_listener(self._on_meal_write)
+
+    def close(self) -> None:
+        """ Stops following meal writes.
+        """
+        kitchen_model.unregister_listener(self._on_meal_write)
+
+    def is_stale(self) -> bool:
+        """ Returns whether the index has not been loaded yet or is older than max_age.
+        """
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def refresh(self) -> None:
+        """ Reloads the names of all live meals from the database.
+
+        Raises:
+            sqlite3.Error: If the meals cannot be read; the previous index is kept.
+        """
+        # Writes committed during the load wait for it, then apply on top of it
+        with self._lock:
+            try:
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT id, meal FROM meals WHERE deleted = FALSE")
+                    rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error("Database error while loading the meal name index: %s", str(e))
+                raise e
+
+            self._entries = sorted((name.casefold(), name) for _, name in rows)
+            self._keys = [key for key, _ in self._entries]
+            self._names_by_id = dict(rows)
+            self._loaded_at = time.monotonic()
+        logger.info("Loaded meal name index of %d meals", len(rows))
+
+    def _on_meal_write(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if event == "create" and data["id"] not in self._names_by_id:
+                entry = (data["meal"].casefold(), data["meal"])
+                position = bisect_left(self._entries, entry)
+                self._entries.insert(position, entry)
+                self._keys.insert(position, entry[0])
+                self._names_by_id[data["id"]] = data["meal"]
+            elif event == "delete" and data["id"] in self._names_by_id:
+                name = self._names_by_id.pop(data["id"])
+                position = bisect_left(self._entries, (name.casefold(), name))
+                del self._entries[position]
+                del self._keys[position]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """ Returns live meal names starting with the prefix, ignoring case, in alphabetical order.
+
+        Args:
+            prefix (str): The start of the meal name.
+            limit (int): The maximum number of names to return.
+
+        Returns:
+            List[str]: Up to 'limit' matching meal names.
+        """
+        if self.is_stale():
+            self.refresh()
+
+        key = prefix.casefold()
+        with self._lock:
+            start = bisect_left(self._keys, key)
+            names = []
+            for position in range(start, min(start + limit, len(self._keys))):
+                if not self._keys[position].startswith(key):
+                    break
+                names.append(self._entries[position][1])
+        return names
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Optional
+
+import httpx
+
+from meal_max.utils import random_utils
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upper bound on concurrent connections to random.org from one process
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "100"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async HTTP client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=random_utils.RANDOM_ORG_TIMEOUT, limits=httpx.Limits(max_connections=ASYNC_HTTP_MAX_CONNECTIONS))
+    return _client
+
+async def close_client() -> None:
+    """
+    Closes the shared async HTTP client, if one was created.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def fetch(url: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Fetches a random.org URL through random_utils' circuit breaker, retrying timeouts and
+    server errors with the same policy as the synchronous client. As there, the body is
+    parsed before the call is reported to the breaker.
+
+    Args:
+        url (str): The URL to fetch.
+        parse (Callable[[str], Any]): Parses the stripped response body.
+
+    Returns:
+        Any: The parsed response.
+
+    Raises:
+        RuntimeError: If the breaker is open, or the request still fails after the retries.
+        ValueError: If the response cannot be parsed; it is not retried.
+    """
+    breaker = random_utils.breaker
+    if not breaker.allow():
+        logger.error("Circuit breaker for random.org is open, not sending the request.")
+        raise RuntimeError("Request to random.org failed: circuit breaker is open")
+
+    attempt = 0
+    while True:
+        # Log the request to random.org
+        logger.info("Fetching random number from %s", url)
+
+        start = time.perf_counter()
+        try:
+            response = await get_client().get(url)
+
+            # Check if the request was successful
+            response.raise_for_status()
+            result = parse(response.text.strip())
+        except httpx.HTTPError as e:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
+
+            status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            retryable = isinstance(e, httpx.TransportError) or status_code in random_utils.RETRY_STATUS_CODES
+            if retryable and attempt < random_utils.RANDOM_ORG_RETRIES and breaker.allow():
+                delay = random_utils.backoff_delay(attempt)
+                logger.warning("Request to random.org failed (%s), retrying in %.3f seconds", e, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if isinstance(e, httpx.TimeoutException):
+                logger.error("Request to random.org timed out.")
+                raise RuntimeError("Request to random.org timed out.")
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+        except Exception:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled, e.g. by a client disconnect: record nothing, but never leave a half
+            # open trial in flight
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="cancelled")
+            breaker.release_trial()
+            raise
+
+        metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="success")
+        breaker.record_success()
+        return result
+
+
+async def get_random() -> float:
+    """ Retrieves a random decimal number from random.org without blocking the event loop,
+    falling back like random_utils.get_random.
+
+    Returns:
+        float: a random decimal number provided by random.org
+    Raises:
+        ValueError: Raised if the response from random.org is not a valid float.
+        RuntimeError: Raised if the request times out or fails due to a connection issue.
+    """
+    url = f"{random_utils.RANDOM_ORG_BASE_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+
+    try:
+        random_number = await fetch(url, lambda body: random_utils.parse_numbers(body, 1, float)[0])
+    except (RuntimeError, ValueError) as e:
+        if random_utils.RANDOM_ORG_FALLBACK != "local":
+            raise
+        metrics.inc("random_org_fallbacks_total")
+        random_number = random_utils.local_random.randint(0, 99) / 100
+        logger.warning("random.org unavailable (%s), drew %.2f locally", e, random_number)
+        return random_number
+
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
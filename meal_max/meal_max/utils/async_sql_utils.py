@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+
+# sqlite3 calls block, so the async app runs them on a bounded pool of threads
+ASYNC_DB_WORKERS = int(os.getenv("ASYNC_DB_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=ASYNC_DB_WORKERS, thread_name_prefix="sqlite")
+
+# Items handed from a streaming model function to the event loop at a time, see iterate_db
+ASYNC_DB_STREAM_BATCH = int(os.getenv("ASYNC_DB_STREAM_BATCH", "100"))
+
+# Calls submitted to the pool and not finished yet, running or queued
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking database function on the SQLite thread pool without blocking the event loop.
+
+    Any model function can be awaited this way, so the async app shares the validation,
+    logging and SQL of the synchronous models.
+
+    Args:
+        func (Callable): The blocking function, usually a model function.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        Any: The function's return value. Its exceptions propagate to the caller.
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+async def iterate_db(func: Callable[..., Any], *args, **kwargs) -> AsyncIterator[List[Any]]:
+    """
+    Runs a blocking model generator, e.g. iter_all_songs, on the SQLite thread pool and yields
+    its items in lists of up to ASYNC_DB_STREAM_BATCH.
+
+    The generator runs start to finish on one pool thread, since a SQLite connection may only
+    be used by the thread that opened it, and holds that thread until it is done. At most two
+    batches wait for the consumer, so a slow client pauses the query rather than buffering
+    its rows. If the consumer stops early, the generator is closed, releasing its connection.
+
+    Args:
+        func (Callable): The function returning the iterator, usually a model function.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Yields:
+        List[Any]: The next items of the iterator. Its exceptions propagate to the consumer.
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=2)
+    stopped = threading.Event()
+    done = object()
+
+    def hand_over(item: Any) -> bool:
+        # Nothing is handed over once the consumer is gone, so a full queue cannot block the thread
+        if stopped.is_set():
+            return False
+        asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+        return True
+
+    def produce() -> None:
+        global _in_flight
+        try:
+            iterator = func(*args, **kwargs)
+            try:
+                batch = []
+                for item in iterator:
+                    batch.append(item)
+                    if len(batch) >= ASYNC_DB_STREAM_BATCH:
+                        if not hand_over(batch):
+                            return
+                        batch = []
+                if batch and not hand_over(batch):
+                    return
+            finally:
+                if hasattr(iterator, "close"):
+                    iterator.close()
+            hand_over(done)
+        except Exception as e:
+            hand_over(e)
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    with _in_flight_lock:
+        _in_flight += 1
+    loop.run_in_executor(_executor, produce)
+    try:
+        while True:
+            item = await batches.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        # Free the queue so a hand-over that was already waiting completes
+        while not batches.empty():
+            batches.get_nowait()
+
+
+def db_pool_stats() -> Dict[str, Any]:
+    """
+    Reports how busy the SQLite thread pool is.
+
+    Returns:
+        Dict[str, Any]: The pool size, the calls running and waiting for a thread, and the
+            saturation (calls in flight per thread; above 1 means calls are queueing).
+    """
+    in_flight = _in_flight
+    return {
+        'workers': ASYNC_DB_WORKERS,
+        'busy': min(in_flight, ASYNC_DB_WORKERS),
+        'queued': max(in_flight - ASYNC_DB_WORKERS, 0),
+        'saturation': round(in_flight / ASYNC_DB_WORKERS, 3),
+    }
@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils import sql_utils
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# A readiness result younger than this is served without touching the database
+READINESS_TTL = float(os.getenv("READINESS_TTL", "5"))
+
+# A cached result older than this (e.g. because the refresh hangs on a locked database) reports not ready
+READINESS_MAX_STALENESS = float(os.getenv("READINESS_MAX_STALENESS", "30"))
+
+
+def check_database(tables: Sequence[str]) -> None:
+    """
+    Checks that the database answers and that the tables exist, on a single connection.
+
+    Args:
+        tables (Sequence[str]): The tables that must be queryable.
+
+    Raises:
+        Exception: If the database cannot be reached or a table cannot be queried.
+    """
+    try:
+        with sql_utils.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            for table in tables:
+                cursor.execute(f"SELECT 1 FROM {table} LIMIT 1;")
+    except Exception as e:
+        error_message = f"Database check error: {e}"
+        logger.error(error_message)
+        raise Exception(error_message) from e
+
+
+class ReadinessProbe:
+    """
+    Caches the database readiness check so frequent orchestrator probes cost no database work.
+
+    The first call checks synchronously. Afterwards the cached result is returned at once, and
+    a result older than 'ttl' starts a single background refresh. A result older than
+    'max_staleness' reports not ready, since the refresh that should replace it is stuck.
+    Each status also carries the current value of the registered load gauges.
+
+    Attributes:
+        tables (Sequence[str]): The tables checked for readiness.
+        ttl (float): Seconds a result is served before it is refreshed.
+        max_staleness (float): Seconds after which a result is no longer trusted.
+        checked_at (float): The time.monotonic() of the last completed check, or None before the first.
+    """
+
+    def __init__(self, tables: Sequence[str], ttl: Optional[float] = None, max_staleness: Optional[float] = None):
+        self.tables = tuple(tables)
+        self.ttl = READINESS_TTL if ttl is None else ttl
+        self.max_staleness = READINESS_MAX_STALENESS if max_staleness is None else max_staleness
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def register_gauge(self, name: str, gauge: Callable[[], Any]) -> None:
+        """
+        Adds a load indicator, e.g. pool saturation, reported with every status.
+
+        Args:
+            name (str): The key of the gauge in the status.
+            gauge (Callable[[], Any]): Returns the current value; it must be cheap and JSON-serializable.
+        """
+        self._gauges[name] = gauge
+
+    def refresh(self) -> None:
+        """
+        Runs the database check and caches its result.
+        """
+        try:
+            check_database(self.tables)
+            error = None
+        except Exception as e:
+            error = str(e)
+        with self._lock:
+            self._error = error
+            self.checked_at = time.monotonic()
+            self._refreshing = False
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="readiness-refresh", daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the cached readiness, refreshing it first if there is none yet.
+
+        Returns:
+            Dict[str, Any]: 'ready', the database status or error, the age of the check in
+                seconds and the value of each registered gauge.
+        """
+        if self.checked_at is None:
+            self.refresh()
+
+        age = time.monotonic() - self.checked_at
+        error = self._error
+        if error is None and age > self.max_staleness:
+            error = f"Database check is {age:.0f} seconds old"
+
+        if age > self.ttl:
+            self._refresh_in_background()
+
+        status = {
+            'ready': error is None,
+            'database_status': 'healthy' if error is None else 'unhealthy',
+            'checked_seconds_ago': round(age, 3),
+        }
+        if error is not None:
+            status['error'] = error
+        for name, gauge in self._gauges.items():
+            status[name] = gauge()
+        return status
+
+
+class InFlightRequests:
+    """
+    Counts the requests a Flask app is currently serving, to report how saturated its
+    worker threads are.
+
+    Attributes:
+        capacity (int): The number of requests the process can serve at once.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def track(self, app) -> None:
+        """
+        Wraps the app's WSGI callable so each request is counted from the moment the server hands
+        it over until the server closes its response, after the last byte of a streamed body.
+
+        Counting in the WSGI layer rather than in request hooks keeps the increment and decrement
+        paired: a before_request hook that answers or raises first, or a response streamed after
+        teardown, cannot skew the count.
+        """
+        from werkzeug.wsgi import ClosingIterator
+
+        wsgi_app = app.wsgi_app
+
+        def counted_wsgi_app(environ, start_response):
+            self._add(1)
+            try:
+                response = wsgi_app(environ, start_response)
+            except BaseException:
+                self._add(-1)
+                raise
+            return ClosingIterator(response, lambda: self._add(-1))
+
+        app.wsgi_app = counted_wsgi_app
+
+    def _add(self, delta: int) -> None:
+        with self._lock:
+            self._count += delta
+
+    def gauge(self) -> Dict[str, Any]:
+        """
+        Returns the in-flight requests, the capacity and their ratio.
+        """
+        count = self._count
+        return {'in_flight': count, 'capacity': self.capacity, 'saturation': round(count / self.capacity, 3)}
@@ -1,26 +1,204 @@
+import atexit
 import logging
+import os
 import sys
+import threading
+import time
+from typing import Optional
 
-from flask import current_app, has_request_context
 
+# Sampling defaults for hot-path loggers, overridable through the environment.
+# A limit of 0 turns sampling off.
+LOG_SAMPLE_LIMIT = int(os.getenv("LOG_SAMPLE_LIMIT", "0"))
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "60"))
 
-def configure_logger(logger):
-    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
+# The stderr handler shared by every configured logger, created on first use
+_handler: Optional[logging.Handler] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits repetitive log records and periodically summarizes the ones it dropped.
+
+    Records are grouped by logger name and message template (the unformatted msg), so
+    "Playing track number: %d" is one template whatever the track number. Within each
+    window of 'interval' seconds at most 'limit' records per template are let through.
+    Once a window has closed, a single summary record reporting how many occurrences
+    were seen in that window is emitted in place of the dropped records.
+
+    Summaries are emitted by the next record passing through the filter after the window
+    closes or, if the logger has gone quiet, by a timer thread that the first dropped record
+    of a window schedules for its close. Windows still open when the interpreter exits are
+    summarized by flush(), which is registered with atexit; close() cancels both.
+
+    Records at WARNING and above are never sampled.
+
+    Attributes:
+        limit (int): The maximum number of records per template per window.
+        interval (float): The length of a sampling window in seconds.
+    """
+
+    def __init__(self, limit: int, interval: float = LOG_SAMPLE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._lock = threading.Lock()
+        # (logger name, template) -> [window start, levelno, emitted, suppressed]
+        self._windows = {}
+        self._next_sweep = time.monotonic() + interval
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "sampling_summary", False):
+            return True
+
+        now = time.monotonic()
+        key = (record.name, str(record.msg))
+        summaries = []
+        with self._lock:
+            if now >= self._next_sweep:
+                summaries = self._sweep(now)
+
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is not None and window[3]:
+                    summaries.append(self._summary(key, window, now))
+                window = [now, record.levelno, 0, 0]
+                self._windows[key] = window
+
+            if window[2] < self.limit:
+                window[2] += 1
+                allowed = True
+            else:
+                if not window[3]:
+                    self._schedule_sweep(window[0] + self.interval - now)
+                window[3] += 1
+                allowed = False
+
+        for summary in summaries:
+            self._emit(*summary)
+        return allowed
 
-    # Create a console handler that logs to stderr
-    handler = logging.StreamHandler(sys.stderr)
-    handler.setLevel(logging.DEBUG)
+    def flush(self) -> None:
+        """
+        Emits summaries for every template with suppressed records, regardless of window age.
+        """
+        now = time.monotonic()
+        with self._lock:
+            summaries = [self._summary(key, window, now) for key, window in self._windows.items() if window[3]]
+            self._windows.clear()
+        for summary in summaries:
+            self._emit(*summary)
 
-    # Create a formatter with a timestamp
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def close(self) -> None:
+        """
+        Cancels the pending timer and the exit flush, then emits the outstanding summaries.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        atexit.unregister(self.flush)
+        self.flush()
+
+    def _schedule_sweep(self, delay: float) -> None:
+        """
+        Starts a timer sweeping the windows after 'delay' seconds, unless one is pending.
+        Must be called with the lock held.
+        """
+        if self._timer is None:
+            self._timer = threading.Timer(max(delay, 0), self._sweep_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _sweep_on_timer(self) -> None:
+        """
+        Emits the summaries of closed windows, and waits for the next close if records are still being dropped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._timer = None
+            summaries = self._sweep(now)
+            closes = [window[0] + self.interval for window in self._windows.values() if window[3]]
+            if closes:
+                self._schedule_sweep(min(closes) - now)
+        for summary in summaries:
+            self._emit(*summary)
+
+    def _sweep(self, now: float) -> list:
+        """
+        Drops closed windows and returns summaries for those that suppressed records.
+        Must be called with the lock held.
+        """
+        self._next_sweep = now + self.interval
+        summaries = []
+        for key, window in list(self._windows.items()):
+            if now - window[0] >= self.interval:
+                if window[3]:
+                    summaries.append(self._summary(key, window, now))
+                del self._windows[key]
+        return summaries
+
+    @staticmethod
+    def _summary(key: tuple, window: list, now: float) -> tuple:
+        name, template = key
+        window_start, levelno, emitted, suppressed = window
+        return name, levelno, template, emitted + suppressed, suppressed, now - window_start
+
+    @staticmethod
+    def _emit(name: str, levelno: int, template: str, occurrences: int, suppressed: int, elapsed: float) -> None:
+        logging.getLogger(name).log(
+            levelno,
+            "%d occurrences of '%s' in the last %.0f seconds (%d suppressed)",
+            occurrences, template, elapsed, suppressed,
+            extra={"sampling_summary": True},
+        )
+
+
+def _get_handler() -> logging.Handler:
+    """
+    Returns the shared stderr handler, creating it on first use.
+    """
+    global _handler
+    if _handler is None:
+        # Create a console handler that logs to stderr
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setLevel(logging.DEBUG)
+
+        # Create a formatter with a timestamp
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        _handler = handler
+    return _handler
+
+
+def configure_logger(logger, sample_limit: Optional[int] = None, sample_interval: Optional[float] = None):
+    """
+    Attaches the shared stderr handler to the logger and, optionally, a sampling filter.
+
+    Safe to call more than once for the same logger: the handler and the sampling filter
+    are only added the first time.
+
+    Args:
+        logger (logging.Logger): The logger to configure.
+        sample_limit (int, optional): If positive, at most this many records per message
+            template are emitted per sampling window. Defaults to None (no sampling).
+        sample_interval (float, optional): The sampling window in seconds.
+            Defaults to LOG_SAMPLE_INTERVAL.
+    """
+    logger.setLevel(logging.DEBUG)  # Set the desired logging level here
 
-    # Add the formatter to the handler
-    handler.setFormatter(formatter)
+    handler = _get_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
 
-    # Add the handler to the logger
-    logger.addHandler(handler)
+    # Sample hot-path loggers so high-frequency messages don't dominate I/O
+    if sample_limit and not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(sample_limit, sample_interval or LOG_SAMPLE_INTERVAL))
 
-    if has_request_context():
-        app_logger = current_app.logger
-        for handler in app_logger.handlers:
-            logger.addHandler(handler)
\ No newline at end of file
+    # Only consult Flask if something already imported it, so the models load without it
+    flask = sys.modules.get("flask")
+    if flask is not None and flask.has_request_context():
+        for app_handler in flask.current_app.logger.handlers:
+            if app_handler not in logger.handlers:
+                logger.addHandler(app_handler)
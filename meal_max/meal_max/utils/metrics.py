@@ -0,0 +1,357 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from meal_max.utils.logger import configure_logger
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+    from quart import Quart
+
+    from meal_max.utils.shared_state import SharedStateStore
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds between a pre-fork worker's writes of its metrics to the shared state database
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "5"))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """
+    A registry of counters and histograms rendered in the Prometheus text format.
+
+    Every thread records into its own shard, so the hot path (inc/observe) never takes
+    a lock. The lock is only taken the first time a thread records something and when
+    the shards are merged by render(). Shards of threads that have exited are folded
+    into a retired shard so short-lived request threads don't accumulate.
+
+    Attributes:
+        buckets (Tuple[float, ...]): The histogram bucket upper bounds.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, dict, dict]] = []
+        self._retired_counters: Dict[tuple, float] = {}
+        self._retired_histograms: Dict[tuple, list] = {}
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+
+    ##################################################
+    # Recording
+    ##################################################
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """
+        Registers the type ('counter' or 'histogram') and help text of a metric.
+
+        Args:
+            name (str): The metric name.
+            metric_type (str): The Prometheus metric type.
+            help_text (str): A one-line description of the metric.
+        """
+        self._descriptions[name] = (metric_type, help_text)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The metric name.
+            value (float, optional): The amount to add. Defaults to 1.
+            **labels: The label values of the series.
+        """
+        counters = self._shard()[0]
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Records an observation in a histogram.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value, usually a duration in seconds.
+            **labels: The label values of the series.
+        """
+        histograms = self._shard()[1]
+        key = (name, tuple(sorted(labels.items())))
+        series = histograms.get(key)
+        if series is None:
+            # One slot per bucket, one for +Inf, then the sum
+            series = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Context manager observing the duration of its body in a histogram.
+
+        Args:
+            name (str): The metric name.
+            **labels: The label values of the series.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _shard(self) -> Tuple[dict, dict]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard[0], shard[1]))
+        return shard
+
+    ##################################################
+    # Collection
+    ##################################################
+
+    def collect(self) -> Tuple[Dict[tuple, float], Dict[tuple, list]]:
+        """
+        Merges the per-thread shards.
+
+        Returns:
+            Tuple[dict, dict]: The counters and histograms keyed by (name, labels).
+        """
+        with self._lock:
+            live = []
+            for thread, counters, histograms in self._shards:
+                if thread.is_alive():
+                    live.append((thread, counters, histograms))
+                else:
+                    self._merge(self._retired_counters, self._retired_histograms, counters, histograms)
+            self._shards = live
+
+            counters = dict(self._retired_counters)
+            histograms = {key: list(series) for key, series in self._retired_histograms.items()}
+            for _, shard_counters, shard_histograms in live:
+                self._merge(counters, histograms, shard_counters, shard_histograms)
+        return counters, histograms
+
+    @staticmethod
+    def _merge(counters: dict, histograms: dict, shard_counters: dict, shard_histograms: dict) -> None:
+        for key, value in list(shard_counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, series in list(shard_histograms.items()):
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    merged[i] += value
+
+    def render(self, collected: Optional[Tuple[Dict[tuple, float], Dict[tuple, list]]] = None) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Args:
+            collected (Tuple[dict, dict], optional): The counters and histograms to render, as
+                collect() returns them. Defaults to this registry's.
+
+        Returns:
+            str: The exposition text.
+        """
+        counters, histograms = self.collect() if collected is None else collected
+        lines = []
+
+        by_name: Dict[str, list] = {}
+        for (name, labels), value in counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+        for name in sorted(by_name):
+            self._header(lines, name, "counter")
+            for labels, value in sorted(by_name[name]):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        by_name = {}
+        for (name, labels), series in histograms.items():
+            by_name.setdefault(name, []).append((labels, series))
+        for name in sorted(by_name):
+            self._header(lines, name, "histogram")
+            for labels, series in sorted(by_name[name]):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels, 'le="%g"' % bound)
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                cumulative += series[len(self.buckets)]
+                bucket_labels = _format_labels(labels, 'le="+Inf"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {series[-1]:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: list, name: str, default_type: str) -> None:
+        metric_type, help_text = self._descriptions.get(name, (default_type, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+class SharedMetrics:
+    """
+    The metrics of every pre-fork worker process, merged.
+
+    A registry only holds its own process's metrics, so behind a pre-fork server a scrape would
+    see whichever worker answered it. Instead, each worker writes what its registry collected to
+    the shared state store every publish_interval seconds, and render() merges the latest snapshot
+    of every worker, taking the answering worker's own just then. Snapshots of exited workers are
+    kept, so the counts they contributed never go backwards.
+
+    Attributes:
+        registry (MetricsRegistry): This process's registry.
+        store (SharedStateStore): The store holding every worker's snapshot.
+        publish_interval (float): Seconds between this process's snapshots.
+    """
+
+    def __init__(self, registry: MetricsRegistry, store: "SharedStateStore", publish_interval: Optional[float] = None):
+        self.registry = registry
+        self.store = store
+        self.publish_interval = METRICS_PUBLISH_INTERVAL if publish_interval is None else publish_interval
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._worker: Optional[str] = None
+
+    def start(self) -> None:
+        """
+        Starts writing this process's snapshots in the background, once per process.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # A later worker may get the same pid, and must not replace this one's snapshot
+            self._worker = f"{self._pid}:{time.time():.6f}"
+        threading.Thread(target=self._publish_periodically, name="metrics-publisher", daemon=True).start()
+
+    def publish(self) -> List[Dict[str, Any]]:
+        """
+        Writes this process's snapshot and returns the latest snapshot of every worker.
+
+        Raises:
+            sqlite3.Error: If the shared state cannot be written.
+        """
+        self.start()
+        counters, histograms = self.registry.collect()
+        with self.store.transaction() as state:
+            state[self._worker] = {
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                'histograms': [[name, labels, series] for (name, labels), series in histograms.items()],
+            }
+            return list(state.values())
+
+    def render(self) -> str:
+        """
+        Renders the merged metrics of every worker in the Prometheus text exposition format,
+        or only this process's if the shared state cannot be used.
+
+        Returns:
+            str: The exposition text.
+        """
+        try:
+            snapshots = self.publish()
+        except Exception as e:
+            logger.error("Could not merge the metrics of the other workers: %s", str(e))
+            return self.registry.render()
+
+        counters: Dict[tuple, float] = {}
+        histograms: Dict[tuple, list] = {}
+        for snapshot in snapshots:
+            MetricsRegistry._merge(
+                counters, histograms,
+                {(name, tuple(map(tuple, labels))): value for name, labels, value in snapshot['counters']},
+                {(name, tuple(map(tuple, labels))): series for name, labels, series in snapshot['histograms']},
+            )
+        return self.registry.render((counters, histograms))
+
+    def _publish_periodically(self) -> None:
+        while True:
+            time.sleep(self.publish_interval)
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error("Could not share this worker's metrics: %s", str(e))
+
+
+# The process-wide registry
+metrics = MetricsRegistry()
+
+metrics.describe("http_requests_total", "counter", "HTTP requests by route, method and status.")
+metrics.describe("http_request_errors_total", "counter", "HTTP requests that returned a 5xx status.")
+metrics.describe("http_request_duration_seconds", "histogram", "HTTP request latency by route.")
+
+
+def _record_request(request: Any, response: "Response", start: Optional[float]) -> None:
+    """
+    Records a finished request's count, error and latency under its route.
+    """
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    metrics.inc("http_requests_total", method=request.method, route=route, status=str(response.status_code))
+    if response.status_code >= 500:
+        metrics.inc("http_request_errors_total", method=request.method, route=route)
+    if start is not None:
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start, method=request.method, route=route)
+
+def instrument_app(app: "Flask") -> None:
+    """
+    Registers request hooks recording count, errors and latency per route.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    # Imported here so the models can record metrics without loading Flask
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer() -> None:
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response: "Response") -> "Response":
+        _record_request(request, response, g.pop("metrics_request_start", None))
+        return response
+
+def instrument_asgi_app(app: "Quart") -> None:
+    """
+    Registers the same request hooks as instrument_app on a Quart application, as coroutines,
+    since Quart runs plain functions on a thread pool.
+
+    Args:
+        app (Quart): The application to instrument.
+    """
+    from quart import g, request
+
+    @app.before_request
+    async def _start_request_timer() -> None:
+        g.metrics_request_start = time.perf_counter()
+
+    @app.after_request
+    async def _record_request_metrics(response: "Response") -> "Response":
+        _record_request(request, response, g.pop("metrics_request_start", None))
+        return response
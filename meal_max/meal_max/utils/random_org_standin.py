@@ -0,0 +1,241 @@
+"""
+Local stand-in for the random.org endpoints used by random_utils, for testing how the app
+behaves when random.org is slow, failing, throttled or returning garbage.
+
+It answers /integers/ and /decimal-fractions/ like random.org's plain-text API, one number per
+line. Latency, error and garbage rates and a request quota are configurable, and can be changed
+while it runs. Point RANDOM_ORG_BASE_URL at it:
+
+    python -m meal_max.utils.random_org_standin --port 8001 --latency lognormal:80,0.5 --error-rate 0.05
+    RANDOM_ORG_BASE_URL=http://127.0.0.1:8001 python app.py
+
+Latency specs, in milliseconds: 'fixed:MS', 'uniform:LOW,HIGH', 'normal:MEAN,STDDEV',
+'lognormal:MEDIAN,SIGMA' and 'exponential:MEAN'.
+"""
+import argparse
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+LATENCY_DISTRIBUTIONS: Dict[str, Callable[..., Callable[[random.Random], float]]] = {
+    "fixed": lambda ms: lambda rng: ms,
+    "uniform": lambda low, high: lambda rng: rng.uniform(low, high),
+    "normal": lambda mean, stddev: lambda rng: max(rng.gauss(mean, stddev), 0),
+    "lognormal": lambda median, sigma: lambda rng: rng.lognormvariate(math.log(median), sigma),
+    "exponential": lambda mean: lambda rng: rng.expovariate(1 / mean),
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parses a latency spec such as 'lognormal:80,0.5' into a sampler returning milliseconds.
+
+    Args:
+        spec (str): The distribution name and its comma-separated parameters.
+
+    Returns:
+        Callable[[random.Random], float]: Draws one latency in milliseconds.
+
+    Raises:
+        ValueError: If the distribution is unknown or its parameters are invalid.
+    """
+    name, _, params = spec.partition(":")
+    if name not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"Invalid latency distribution: {name}. Must be one of {', '.join(LATENCY_DISTRIBUTIONS)}.")
+    try:
+        return LATENCY_DISTRIBUTIONS[name](*(float(param) for param in params.split(",") if param))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid latency parameters for {name}: {params}")
+
+
+@dataclass
+class StandInConfig:
+    """
+    How the stand-in misbehaves. Rates are probabilities per request.
+
+    Attributes:
+        latency (str): The latency spec, see parse_latency. Defaults to 'fixed:0'.
+        error_rate (float): The share of requests answered with error_status.
+        error_status (int): The HTTP status of injected errors. Defaults to 503.
+        garbage_rate (float): The share of requests answered 200 with a body that is not a number.
+        quota (int, optional): Requests served per quota period before answering 503, like
+            random.org once an allowance is used up. None for no quota.
+        quota_period (float, optional): Seconds after which the quota is replenished. None to never replenish.
+        seed (int, optional): The random seed, for reproducible latencies and failures.
+    """
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_status: int = 503
+    garbage_rate: float = 0.0
+    quota: Optional[int] = None
+    quota_period: Optional[float] = None
+    seed: Optional[int] = None
+
+
+class RandomOrgStandIn:
+    """
+    A threaded HTTP server answering random.org requests as configured.
+
+    Attributes:
+        config (StandInConfig): The behavior; assign a new config to change it while running.
+        stats (Dict[str, int]): Requests served by outcome: 'ok', 'error', 'garbage' and 'quota'.
+    """
+
+    def __init__(self, config: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        self.config = config or StandInConfig()
+        self.stats = {"ok": 0, "error": 0, "garbage": 0, "quota": 0}
+
+    @property
+    def config(self) -> StandInConfig:
+        return self._config
+
+    @config.setter
+    def config(self, config: StandInConfig) -> None:
+        with self._lock:
+            self._config = config
+            self._latency = parse_latency(config.latency)
+            self._rng = random.Random(config.seed)
+            self._quota_used = 0
+            self._quota_started = time.monotonic()
+
+    @property
+    def base_url(self) -> str:
+        """
+        The URL to set as RANDOM_ORG_BASE_URL.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "RandomOrgStandIn":
+        """
+        Serves requests from a daemon thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name="random-org-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops serving and closes the socket.
+        """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "RandomOrgStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _decide(self) -> tuple:
+        """
+        Draws the latency and outcome of one request.
+        """
+        with self._lock:
+            config = self._config
+            rng = self._rng
+            latency = self._latency(rng) / 1000
+
+            if config.quota_period is not None and time.monotonic() - self._quota_started >= config.quota_period:
+                self._quota_used = 0
+                self._quota_started = time.monotonic()
+            if config.quota is not None and self._quota_used >= config.quota:
+                outcome = "quota"
+            else:
+                self._quota_used += 1
+                draw = rng.random()
+                if draw < config.error_rate:
+                    outcome = "error"
+                elif draw < config.error_rate + config.garbage_rate:
+                    outcome = "garbage"
+                else:
+                    outcome = "ok"
+            self.stats[outcome] += 1
+            return latency, outcome, config.error_status, rng.random()
+
+    def _handler_class(self) -> type:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as random.org does
+            # Headers and body are written separately; without this, Nagle's algorithm adds ~40 ms per response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                endpoint = url.path.rstrip("/")
+                if endpoint not in ("/integers", "/decimal-fractions"):
+                    self._reply(404, "Error: Unknown endpoint")
+                    return
+
+                latency, outcome, error_status, seed = standin._decide()
+                time.sleep(latency)
+                if outcome == "quota":
+                    self._reply(503, "Error: You have used your daily allowance of randomness.")
+                elif outcome == "error":
+                    self._reply(error_status, "Error: The server is temporarily unable to service your request.")
+                elif outcome == "garbage":
+                    self._reply(200, "<html>garbage</html>")
+                else:
+                    rng = random.Random(seed)
+                    count = int(query.get("num", ["1"])[0])
+                    if endpoint == "/integers":
+                        low, high = int(query["min"][0]), int(query["max"][0])
+                        numbers = [str(rng.randint(low, high)) for _ in range(count)]
+                    else:
+                        digits = int(query.get("dec", ["2"])[0])
+                        numbers = ["%.*f" % (digits, rng.randrange(10 ** digits) / 10 ** digits) for _ in range(count)]
+                    self._reply(200, "\n".join(numbers))
+
+            def _reply(self, status: int, body: str) -> None:
+                data = f"{body}\n".encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0", help="latency spec in ms, e.g. lognormal:80,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--garbage-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=int, help="requests served per quota period before answering 503")
+    parser.add_argument("--quota-period", type=float, help="seconds after which the quota is replenished")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StandInConfig(args.latency, args.error_rate, args.error_status, args.garbage_rate, args.quota, args.quota_period, args.seed)
+    standin = RandomOrgStandIn(config, args.host, args.port).start()
+    print(f"random.org stand-in listening on {standin.base_url}")
+    try:
+        standin._thread.join()
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,181 @@
 import logging
-import requests
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, List
 
+from meal_max.utils.circuit_breaker import CircuitBreaker
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("random_org_request_seconds", "histogram", "Latency of random.org requests by outcome.")
+metrics.describe("random_org_fallbacks_total", "counter", "Random numbers drawn locally because random.org was unavailable.")
 
-def get_random() -> float:
-    url = "https://www.random.org/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+# load the random.org base url from the environment so a local stand-in can replace it
+RANDOM_ORG_BASE_URL = os.getenv("RANDOM_ORG_BASE_URL", "https://www.random.org").rstrip("/")
+
+# Per-attempt timeout, and how many times a timed out or failed (5xx, 429) request is retried
+RANDOM_ORG_TIMEOUT = float(os.getenv("RANDOM_ORG_TIMEOUT", "5"))
+RANDOM_ORG_RETRIES = int(os.getenv("RANDOM_ORG_RETRIES", "2"))
+# Base of the exponential backoff between retries, in seconds; each delay is jittered
+RANDOM_ORG_BACKOFF = float(os.getenv("RANDOM_ORG_BACKOFF", "0.1"))
+# Kept-alive connections to random.org in the shared session's pool
+RANDOM_ORG_POOL_SIZE = int(os.getenv("RANDOM_ORG_POOL_SIZE", "10"))
+# 'local' draws from the operating system's entropy source when random.org is unavailable,
+# 'none' raises instead
+RANDOM_ORG_FALLBACK = os.getenv("RANDOM_ORG_FALLBACK", "none").lower()
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Shared by the sync and async clients, so both stop calling random.org while it is failing
+breaker = CircuitBreaker(
+    "random_org",
+    failure_rate=float(os.getenv("RANDOM_ORG_BREAKER_FAILURE_RATE", "0.5")),
+    reset_timeout=float(os.getenv("RANDOM_ORG_BREAKER_RESET_TIMEOUT", "30")),
+    trial_timeout=RANDOM_ORG_TIMEOUT,
+)
+
+local_random = random.SystemRandom()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the shared requests session, creating it on first use. Its pooled connections are
+    kept alive between calls, so only the first request pays for DNS, TCP and TLS setup.
+
+    Returns:
+        requests.Session: The session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests takes a noticeable share of startup, so it is imported on the first draw
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RANDOM_ORG_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Returns the delay before retry number 'attempt' (from 0): a random fraction of the
+    exponential backoff, so clients that failed together do not retry together.
+    """
+    return random.uniform(0, RANDOM_ORG_BACKOFF * 2 ** attempt)
+
+def parse_numbers(body: str, count: int, number_type: Callable[[str], Any]) -> List[Any]:
+    """
+    Parses a plain text random.org response holding one number per line.
+
+    Args:
+        body (str): The response body.
+        count (int): How many numbers the response must hold.
+        number_type (Callable[[str], Any]): Converts each line, e.g. int or float.
+
+    Returns:
+        List[Any]: The numbers.
+
+    Raises:
+        ValueError: If a line is not a valid number, or there are not 'count' of them.
+    """
+    try:
+        numbers = [number_type(line) for line in body.split()]
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % body)
+    if len(numbers) != count:
+        raise ValueError("Expected %d numbers from random.org, received %d" % (count, len(numbers)))
+    return numbers
+
+def fetch(url: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Fetches a random.org URL through the circuit breaker, retrying timeouts and server errors.
+
+    The body is parsed before the call is reported to the breaker, so a response that cannot
+    be parsed counts as a failure.
+
+    Args:
+        url (str): The URL to fetch.
+        parse (Callable[[str], Any]): Parses the stripped response body.
+
+    Returns:
+        Any: The parsed response.
+
+    Raises:
+        RuntimeError: If the breaker is open, or the request still fails after the retries.
+        ValueError: If the response cannot be parsed; it is not retried.
+    """
+    import requests
 
-""" Retrieves a random decimal number from random.org
-    Sends a GET request to the random.org API to obtain a random decimal fraction. 
-    Logs the process and handles any errors that may occur, raising an exception if the 
+    if not breaker.allow():
+        logger.error("Circuit breaker for random.org is open, not sending the request.")
+        raise RuntimeError("Request to random.org failed: circuit breaker is open")
+
+    attempt = 0
+    while True:
+        # Log the request to random.org
+        logger.info("Fetching random number from %s", url)
+
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, timeout=RANDOM_ORG_TIMEOUT)
+
+            # Check if the request was successful
+            response.raise_for_status()
+            result = parse(response.text.strip())
+        except requests.exceptions.RequestException as e:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
+
+            status_code = getattr(e.response, "status_code", None)
+            retryable = isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)) or status_code in RETRY_STATUS_CODES
+            if retryable and attempt < RANDOM_ORG_RETRIES and breaker.allow():
+                delay = backoff_delay(attempt)
+                logger.warning("Request to random.org failed (%s), retrying in %.3f seconds", e, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if isinstance(e, requests.exceptions.Timeout):
+                logger.error("Request to random.org timed out.")
+                raise RuntimeError("Request to random.org timed out.")
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+        except Exception:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted, not failed: record nothing, but never leave a half open trial in flight
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="cancelled")
+            breaker.release_trial()
+            raise
+
+        metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="success")
+        breaker.record_success()
+        return result
+
+
+def get_random() -> float:
+    """ Retrieves a random decimal number from random.org
+    Sends a GET request to the random.org API to obtain a random decimal fraction.
+    Logs the process and handles any errors that may occur, raising an exception if the
     request fails or if the response cannot be parsed to a float.
 
-    Returns: 
+    If random.org is unavailable or its response is invalid and RANDOM_ORG_FALLBACK is 'local',
+    the number is drawn from the operating system's entropy source instead.
+
+    Returns:
         float: a random decimal number provided by random.org
     Raises:
         ValueError: Raised if the response from random.org is not a valid float.
@@ -23,31 +183,48 @@ def get_random() -> float:
     Ex:
         >>> random_value = get_random()
         >>> print(f"Random value: {random_value}"
-"""
-    
+    """
+    url = f"{RANDOM_ORG_BASE_URL}/decimal-fractions/?num=1&dec=2&col=1&format=plain&rnd=new"
+
     try:
-        # Log the request to random.org
-        logger.info("Fetching random number from %s", url)
+        random_number = fetch(url, lambda body: parse_numbers(body, 1, float)[0])
+    except (RuntimeError, ValueError) as e:
+        if RANDOM_ORG_FALLBACK != "local":
+            raise
+        metrics.inc("random_org_fallbacks_total")
+        random_number = local_random.randint(0, 99) / 100
+        logger.warning("random.org unavailable (%s), drew %.2f locally", e, random_number)
+        return random_number
 
-        response = requests.get(url, timeout=5)
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
 
-        # Check if the request was successful
-        response.raise_for_status()
 
-        random_number_str = response.text.strip()
+def get_random_batch(count: int) -> List[float]:
+    """ Retrieves several random decimal numbers from random.org in a single request,
+    falling back like get_random.
 
-        try:
-            random_number = float(random_number_str)
-        except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+    Args:
+        count (int): How many numbers to fetch, between 1 and 10000.
+    Returns:
+        List[float]: 'count' random decimal numbers provided by random.org
+    Raises:
+        ValueError: Raised if 'count' is out of range or the response is not 'count' valid floats.
+        RuntimeError: Raised if the request times out or fails due to a connection issue.
+    """
+    if not 1 <= count <= 10000:
+        raise ValueError(f"Invalid count: {count}. Must be between 1 and 10000.")
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+    url = f"{RANDOM_ORG_BASE_URL}/decimal-fractions/?num={count}&dec=2&col=1&format=plain&rnd=new"
 
-    except requests.exceptions.Timeout:
-        logger.error("Request to random.org timed out.")
-        raise RuntimeError("Request to random.org timed out.")
+    try:
+        random_numbers = fetch(url, lambda body: parse_numbers(body, count, float))
+    except (RuntimeError, ValueError) as e:
+        if RANDOM_ORG_FALLBACK != "local":
+            raise
+        metrics.inc("random_org_fallbacks_total", count)
+        logger.warning("random.org unavailable (%s), drew %d numbers locally", e, count)
+        return [local_random.randint(0, 99) / 100 for _ in range(count)]
 
-    except requests.exceptions.RequestException as e:
-        logger.error("Request to random.org failed: %s", e)
-        raise RuntimeError("Request to random.org failed: %s" % e)
+    logger.info("Received %d random numbers", count)
+    return random_numbers
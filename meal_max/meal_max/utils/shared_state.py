@@ -0,0 +1,189 @@
+from contextlib import contextmanager
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import DB_PATH
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# load the shared state db path from the environment, next to the catalog by default
+SHARED_STATE_DB_PATH = os.getenv("SHARED_STATE_DB_PATH", os.path.join(os.path.dirname(DB_PATH), "shared_state.db"))
+
+# How long a worker waits for another worker's transaction before giving up
+SHARED_STATE_TIMEOUT = float(os.getenv("SHARED_STATE_TIMEOUT", "30"))
+
+SHARED_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+# Holds the wall-clock time of the namespace's last write transaction, by any process; not part of the state
+TOUCHED_KEY = "__touched_at__"
+
+# Each thread's connection per shared state database, see SharedStateStore._get_connection
+_thread_connections = threading.local()
+
+
+class SharedStateStore:
+    """
+    JSON values kept in a SQLite table so that several worker processes can share in-flight state.
+
+    Every transaction loads the whole namespace and writes back only the keys that changed.
+    Write transactions take SQLite's write lock up front (BEGIN IMMEDIATE), so concurrent
+    read-modify-write cycles from different processes are serialized. Within a process,
+    transactions are serialized by a lock, since the models load the state into shared attributes.
+    Each write transaction also records when it ran, so clear() can tell a namespace still
+    written by some process from an abandoned one.
+
+    Attributes:
+        db_path (str): The SQLite database holding the state.
+        namespace (str): The namespace whose keys this store reads and writes.
+    """
+
+    def __init__(self, namespace: str, db_path: Optional[str] = None):
+        self.namespace = namespace
+        self.db_path = db_path or SHARED_STATE_DB_PATH
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Returns this thread's connection to the database, opening a new one in a freshly forked
+        worker. Stores on the same database share it, so many namespaces cost no extra connections.
+        """
+        connections = getattr(_thread_connections, "by_path", None)
+        if connections is None or _thread_connections.pid != os.getpid():
+            connections = _thread_connections.by_path = {}
+            _thread_connections.pid = os.getpid()
+
+        conn = connections.get(self.db_path)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=SHARED_STATE_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SHARED_STATE_SCHEMA)
+            connections[self.db_path] = conn
+        return conn
+
+    def in_transaction(self) -> bool:
+        """
+        Returns whether the calling thread is inside a transaction on this store.
+        """
+        return getattr(self._local, "state", None) is not None
+
+    @contextmanager
+    def transaction(self, write: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Loads the namespace into a dict and, for write transactions, stores any changed keys on exit.
+
+        Args:
+            write (bool): Whether to take the write lock and save changes. Defaults to True.
+
+        Yields:
+            Dict[str, Any]: The decoded state, to be read and updated in place.
+
+        Raises:
+            sqlite3.Error: If the state cannot be read or written; nothing is saved.
+        """
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                rows = conn.execute("SELECT key, value FROM shared_state WHERE namespace = ?", (self.namespace,)).fetchall()
+                stored = dict(rows)
+                stored.pop(TOUCHED_KEY, None)
+                state = {key: json.loads(value) for key, value in stored.items()}
+                self._local.state = state
+                yield state
+
+                if write:
+                    for key, value in state.items():
+                        encoded = json.dumps(value)
+                        if stored.get(key) != encoded:
+                            conn.execute(
+                                "INSERT OR REPLACE INTO shared_state (namespace, key, value) VALUES (?, ?, ?)",
+                                (self.namespace, key, encoded)
+                            )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO shared_state (namespace, key, value) VALUES (?, ?, ?)",
+                        (self.namespace, TOUCHED_KEY, json.dumps(time.time()))
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._local.state = None
+
+    def clear(self, idle_for: Optional[float] = None) -> bool:
+        """
+        Deletes every key of the namespace, e.g. once nothing will read it again.
+
+        Args:
+            idle_for (float, optional): Only delete the namespace if no process has written to it
+                for this many seconds, so a process done with it cannot wipe state that another
+                process is still using. Defaults to None (delete unconditionally).
+
+        Returns:
+            bool: Whether the namespace was deleted.
+
+        Raises:
+            sqlite3.Error: If the state cannot be deleted.
+        """
+        with self._lock:
+            conn = self._get_connection()
+            if idle_for is None:
+                cursor = conn.execute("DELETE FROM shared_state WHERE namespace = ?", (self.namespace,))
+                return cursor.rowcount > 0
+            cursor = conn.execute(
+                """
+                DELETE FROM shared_state WHERE namespace = ? AND NOT EXISTS (
+                    SELECT 1 FROM shared_state WHERE namespace = ? AND key = ? AND CAST(value AS REAL) > ?
+                )
+                """,
+                (self.namespace, self.namespace, TOUCHED_KEY, time.time() - idle_for)
+            )
+            return cursor.rowcount > 0
+
+
+def shared_method(write: bool = True) -> Callable:
+    """
+    Decorator running a model method inside a transaction on the model's state store.
+
+    The model must have a 'store' attribute and 'load_state'/'save_state' methods. The outermost
+    call loads the shared state into the model, runs the method and, for writes, saves the model's
+    state back; nested calls from inside the method run directly against the loaded state.
+
+    Args:
+        write (bool): Whether the method changes the state. Defaults to True.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.store.in_transaction():
+                return method(self, *args, **kwargs)
+            try:
+                with self.store.transaction(write=write) as state:
+                    self.load_state(state)
+                    result = method(self, *args, **kwargs)
+                    if write:
+                        self.save_state(state)
+                    return result
+            except sqlite3.Error as e:
+                logger.error("Shared state error in %s: %s", method.__name__, str(e))
+                raise e
+        return wrapper
+    return decorator
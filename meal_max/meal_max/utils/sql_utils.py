@@ -1,41 +1,289 @@
+from collections import deque
 from contextlib import contextmanager
+from functools import lru_cache
 import logging
+import math
 import os
+import re
 import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Optional
 
 from meal_max.utils.logger import configure_logger
+from meal_max.utils.metrics import metrics
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("db_connect_seconds", "histogram", "Time to open a SQLite connection.")
+metrics.describe("db_connection_seconds", "histogram", "Time a SQLite connection was held open, covering its queries.")
+metrics.describe("db_connection_reuses_total", "counter", "get_db_connection calls served by the current request's connection.")
+metrics.describe("db_errors_total", "counter", "SQLite errors raised inside get_db_connection.")
+metrics.describe("db_statement_seconds", "histogram", "Duration of traced SQL statements by calling function.")
+
+# Statements slower than the threshold are written to this logger
+slow_query_logger = logging.getLogger(f"{__name__}.slow_query")
 
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# Statement tracing is off unless enabled in the environment or per connection
+SQL_TRACE = os.getenv("SQL_TRACE", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
 
-def check_database_connection():
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # This ensures the connection is actually active
-        cursor.execute("SELECT 1;")
-        conn.close()
-    except sqlite3.Error as e:
-        error_message = f"Database connection error: {e}"
-        logger.error(error_message)
-        raise Exception(error_message) from e
+# Marks apps set up by use_request_connections, and names the flask.g attribute holding the request's connection
+REQUEST_CONNECTION_KEY = "request_db_connection"
 
-def check_table_exists(tablename: str):
-    try:
+
+###################################################
+#
+# Statement tracing
+#
+###################################################
+
+@lru_cache(maxsize=512)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals with '?' so equivalent statements group together
+
+    Args:
+        sql (str): The SQL statement
+
+    Returns:
+        str: The normalized statement
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class StatementStats:
+    """
+    Thread-safe summary of traced statement timings and a bounded slow-query log.
+
+    Attributes:
+        sample_size (int): The number of recent durations kept per statement for percentiles.
+        slow_queries (deque): The most recent slow statements, newest last.
+    """
+
+    def __init__(self, sample_size: int = 1000, slow_query_log_size: int = 100):
+        self.sample_size = sample_size
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self._lock = threading.Lock()
+        self._statements = {}  # normalized sql -> [count, total seconds, recent durations]
+
+    def record(self, sql: str, duration: float, caller: str) -> None:
+        """Record one execution of a statement
+
+        Args:
+            sql (str): The normalized SQL statement
+            duration (float): The execution time in seconds, including fetching its rows
+            caller (str): The module and function that issued the statement
+        """
+        with self._lock:
+            entry = self._statements.get(sql)
+            if entry is None:
+                entry = self._statements[sql] = [0, 0.0, deque(maxlen=self.sample_size)]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2].append(duration)
+
+        if duration * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+            self.slow_queries.append({'sql': sql, 'caller': caller, 'duration_ms': round(duration * 1000, 3), 'timestamp': time.time()})
+            slow_query_logger.warning("Slow query (%.1f ms) from %s: %s", duration * 1000, caller, sql)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Summarize every traced statement, slowest total time first
+
+        Returns:
+            list[dict]: One entry per statement with count, total_ms, avg_ms and p95_ms
+        """
+        with self._lock:
+            entries = [(sql, count, total, sorted(samples)) for sql, (count, total, samples) in self._statements.items()]
+
+        summary = []
+        for sql, count, total, samples in entries:
+            p95 = samples[max(math.ceil(len(samples) * 0.95) - 1, 0)]
+            summary.append({
+                'sql': sql,
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'avg_ms': round(total * 1000 / count, 3),
+                'p95_ms': round(p95 * 1000, 3),
+            })
+        summary.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return summary
+
+    def reset(self) -> None:
+        """Clear all statement timings and the slow-query log"""
+        with self._lock:
+            self._statements.clear()
+            self.slow_queries.clear()
+
+
+statement_stats = StatementStats()
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement from execute() until its rows have been fetched.
+
+    A statement is recorded when the next one is executed on the cursor or when the
+    cursor (or its connection) is closed, so the time spent fetching rows counts too.
+    """
+
+    _pending = None  # [normalized sql, elapsed seconds, caller]
+
+    def execute(self, sql: str, parameters=()):
+        self._flush()
+        caller_frame = sys._getframe(1)
+        caller = f"{caller_frame.f_globals.get('__name__')}.{caller_frame.f_code.co_name}"
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [normalize_sql(sql), time.perf_counter() - start, caller]
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._flush()
+        caller_frame = sys._getframe(1)
+        caller = f"{caller_frame.f_globals.get('__name__')}.{caller_frame.f_code.co_name}"
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [normalize_sql(sql), time.perf_counter() - start, caller]
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._add_fetch_time(time.perf_counter() - start)
+
+    def fetchmany(self, size: Optional[int] = None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._add_fetch_time(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._add_fetch_time(time.perf_counter() - start)
+
+    def close(self):
+        self._flush()
+        super().close()
+
+    def _add_fetch_time(self, elapsed: float) -> None:
+        if self._pending is not None:
+            self._pending[1] += elapsed
+
+    def _flush(self) -> None:
+        if self._pending is not None:
+            sql, elapsed, caller = self._pending
+            self._pending = None
+            statement_stats.record(sql, elapsed, caller)
+            metrics.observe("db_statement_seconds", elapsed, caller=caller)
+
+
+class TracedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are TracedCursors. Pending statement timings are
+    recorded when the connection is closed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = []
+
+    def cursor(self, factory=TracedCursor):
+        cursor = super().cursor(factory)
+        self._cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        for cursor in self._cursors:
+            cursor._flush()
+        self._cursors.clear()
+        super().close()
+
+
+###################################################
+#
+# Request-scoped connections
+#
+###################################################
+
+class _RequestConnection:
+    """
+    The connection shared by one request's get_db_connection calls.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, connected: float, traced: bool):
+        self.conn = conn
+        self.connected = connected
+        self.traced = traced
+        self.depth = 0  # the number of get_db_connection blocks currently using it
+
+
+def _request_globals():
+    """
+    Returns flask.g while serving a request of an app set up with use_request_connections, else None.
+    """
+    # Only consult Flask if something already imported it, so the models load without it
+    flask = sys.modules.get("flask")
+    if flask is None or not flask.has_request_context() or REQUEST_CONNECTION_KEY not in flask.current_app.extensions:
+        return None
+    return flask.g
+
+
+def close_request_connection(exc: Optional[BaseException] = None) -> None:
+    """
+    Closes the current request's connection, if it opened one.
+    """
+    flask = sys.modules.get("flask")
+    if flask is None or not flask.has_app_context():
+        return
+    shared = flask.g.pop(REQUEST_CONNECTION_KEY, None)
+    if shared is not None:
+        shared.conn.close()
+        metrics.observe("db_connection_seconds", time.perf_counter() - shared.connected)
+        logger.info("Database connection closed.")
+
+
+def use_request_connections(app) -> None:
+    """
+    Makes the get_db_connection calls of each request share one connection, so a route
+    calling several model functions connects once. The connection is closed when the
+    request's app context is torn down.
+
+    Args:
+        app (Flask): The application.
+    """
+    app.extensions[REQUEST_CONNECTION_KEY] = True
+    app.teardown_appcontext(close_request_connection)
+
+
+def _connect(trace: bool) -> tuple:
+    """
+    Opens a connection, returning it with the time.perf_counter() at which it was opened.
+    """
+    start = time.perf_counter()
+    if trace:
+        conn = sqlite3.connect(DB_PATH, factory=TracedConnection)
+    else:
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT 1 FROM {tablename} LIMIT 1;")
-        conn.close()
-    except sqlite3.Error as e:
-        error_message = f"Table check error: {e}"
-        logger.error(error_message)
-        raise Exception(error_message) from e
+    connected = time.perf_counter()
+    metrics.observe("db_connect_seconds", connected - start)
+    return conn, connected
+
 
 ###################################################
 #
@@ -44,15 +292,41 @@ def check_table_exists(tablename: str):
 #
 ###################################################
 @contextmanager
-def get_db_connection():
+def get_db_connection(trace: Optional[bool] = None):
+    if trace is None:
+        trace = SQL_TRACE
+
     conn = None
+    shared = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        yield conn
+        request_globals = _request_globals()
+        if request_globals is not None:
+            shared = request_globals.get(REQUEST_CONNECTION_KEY)
+            if shared is None:
+                shared = _RequestConnection(*_connect(trace), trace)
+                setattr(request_globals, REQUEST_CONNECTION_KEY, shared)
+            elif shared.traced == trace:
+                metrics.inc("db_connection_reuses_total")
+            else:
+                # The request's connection is traced differently, so this call gets its own
+                shared = None
+
+        if shared is not None:
+            shared.depth += 1
+            yield shared.conn
+        else:
+            conn, connected = _connect(trace)
+            yield conn
     except sqlite3.Error as e:
+        metrics.inc("db_errors_total")
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
-        if conn:
+        if shared is not None:
+            shared.depth -= 1
+            if shared.depth == 0 and shared.conn.in_transaction:
+                shared.conn.rollback()
+        elif conn:
             conn.close()
+            metrics.observe("db_connection_seconds", time.perf_counter() - connected)
             logger.info("Database connection closed.")
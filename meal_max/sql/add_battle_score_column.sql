@@ -0,0 +1,7 @@
+-- Adds battle_score to a meals table created before it existed. SQLite can only add a generated
+-- column as VIRTUAL, so it is computed on read rather than stored, with the same expression as
+-- create_meal_table.sql. ALTER TABLE has no IF NOT EXISTS, so migrate_db.sh only runs this when
+-- the column is missing.
+ALTER TABLE meals ADD COLUMN battle_score REAL GENERATED ALWAYS AS (
+    price * length(cuisine) - CASE difficulty WHEN 'HIGH' THEN 1 WHEN 'MED' THEN 2 ELSE 3 END
+) VIRTUAL;
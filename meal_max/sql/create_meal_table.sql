@@ -1,11 +1,59 @@
+DROP TABLE IF EXISTS meal_stats;
 DROP TABLE IF EXISTS meals;
 CREATE TABLE meals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     meal TEXT NOT NULL UNIQUE,
     cuisine TEXT NOT NULL,
-    price REAL NOT NULL,
+    price REAL NOT NULL CHECK(price > 0),
     difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
-    deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+    deleted BOOLEAN DEFAULT FALSE,
+    -- What BattleModel scores a meal at, stored so battles read it and meals can be matched by score
+    battle_score REAL GENERATED ALWAYS AS (
+        price * length(cuisine) - CASE difficulty WHEN 'HIGH' THEN 1 WHEN 'MED' THEN 2 ELSE 3 END
+    ) STORED
+);
+
+-- Score range queries over the meals that can still battle
+CREATE INDEX meals_battle_score ON meals (battle_score) WHERE deleted = FALSE;
+
+-- Running totals over the non-deleted meals of each cuisine and each difficulty
+CREATE TABLE meal_stats (
+    dimension TEXT NOT NULL CHECK(dimension IN ('cuisine', 'difficulty')),
+    value TEXT NOT NULL,
+    meals INTEGER NOT NULL DEFAULT 0,
+    total_price REAL NOT NULL DEFAULT 0,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER meal_stats_insert AFTER INSERT ON meals WHEN NOT NEW.deleted BEGIN
+    INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+    VALUES ('cuisine', NEW.cuisine, 1, NEW.price, NEW.battles, NEW.wins), ('difficulty', NEW.difficulty, 1, NEW.price, NEW.battles, NEW.wins)
+    ON CONFLICT (dimension, value) DO UPDATE SET
+        meals = meals + 1, total_price = total_price + excluded.total_price,
+        battles = battles + excluded.battles, wins = wins + excluded.wins;
+END;
+
+-- Battle results and soft deletes move the old row's contribution out and the new row's in
+CREATE TRIGGER meal_stats_update AFTER UPDATE OF cuisine, price, difficulty, battles, wins, deleted ON meals BEGIN
+    UPDATE meal_stats SET
+        meals = meals - 1, total_price = total_price - OLD.price, battles = battles - OLD.battles, wins = wins - OLD.wins
+    WHERE NOT OLD.deleted
+        AND ((dimension = 'cuisine' AND value = OLD.cuisine) OR (dimension = 'difficulty' AND value = OLD.difficulty));
+    INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+    SELECT dimension, value, 1, NEW.price, NEW.battles, NEW.wins
+    FROM (SELECT 'cuisine' AS dimension, NEW.cuisine AS value UNION ALL SELECT 'difficulty', NEW.difficulty)
+    WHERE NOT NEW.deleted
+    ON CONFLICT (dimension, value) DO UPDATE SET
+        meals = meals + 1, total_price = total_price + excluded.total_price,
+        battles = battles + excluded.battles, wins = wins + excluded.wins;
+END;
+
+CREATE TRIGGER meal_stats_delete AFTER DELETE ON meals WHEN NOT OLD.deleted BEGIN
+    UPDATE meal_stats SET
+        meals = meals - 1, total_price = total_price - OLD.price, battles = battles - OLD.battles, wins = wins - OLD.wins
+    WHERE (dimension = 'cuisine' AND value = OLD.cuisine) OR (dimension = 'difficulty' AND value = OLD.difficulty);
+END;
@@ -0,0 +1,18 @@
+#!/bin/bash
+
+# Applies the idempotent schema migrations to an existing database, so one created by an
+# older create_meal_table.sql gains the newer columns, tables and triggers
+if [ -f "$DB_PATH" ]; then
+    echo "Migrating database at $DB_PATH."
+    if [ -z "$(sqlite3 "$DB_PATH" "SELECT 1 FROM sqlite_master WHERE name = 'meals' AND sql LIKE '%CHECK(price > 0)%'")" ]; then
+        if ! sqlite3 -bail "$DB_PATH" < /app/sql/rebuild_meal_table.sql; then
+            echo "Could not add the price check to the meals table; fix the meals without a positive price and restart."
+            exit 1
+        fi
+    fi
+    if [ -z "$(sqlite3 "$DB_PATH" "SELECT 1 FROM pragma_table_xinfo('meals') WHERE name = 'battle_score'")" ]; then
+        sqlite3 "$DB_PATH" < /app/sql/add_battle_score_column.sql
+    fi
+    sqlite3 "$DB_PATH" < /app/sql/migrate_meal_table.sql
+    echo "Database migrated successfully."
+fi
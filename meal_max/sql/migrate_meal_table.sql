@@ -0,0 +1,53 @@
+-- Brings a database created by an older create_meal_table.sql up to the current schema.
+-- Every statement is safe to run again, so entrypoint.sh applies it on each start.
+
+-- Score range queries over the meals that can still battle; needs the battle_score column,
+-- which migrate_db.sh adds first
+CREATE INDEX IF NOT EXISTS meals_battle_score ON meals (battle_score) WHERE deleted = FALSE;
+
+-- Running totals over the non-deleted meals of each cuisine and each difficulty
+CREATE TABLE IF NOT EXISTS meal_stats (
+    dimension TEXT NOT NULL CHECK(dimension IN ('cuisine', 'difficulty')),
+    value TEXT NOT NULL,
+    meals INTEGER NOT NULL DEFAULT 0,
+    total_price REAL NOT NULL DEFAULT 0,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS meal_stats_insert AFTER INSERT ON meals WHEN NOT NEW.deleted BEGIN
+    INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+    VALUES ('cuisine', NEW.cuisine, 1, NEW.price, NEW.battles, NEW.wins), ('difficulty', NEW.difficulty, 1, NEW.price, NEW.battles, NEW.wins)
+    ON CONFLICT (dimension, value) DO UPDATE SET
+        meals = meals + 1, total_price = total_price + excluded.total_price,
+        battles = battles + excluded.battles, wins = wins + excluded.wins;
+END;
+
+-- Battle results and soft deletes move the old row's contribution out and the new row's in
+CREATE TRIGGER IF NOT EXISTS meal_stats_update AFTER UPDATE OF cuisine, price, difficulty, battles, wins, deleted ON meals BEGIN
+    UPDATE meal_stats SET
+        meals = meals - 1, total_price = total_price - OLD.price, battles = battles - OLD.battles, wins = wins - OLD.wins
+    WHERE NOT OLD.deleted
+        AND ((dimension = 'cuisine' AND value = OLD.cuisine) OR (dimension = 'difficulty' AND value = OLD.difficulty));
+    INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+    SELECT dimension, value, 1, NEW.price, NEW.battles, NEW.wins
+    FROM (SELECT 'cuisine' AS dimension, NEW.cuisine AS value UNION ALL SELECT 'difficulty', NEW.difficulty)
+    WHERE NOT NEW.deleted
+    ON CONFLICT (dimension, value) DO UPDATE SET
+        meals = meals + 1, total_price = total_price + excluded.total_price,
+        battles = battles + excluded.battles, wins = wins + excluded.wins;
+END;
+
+CREATE TRIGGER IF NOT EXISTS meal_stats_delete AFTER DELETE ON meals WHEN NOT OLD.deleted BEGIN
+    UPDATE meal_stats SET
+        meals = meals - 1, total_price = total_price - OLD.price, battles = battles - OLD.battles, wins = wins - OLD.wins
+    WHERE (dimension = 'cuisine' AND value = OLD.cuisine) OR (dimension = 'difficulty' AND value = OLD.difficulty);
+END;
+
+-- Totals for the meals that predate the triggers; recomputed from scratch so a re-run is harmless
+DELETE FROM meal_stats;
+INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+SELECT 'cuisine', cuisine, COUNT(*), SUM(price), SUM(battles), SUM(wins) FROM meals WHERE deleted = FALSE GROUP BY cuisine;
+INSERT INTO meal_stats (dimension, value, meals, total_price, battles, wins)
+SELECT 'difficulty', difficulty, COUNT(*), SUM(price), SUM(battles), SUM(wins) FROM meals WHERE deleted = FALSE GROUP BY difficulty;
@@ -0,0 +1,34 @@
+-- Rebuilds a meals table created before create_meal_table.sql checked prices, so it gains
+-- CHECK(price > 0) and a STORED battle_score; SQLite cannot add a constraint to an existing
+-- table. migrate_db.sh only runs this when the constraint is missing. A stored meal without a
+-- positive price fails the copy, and as migrate_db.sh stops at the first error, the transaction
+-- is rolled back and the table left as it was.
+-- The indexes and triggers dropped with the old table are recreated by migrate_meal_table.sql.
+BEGIN;
+
+CREATE TABLE meals_rebuilt (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    meal TEXT NOT NULL UNIQUE,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL CHECK(price > 0),
+    difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
+    battles INTEGER DEFAULT 0,
+    wins INTEGER DEFAULT 0,
+    deleted BOOLEAN DEFAULT FALSE,
+    -- What BattleModel scores a meal at, stored so battles read it and meals can be matched by score
+    battle_score REAL GENERATED ALWAYS AS (
+        price * length(cuisine) - CASE difficulty WHEN 'HIGH' THEN 1 WHEN 'MED' THEN 2 ELSE 3 END
+    ) STORED
+);
+
+INSERT INTO meals_rebuilt (id, meal, cuisine, price, difficulty, battles, wins, deleted)
+SELECT id, meal, cuisine, price, difficulty, battles, wins, deleted FROM meals;
+
+-- Ids of meals removed from the old table are not handed out again
+DELETE FROM sqlite_sequence WHERE name = 'meals_rebuilt';
+INSERT INTO sqlite_sequence (name, seq) SELECT 'meals_rebuilt', seq FROM sqlite_sequence WHERE name = 'meals';
+
+DROP TABLE meals;
+ALTER TABLE meals_rebuilt RENAME TO meals;
+
+COMMIT;
@@ -0,0 +1,75 @@
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.utils import random_utils
+from meal_max.utils.circuit_breaker import CircuitBreaker
+from meal_max.utils.random_org_standin import RandomOrgStandIn
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_meal_table.sql"
+
+
+@pytest.fixture
+def meal_db(tmp_path, mocker):
+    """Fixture pointing kitchen_model at a fresh database built from sql/create_meal_table.sql."""
+    db_path = tmp_path / "meal_max.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture
+def client(meal_db, mocker):
+    """Fixture providing a test client for the app, with fresh arenas and battle jobs on the test database."""
+    import app as app_module
+    from meal_max.models.arena_registry import ArenaRegistry
+    from meal_max.models.battle_queue import BattleJobQueue
+
+    mocker.patch.object(app_module, "arenas", ArenaRegistry())
+    mocker.patch.object(app_module, "battle_jobs", BattleJobQueue())
+    return app_module.app.test_client()
+
+@pytest.fixture
+def asgi_app_module(meal_db, mocker):
+    """Fixture providing the ASGI app's module, with fresh arenas, battle jobs, meal name index and metrics on the test database.
+
+    Tests run their requests through serve(), which needs the event loop the app is served on.
+    """
+    import asgi_app
+    from meal_max.models.arena_registry import ArenaRegistry
+    from meal_max.models.battle_queue import BattleJobQueue
+    from meal_max.models.meal_name_index import MealNameIndex
+    from meal_max.utils import metrics as metrics_module
+
+    registry = metrics_module.MetricsRegistry()
+    mocker.patch.object(metrics_module, "metrics", registry)
+    mocker.patch.object(asgi_app, "metrics", registry)
+    mocker.patch.object(asgi_app, "arenas", ArenaRegistry())
+    mocker.patch.object(asgi_app, "battle_jobs", BattleJobQueue())
+    index = mocker.patch.object(asgi_app, "meal_name_index", MealNameIndex())
+    yield asgi_app
+    index.close()
+
+@pytest.fixture
+def scored_meals(meal_db):
+    """Fixture storing LOW difficulty meals of a one-letter cuisine, so each scores its price minus 3."""
+    for meal, score in [("Meal", 50), ("Near", 52), ("Far", 60), ("Deleted", 50.5)]:
+        kitchen_model.create_meal(meal, "X", score + 3, "LOW")
+    kitchen_model.delete_meal(kitchen_model.get_meal_by_name("Deleted").id)
+
+@pytest.fixture
+def random_org(mocker):
+    """Fixture running the local random.org stand-in, with random_utils pointed at it.
+
+    Tests set random_org.config to make it slow, failing or throttled. Each test gets a
+    fresh circuit breaker, and retries are not delayed.
+    """
+    with RandomOrgStandIn() as standin:
+        mocker.patch.object(random_utils, "RANDOM_ORG_BASE_URL", standin.base_url)
+        mocker.patch.object(random_utils, "RANDOM_ORG_BACKOFF", 0)
+        mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org"))
+        yield standin
@@ -0,0 +1,48 @@
+import pytest
+
+from meal_max.models import kitchen_model
+
+
+######################################################
+#
+#    Matchmaking
+#
+######################################################
+
+
+def test_matchmake_preps_closest_opponent(client, scored_meals):
+    """Test that matchmaking returns the opponents closest first and preps the closest against the meal."""
+    response = client.post("/api/matchmake", json={"meal": "Meal", "k": 5})
+
+    assert response.status_code == 200
+    assert [opponent["meal"] for opponent in response.json["opponents"]] == ["Near", "Far"]
+    assert [combatant["meal"] for combatant in response.json["combatants"]] == ["Meal", "Near"]
+    combatants = client.get("/api/get-combatants").json["combatants"]
+    assert [combatant["meal"] for combatant in combatants] == ["Meal", "Near"]
+
+def test_matchmake_replaces_prepped_combatants(client, scored_meals):
+    """Test that matchmaking replaces combatants already prepped in the arena, leaving other arenas alone."""
+    client.post("/api/prep-combatant", json={"meal": "Far"})
+    client.post("/api/prep-combatant?arena=other", json={"meal": "Far"})
+
+    response = client.post("/api/matchmake", json={"meal": "Near"})
+
+    assert response.status_code == 200
+    assert [combatant["meal"] for combatant in response.json["combatants"]] == ["Near", "Meal"]
+    combatants = client.get("/api/get-combatants?arena=other").json["combatants"]
+    assert [combatant["meal"] for combatant in combatants] == ["Far"]
+
+def test_matchmake_without_opponents(client, meal_db):
+    """Test that matchmaking a meal with no live opponent is rejected and preps nothing."""
+    kitchen_model.create_meal("Lonely", "X", 10, "LOW")
+
+    response = client.post("/api/matchmake", json={"meal": "Lonely"})
+
+    assert response.status_code == 400
+    assert response.json["error"] == "No opponents available for Lonely"
+    assert client.get("/api/get-combatants").json["combatants"] == []
+
+@pytest.mark.parametrize("body", [{}, {"meal": "Meal", "k": 0}, {"meal": "Meal", "k": 101}, {"meal": "Meal", "k": True}, {"meal": "Missing"}])
+def test_matchmake_invalid_request(client, scored_meals, body):
+    """Test that a missing or unknown meal, or an out of range k, is rejected."""
+    assert client.post("/api/matchmake", json=body).status_code == 400
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from meal_max.models.arena_registry import ArenaRegistry
+from meal_max.models.battle_model import BattleModel, SharedBattleModel
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils.shared_state import SharedStateStore
+
+
+IDLE_TIMEOUT = 0.05
+
+
+def worker_arenas(db_path, **kwargs):
+    """Returns a registry of shared-state arenas set up as app.py does in pre-fork mode, standing in for one worker."""
+    arenas = ArenaRegistry(
+        lambda arena_id: SharedBattleModel(SharedStateStore(f"battle:{arena_id}", db_path)),
+        idle_timeout=IDLE_TIMEOUT,
+        on_evict=lambda arena_id, battle_model: battle_model.store.clear(idle_for=arenas.idle_timeout),
+        **kwargs
+    )
+    return arenas
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture providing the path of a shared state database."""
+    return str(tmp_path / "shared_state.db")
+
+def stored_combatants(battle_model):
+    """Reads an arena's combatants straight from its shared state namespace."""
+    with battle_model.store.transaction(write=False) as state:
+        return [meal["meal"] for meal in state.get("combatants", [])]
+
+def prep(battle_model, name):
+    battle_model.prep_combatant(Meal(1, name, "Italian", 10.0, "MED"))
+
+
+def test_idle_arena_deletes_abandoned_shared_state(db_path):
+    """Test that an arena dropped after no worker wrote to it for idle_timeout has its namespace deleted."""
+    arenas = worker_arenas(db_path)
+    first = arenas.get("first")
+    prep(first, "Spaghetti")
+
+    time.sleep(2 * IDLE_TIMEOUT)
+    arenas.get("second")
+
+    assert len(arenas) == 1
+    assert stored_combatants(first) == []
+
+def test_idle_arena_keeps_state_another_worker_uses(db_path):
+    """Test that a worker dropping an arena it stopped using leaves the state another worker just wrote."""
+    worker_1, worker_2 = worker_arenas(db_path), worker_arenas(db_path)
+    prep(worker_1.get("first"), "Spaghetti")
+
+    time.sleep(2 * IDLE_TIMEOUT)
+    prep(worker_2.get("first"), "Dumplings")
+    worker_1.get("second")
+
+    assert len(worker_1) == 1
+    assert [meal.meal for meal in worker_1.get("first").get_combatants()] == ["Spaghetti", "Dumplings"]
+
+def test_capacity_eviction_keeps_recently_written_state(db_path):
+    """Test that an arena dropped for capacity keeps its namespace while it is still being written."""
+    arenas = worker_arenas(db_path, max_arenas=2)
+    first = arenas.get("first")
+    prep(first, "Spaghetti")
+    arenas.get("second")
+
+    arenas.get("third")
+
+    assert len(arenas) == 2
+    assert stored_combatants(first) == ["Spaghetti"]
+
+def test_closed_arena_deletes_abandoned_shared_state(db_path):
+    """Test that closing an arena deletes its namespace only once no worker has written to it for idle_timeout."""
+    arenas = worker_arenas(db_path)
+    first = arenas.get("first")
+    prep(first, "Spaghetti")
+
+    assert arenas.close("first")
+    assert not arenas.close("first")
+    assert stored_combatants(first) == ["Spaghetti"]
+
+    arenas.get("first")
+    time.sleep(2 * IDLE_TIMEOUT)
+    assert arenas.close("first")
+    assert stored_combatants(first) == []
+
+def test_default_arena_is_never_dropped(mocker):
+    """Test that the default arena survives both idle and capacity eviction."""
+    on_evict = mocker.Mock()
+    arenas = ArenaRegistry(idle_timeout=IDLE_TIMEOUT, max_arenas=2, on_evict=on_evict)
+    default = arenas.get()
+
+    time.sleep(2 * IDLE_TIMEOUT)
+    arenas.get("first")
+    arenas.get("second")
+    arenas.get("third")
+
+    assert arenas.get() is default
+    assert [call.args[0] for call in on_evict.call_args_list] == ["first", "second"]
+
+def test_on_evict_errors_do_not_fail_lookups(mocker):
+    """Test that a failing on_evict is logged without failing the lookup that dropped the arena."""
+    on_evict = mocker.Mock(side_effect=RuntimeError("boom"))
+    arenas = ArenaRegistry(max_arenas=1, on_evict=on_evict)
+    first = arenas.get("first")
+
+    second = arenas.get("second")
+
+    assert isinstance(second, BattleModel) and second is not first
+    on_evict.assert_called_once_with("first", first)
@@ -0,0 +1,170 @@
+import asyncio
+import json
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.utils.json_provider import FastJSONProvider
+
+
+def serve(asgi_app_module, scenario):
+    """Runs scenario(client) against the ASGI app, started and shut down around it as by an ASGI server."""
+    async def run():
+        async with asgi_app_module.app.test_app() as test_app:
+            await scenario(test_app.test_client())
+
+    asyncio.run(run())
+
+
+######################################################
+#
+#    Healthchecks and metrics
+#
+######################################################
+
+
+def test_health_routes(asgi_app_module):
+    """Test that the health routes answer with their pre-encoded bodies, through the orjson provider."""
+    async def scenario(client):
+        response = await client.get("/api/health")
+        assert response.status_code == 200
+        assert await response.get_data() == b'{"status":"healthy"}\n'
+
+        response = await client.get("/api/db-check")
+        assert response.status_code == 200
+        assert await response.get_json() == {"database_status": "healthy"}
+
+    assert isinstance(asgi_app_module.app.json, FastJSONProvider)
+    serve(asgi_app_module, scenario)
+
+def test_requests_are_counted(asgi_app_module):
+    """Test that requests are recorded under their route, as by the WSGI app."""
+    async def scenario(client):
+        await client.get("/api/health")
+        await client.get("/api/get-meal-by-id/1")
+
+        response = await client.get("/api/metrics")
+        text = (await response.get_data()).decode()
+        assert 'http_requests_total{method="GET",route="/api/health",status="200"} 1\n' in text
+        assert 'http_request_errors_total{method="GET",route="/api/get-meal-by-id/<int:meal_id>"} 1\n' in text
+
+    serve(asgi_app_module, scenario)
+
+
+######################################################
+#
+#    Meals
+#
+######################################################
+
+
+def test_create_and_get_meal(asgi_app_module):
+    """Test that a created meal can be read back by name and suggested by autocomplete."""
+    async def scenario(client):
+        response = await client.post("/api/create-meal", json={"meal": "Spaghetti", "cuisine": "Italian", "price": 12.5, "difficulty": "MED"})
+        assert response.status_code == 201
+
+        response = await client.get("/api/get-meal-by-name/Spaghetti")
+        assert response.status_code == 200
+        meal = (await response.get_json())["meal"]
+        assert (meal["meal"], meal["cuisine"], meal["price"], meal["difficulty"]) == ("Spaghetti", "Italian", 12.5, "MED")
+
+        response = await client.get("/api/meal-autocomplete?q=spa")
+        assert "Spaghetti" in json.dumps(await response.get_json())
+
+    serve(asgi_app_module, scenario)
+
+@pytest.mark.parametrize("body", [{}, {"meal": "Spaghetti", "cuisine": "Italian", "price": 12.5, "difficulty": "EASY"}, {"meal": "Spaghetti", "cuisine": "Italian", "price": 12.555, "difficulty": "MED"}])
+def test_create_meal_invalid_request(asgi_app_module, body):
+    """Test that a missing field, unknown difficulty or price with more than two decimals is rejected."""
+    async def scenario(client):
+        assert (await client.post("/api/create-meal", json=body)).status_code == 400
+
+    serve(asgi_app_module, scenario)
+
+
+######################################################
+#
+#    Arenas and battles
+#
+######################################################
+
+
+def test_matchmake_preps_closest_opponent(asgi_app_module, scored_meals):
+    """Test that matchmaking preps the closest opponent in the arena named by the request only."""
+    async def scenario(client):
+        response = await client.post("/api/matchmake?arena=other", json={"meal": "Meal", "k": 5})
+        assert response.status_code == 200
+        assert [opponent["meal"] for opponent in (await response.get_json())["opponents"]] == ["Near", "Far"]
+
+        combatants = (await (await client.get("/api/get-combatants?arena=other")).get_json())["combatants"]
+        assert [combatant["meal"] for combatant in combatants] == ["Meal", "Near"]
+        assert (await (await client.get("/api/get-combatants")).get_json())["combatants"] == []
+
+    serve(asgi_app_module, scenario)
+
+def test_battle(asgi_app_module, scored_meals, random_org):
+    """Test that a battle between prepped meals draws from random.org and records the result."""
+    async def scenario(client):
+        for meal in ("Meal", "Far"):
+            assert (await client.post("/api/prep-combatant", json={"meal": meal})).status_code == 200
+
+        response = await client.get("/api/battle")
+        assert response.status_code == 200
+        assert (await response.get_json())["winner"] in ("Meal", "Far")
+
+    serve(asgi_app_module, scenario)
+    assert random_org.stats["ok"] == 1
+    assert [meal["meal"] for meal in kitchen_model.get_leaderboard()] in (["Meal", "Far"], ["Far", "Meal"])
+
+def test_battle_without_combatants(asgi_app_module):
+    """Test that a battle with fewer than two combatants prepped fails without calling random.org."""
+    async def scenario(client):
+        response = await client.get("/api/battle")
+        assert response.status_code == 500
+        assert "Two combatants must be prepped" in (await response.get_json())["error"]
+
+    serve(asgi_app_module, scenario)
+
+def test_battle_job_can_be_waited_for(asgi_app_module, scored_meals, random_org):
+    """Test that a queued battle is polled with 'wait' until it has a winner, and an unknown job is not found."""
+    async def scenario(client):
+        for meal in ("Meal", "Far"):
+            await client.post("/api/prep-combatant", json={"meal": meal})
+
+        response = await client.post("/api/battle-jobs")
+        assert response.status_code == 202
+        job_id = (await response.get_json())["job_id"]
+
+        job = await (await client.get(f"/api/battle-jobs/{job_id}?wait=10")).get_json()
+        assert job["status"] == "complete"
+        assert job["winner"] in ("Meal", "Far")
+        assert (await client.get("/api/battle-jobs/unknown")).status_code == 404
+        assert (await client.get(f"/api/battle-jobs/{job_id}?wait=-1")).status_code == 400
+
+    serve(asgi_app_module, scenario)
+
+
+######################################################
+#
+#    Leaderboard
+#
+######################################################
+
+
+def test_export_leaderboard_streams_ndjson(asgi_app_module, scored_meals):
+    """Test that the leaderboard export streams one JSON meal per line, leaving out meals that have not battled."""
+    for meal in ("Meal", "Near", "Far"):
+        kitchen_model.update_meal_stats(kitchen_model.get_meal_by_name(meal).id, "win" if meal == "Far" else "loss")
+    kitchen_model.update_meal_stats(kitchen_model.get_meal_by_name("Meal").id, "win")
+
+    async def scenario(client):
+        response = await client.get("/api/export-leaderboard?sort=win_pct")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+
+        lines = (await response.get_data()).decode().splitlines()
+        assert [json.loads(line)["meal"] for line in lines] == ["Far", "Meal", "Near"]
+        assert (await client.get("/api/export-leaderboard?sort=price")).status_code == 400
+
+    serve(asgi_app_module, scenario)
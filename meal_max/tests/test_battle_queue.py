@@ -0,0 +1,222 @@
+import sqlite3
+
+import pytest
+
+import app as app_module
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel, SharedBattleModel
+from meal_max.models.battle_queue import BattleJobQueue
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils import random_utils
+from meal_max.utils.random_org_standin import StandInConfig
+from meal_max.utils.shared_state import SharedStateStore
+
+
+@pytest.fixture
+def battle_model(meal_db):
+    """Fixture providing a battle model with two stored meals prepped."""
+    kitchen_model.create_meal("Spaghetti", "Italian", 12.5, "MED")
+    kitchen_model.create_meal("Dumplings", "Chinese", 9.99, "HIGH")
+    battle_model = BattleModel()
+    battle_model.prep_combatant(kitchen_model.get_meal_by_name("Spaghetti"))
+    battle_model.prep_combatant(kitchen_model.get_meal_by_name("Dumplings"))
+    return battle_model
+
+def prepped_arenas(count):
+    """Stores two meals per arena and returns a battle model per arena with its pair prepped."""
+    arenas = []
+    for number in range(count):
+        battle_model = BattleModel()
+        for side, cuisine in (("A", "Italian"), ("B", "Chinese")):
+            kitchen_model.create_meal(f"Meal {number}{side}", cuisine, 10 + number, "MED")
+            battle_model.prep_combatant(kitchen_model.get_meal_by_name(f"Meal {number}{side}"))
+        arenas.append(battle_model)
+    return arenas
+
+def paused_queue(mocker, **kwargs):
+    """Returns a queue whose workers only start when the returned callable is called, so jobs can pile up."""
+    jobs = BattleJobQueue(**kwargs)
+    mocker.patch.object(jobs, "_start_workers")
+    return jobs, lambda: BattleJobQueue._start_workers(jobs)
+
+def battles(meal_db):
+    conn = sqlite3.connect(meal_db)
+    try:
+        return dict(conn.execute("SELECT meal, battles FROM meals").fetchall())
+    finally:
+        conn.close()
+
+
+def test_double_submit_is_rejected(meal_db, battle_model, random_org):
+    """Test that the prepped pair is reserved for its job, so a second submit cannot battle it again."""
+    jobs = BattleJobQueue(workers=1)
+    job = jobs.submit(battle_model, "default")
+
+    with pytest.raises(ValueError, match="already queued"):
+        jobs.submit(battle_model, "default")
+    with pytest.raises(ValueError, match="already queued"):
+        battle_model.battle()
+
+    jobs.wait(job, 10)
+    assert job.status == "complete"
+    assert battles(meal_db) == {"Spaghetti": 1, "Dumplings": 1}
+    assert [meal.meal for meal in battle_model.get_combatants()] == [job.winner]
+    assert battle_model.claimed_by is None
+
+def test_clearing_combatants_releases_the_claim(meal_db, battle_model, random_org):
+    """Test that clearing a reserved pair lets new combatants battle, and the old job leaves them alone."""
+    random_org.config = StandInConfig(latency="fixed:200")
+    jobs = BattleJobQueue(workers=1)
+    job = jobs.submit(battle_model, "default")
+
+    battle_model.clear_combatants()
+    kitchen_model.create_meal("Tacos", "Mexican", 8.0, "LOW")
+    battle_model.prep_combatant(kitchen_model.get_meal_by_name("Tacos"))
+    battle_model.prep_combatant(kitchen_model.get_meal_by_name("Spaghetti"))
+
+    jobs.wait(job, 10)
+    assert job.status == "complete"
+    assert [meal.meal for meal in battle_model.get_combatants()] == ["Tacos", "Spaghetti"]
+
+def test_lapsed_claim_is_released(meal_db, battle_model, mocker):
+    """Test that a claim older than the lease no longer blocks the pair, and its job cannot release the new claim."""
+    battle_model.claim_battle("lost job")
+    with pytest.raises(ValueError, match="already queued"):
+        battle_model.claim_battle("new job")
+
+    mocker.patch("meal_max.models.battle_model.BATTLE_CLAIM_LEASE", 0)
+    battle_model.claim_battle("new job")
+    battle_model.release_battle("lost job", battle_model.get_combatants()[0])
+
+    assert battle_model.claimed_by == "new job"
+    assert len(battle_model.get_combatants()) == 2
+
+def test_shared_claim_keeps_its_lease(meal_db, tmp_path, mocker):
+    """Test that another worker sees when a shared claim was taken, and takes over the pair only once it lapses."""
+    kitchen_model.create_meal("Spaghetti", "Italian", 12.5, "MED")
+    kitchen_model.create_meal("Dumplings", "Chinese", 9.99, "HIGH")
+    store_path = str(tmp_path / "shared_state.db")
+    first, second = (SharedBattleModel(SharedStateStore("battle", store_path)) for _ in range(2))
+    first.prep_match(kitchen_model.get_meal_by_name("Spaghetti"), kitchen_model.get_meal_by_name("Dumplings"))
+    first.claim_battle("lost job")
+
+    with pytest.raises(ValueError, match="already queued"):
+        second.claim_battle("new job")
+    mocker.patch("meal_max.models.battle_model.BATTLE_CLAIM_LEASE", 0)
+    second.claim_battle("new job")
+    first.release_battle("lost job")
+
+    other = SharedBattleModel(SharedStateStore("battle", store_path))
+    assert len(other.get_combatants()) == 2
+    assert other.claimed_by == "new job"
+
+def test_shared_combatants_keep_their_stored_score(tmp_path):
+    """Test that combatants reloaded from the shared state keep the battle score read from the meals table."""
+    store_path = str(tmp_path / "shared_state.db")
+    stored = Meal.from_row((1, "Spaghetti", "Italian", 12.5, "MED", 85.0))
+    SharedBattleModel(SharedStateStore("battle", store_path)).prep_combatant(stored)
+
+    combatants = SharedBattleModel(SharedStateStore("battle", store_path)).get_combatants()
+
+    assert combatants == [stored]
+    assert combatants[0].battle_score == 85.0
+
+def test_queued_jobs_are_resolved_in_one_batch(meal_db, random_org, mocker):
+    """Test that jobs queued together share one random.org request and one transaction."""
+    get_random_batch = mocker.spy(random_utils, "get_random_batch")
+    record_battle_results = mocker.spy(kitchen_model, "record_battle_results")
+    jobs, start = paused_queue(mocker, workers=1, batch_size=10)
+    submitted = [jobs.submit(battle_model, f"arena-{number}") for number, battle_model in enumerate(prepped_arenas(3))]
+
+    start()
+    for job in submitted:
+        jobs.wait(job, 10)
+
+    assert [job.status for job in submitted] == ["complete"] * 3
+    get_random_batch.assert_called_once_with(3)
+    record_battle_results.assert_called_once()
+    assert len(record_battle_results.call_args.args[0]) == 3
+    assert sum(battles(meal_db).values()) == 6
+
+def test_deleted_meal_fails_only_its_own_job(meal_db, random_org, mocker):
+    """Test that a meal deleted while queued fails its job, and the rest of the batch is recorded one by one."""
+    record_battle_results = mocker.spy(kitchen_model, "record_battle_results")
+    jobs, start = paused_queue(mocker, workers=1, batch_size=10)
+    submitted = [jobs.submit(battle_model, f"arena-{number}") for number, battle_model in enumerate(prepped_arenas(3))]
+    kitchen_model.delete_meal(kitchen_model.get_meal_by_name("Meal 1A").id)
+
+    start()
+    for job in submitted:
+        jobs.wait(job, 10)
+
+    assert [job.status for job in submitted] == ["complete", "failed", "complete"]
+    assert "has been deleted" in submitted[1].error
+    assert record_battle_results.call_count == 4
+    assert battles(meal_db) == {"Meal 0A": 1, "Meal 0B": 1, "Meal 1A": 0, "Meal 1B": 0, "Meal 2A": 1, "Meal 2B": 1}
+
+def test_entropy_failure_fails_the_whole_batch(meal_db, random_org, mocker):
+    """Test that when random.org fails, every job of the batch fails, nothing is recorded and the pairs are released."""
+    random_org.config = StandInConfig(error_rate=1.0)
+    record_battle_results = mocker.spy(kitchen_model, "record_battle_results")
+    arenas = prepped_arenas(3)
+    jobs, start = paused_queue(mocker, workers=1, batch_size=10)
+    submitted = [jobs.submit(battle_model, f"arena-{number}") for number, battle_model in enumerate(arenas)]
+
+    start()
+    for job in submitted:
+        jobs.wait(job, 10)
+
+    assert [job.status for job in submitted] == ["failed"] * 3
+    record_battle_results.assert_not_called()
+    assert sum(battles(meal_db).values()) == 0
+    assert all(battle_model.claimed_by is None and len(battle_model.get_combatants()) == 2 for battle_model in arenas)
+
+def test_full_queue_answers_503(client, mocker):
+    """Test that a submission beyond max_pending is refused with 503 and leaves its pair free."""
+    jobs, _ = paused_queue(mocker, max_pending=1)
+    mocker.patch.object(app_module, "battle_jobs", jobs)
+    for arena in ("first", "second"):
+        for meal, cuisine in ((f"{arena} A", "Italian"), (f"{arena} B", "Chinese")):
+            kitchen_model.create_meal(meal, cuisine, 10, "MED")
+            client.post(f"/api/prep-combatant?arena={arena}", json={"meal": meal})
+
+    assert client.post("/api/battle-jobs?arena=first").status_code == 202
+    response = client.post("/api/battle-jobs?arena=second")
+
+    assert response.status_code == 503
+    assert app_module.arenas.get("second").claimed_by is None
+
+def test_finished_jobs_expire_after_result_ttl(meal_db, random_org):
+    """Test that a finished job can be polled until its result_ttl has passed, then is purged."""
+    first, second, third = prepped_arenas(3)
+    jobs = BattleJobQueue(workers=1, result_ttl=30)
+    finished = jobs.submit(first, "first")
+    jobs.wait(finished, 10)
+
+    jobs.submit(second, "second")
+    assert jobs.get(finished.id) is finished
+
+    # As if it had finished longer than result_ttl ago
+    finished.finished_at -= 31
+    queued = jobs.submit(third, "third")
+    assert jobs.get(finished.id) is None
+    assert jobs.get(queued.id) is queued
+
+def test_shared_jobs_are_polled_from_another_worker(meal_db, random_org, tmp_path):
+    """Test that with a store_factory, a worker that did not accept a job sees its status, result and expiry."""
+    store_path = str(tmp_path / "shared_state.db")
+    store_factory = lambda job_id: SharedStateStore(f"battle_job:{job_id}", store_path)
+    first, second = prepped_arenas(2)
+    accepting = BattleJobQueue(workers=1, result_ttl=30, store_factory=store_factory)
+    other = BattleJobQueue(workers=1, store_factory=store_factory)
+
+    job = accepting.submit(first, "first")
+    polled = other.poll(job.id, 10)
+
+    assert polled == {'job_id': job.id, 'arena': "first", 'status': "complete", 'winner': job.winner}
+    assert other.poll("unknown") is None
+
+    # As if it had finished longer than result_ttl ago
+    job.finished_at -= 31
+    accepting.submit(second, "second")
+    assert other.poll(job.id) is None
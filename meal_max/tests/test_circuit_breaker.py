@@ -0,0 +1,70 @@
+import pytest
+
+from meal_max.utils import circuit_breaker, random_utils
+from meal_max.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture providing a controllable monotonic clock for the breaker."""
+    now = [1000.0]
+    mocker.patch.object(circuit_breaker.time, "monotonic", side_effect=lambda: now[0])
+    return now
+
+
+def test_breaker_lets_another_trial_through_after_trial_timeout(clock):
+    """Test that a trial that never reports back stops blocking calls after trial_timeout."""
+    breaker = CircuitBreaker("test", window=10, min_calls=4, reset_timeout=30, trial_timeout=5)
+    for _ in range(4):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+
+    clock[0] += 4
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+
+def interrupted_trial(clock, mocker, error):
+    """Opens a breaker and runs its half open trial through get_random, with the request raising 'error'."""
+    breaker = CircuitBreaker("random_org", min_calls=1, reset_timeout=30, trial_timeout=60)
+    mocker.patch.object(random_utils, "breaker", breaker)
+    session = mocker.Mock()
+    session.get.side_effect = error
+    mocker.patch.object(random_utils, "get_session", return_value=session)
+    breaker.record_failure()
+    clock[0] += 30
+
+    with pytest.raises(error):
+        random_utils.get_random()
+    return breaker
+
+def test_trial_failing_unexpectedly_is_recorded_as_failure(clock, mocker):
+    """Test that a trial call leaving fetch with an unexpected exception reopens the breaker instead of blocking it."""
+    breaker = interrupted_trial(clock, mocker, TypeError)
+
+    assert breaker.state == "open"
+    clock[0] += 30
+    assert breaker.allow()
+
+def test_interrupted_trial_records_nothing(clock, mocker):
+    """Test that a trial call interrupted before it had an outcome frees the trial without reopening the breaker."""
+    breaker = interrupted_trial(clock, mocker, KeyboardInterrupt)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_invalid_batch_is_a_failure_and_falls_back(mocker):
+    """Test that a 200 answer with too few numbers counts against random.org and, with the fallback enabled, is drawn locally."""
+    breaker = CircuitBreaker("random_org")
+    mocker.patch.object(random_utils, "breaker", breaker)
+    mocker.patch.object(random_utils, "RANDOM_ORG_FALLBACK", "local")
+    session = mocker.Mock()
+    session.get.return_value.text = "0.42\n0.17\n"
+    mocker.patch.object(random_utils, "get_session", return_value=session)
+
+    random_numbers = random_utils.get_random_batch(3)
+
+    assert len(random_numbers) == 3 and all(0 <= number < 1 for number in random_numbers)
+    assert breaker.snapshot()["recent_failures"] == 1
@@ -0,0 +1,294 @@
+from pathlib import Path
+import random
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal
+
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+OLD_SCHEMA = """
+    CREATE TABLE meals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, meal TEXT NOT NULL UNIQUE, cuisine TEXT NOT NULL, price REAL NOT NULL,
+        difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')), battles INTEGER DEFAULT 0, wins INTEGER DEFAULT 0,
+        deleted BOOLEAN DEFAULT FALSE
+    );
+"""
+
+
+def meal_stats(db_path):
+    """Reads the trigger-maintained meal_stats rows as {(dimension, value): (meals, total_price, battles, wins)}."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT dimension, value, meals, total_price, battles, wins FROM meal_stats").fetchall()
+    finally:
+        conn.close()
+    return {(dimension, value): (meals, pytest.approx(total_price), battles, wins)
+            for dimension, value, meals, total_price, battles, wins in rows if meals}
+
+def migrate(conn):
+    """Applies the migrations the way sql/migrate_db.sh does."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meals' AND sql LIKE '%CHECK(price > 0)%'").fetchone():
+        try:
+            conn.executescript((SQL_DIR / "rebuild_meal_table.sql").read_text())
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    if not conn.execute("SELECT 1 FROM pragma_table_xinfo('meals') WHERE name = 'battle_score'").fetchone():
+        conn.executescript((SQL_DIR / "add_battle_score_column.sql").read_text())
+    conn.executescript((SQL_DIR / "migrate_meal_table.sql").read_text())
+
+def rebuilt_meal_stats(db_path):
+    """Recomputes meal_stats from the meals table and returns it as meal_stats() does."""
+    kitchen_model.rebuild_meal_stats()
+    return meal_stats(db_path)
+
+
+######################################################
+#
+#    Meal stats triggers
+#
+######################################################
+
+
+def test_meal_stats_count_inserted_meals(meal_db):
+    """Test that inserting meals adds them to their cuisine and difficulty totals."""
+    kitchen_model.create_meal("Spaghetti", "Italian", 12.5, "MED")
+    kitchen_model.create_meal("Lasagna", "Italian", 14.0, "HIGH")
+    kitchen_model.create_meal("Dumplings", "Chinese", 9.99, "HIGH")
+
+    assert meal_stats(meal_db) == {
+        ("cuisine", "Italian"): (2, 26.5, 0, 0),
+        ("cuisine", "Chinese"): (1, 9.99, 0, 0),
+        ("difficulty", "MED"): (1, 12.5, 0, 0),
+        ("difficulty", "HIGH"): (2, 23.99, 0, 0),
+    }
+
+def test_meal_stats_follow_battle_results(meal_db):
+    """Test that battle updates move battles and wins into the totals without recounting meals."""
+    kitchen_model.create_meal("Spaghetti", "Italian", 12.5, "MED")
+    kitchen_model.create_meal("Dumplings", "Chinese", 9.99, "HIGH")
+    spaghetti = kitchen_model.get_meal_by_name("Spaghetti")
+    dumplings = kitchen_model.get_meal_by_name("Dumplings")
+
+    kitchen_model.update_meal_stats(spaghetti.id, "win")
+    kitchen_model.update_meal_stats(dumplings.id, "loss")
+    kitchen_model.record_battle_results([(dumplings.id, spaghetti.id), (spaghetti.id, dumplings.id)])
+
+    stats = meal_stats(meal_db)
+    assert stats == {
+        ("cuisine", "Italian"): (1, 12.5, 3, 2),
+        ("cuisine", "Chinese"): (1, 9.99, 3, 1),
+        ("difficulty", "MED"): (1, 12.5, 3, 2),
+        ("difficulty", "HIGH"): (1, 9.99, 3, 1),
+    }
+    assert rebuilt_meal_stats(meal_db) == stats
+
+def test_meal_stats_drop_soft_deleted_meals(meal_db):
+    """Test that soft deleting a meal takes it, its battles and its wins out of the totals."""
+    kitchen_model.create_meal("Spaghetti", "Italian", 12.5, "MED")
+    kitchen_model.create_meal("Lasagna", "Italian", 14.0, "MED")
+    lasagna = kitchen_model.get_meal_by_name("Lasagna")
+    kitchen_model.update_meal_stats(lasagna.id, "win")
+
+    kitchen_model.delete_meal(lasagna.id)
+
+    stats = meal_stats(meal_db)
+    assert stats == {
+        ("cuisine", "Italian"): (1, 12.5, 0, 0),
+        ("difficulty", "MED"): (1, 12.5, 0, 0),
+    }
+    assert rebuilt_meal_stats(meal_db) == stats
+
+def test_meal_stats_migration_counts_existing_meals(tmp_path, mocker):
+    """Test that migrating a database created without meal_stats totals its meals, and can run again."""
+    db_path = tmp_path / "meal_max.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(OLD_SCHEMA + """
+        INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins, deleted) VALUES
+            ('Spaghetti', 'Italian', 12.5, 'MED', 6, 3, FALSE),
+            ('Lasagna', 'Italian', 14.0, 'HIGH', 2, 2, TRUE);
+    """)
+    migrate(conn)
+    migrate(conn)
+    conn.close()
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(db_path))
+
+    assert meal_stats(db_path) == {
+        ("cuisine", "Italian"): (1, 12.5, 6, 3),
+        ("difficulty", "MED"): (1, 12.5, 6, 3),
+    }
+    kitchen_model.update_meal_stats(1, "win")
+    assert meal_stats(db_path)[("cuisine", "Italian")] == (1, 12.5, 7, 4)
+
+
+def test_migration_adds_price_check(tmp_path, mocker):
+    """Test that migrating a database created without the price check rejects non-positive prices
+    afterwards, keeps its meals and never reuses the id of a removed meal."""
+    db_path = tmp_path / "meal_max.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(OLD_SCHEMA + """
+        INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Spaghetti', 'Italian', 12.5, 'MED'), ('Removed', 'Thai', 5, 'LOW');
+        DELETE FROM meals WHERE meal = 'Removed';
+    """)
+    migrate(conn)
+    migrate(conn)
+
+    with pytest.raises(sqlite3.IntegrityError, match="CHECK constraint failed"):
+        conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Free', 'Thai', 0, 'LOW')")
+    conn.close()
+    mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(db_path))
+
+    kitchen_model.create_meal("Tacos", "Mexican", 8.0, "LOW")
+    assert kitchen_model.get_meal_by_name("Tacos").id == 3
+    assert kitchen_model.get_meal_by_name("Spaghetti").battle_score == pytest.approx(12.5 * 7 - 2)
+    assert meal_stats(db_path)[("cuisine", "Italian")] == (1, 12.5, 0, 0)
+
+def test_migration_keeps_table_with_invalid_prices(tmp_path):
+    """Test that a stored meal without a positive price stops the rebuild and leaves the table as it was."""
+    db_path = tmp_path / "meal_max.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(OLD_SCHEMA + "INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Free', 'Thai', 0, 'LOW');")
+
+    with pytest.raises(sqlite3.IntegrityError, match="CHECK constraint failed"):
+        migrate(conn)
+
+    assert conn.execute("SELECT meal, price FROM meals").fetchall() == [("Free", 0)]
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meals_rebuilt'").fetchone()
+    conn.close()
+
+
+######################################################
+#
+#    Battle score column
+#
+######################################################
+
+
+SCORED_MEALS = [
+    ("Spaghetti", "Italian", 12.5, "MED"),
+    ("Dumplings", "Chinese", 9.99, "HIGH"),
+    ("Tacos", "Mexican", 8.0, "LOW"),
+]
+
+@pytest.mark.parametrize("migrated", [False, True], ids=["created", "migrated"])
+def test_battle_score_column_matches_battle_model(tmp_path, mocker, meal_db, migrated):
+    """Test that the stored or migrated battle_score column scores every difficulty as BattleModel does."""
+    if migrated:
+        db_path = tmp_path / "old_meal_max.db"
+        conn = sqlite3.connect(db_path)
+        conn.executescript(OLD_SCHEMA)
+        migrate(conn)
+        migrate(conn)
+        conn.close()
+        mocker.patch("meal_max.utils.sql_utils.DB_PATH", str(db_path))
+    battle_model = BattleModel()
+
+    for meal, cuisine, price, difficulty in SCORED_MEALS:
+        kitchen_model.create_meal(meal, cuisine, price, difficulty)
+        stored = kitchen_model.get_meal_by_name(meal)
+        computed = Meal(stored.id, meal, cuisine, price, difficulty)
+        assert battle_model.get_battle_score(stored) == pytest.approx(battle_model.get_battle_score(computed))
+
+    by_score = kitchen_model.get_meals_by_score(0, 1000)
+    assert [meal.meal for meal in by_score] == ["Tacos", "Dumplings", "Spaghetti"]
+
+
+######################################################
+#
+#    Matchmaking by battle score
+#
+######################################################
+
+
+def create_scored_meal(meal, score, deleted=False):
+    """Creates a LOW difficulty meal of a one-letter cuisine, so its battle score is its price minus 3."""
+    kitchen_model.create_meal(meal, "X", score + 3, "LOW")
+    created = kitchen_model.get_meal_by_name(meal)
+    if deleted:
+        kitchen_model.delete_meal(created.id)
+    return created
+
+def brute_force_nearest(db_path, meal, k):
+    """Scans every live meal for the k scoring closest to a meal, as (distance, id) pairs."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, battle_score FROM meals WHERE deleted = FALSE AND id != ?", (meal.id,)).fetchall()
+    finally:
+        conn.close()
+    return sorted((abs(score - meal.battle_score), meal_id) for meal_id, score in rows)[:k]
+
+
+def test_get_meals_by_score(meal_db):
+    """Test that a score range returns its live meals, lowest score first, up to the limit."""
+    for meal, score in [("A", 10), ("B", 20), ("C", 30), ("D", 40)]:
+        create_scored_meal(meal, score)
+    create_scored_meal("Deleted", 25, deleted=True)
+
+    assert [meal.meal for meal in kitchen_model.get_meals_by_score(15, 40)] == ["B", "C", "D"]
+    assert [meal.meal for meal in kitchen_model.get_meals_by_score(10, 40, limit=2)] == ["A", "B"]
+    assert kitchen_model.get_meals_by_score(41, 50) == []
+
+def test_get_meals_by_score_invalid_arguments(meal_db):
+    """Test that an inverted range or a non-positive limit is rejected."""
+    with pytest.raises(ValueError, match="Invalid score range"):
+        kitchen_model.get_meals_by_score(20, 10)
+    with pytest.raises(ValueError, match="Invalid limit"):
+        kitchen_model.get_meals_by_score(10, 20, limit=0)
+
+def test_get_nearest_meals_merges_both_sides(meal_db):
+    """Test that opponents come from above and below the meal's score, closest first, never the meal itself."""
+    meal = create_scored_meal("Meal", 50)
+    for name, score in [("Below 1", 49), ("Above 2", 52), ("Below 5", 45), ("Above 10", 60), ("Below 20", 30)]:
+        create_scored_meal(name, score)
+
+    nearest = kitchen_model.get_nearest_meals(meal, 4)
+    assert [opponent.meal for opponent in nearest] == ["Below 1", "Above 2", "Below 5", "Above 10"]
+
+def test_get_nearest_meals_ties(meal_db):
+    """Test that equal distances favor the meal scoring above, and an equal score counts as closest."""
+    meal = create_scored_meal("Meal", 50)
+    create_scored_meal("Below", 45)
+    create_scored_meal("Above", 55)
+    create_scored_meal("Same", 50)
+
+    nearest = kitchen_model.get_nearest_meals(meal, 3)
+    assert [opponent.meal for opponent in nearest] == ["Same", "Above", "Below"]
+
+def test_get_nearest_meals_skips_deleted_meals(meal_db):
+    """Test that deleted meals are never offered as opponents, and fewer than k live meals are all returned."""
+    meal = create_scored_meal("Meal", 50)
+    create_scored_meal("Deleted", 51, deleted=True)
+    create_scored_meal("Live", 60)
+
+    assert [opponent.meal for opponent in kitchen_model.get_nearest_meals(meal, 5)] == ["Live"]
+
+def test_get_nearest_meals_invalid_k(meal_db):
+    """Test that a non-positive number of opponents is rejected."""
+    meal = create_scored_meal("Meal", 50)
+    with pytest.raises(ValueError, match="Invalid number of opponents"):
+        kitchen_model.get_nearest_meals(meal, 0)
+
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_get_nearest_meals_matches_brute_force(meal_db, k):
+    """Test that the two index scans find the same distances as scanning every meal."""
+    rng = random.Random(k)
+    meals = []
+    for i in range(60):
+        kitchen_model.create_meal(f"Meal {i}", rng.choice(["Thai", "Italian", "Greek"]),
+                                  round(rng.uniform(1, 30), 2), rng.choice(["LOW", "MED", "HIGH"]))
+        meals.append(kitchen_model.get_meal_by_name(f"Meal {i}"))
+    for meal in rng.sample(meals, 15):
+        kitchen_model.delete_meal(meal.id)
+    deleted = {meal.id for meal in kitchen_model.get_meals_by_score(-1000, 1000, limit=1000)} ^ {meal.id for meal in meals}
+
+    for meal in meals:
+        nearest = kitchen_model.get_nearest_meals(meal, k)
+        expected = brute_force_nearest(meal_db, meal, k)
+        assert [abs(opponent.battle_score - meal.battle_score) for opponent in nearest] == [distance for distance, _ in expected]
+        assert meal.id not in {opponent.id for opponent in nearest}
+        assert not deleted & {opponent.id for opponent in nearest}
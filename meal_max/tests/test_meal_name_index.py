@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+from meal_max.models import kitchen_model
+from meal_max.models.meal_name_index import MealNameIndex
+
+
+@pytest.fixture
+def name_index(meal_db):
+    """Fixture providing a meal name index over a few stored meals, closed after the test."""
+    for meal, cuisine in [("Spaghetti", "Italian"), ("spam fritters", "British"), ("Straße Salad", "German"), ("Sushi", "Japanese")]:
+        kitchen_model.create_meal(meal, cuisine, 10, "MED")
+    name_index = MealNameIndex(max_age=3600)
+    yield name_index
+    name_index.close()
+
+
+def test_complete_is_case_insensitive(name_index):
+    """Test that prefixes match casefolded names and return them as stored, in alphabetical order."""
+    assert name_index.complete("SP") == ["Spaghetti", "spam fritters"]
+    assert name_index.complete("strass") == ["Straße Salad"]
+    assert name_index.complete("s", limit=2) == ["Spaghetti", "spam fritters"]
+    assert name_index.complete("tacos") == []
+
+def test_created_meals_are_inserted_without_reloading(name_index, mocker):
+    """Test that meals created after the load are inserted in order by the write listener."""
+    name_index.complete("s")
+    refresh = mocker.spy(name_index, "refresh")
+
+    kitchen_model.create_meal("Spanakopita", "Greek", 12, "MED")
+
+    assert name_index.complete("spa") == ["Spaghetti", "spam fritters", "Spanakopita"]
+    refresh.assert_not_called()
+
+def test_deleted_meals_are_removed_without_reloading(name_index, mocker):
+    """Test that deleted meals are removed by the write listener."""
+    name_index.complete("s")
+    refresh = mocker.spy(name_index, "refresh")
+
+    kitchen_model.delete_meal(kitchen_model.get_meal_by_name("spam fritters").id)
+
+    assert name_index.complete("sp") == ["Spaghetti"]
+    refresh.assert_not_called()
+
+def test_writes_before_the_first_load_come_from_the_database(name_index):
+    """Test that writes made before the index is loaded are read from the database, once."""
+    kitchen_model.create_meal("Spanakopita", "Greek", 12, "MED")
+    kitchen_model.delete_meal(kitchen_model.get_meal_by_name("Sushi").id)
+
+    assert name_index.complete("s") == ["Spaghetti", "spam fritters", "Spanakopita", "Straße Salad"]
+
+def test_closed_index_stops_following_writes(name_index):
+    """Test that a closed index no longer hears about meal writes."""
+    name_index.complete("s")
+    name_index.close()
+
+    kitchen_model.create_meal("Spanakopita", "Greek", 12, "MED")
+
+    assert name_index.complete("spa") == ["Spaghetti", "spam fritters"]
+
+def test_stale_index_picks_up_other_writers(name_index, meal_db):
+    """Test that meals written behind the listeners' back appear once the index is older than max_age."""
+    name_index.complete("s")
+    conn = sqlite3.connect(meal_db)
+    conn.execute("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES ('Sashimi', 'Japanese', 20, 'HIGH')")
+    conn.commit()
+    conn.close()
+    assert name_index.complete("sa") == []
+
+    name_index.max_age = 0
+    assert name_index.complete("sa") == ["Sashimi"]
@@ -1,17 +1,72 @@
+import os
+import queue
+import threading
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 
 from music_collection.models import song_model
-from music_collection.models.playlist_model import PlaylistModel
-from music_collection.utils.sql_utils import check_database_connection, check_table_exists
+from music_collection.models.analytics_jobs import ANALYTICS_JOB_MAX_WAIT, AnalyticsJobQueue
+from music_collection.models.playlist_model import PlaylistModel, SharedPlaylistModel
+from music_collection.utils.health import InFlightRequests, ReadinessProbe
+from music_collection.utils.json_provider import FastJSONProvider, PreEncodedJSON, iter_ndjson
+from music_collection.utils.metrics import PROMETHEUS_CONTENT_TYPE, SharedMetrics, instrument_app, metrics
+from music_collection.utils.random_utils import breaker as random_org_breaker
+from music_collection.utils.shared_state import SharedStateStore
+from music_collection.utils.sql_utils import statement_stats, use_request_connections
 
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+instrument_app(app)
+# Model calls made while serving a request share one database connection
+use_request_connections(app)
+
+# Readiness is checked against the database at most every READINESS_TTL seconds, in the background,
+# and reports how many of the process's request threads are busy
+readiness = ReadinessProbe(["songs"])
+in_flight_requests = InFlightRequests(int(os.getenv("WEB_THREADS", "4")))
+in_flight_requests.track(app)
+readiness.register_gauge("requests", in_flight_requests.gauge)
+readiness.register_gauge("random_org", random_org_breaker.snapshot)
+
+# Pre-fork workers keep the in-flight playlist in the shared state database so they all agree on it,
+# and share their metrics through it so /api/metrics reports every worker's
+if os.getenv("SERVER_MODE") == "prefork":
+    playlist_model = SharedPlaylistModel()
+    exported_metrics = SharedMetrics(metrics, SharedStateStore("metrics"))
+    exported_metrics.start()
+else:
+    playlist_model = PlaylistModel()
+    exported_metrics = metrics
+
+
+# Column store of the catalog for the analytics routes. It pulls in NumPy, so it is only
+# created, and loaded, when an analytics route is first used
+_catalog_snapshot = None
+_catalog_snapshot_lock = threading.Lock()
+
+def get_catalog_snapshot():
+    """
+    Returns the catalog snapshot, creating it on first use.
+    """
+    global _catalog_snapshot
+    with _catalog_snapshot_lock:
+        if _catalog_snapshot is None:
+            from music_collection.models.catalog_snapshot import CatalogSnapshot
+            _catalog_snapshot = CatalogSnapshot()
+    return _catalog_snapshot
 
-playlist_model = PlaylistModel()
+# Heavy aggregations run as background jobs on a pool of worker processes, started on first use
+analytics_jobs = AnalyticsJobQueue()
+readiness.register_gauge("analytics_jobs", analytics_jobs.snapshot)
+
+# Bodies of responses that never change are encoded once
+HEALTHY = PreEncodedJSON({'status': 'healthy'})
+DATABASE_HEALTHY = PreEncodedJSON({'database_status': 'healthy'})
 
 
 ####################################################
@@ -29,29 +84,55 @@ def healthcheck() -> Response:
         JSON response indicating the health status of the service.
     """
     app.logger.info('Health check')
-    return make_response(jsonify({'status': 'healthy'}), 200)
+    return HEALTHY.response(app, 200)
 
 
 @app.route('/api/db-check', methods=['GET'])
 def db_check() -> Response:
     """
     Route to check if the database connection and songs table are functional.
+    Served from the readiness probe's cached result.
 
     Returns:
         JSON response indicating the database health status.
     Raises:
         404 error if there is an issue with the database.
     """
-    try:
-        app.logger.info("Checking database connection...")
-        check_database_connection()
-        app.logger.info("Database connection is OK.")
-        app.logger.info("Checking if songs table exists...")
-        check_table_exists("songs")
-        app.logger.info("songs table exists.")
-        return make_response(jsonify({'database_status': 'healthy'}), 200)
-    except Exception as e:
-        return make_response(jsonify({'error': str(e)}), 404)
+    app.logger.info("Checking database readiness...")
+    status = readiness.status()
+    if status['ready']:
+        return DATABASE_HEALTHY.response(app, 200)
+    return make_response(jsonify({'error': status['error']}), 404)
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check() -> Response:
+    """
+    Readiness route for orchestrator probes, separate from the /api/health liveness route.
+
+    The database check is cached for READINESS_TTL seconds and refreshed in the background,
+    so probes add no database load.
+
+    Returns:
+        JSON response with the readiness, the database status and the current load.
+        503 status if the service is not ready.
+    """
+    status = readiness.status()
+    return make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics() -> Response:
+    """
+    Route to expose request, database and random.org metrics in Prometheus text format.
+
+    Pre-fork workers each count their own requests; the response merges every worker's
+    metrics, the other workers' as of their last snapshot, up to METRICS_PUBLISH_INTERVAL old.
+
+    Returns:
+        Plain text response with the current metric values.
+    """
+    return Response(exported_metrics.render(), status=200, content_type=PROMETHEUS_CONTENT_TYPE)
 
 
 ##########################################################
@@ -145,6 +226,32 @@ def get_all_songs() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/export-catalog', methods=['GET'])
+def export_catalog() -> Response:
+    """
+    Route to stream all songs in the catalog (non-deleted) as newline-delimited JSON, one song per line.
+
+    Songs are read from the database in chunks while the response is sent, so memory use does
+    not grow with the catalog. An error after the first chunk has been sent ends the stream early.
+
+    Query Parameter:
+        - sort_by_play_count (bool, optional): If true, sort songs by play count.
+
+    Returns:
+        NDJSON response streaming the songs, or JSON error message.
+    """
+    try:
+        sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
+
+        app.logger.info("Exporting the catalog, sort_by_play_count=%s", sort_by_play_count)
+        songs = song_model.iter_all_songs(sort_by_play_count=sort_by_play_count)
+
+        return Response(stream_with_context(iter_ndjson(app, songs)), status=200, mimetype='application/x-ndjson')
+    except Exception as e:
+        app.logger.error(f"Error exporting the catalog: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 @app.route('/api/get-song-from-catalog-by-id/<int:song_id>', methods=['GET'])
 def get_song_by_id(song_id: int) -> Response:
     """
@@ -217,6 +324,54 @@ def get_random_song() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/search-songs', methods=['GET'])
+def search_songs() -> Response:
+    """
+    Route to search the catalog by artist, title and genre, best matches first.
+
+    Query Parameters:
+        - q (str): The words to search for; each must match the start of a word in the song.
+        - page (int, optional): The 1-based page number. Default is 1.
+        - page_size (int, optional): Songs per page, at most 100. Default is 20.
+
+    Returns:
+        JSON response with the page of matching songs and whether more pages follow.
+    Raises:
+        400 error if the query or pagination parameters are invalid.
+        500 error if there is an issue searching the catalog.
+    """
+    try:
+        query = request.args.get('q', '')
+        try:
+            page = int(request.args.get('page', 1))
+            page_size = int(request.args.get('page_size', 20))
+        except ValueError:
+            return make_response(jsonify({'error': 'Page and page_size must be integers'}), 400)
+
+        if page < 1 or not 1 <= page_size <= 100:
+            return make_response(jsonify({'error': 'Page must be at least 1 and page_size between 1 and 100'}), 400)
+
+        app.logger.info("Searching songs for '%s', page %d", query, page)
+
+        # Fetch one extra song to tell whether another page follows
+        songs = song_model.search_songs(query, limit=page_size + 1, offset=(page - 1) * page_size)
+
+        return make_response(jsonify({
+            'status': 'success',
+            'query': query,
+            'page': page,
+            'page_size': page_size,
+            'has_more': len(songs) > page_size,
+            'songs': songs[:page_size]
+        }), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid search: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error searching songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 ############################################################
 #
 # Playlist Management
@@ -710,5 +865,175 @@ def get_song_leaderboard() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+############################################################
+#
+# Analytics
+#
+############################################################
+
+@app.route('/api/analytics/songs-by', methods=['GET'])
+def get_songs_by() -> Response:
+    """
+    Route to aggregate the catalog by genre, decade or artist.
+
+    Query Parameters:
+        - group (str): The field to group by ('genre', 'decade' or 'artist'). Default is 'genre'.
+
+    Returns:
+        JSON response with the song count, plays, total and average duration per group,
+        sorted by plays.
+    Raises:
+        400 error if the group is not supported.
+        500 error if there is an issue reading the catalog.
+    """
+    try:
+        group = request.args.get('group', 'genre')
+        app.logger.info("Aggregating the catalog by %s", group)
+        groups = get_catalog_snapshot().group_by(group)
+        return make_response(jsonify({'status': 'success', 'group_by': group, 'groups': groups}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid analytics request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error aggregating the catalog: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics/duration-distribution', methods=['GET'])
+def get_duration_distribution() -> Response:
+    """
+    Route to get the distribution of song durations in the catalog.
+
+    Query Parameters:
+        - bins (int, optional): The number of histogram bins. Default is 10.
+
+    Returns:
+        JSON response with the duration histogram and summary statistics.
+    Raises:
+        400 error if bins is invalid or the catalog is empty.
+        500 error if there is an issue reading the catalog.
+    """
+    try:
+        try:
+            bins = int(request.args.get('bins', 10))
+        except ValueError:
+            return make_response(jsonify({'error': 'Bins must be an integer'}), 400)
+
+        app.logger.info("Computing the duration distribution with %d bins", bins)
+        distribution = get_catalog_snapshot().duration_distribution(bins)
+        return make_response(jsonify({'status': 'success', 'durations': distribution}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid analytics request: {e}")
+        return make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error computing the duration distribution: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics-jobs', methods=['POST'])
+def submit_analytics_job() -> Response:
+    """
+    Route to start an aggregation over the whole catalog, computed by background worker processes.
+
+    The response is sent as soon as the job is started; poll /api/analytics-jobs/<job_id> for
+    the result. A job of the same kind that is running, or finished recently with no catalog
+    write since, is returned instead of starting another.
+
+    Expected JSON Input:
+        - kind (str): 'genre_histogram', 'year_histogram', 'duplicates' or 'statistics'.
+
+    Returns:
+        JSON response with the job id and status, and the result if it is already complete.
+    Raises:
+        400 error if the kind is missing or not supported.
+        503 error if too many jobs are already running.
+        500 error if there is an issue starting the job.
+    """
+    try:
+        data = request.get_json()
+        kind = data.get('kind')
+        if not kind:
+            return make_response(jsonify({'error': 'Invalid input. Kind is required.'}), 400)
+
+        app.logger.info("Submitting %s analytics job", kind)
+        job = analytics_jobs.submit(kind)
+        return make_response(jsonify(job.to_dict()), 200 if job.status == "complete" else 202)
+    except ValueError as e:
+        return make_response(jsonify({'error': str(e)}), 400)
+    except queue.Full:
+        return make_response(jsonify({'error': 'Too many analytics jobs are running, try again later'}), 503)
+    except Exception as e:
+        app.logger.error(f"Error starting analytics job: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics-jobs/<job_id>', methods=['GET'])
+def get_analytics_job(job_id: str) -> Response:
+    """
+    Route to get the status of an analytics job and, once it is complete, its result.
+
+    Path Parameter:
+        - job_id (str): The id returned when the job was started.
+
+    Query Parameters:
+        - wait (float, optional): Seconds to wait for the job to finish before answering,
+          at most ANALYTICS_JOB_MAX_WAIT. Defaults to 0, answering at once.
+
+    Returns:
+        JSON response with the job's status, and its result or error once finished.
+    Raises:
+        400 error if 'wait' is not a non-negative number.
+        404 error if the job is unknown or its result has expired.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1
+    if not wait >= 0:
+        return make_response(jsonify({'error': 'wait must be a non-negative number of seconds'}), 400)
+    wait = min(wait, ANALYTICS_JOB_MAX_WAIT)
+
+    job = analytics_jobs.get(job_id)
+    if job is None:
+        return make_response(jsonify({'error': f'Analytics job {job_id} not found'}), 404)
+
+    if wait:
+        analytics_jobs.wait(job, wait)
+
+    return make_response(jsonify(job.to_dict()), 200)
+
+
+############################################################
+#
+# Admin
+#
+############################################################
+
+@app.route('/api/admin/sql-stats', methods=['GET'])
+def get_sql_stats() -> Response:
+    """
+    Route to get per-statement timing statistics and recent slow queries.
+    Statements are only timed on connections opened with tracing enabled (SQL_TRACE=true).
+
+    Query Parameters:
+        - reset (bool, optional): If true, clear the statistics after returning them.
+
+    Returns:
+        JSON response with the statement summary (count, total, average and p95 in ms)
+        and the slow-query log.
+    """
+    try:
+        app.logger.info("Retrieving SQL statement statistics")
+        statements = statement_stats.summary()
+        slow_queries = list(statement_stats.slow_queries)
+
+        if request.args.get('reset', 'false').lower() == 'true':
+            app.logger.info("Resetting SQL statement statistics")
+            statement_stats.reset()
+
+        return make_response(jsonify({'status': 'success', 'statements': statements, 'slow_queries': slow_queries}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL statistics: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,1050 @@
+"""
+ASGI variant of app.py with the same routes, for serving many slow requests from one process.
+
+Handlers are coroutines: SQLite work runs on a bounded thread pool (async_sql_utils.run_db) and
+random.org is called through a shared async HTTP client (async_random_utils), so a request
+waiting on entropy holds no thread. Serve it with an ASGI server, e.g.
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import queue
+import threading
+
+from dotenv import load_dotenv
+from quart import Quart, jsonify, make_response, Response, request
+
+from music_collection.models import song_model
+from music_collection.models.analytics_jobs import ANALYTICS_JOB_MAX_WAIT, AnalyticsJobQueue
+from music_collection.models.playlist_model import PlaylistModel
+from music_collection.utils.async_random_utils import close_client, get_random
+from music_collection.utils.async_sql_utils import db_pool_stats, iterate_db, run_db
+from music_collection.utils.health import ReadinessProbe
+from music_collection.utils.json_provider import FastJSONProvider, PreEncodedJSON, encode_ndjson
+from music_collection.utils.metrics import PROMETHEUS_CONTENT_TYPE, instrument_asgi_app, metrics
+from music_collection.utils.random_utils import breaker as random_org_breaker
+from music_collection.utils.sql_utils import statement_stats
+
+
+# Load environment variables from .env file
+load_dotenv()
+
+app = Quart(__name__)
+app.json = FastJSONProvider(app)
+instrument_asgi_app(app)
+
+
+@app.after_serving
+async def _close_http_client() -> None:
+    await close_client()
+
+# Readiness is checked against the database at most every READINESS_TTL seconds, in the background
+readiness = ReadinessProbe(["songs"])
+readiness.register_gauge("db_pool", db_pool_stats)
+readiness.register_gauge("random_org", random_org_breaker.snapshot)
+
+playlist_model = PlaylistModel()
+
+# Column store of the catalog for the analytics routes. It pulls in NumPy, so it is only
+# created, and loaded, when an analytics route is first used
+_catalog_snapshot = None
+_catalog_snapshot_lock = threading.Lock()
+
+def get_catalog_snapshot():
+    """
+    Returns the catalog snapshot, creating it on first use.
+    """
+    global _catalog_snapshot
+    with _catalog_snapshot_lock:
+        if _catalog_snapshot is None:
+            from music_collection.models.catalog_snapshot import CatalogSnapshot
+            _catalog_snapshot = CatalogSnapshot()
+    return _catalog_snapshot
+
+# Heavy aggregations run as background jobs on a pool of worker processes, started on first use
+analytics_jobs = AnalyticsJobQueue()
+readiness.register_gauge("analytics_jobs", analytics_jobs.snapshot)
+
+
+# Bodies of responses that never change are encoded once
+HEALTHY = PreEncodedJSON({'status': 'healthy'})
+DATABASE_HEALTHY = PreEncodedJSON({'database_status': 'healthy'})
+
+
+####################################################
+#
+# Healthchecks
+#
+####################################################
+
+@app.route('/api/health', methods=['GET'])
+async def healthcheck() -> Response:
+    """
+    Health check route to verify the service is running.
+
+    Returns:
+        JSON response indicating the health status of the service.
+    """
+    app.logger.info('Health check')
+    return HEALTHY.response(app, 200)
+
+
+@app.route('/api/db-check', methods=['GET'])
+async def db_check() -> Response:
+    """
+    Route to check if the database connection and songs table are functional.
+    Served from the readiness probe's cached result.
+
+    Returns:
+        JSON response indicating the database health status.
+    Raises:
+        404 error if there is an issue with the database.
+    """
+    app.logger.info("Checking database readiness...")
+    if readiness.checked_at is None:
+        await run_db(readiness.refresh)
+    status = readiness.status()
+    if status['ready']:
+        return DATABASE_HEALTHY.response(app, 200)
+    return await make_response(jsonify({'error': status['error']}), 404)
+
+
+@app.route('/api/ready', methods=['GET'])
+async def readiness_check() -> Response:
+    """
+    Readiness route for orchestrator probes, separate from the /api/health liveness route.
+
+    The database check is cached for READINESS_TTL seconds and refreshed in the background,
+    so probes add no database load.
+
+    Returns:
+        JSON response with the readiness, the database status and the current load.
+        503 status if the service is not ready.
+    """
+    if readiness.checked_at is None:
+        await run_db(readiness.refresh)
+    status = readiness.status()
+    return await make_response(jsonify(status), 200 if status['ready'] else 503)
+
+
+@app.route('/api/metrics', methods=['GET'])
+async def get_metrics() -> Response:
+    """
+    Route to expose request, database and random.org metrics in Prometheus text format.
+
+    Returns:
+        Plain text response with the current metric values.
+    """
+    return Response(metrics.render(), status=200, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+##########################################################
+#
+# Song Management
+#
+##########################################################
+
+@app.route('/api/create-song', methods=['POST'])
+async def add_song() -> Response:
+    """
+    Route to add a new song to the playlist.
+
+    Expected JSON Input:
+        - artist (str): The artist's name.
+        - title (str): The song title.
+        - year (int): The year the song was released.
+        - genre (str): The genre of the song.
+        - duration (int): The duration of the song in seconds.
+
+    Returns:
+        JSON response indicating the success of the song addition.
+    Raises:
+        400 error if input validation fails.
+        500 error if there is an issue adding the song to the playlist.
+    """
+    app.logger.info('Adding a new song to the catalog')
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+        genre = data.get('genre')
+        duration = data.get('duration')
+
+        if not artist or not title or year is None or not genre or duration is None:
+            return await make_response(jsonify({'error': 'Invalid input, all fields are required with valid values'}), 400)
+
+        # Add the song to the playlist
+        app.logger.info('Adding song: %s - %s', artist, title)
+        await run_db(song_model.create_song, artist=artist, title=title, year=year, genre=genre, duration=duration)
+        app.logger.info("Song added to playlist: %s - %s", artist, title)
+        return await make_response(jsonify({'status': 'success', 'song': title}), 201)
+    except Exception as e:
+        app.logger.error("Failed to add song: %s", str(e))
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/delete-song/<int:song_id>', methods=['DELETE'])
+async def delete_song(song_id: int) -> Response:
+    """
+    Route to delete a song by its ID (soft delete).
+
+    Path Parameter:
+        - song_id (int): The ID of the song to delete.
+
+    Returns:
+        JSON response indicating success of the operation or error message.
+    """
+    try:
+        app.logger.info(f"Deleting song by ID: {song_id}")
+        await run_db(song_model.delete_song, song_id)
+        return await make_response(jsonify({'status': 'success'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error deleting song: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/get-all-songs-from-catalog', methods=['GET'])
+async def get_all_songs() -> Response:
+    """
+    Route to retrieve all songs in the catalog (non-deleted), with an option to sort by play count.
+
+    Query Parameter:
+        - sort_by_play_count (bool, optional): If true, sort songs by play count.
+
+    Returns:
+        JSON response with the list of songs or error message.
+    """
+    try:
+        # Extract query parameter for sorting by play count
+        sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
+
+        app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
+        songs = await run_db(song_model.get_all_songs, sort_by_play_count=sort_by_play_count)
+
+        return await make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving songs: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/export-catalog', methods=['GET'])
+async def export_catalog() -> Response:
+    """
+    Route to stream all songs in the catalog (non-deleted) as newline-delimited JSON, one song per line.
+
+    Songs are read from the database in chunks while the response is sent, so memory use does
+    not grow with the catalog. An error after the first chunk has been sent ends the stream early.
+
+    Query Parameter:
+        - sort_by_play_count (bool, optional): If true, sort songs by play count.
+
+    Returns:
+        NDJSON response streaming the songs.
+    """
+    sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
+    app.logger.info("Exporting the catalog, sort_by_play_count=%s", sort_by_play_count)
+
+    async def stream_songs():
+        async for songs in iterate_db(song_model.iter_all_songs, sort_by_play_count=sort_by_play_count):
+            yield encode_ndjson(app, songs)
+
+    return Response(stream_songs(), status=200, mimetype='application/x-ndjson')
+
+
+@app.route('/api/get-song-from-catalog-by-id/<int:song_id>', methods=['GET'])
+async def get_song_by_id(song_id: int) -> Response:
+    """
+    Route to retrieve a song by its ID.
+
+    Path Parameter:
+        - song_id (int): The ID of the song.
+
+    Returns:
+        JSON response with the song details or error message.
+    """
+    try:
+        app.logger.info(f"Retrieving song by ID: {song_id}")
+        song = await run_db(song_model.get_song_by_id, song_id)
+        return await make_response(jsonify({'status': 'success', 'song': song}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving song by ID: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-song-from-catalog-by-compound-key', methods=['GET'])
+async def get_song_by_compound_key() -> Response:
+    """
+    Route to retrieve a song by its compound key (artist, title, year).
+
+    Query Parameters:
+        - artist (str): The artist's name.
+        - title (str): The song title.
+        - year (int): The year the song was released.
+
+    Returns:
+        JSON response with the song details or error message.
+    """
+    try:
+        # Extract query parameters from the request
+        artist = request.args.get('artist')
+        title = request.args.get('title')
+        year = request.args.get('year')
+
+        if not artist or not title or not year:
+            return await make_response(jsonify({'error': 'Missing required query parameters: artist, title, year'}), 400)
+
+        # Attempt to cast year to an integer
+        try:
+            year = int(year)
+        except ValueError:
+            return await make_response(jsonify({'error': 'Year must be an integer'}), 400)
+
+        app.logger.info(f"Retrieving song by compound key: {artist}, {title}, {year}")
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+        return await make_response(jsonify({'status': 'success', 'song': song}), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error retrieving song by compound key: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-random-song', methods=['GET'])
+async def get_random_song() -> Response:
+    """
+    Route to retrieve a random song from the catalog.
+
+    Returns:
+        JSON response with the details of a random song or error message.
+    """
+    try:
+        app.logger.info("Retrieving a random song from the catalog")
+        all_songs = await run_db(song_model.get_song_columns)
+        if not all_songs:
+            raise ValueError("The song catalog is empty.")
+
+        # Await random.org on the event loop rather than holding an executor thread
+        random_index = await get_random(len(all_songs))
+        song = all_songs[random_index - 1]
+        return await make_response(jsonify({'status': 'success', 'song': song}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving a random song: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/search-songs', methods=['GET'])
+async def search_songs() -> Response:
+    """
+    Route to search the catalog by artist, title and genre, best matches first.
+
+    Query Parameters:
+        - q (str): The words to search for; each must match the start of a word in the song.
+        - page (int, optional): The 1-based page number. Default is 1.
+        - page_size (int, optional): Songs per page, at most 100. Default is 20.
+
+    Returns:
+        JSON response with the page of matching songs and whether more pages follow.
+    Raises:
+        400 error if the query or pagination parameters are invalid.
+        500 error if there is an issue searching the catalog.
+    """
+    try:
+        query = request.args.get('q', '')
+        try:
+            page = int(request.args.get('page', 1))
+            page_size = int(request.args.get('page_size', 20))
+        except ValueError:
+            return await make_response(jsonify({'error': 'Page and page_size must be integers'}), 400)
+
+        if page < 1 or not 1 <= page_size <= 100:
+            return await make_response(jsonify({'error': 'Page must be at least 1 and page_size between 1 and 100'}), 400)
+
+        app.logger.info("Searching songs for '%s', page %d", query, page)
+
+        # Fetch one extra song to tell whether another page follows
+        songs = await run_db(song_model.search_songs, query, limit=page_size + 1, offset=(page - 1) * page_size)
+
+        return await make_response(jsonify({
+            'status': 'success',
+            'query': query,
+            'page': page,
+            'page_size': page_size,
+            'has_more': len(songs) > page_size,
+            'songs': songs[:page_size]
+        }), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid search: {e}")
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error searching songs: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Playlist Management
+#
+############################################################
+
+@app.route('/api/add-song-to-playlist', methods=['POST'])
+async def add_song_to_playlist() -> Response:
+    """
+    Route to add a song to the playlist by compound key (artist, title, year).
+
+    Expected JSON Input:
+        - artist (str): The artist's name.
+        - title (str): The song title.
+        - year (int): The year the song was released.
+
+    Returns:
+        JSON response indicating success of the addition or error message.
+    """
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+
+        if not artist or not title or not year:
+            return await make_response(jsonify({'error': 'Invalid input. Artist, title, and year are required.'}), 400)
+
+        # Lookup the song by compound key
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+
+        # Add song to playlist
+        playlist_model.add_song_to_playlist(song)
+
+        app.logger.info(f"Song added to playlist: {artist} - {title} ({year})")
+        return await make_response(jsonify({'status': 'success', 'message': 'Song added to playlist'}), 201)
+
+    except Exception as e:
+        app.logger.error(f"Error adding song to playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/remove-song-from-playlist', methods=['DELETE'])
+async def remove_song_by_song_id() -> Response:
+    """
+    Route to remove a song from the playlist by compound key (artist, title, year).
+
+    Expected JSON Input:
+        - artist (str): The artist's name.
+        - title (str): The song title.
+        - year (int): The year the song was released.
+
+    Returns:
+        JSON response indicating success of the removal or error message.
+    """
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+
+        if not artist or not title or not year:
+            return await make_response(jsonify({'error': 'Invalid input. Artist, title, and year are required.'}), 400)
+
+        # Lookup the song by compound key
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+
+        # Remove song from playlist
+        playlist_model.remove_song_by_song_id(song.id)
+
+        app.logger.info(f"Song removed from playlist: {artist} - {title} ({year})")
+        return await make_response(jsonify({'status': 'success', 'message': 'Song removed from playlist'}), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error removing song from playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/remove-song-from-playlist-by-track-number/<int:track_number>', methods=['DELETE'])
+async def remove_song_by_track_number(track_number: int) -> Response:
+    """
+    Route to remove a song from the playlist by track number.
+
+    Path Parameter:
+        - track_number (int): The track number of the song to remove.
+
+    Returns:
+        JSON response indicating success of the removal or an error message.
+    """
+    try:
+        app.logger.info(f"Removing song from playlist by track number: {track_number}")
+
+        # Remove song by track number
+        playlist_model.remove_song_by_track_number(track_number)
+
+        return await make_response(jsonify({'status': 'success', 'message': f'Song at track number {track_number} removed from playlist'}), 200)
+
+    except ValueError as e:
+        app.logger.error(f"Error removing song by track number: {e}")
+        return await make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error(f"Error removing song from playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/clear-playlist', methods=['POST'])
+async def clear_playlist() -> Response:
+    """
+    Route to clear all songs from the playlist.
+
+    Returns:
+        JSON response indicating success of the operation or an error message.
+    """
+    try:
+        app.logger.info('Clearing the playlist')
+
+        # Clear the entire playlist
+        playlist_model.clear_playlist()
+
+        return await make_response(jsonify({'status': 'success', 'message': 'Playlist cleared'}), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error clearing the playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+############################################################
+#
+# Play Playlist
+#
+############################################################
+
+@app.route('/api/play-current-song', methods=['POST'])
+async def play_current_song() -> Response:
+    """
+    Route to play the current song in the playlist.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue playing the current song.
+    """
+    try:
+        app.logger.info('Playing current song')
+        current_song = playlist_model.get_current_song()
+        await run_db(playlist_model.play_current_song)
+
+        return await make_response(jsonify({
+            'status': 'success',
+            'song': {
+                'id': current_song.id,
+                'artist': current_song.artist,
+                'title': current_song.title,
+                'year': current_song.year,
+                'genre': current_song.genre,
+                'duration': current_song.duration
+            }
+        }), 200)
+    except Exception as e:
+        app.logger.error(f"Error playing current song: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+@app.route('/api/play-entire-playlist', methods=['POST'])
+async def play_entire_playlist() -> Response:
+    """
+    Route to play all songs in the playlist.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue playing the playlist.
+    """
+    try:
+        app.logger.info('Playing entire playlist')
+        await run_db(playlist_model.play_entire_playlist)
+        return await make_response(jsonify({'status': 'success'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error playing playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/play-rest-of-playlist', methods=['POST'])
+async def play_rest_of_playlist() -> Response:
+    """
+    Route to play the rest of the playlist from the current track.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue playing the rest of the playlist.
+    """
+    try:
+        app.logger.info('Playing rest of the playlist')
+        await run_db(playlist_model.play_rest_of_playlist)
+        return await make_response(jsonify({'status': 'success'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error playing rest of the playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/rewind-playlist', methods=['POST'])
+async def rewind_playlist() -> Response:
+    """
+    Route to rewind the playlist to the first song.
+
+    Returns:
+        JSON response indicating success of the operation.
+    Raises:
+        500 error if there is an issue rewinding the playlist.
+    """
+    try:
+        app.logger.info('Rewinding playlist to the first song')
+        playlist_model.rewind_playlist()
+        return await make_response(jsonify({'status': 'success'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error rewinding playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-all-songs-from-playlist', methods=['GET'])
+async def get_all_songs_from_playlist() -> Response:
+    """
+    Route to retrieve all songs in the playlist.
+
+    Returns:
+        JSON response with the list of songs or an error message.
+    """
+    try:
+        app.logger.info("Retrieving all songs from the playlist")
+
+        # Get all songs from the playlist
+        songs = playlist_model.get_all_songs()
+
+        return await make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error retrieving songs from playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-song-from-playlist-by-track-number/<int:track_number>', methods=['GET'])
+async def get_song_by_track_number(track_number: int) -> Response:
+    """
+    Route to retrieve a song by its track number from the playlist.
+
+    Path Parameter:
+        - track_number (int): The track number of the song.
+
+    Returns:
+        JSON response with the song details or error message.
+    """
+    try:
+        app.logger.info(f"Retrieving song from playlist by track number: {track_number}")
+
+        # Get the song by track number
+        song = playlist_model.get_song_by_track_number(track_number)
+
+        return await make_response(jsonify({'status': 'success', 'song': song}), 200)
+
+    except ValueError as e:
+        app.logger.error(f"Error retrieving song by track number: {e}")
+        return await make_response(jsonify({'error': str(e)}), 404)
+    except Exception as e:
+        app.logger.error(f"Error retrieving song from playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-current-song', methods=['GET'])
+async def get_current_song() -> Response:
+    """
+    Route to retrieve the current song being played.
+
+    Returns:
+        JSON response with the current song details or error message.
+    """
+    try:
+        app.logger.info("Retrieving the current song from the playlist")
+
+        # Get the current song
+        current_song = playlist_model.get_current_song()
+
+        return await make_response(jsonify({'status': 'success', 'current_song': current_song}), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error retrieving current song: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/get-playlist-length-duration', methods=['GET'])
+async def get_playlist_length_and_duration() -> Response:
+    """
+    Route to retrieve both the length (number of songs) and the total duration of the playlist.
+
+    Returns:
+        JSON response with the playlist length and total duration or error message.
+    """
+    try:
+        app.logger.info("Retrieving playlist length and total duration")
+
+        # Get playlist length and duration
+        playlist_length = playlist_model.get_playlist_length()
+        playlist_duration = playlist_model.get_playlist_duration()
+
+        return await make_response(jsonify({
+            'status': 'success',
+            'playlist_length': playlist_length,
+            'playlist_duration': playlist_duration
+        }), 200)
+
+    except Exception as e:
+        app.logger.error(f"Error retrieving playlist length and duration: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/go-to-track-number/<int:track_number>', methods=['POST'])
+async def go_to_track_number(track_number: int) -> Response:
+    """
+    Route to set the playlist to start playing from a specific track number.
+
+    Path Parameter:
+        - track_number (int): The track number to set as the current song.
+
+    Returns:
+        JSON response indicating success or an error message.
+    """
+    try:
+        app.logger.info(f"Going to track number: {track_number}")
+
+        # Set the playlist to start at the given track number
+        playlist_model.go_to_track_number(track_number)
+
+        return await make_response(jsonify({'status': 'success', 'track_number': track_number}), 200)
+    except ValueError as e:
+        app.logger.error(f"Error going to track number {track_number}: {e}")
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error going to track number: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+############################################################
+#
+# Arrange Playlist
+#
+############################################################
+
+@app.route('/api/move-song-to-beginning', methods=['POST'])
+async def move_song_to_beginning() -> Response:
+    """
+    Route to move a song to the beginning of the playlist.
+
+    Expected JSON Input:
+        - artist (str): The artist of the song.
+        - title (str): The title of the song.
+        - year (int): The year the song was released.
+
+    Returns:
+        JSON response indicating success or an error message.
+    """
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+
+        app.logger.info(f"Moving song to beginning: {artist} - {title} ({year})")
+
+        # Retrieve song by compound key and move it to the beginning
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+        playlist_model.move_song_to_beginning(song.id)
+
+        return await make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error moving song to beginning: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/move-song-to-end', methods=['POST'])
+async def move_song_to_end() -> Response:
+    """
+    Route to move a song to the end of the playlist.
+
+    Expected JSON Input:
+        - artist (str): The artist of the song.
+        - title (str): The title of the song.
+        - year (int): The year the song was released.
+
+    Returns:
+        JSON response indicating success or an error message.
+    """
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+
+        app.logger.info(f"Moving song to end: {artist} - {title} ({year})")
+
+        # Retrieve song by compound key and move it to the end
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+        playlist_model.move_song_to_end(song.id)
+
+        return await make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}'}), 200)
+    except Exception as e:
+        app.logger.error(f"Error moving song to end: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/move-song-to-track-number', methods=['POST'])
+async def move_song_to_track_number() -> Response:
+    """
+    Route to move a song to a specific track number in the playlist.
+
+    Expected JSON Input:
+        - artist (str): The artist of the song.
+        - title (str): The title of the song.
+        - year (int): The year the song was released.
+        - track_number (int): The new track number to move the song to.
+
+    Returns:
+        JSON response indicating success or an error message.
+    """
+    try:
+        data = await request.get_json()
+
+        artist = data.get('artist')
+        title = data.get('title')
+        year = data.get('year')
+        track_number = data.get('track_number')
+
+        app.logger.info(f"Moving song to track number {track_number}: {artist} - {title} ({year})")
+
+        # Retrieve song by compound key and move it to the specified track number
+        song = await run_db(song_model.get_song_by_compound_key, artist, title, year)
+        playlist_model.move_song_to_track_number(song.id, track_number)
+
+        return await make_response(jsonify({'status': 'success', 'song': f'{artist} - {title}', 'track_number': track_number}), 200)
+    except Exception as e:
+        app.logger.error(f"Error moving song to track number: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/swap-songs-in-playlist', methods=['POST'])
+async def swap_songs_in_playlist() -> Response:
+    """
+    Route to swap two songs in the playlist by their track numbers.
+
+    Expected JSON Input:
+        - track_number_1 (int): The track number of the first song.
+        - track_number_2 (int): The track number of the second song.
+
+    Returns:
+        JSON response indicating success or an error message.
+    """
+    try:
+        data = await request.get_json()
+
+        track_number_1 = data.get('track_number_1')
+        track_number_2 = data.get('track_number_2')
+
+        app.logger.info(f"Swapping songs at track numbers {track_number_1} and {track_number_2}")
+
+        # Retrieve songs by track numbers and swap them
+        song_1 = playlist_model.get_song_by_track_number(track_number_1)
+        song_2 = playlist_model.get_song_by_track_number(track_number_2)
+        playlist_model.swap_songs_in_playlist(song_1.id, song_2.id)
+
+        return await make_response(jsonify({
+            'status': 'success',
+            'swapped_songs': {
+                'track_1': {'id': song_1.id, 'artist': song_1.artist, 'title': song_1.title},
+                'track_2': {'id': song_2.id, 'artist': song_2.artist, 'title': song_2.title}
+            }
+        }), 200)
+    except Exception as e:
+        app.logger.error(f"Error swapping songs in playlist: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+############################################################
+#
+# Leaderboard / Stats
+#
+############################################################
+
+@app.route('/api/song-leaderboard', methods=['GET'])
+async def get_song_leaderboard() -> Response:
+    """
+    Route to get a list of all sorted by play count.
+
+    Returns:
+        JSON response with a sorted leaderboard of songs.
+    Raises:
+        500 error if there is an issue generating the leaderboard.
+    """
+    try:
+        app.logger.info("Generating song leaderboard sorted")
+        leaderboard_data = await run_db(song_model.get_all_songs, sort_by_play_count=True)
+        return await make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+    except Exception as e:
+        app.logger.error(f"Error generating leaderboard: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Analytics
+#
+############################################################
+
+@app.route('/api/analytics/songs-by', methods=['GET'])
+async def get_songs_by() -> Response:
+    """
+    Route to aggregate the catalog by genre, decade or artist.
+
+    Query Parameters:
+        - group (str): The field to group by ('genre', 'decade' or 'artist'). Default is 'genre'.
+
+    Returns:
+        JSON response with the song count, plays, total and average duration per group,
+        sorted by plays.
+    Raises:
+        400 error if the group is not supported.
+        500 error if there is an issue reading the catalog.
+    """
+    try:
+        group = request.args.get('group', 'genre')
+        app.logger.info("Aggregating the catalog by %s", group)
+        groups = await run_db(get_catalog_snapshot().group_by, group)
+        return await make_response(jsonify({'status': 'success', 'group_by': group, 'groups': groups}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid analytics request: {e}")
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error aggregating the catalog: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics/duration-distribution', methods=['GET'])
+async def get_duration_distribution() -> Response:
+    """
+    Route to get the distribution of song durations in the catalog.
+
+    Query Parameters:
+        - bins (int, optional): The number of histogram bins. Default is 10.
+
+    Returns:
+        JSON response with the duration histogram and summary statistics.
+    Raises:
+        400 error if bins is invalid or the catalog is empty.
+        500 error if there is an issue reading the catalog.
+    """
+    try:
+        try:
+            bins = int(request.args.get('bins', 10))
+        except ValueError:
+            return await make_response(jsonify({'error': 'Bins must be an integer'}), 400)
+
+        app.logger.info("Computing the duration distribution with %d bins", bins)
+        distribution = await run_db(get_catalog_snapshot().duration_distribution, bins)
+        return await make_response(jsonify({'status': 'success', 'durations': distribution}), 200)
+    except ValueError as e:
+        app.logger.error(f"Invalid analytics request: {e}")
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        app.logger.error(f"Error computing the duration distribution: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics-jobs', methods=['POST'])
+async def submit_analytics_job() -> Response:
+    """
+    Route to start an aggregation over the whole catalog, computed by background worker processes.
+
+    The response is sent as soon as the job is started; poll /api/analytics-jobs/<job_id> for
+    the result. A job of the same kind that is running, or finished recently with no catalog
+    write since, is returned instead of starting another.
+
+    Expected JSON Input:
+        - kind (str): 'genre_histogram', 'year_histogram', 'duplicates' or 'statistics'.
+
+    Returns:
+        JSON response with the job id and status, and the result if it is already complete.
+    Raises:
+        400 error if the kind is missing or not supported.
+        503 error if too many jobs are already running.
+        500 error if there is an issue starting the job.
+    """
+    try:
+        data = await request.get_json()
+        kind = data.get('kind')
+        if not kind:
+            return await make_response(jsonify({'error': 'Invalid input. Kind is required.'}), 400)
+
+        app.logger.info("Submitting %s analytics job", kind)
+        job = analytics_jobs.submit(kind)
+        return await make_response(jsonify(job.to_dict()), 200 if job.status == "complete" else 202)
+    except ValueError as e:
+        return await make_response(jsonify({'error': str(e)}), 400)
+    except queue.Full:
+        return await make_response(jsonify({'error': 'Too many analytics jobs are running, try again later'}), 503)
+    except Exception as e:
+        app.logger.error(f"Error starting analytics job: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/analytics-jobs/<job_id>', methods=['GET'])
+async def get_analytics_job(job_id: str) -> Response:
+    """
+    Route to get the status of an analytics job and, once it is complete, its result.
+
+    Path Parameter:
+        - job_id (str): The id returned when the job was started.
+
+    Query Parameters:
+        - wait (float, optional): Seconds to wait for the job to finish before answering,
+          at most ANALYTICS_JOB_MAX_WAIT. Defaults to 0, answering at once.
+
+    Returns:
+        JSON response with the job's status, and its result or error once finished.
+    Raises:
+        400 error if 'wait' is not a non-negative number.
+        404 error if the job is unknown or its result has expired.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1
+    if not wait >= 0:
+        return await make_response(jsonify({'error': 'wait must be a non-negative number of seconds'}), 400)
+    wait = min(wait, ANALYTICS_JOB_MAX_WAIT)
+
+    job = analytics_jobs.get(job_id)
+    if job is None:
+        return await make_response(jsonify({'error': f'Analytics job {job_id} not found'}), 404)
+
+    if wait and job.finished_at is None:
+        # The job's last partition resolves its future; waiting on it holds no thread
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), wait)
+        except asyncio.TimeoutError:
+            pass
+
+    return await make_response(jsonify(job.to_dict()), 200)
+
+
+############################################################
+#
+# Admin
+#
+############################################################
+
+@app.route('/api/admin/sql-stats', methods=['GET'])
+async def get_sql_stats() -> Response:
+    """
+    Route to get per-statement timing statistics and recent slow queries.
+    Statements are only timed on connections opened with tracing enabled (SQL_TRACE=true).
+
+    Query Parameters:
+        - reset (bool, optional): If true, clear the statistics after returning them.
+
+    Returns:
+        JSON response with the statement summary (count, total, average and p95 in ms)
+        and the slow-query log.
+    """
+    try:
+        app.logger.info("Retrieving SQL statement statistics")
+        statements = statement_stats.summary()
+        slow_queries = list(statement_stats.slow_queries)
+
+        if request.args.get('reset', 'false').lower() == 'true':
+            app.logger.info("Resetting SQL statement statistics")
+            statement_stats.reset()
+
+        return await make_response(jsonify({'status': 'success', 'statements': statements, 'slow_queries': slow_queries}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving SQL statistics: {e}")
+        return await make_response(jsonify({'error': str(e)}), 500)
+
+
+
+if __name__ == '__main__':
+    app.run(debug=True, host='0.0.0.0', port=5000)
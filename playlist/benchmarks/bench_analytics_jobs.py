@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from music_collection.models import analytics_jobs
+from music_collection.models.analytics_jobs import ANALYSES, AnalyticsJobQueue
+
+
+KINDS = list(ANALYSES)
+
+@pytest.fixture
+def jobs(catalog_db):
+    """Fixture providing a job queue over the generated catalog that never reuses a result."""
+    jobs = AnalyticsJobQueue(cache_max_age=-1)
+    yield jobs
+    jobs.close()
+
+
+def run_in_process(jobs, kind):
+    """The request-thread way: run every partition and merge them in this process."""
+    result = None
+    for step, analysis_pass in enumerate(ANALYSES[kind]):
+        args = (result,) if step else ()
+        result = analysis_pass.merge([
+            analytics_jobs._run_partition(kind, step, *partition, *args) for partition in jobs._partitions()
+        ])
+    return result
+
+def run_job(jobs, kind):
+    job = jobs.wait(jobs.submit(kind), timeout=600)
+    assert job.status == "complete", job.error
+    return job.result
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_in_process(benchmark, jobs, kind):
+    """Baseline: the aggregation computed in the calling thread."""
+    assert benchmark.pedantic(run_in_process, args=(jobs, kind), rounds=3) is not None
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_job(benchmark, jobs, kind):
+    """Benchmark an aggregation from submission to result on the worker processes."""
+    assert benchmark.pedantic(run_job, args=(jobs, kind), rounds=3, warmup_rounds=1) is not None
+
+def test_submit(benchmark, jobs):
+    """Benchmark the time a request spends submitting a job, which is all it waits for."""
+    benchmark(jobs.submit, "statistics")
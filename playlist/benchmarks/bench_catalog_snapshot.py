@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.models.song_model import get_all_songs, update_play_count
+
+
+def loaded_snapshot():
+    """Loads a CatalogSnapshot of the catalog song_model points at, closing it after the benchmark."""
+    snapshot = CatalogSnapshot(max_age=3600)
+    snapshot.refresh()
+    yield snapshot
+    snapshot.close()
+
+@pytest.fixture
+def snapshot(catalog_db):
+    """Fixture providing a loaded CatalogSnapshot of the generated catalog."""
+    yield from loaded_snapshot()
+
+@pytest.fixture
+def writable_snapshot(writable_catalog_db):
+    """Fixture providing a loaded CatalogSnapshot of a fresh copy of the generated catalog."""
+    yield from loaded_snapshot()
+
+
+def plays_by_genre_from_dicts():
+    """The pre-snapshot way: load every song as a dict and aggregate in Python."""
+    plays = defaultdict(int)
+    for song in get_all_songs():
+        plays[song["genre"]] += song["play_count"]
+    return plays
+
+def test_plays_by_genre_from_dicts(benchmark, catalog_db):
+    """Baseline: aggregate plays per genre over get_all_songs."""
+    assert benchmark(plays_by_genre_from_dicts)
+
+@pytest.mark.parametrize("key", ["genre", "decade", "artist"])
+def test_group_by(benchmark, snapshot, key):
+    """Benchmark a vectorized group-by on the loaded snapshot."""
+    assert benchmark(snapshot.group_by, key)
+
+def test_duration_distribution(benchmark, snapshot):
+    """Benchmark the duration histogram and percentiles on the loaded snapshot."""
+    assert benchmark(snapshot.duration_distribution)
+
+def test_refresh(benchmark, snapshot):
+    """Benchmark a full reload of the snapshot."""
+    benchmark.pedantic(snapshot.refresh, rounds=3)
+
+def test_incremental_play(benchmark, writable_snapshot):
+    """Benchmark recording a play, including the snapshot update."""
+    song_id = int(writable_snapshot.ids[0])
+    benchmark(update_play_count, song_id)
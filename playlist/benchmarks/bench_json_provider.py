@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from music_collection.models.song_model import Song, get_all_songs
+from music_collection.utils import json_provider
+from music_collection.utils.json_provider import FastJSONProvider
+
+
+@pytest.fixture(params=["default", "fast", "fast_stdlib"])
+def json_app(request, mocker):
+    """Fixture providing an app with Flask's default provider, FastJSONProvider, or FastJSONProvider without orjson."""
+    app = Flask(__name__)
+    if request.param == "default":
+        app.json = DefaultJSONProvider(app)
+    else:
+        app.json = FastJSONProvider(app)
+    if request.param == "fast_stdlib":
+        mocker.patch.object(json_provider, "orjson", None)
+    return app
+
+
+def test_catalog_response(benchmark, catalog_db, json_app):
+    """Benchmark encoding the /api/get-all-songs-from-catalog response."""
+    songs = get_all_songs()
+    with json_app.app_context():
+        response = benchmark(json_app.json.response, {'status': 'success', 'songs': songs})
+    assert response.status_code == 200
+
+def test_song_list_response(benchmark, playlist_songs, json_app):
+    """Benchmark encoding a list of Song dataclasses, as /api/get-all-songs-from-playlist returns."""
+    assert isinstance(playlist_songs[0], Song)
+    with json_app.app_context():
+        response = benchmark(json_app.json.response, {'status': 'success', 'songs': playlist_songs})
+    assert response.status_code == 200
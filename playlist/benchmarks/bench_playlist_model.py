@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from music_collection.models.playlist_model import PlaylistModel
+
+
+@pytest.fixture
+def playlist_model(playlist_songs):
+    """Fixture providing a PlaylistModel filled with the benchmark songs."""
+    model = PlaylistModel()
+    model.playlist.extend(playlist_songs)
+    return model
+
+
+def test_move_song_to_beginning(benchmark, playlist_model):
+    """Benchmark moving the last song to the beginning."""
+    benchmark(lambda: playlist_model.move_song_to_beginning(playlist_model.playlist[-1].id))
+
+def test_move_song_to_end(benchmark, playlist_model):
+    """Benchmark moving the first song to the end."""
+    benchmark(lambda: playlist_model.move_song_to_end(playlist_model.playlist[0].id))
+
+def test_move_song_to_track_number(benchmark, playlist_model):
+    """Benchmark moving the first song to the middle of the playlist."""
+    middle = playlist_model.get_playlist_length() // 2
+    benchmark(lambda: playlist_model.move_song_to_track_number(playlist_model.playlist[0].id, middle))
+
+def test_swap_songs_in_playlist(benchmark, playlist_model):
+    """Benchmark swapping the first and last songs."""
+    benchmark(lambda: playlist_model.swap_songs_in_playlist(playlist_model.playlist[0].id, playlist_model.playlist[-1].id))
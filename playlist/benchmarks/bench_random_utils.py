@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from music_collection.utils import random_utils
+
+
+def test_get_random(benchmark, random_org):
+    """Benchmark one random.org draw against the stand-in, over the pooled session."""
+    number = benchmark(random_utils.get_random, 100)
+    assert 1 <= number <= 100
+
+def test_get_random_burst(benchmark, random_org):
+    """Benchmark 50 concurrent draws, as during a burst of /api/play-random-song requests."""
+    with ThreadPoolExecutor(max_workers=random_utils.RANDOM_ORG_POOL_SIZE) as executor:
+        numbers = benchmark(lambda: list(executor.map(random_utils.get_random, [100] * 50)))
+    assert len(numbers) == 50
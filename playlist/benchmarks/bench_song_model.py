@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+import time
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from music_collection.models.song_model import (
+    get_all_songs, get_random_song, get_song_by_id, get_song_columns, iter_all_songs, search_songs, update_play_count
+)
+
+
+@pytest.mark.parametrize("sort_by_play_count", [False, True], ids=["unsorted", "by_play_count"])
+def test_get_all_songs(benchmark, catalog_db, sort_by_play_count):
+    """Benchmark loading the whole non-deleted catalog."""
+    songs = benchmark(get_all_songs, sort_by_play_count=sort_by_play_count)
+    assert songs
+
+@pytest.mark.parametrize("loader", [get_all_songs, get_song_columns], ids=["dicts", "columns"])
+def test_catalog_memory(benchmark, catalog_db, loader):
+    """Benchmark loading the catalog as dicts or as SongColumns, recording the bytes retained per song."""
+    tracemalloc.start()
+    songs = loader()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["bytes_per_song"] = round(retained / len(songs), 1)
+
+    benchmark(loader)
+
+@pytest.mark.parametrize("chunk_size", [100, 1000])
+def test_iter_all_songs(benchmark, catalog_db, chunk_size):
+    """Benchmark streaming the catalog, recording the peak memory and the time to the first song."""
+    tracemalloc.start()
+    for _ in iter_all_songs(chunk_size=chunk_size):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["peak_bytes"] = peak
+
+    start = time.perf_counter()
+    next(iter_all_songs(chunk_size=chunk_size))
+    benchmark.extra_info["first_song_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    benchmark(lambda: sum(1 for _ in iter_all_songs(chunk_size=chunk_size)))
+
+@pytest.mark.parametrize("query", ["Artist 42", "Song 9", "rock"])
+def test_search_songs(benchmark, catalog_db, query):
+    """Benchmark a ranked first-page search through the FTS5 index."""
+    benchmark(search_songs, query, limit=20)
+
+def test_get_random_song(benchmark, catalog_db, mocker):
+    """Benchmark picking a random song, with the random.org call replaced by a local draw."""
+    rng = random.Random(0)
+    mocker.patch("music_collection.models.song_model.get_random", side_effect=lambda num_songs: rng.randint(1, num_songs))
+
+    song = benchmark(get_random_song)
+    assert song.id > 0
+
+def test_update_play_count(benchmark, writable_catalog_db):
+    """Benchmark incrementing the play count of live songs."""
+    live_ids = [song["id"] for song in get_all_songs()]
+    rng = random.Random(0)
+
+    benchmark(lambda: update_play_count(rng.choice(live_ids)))
+
+@pytest.mark.parametrize("sort_by_play_count", [False, True], ids=["unsorted", "by_play_count"])
+def test_sharded_get_all_songs(benchmark, sharded_catalog_db, sort_by_play_count):
+    """Benchmark loading the whole catalog, fanning out over the shards and merging their sorted rows."""
+    songs = benchmark(get_all_songs, sort_by_play_count=sort_by_play_count)
+    assert songs
+
+def test_sharded_get_song_by_id(benchmark, sharded_catalog_db):
+    """Benchmark point lookups routed to the shard holding the id."""
+    live_ids = [song["id"] for song in iter_all_songs()][:10000]
+    rng = random.Random(0)
+
+    song = benchmark(lambda: get_song_by_id(rng.choice(live_ids)))
+    assert song.id > 0
+
+@pytest.mark.parametrize("writers", [8])
+def test_sharded_concurrent_writes(benchmark, writable_sharded_catalog_db, writers):
+    """Benchmark 200 play count updates from concurrent writers, which one file serializes and shards spread out."""
+    live_ids = [song["id"] for song in iter_all_songs()][:10000]
+    rng = random.Random(0)
+
+    def play_many():
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            list(executor.map(update_play_count, [rng.choice(live_ids) for _ in range(200)]))
+
+    benchmark(play_many)
@@ -0,0 +1,211 @@
+"""
+Fixtures for the song_model and PlaylistModel micro-benchmarks.
+
+The benchmarks run against real SQLite databases generated from sql/create_song_table.sql,
+so they measure actual query cost rather than mocked connections. They need pytest-benchmark
+and are not collected by a plain `pytest` run; run them explicitly:
+
+    python -m pytest benchmarks/bench_*.py --benchmark-json=bench_results.json
+
+and compare runs across commits with --benchmark-autosave / --benchmark-compare.
+
+Environment:
+    BENCH_SIZES: Comma-separated catalog sizes in rows. Defaults to 10000,100000,1000000.
+    BENCH_PLAYLIST_SIZES: Comma-separated playlist lengths. Defaults to 100,1000,10000.
+    BENCH_SHARDS: Comma-separated shard counts for the sharded catalog benchmarks. Defaults to 1,4.
+    BENCH_DB_DIR: Directory in which generated databases are cached between runs.
+        Defaults to a pytest temporary directory.
+    BENCH_RANDOM_ORG_LATENCY: Semicolon-separated latency specs of the local random.org stand-in
+        (see random_org_standin.parse_latency). Defaults to fixed:0;lognormal:80,0.5.
+"""
+import logging
+import os
+from pathlib import Path
+import random
+import shutil
+import sqlite3
+from unittest import mock
+
+import pytest
+
+from music_collection.utils import random_utils, shard_utils, sql_utils
+from music_collection.utils.circuit_breaker import CircuitBreaker
+from music_collection.utils.random_org_standin import RandomOrgStandIn, StandInConfig
+
+from music_collection.models.song_model import Song
+
+
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "10000,100000,1000000").split(",")]
+PLAYLIST_SIZES = [int(size) for size in os.getenv("BENCH_PLAYLIST_SIZES", "100,1000,10000").split(",")]
+SHARD_COUNTS = [int(count) for count in os.getenv("BENCH_SHARDS", "1,4").split(",")]
+
+RANDOM_ORG_LATENCIES = os.getenv("BENCH_RANDOM_ORG_LATENCY", "fixed:0;lognormal:80,0.5").split(";")
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql"
+GENRES = ["Rock", "Pop", "Jazz", "Hip-Hop", "Classical", "Country", "Electronic", "Blues"]
+
+
+def generate_catalog(db_path: Path, rows: int, seed: int = 411) -> None:
+    """
+    Creates a songs table with the given number of synthetic rows.
+
+    Args:
+        db_path (Path): Where to create the database.
+        rows (int): The number of songs to insert.
+        seed (int): The random seed, so every run benchmarks the same data.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA_PATH.read_text())
+        conn.executemany(
+            "INSERT INTO songs (artist, title, year, genre, duration, play_count, deleted) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    f"Artist {i % 5000}",
+                    f"Song {i}",
+                    rng.randint(1950, 2024),
+                    rng.choice(GENRES),
+                    rng.randint(60, 600),
+                    rng.randint(0, 10000),
+                    rng.random() < 0.02,
+                )
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def split_catalog(db_path: Path, sharded_path: Path, shards: int) -> None:
+    """
+    Copies a generated catalog into 'shards' shard files next to 'sharded_path', each song
+    in the shard of its compound key under an id naming that shard, as create_song stores it.
+
+    Args:
+        db_path (Path): The generated catalog.
+        sharded_path (Path): The DB_PATH of the sharded copy.
+        shards (int): The number of shards.
+    """
+    source = sqlite3.connect(db_path)
+    rows = source.execute("SELECT artist, title, year, genre, duration, play_count, deleted FROM songs ORDER BY id").fetchall()
+    source.close()
+
+    with mock.patch.object(sql_utils, "DB_PATH", str(sharded_path)), mock.patch.object(shard_utils, "DB_SHARDS", shards):
+        shard_utils.create_shards(SCHEMA_PATH.read_text())
+        shard_rows = [[] for _ in range(shards)]
+        for row in rows:
+            shard = shard_utils.shard_for_key(*row[:3])
+            shard_rows[shard].append((shard_utils.first_id(shard) + len(shard_rows[shard]) * shards,) + row)
+        for shard, rows in enumerate(shard_rows):
+            conn = sqlite3.connect(shard_utils.shard_path(shard))
+            conn.executemany(
+                "INSERT INTO songs (id, artist, title, year, genre, duration, play_count, deleted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.commit()
+            conn.close()
+
+
+def copy_catalog(db_path: Path, copy_path: Path, shards: int = 1) -> Path:
+    """
+    Copies a generated catalog, and its shard files if it is sharded, so a write benchmark
+    leaves the cached catalog unchanged for the benchmarks after it.
+
+    Args:
+        db_path (Path): The DB_PATH of the generated catalog.
+        copy_path (Path): The DB_PATH of the copy.
+        shards (int): The catalog's shard count.
+
+    Returns:
+        Path: copy_path.
+    """
+    shutil.copyfile(db_path, copy_path)
+    if shards > 1:
+        for shard in range(shards):
+            shutil.copyfile(
+                db_path.with_name(f"{db_path.stem}.shard{shard}{db_path.suffix}"),
+                copy_path.with_name(f"{copy_path.stem}.shard{shard}{copy_path.suffix}"),
+            )
+    return copy_path
+
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logging():
+    """Silence INFO logging so the benchmarks measure query cost rather than log I/O."""
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda size: f"{size}_rows")
+def catalog_path(request, tmp_path_factory) -> Path:
+    """Fixture providing the path of a generated catalog, once per size per session."""
+    rows = request.param
+    cache_dir = os.getenv("BENCH_DB_DIR")
+    db_dir = Path(cache_dir) if cache_dir else tmp_path_factory.mktemp("catalogs")
+    db_dir.mkdir(parents=True, exist_ok=True)
+    db_path = db_dir / f"song_catalog_{rows}.db"
+    if not db_path.exists():
+        generate_catalog(db_path, rows)
+    return db_path
+
+@pytest.fixture
+def catalog_db(catalog_path, mocker) -> Path:
+    """Fixture pointing song_model at a generated catalog."""
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(catalog_path))
+    return catalog_path
+
+@pytest.fixture
+def writable_catalog_db(catalog_path, tmp_path, mocker) -> Path:
+    """Fixture pointing song_model at a fresh copy of a generated catalog, for benchmarks that write."""
+    db_path = copy_catalog(catalog_path, tmp_path / catalog_path.name)
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture(scope="session", params=SHARD_COUNTS, ids=lambda shards: f"{shards}_shards")
+def sharded_catalog_path(request, catalog_path) -> tuple:
+    """Fixture providing the DB_PATH and shard count of a generated catalog split into shards."""
+    shards = request.param
+    if shards == 1:
+        return catalog_path, 1
+    sharded_path = catalog_path.with_name(f"{catalog_path.stem}_x{shards}.db")
+    if not sharded_path.exists():
+        split_catalog(catalog_path, sharded_path, shards)
+        sharded_path.touch()
+    return sharded_path, shards
+
+@pytest.fixture
+def sharded_catalog_db(sharded_catalog_path, mocker) -> int:
+    """Fixture pointing song_model at a generated catalog split into shards, returning the shard count."""
+    db_path, shards = sharded_catalog_path
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    mocker.patch.object(shard_utils, "DB_SHARDS", shards)
+    return shards
+
+@pytest.fixture
+def writable_sharded_catalog_db(sharded_catalog_path, tmp_path, mocker) -> int:
+    """Fixture pointing song_model at a fresh copy of a sharded catalog, for benchmarks that write."""
+    db_path, shards = sharded_catalog_path
+    db_path = copy_catalog(db_path, tmp_path / db_path.name, shards)
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    mocker.patch.object(shard_utils, "DB_SHARDS", shards)
+    return shards
+
+@pytest.fixture(params=PLAYLIST_SIZES, ids=lambda size: f"{size}_songs")
+def playlist_songs(request) -> list:
+    """Fixture providing a list of distinct songs to fill a playlist with."""
+    return [Song(i, f"Artist {i}", f"Song {i}", 2000, "Rock", 180) for i in range(1, request.param + 1)]
+
+@pytest.fixture(scope="session")
+def random_org_standin():
+    """Fixture running the local random.org stand-in for the whole session."""
+    with RandomOrgStandIn() as standin:
+        yield standin
+
+@pytest.fixture(params=RANDOM_ORG_LATENCIES)
+def random_org(request, random_org_standin, mocker) -> RandomOrgStandIn:
+    """Fixture pointing random_utils at the stand-in, once per configured latency."""
+    random_org_standin.config = StandInConfig(latency=request.param, seed=411)
+    mocker.patch.object(random_utils, "RANDOM_ORG_BASE_URL", random_org_standin.base_url)
+    mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org"))
+    return random_org_standin
@@ -11,7 +11,16 @@ if [ "$CREATE_DB" = "true" ]; then
     /app/sql/create_db.sh
 else
     echo "Skipping database creation."
+    # An existing database may predate parts of the schema
+    /app/sql/migrate_db.sh
 fi
 
-# Start the Python application
-exec python app.py
+# Start the Python application: pre-fork workers under Gunicorn if SERVER_MODE is prefork,
+# the ASGI variant under Hypercorn if it is asgi, and the development server otherwise
+if [ "$SERVER_MODE" = "prefork" ]; then
+    exec gunicorn -c gunicorn.conf.py app:app
+elif [ "$SERVER_MODE" = "asgi" ]; then
+    exec hypercorn asgi_app:app --bind 0.0.0.0:5000
+else
+    exec python app.py
+fi
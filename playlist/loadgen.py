@@ -0,0 +1,286 @@
+"""
+Concurrent HTTP load generator replaying the smoketest.sh scenario against the playlist API.
+
+By default it starts the app locally on a fresh database, with random.org replaced by the local
+stand-in in music_collection.utils.random_org_standin, and runs the scenario from several workers at once.
+The --random-org-* options make the stand-in slow or failing, and --shards splits the catalog
+across several SQLite files. Point --base-url at an already running API to load test that instead.
+
+Usage:
+    python loadgen.py --concurrency 16 --iterations 50
+    python loadgen.py --concurrency 32 --rate 200 --duration 60 --json results.json
+    python loadgen.py --concurrency 32 --iterations 50 --shards 4
+    python loadgen.py --base-url http://localhost:5000/api --concurrency 8
+"""
+import argparse
+from collections import defaultdict
+import json
+import math
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from music_collection.utils import shard_utils, sql_utils
+from music_collection.utils.random_org_standin import RandomOrgStandIn, StandInConfig
+
+
+APP_DIR = Path(__file__).resolve().parent
+SCHEMA_PATH = APP_DIR / "sql" / "create_song_table.sql"
+
+
+############################################################
+#
+# Local app
+#
+############################################################
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_app(db_path: str, random_org_url: str, shards: int = 1) -> tuple:
+    """
+    Creates a fresh database, and its shards if 'shards' is above 1, and starts the app on a free port.
+
+    Returns:
+        tuple: The app process and the API base URL.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+    if shards > 1:
+        sql_utils.DB_PATH, shard_utils.DB_SHARDS = db_path, shards
+        shard_utils.create_shards(SCHEMA_PATH.read_text())
+
+    port = free_port()
+    env = dict(os.environ, DB_PATH=db_path, DB_SHARDS=str(shards), RANDOM_ORG_BASE_URL=random_org_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads", "--no-reload"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.exceptions.ConnectionError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The app did not become healthy")
+
+
+############################################################
+#
+# Load generation
+#
+############################################################
+
+class RateLimiter:
+    """Spaces requests evenly across all workers to hold a global rate (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Recorder:
+    """Collects per-endpoint latencies and errors from all workers."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> dict:
+        def percentile(samples, p):
+            return samples[max(math.ceil(len(samples) * p / 100) - 1, 0)]
+
+        endpoints = {}
+        with self._lock:
+            for endpoint, samples in sorted(self.latencies.items()):
+                samples = sorted(samples)
+                endpoints[endpoint] = {
+                    'requests': len(samples),
+                    'errors': self.errors[endpoint],
+                    'throughput_rps': round(len(samples) / elapsed, 2),
+                    'p50_ms': round(percentile(samples, 50) * 1000, 2),
+                    'p95_ms': round(percentile(samples, 95) * 1000, 2),
+                    'p99_ms': round(percentile(samples, 99) * 1000, 2),
+                }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+            'throughput_rps': round(total / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+
+class Client:
+    """A worker's keep-alive HTTP session that records every call."""
+
+    def __init__(self, base_url: str, recorder: Recorder, limiter: RateLimiter):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.limiter = limiter
+        self.session = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        self.limiter.wait()
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=30, **kwargs)
+            ok = response.ok
+            body = response.json() if ok else None
+        except (requests.exceptions.RequestException, ValueError):
+            ok, body = False, None
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return body
+
+
+def run_scenario(client: Client, worker: int, iteration: int) -> None:
+    """
+    Replays the smoketest.sh flow with songs unique to this worker and iteration,
+    so concurrent workers don't collide on the compound key.
+    """
+    tag = f"w{worker}i{iteration}"
+    songs = [
+        {'artist': f"The Beatles {tag}", 'title': "Hey Jude", 'year': 1968, 'genre': "Rock", 'duration': 180},
+        {'artist': f"Queen {tag}", 'title': "Bohemian Rhapsody", 'year': 1975, 'genre': "Rock", 'duration': 355},
+        {'artist': f"Led Zeppelin {tag}", 'title': "Stairway to Heaven", 'year': 1971, 'genre': "Rock", 'duration': 482},
+    ]
+    keys = [{'artist': song['artist'], 'title': song['title'], 'year': song['year']} for song in songs]
+
+    for song in songs:
+        client.call("POST /create-song", "POST", "/create-song", json=song)
+    client.call("GET /get-all-songs-from-catalog", "GET", "/get-all-songs-from-catalog")
+    song = client.call("GET /get-song-from-catalog-by-compound-key", "GET", "/get-song-from-catalog-by-compound-key", params=keys[0])
+    if song:
+        client.call("GET /get-song-from-catalog-by-id/<id>", "GET", f"/get-song-from-catalog-by-id/{song['song']['id']}")
+    client.call("GET /get-random-song", "GET", "/get-random-song")
+
+    for key in keys:
+        client.call("POST /add-song-to-playlist", "POST", "/add-song-to-playlist", json=key)
+    client.call("POST /move-song-to-beginning", "POST", "/move-song-to-beginning", json=keys[2])
+    client.call("POST /move-song-to-end", "POST", "/move-song-to-end", json=keys[0])
+    client.call("GET /get-all-songs-from-playlist", "GET", "/get-all-songs-from-playlist")
+    client.call("GET /get-playlist-length-duration", "GET", "/get-playlist-length-duration")
+    client.call("POST /play-current-song", "POST", "/play-current-song")
+    client.call("POST /play-entire-playlist", "POST", "/play-entire-playlist")
+    client.call("GET /song-leaderboard", "GET", "/song-leaderboard")
+    for key in keys:
+        client.call("DELETE /remove-song-from-playlist", "DELETE", "/remove-song-from-playlist", json=key)
+
+
+def generate_load(base_url: str, concurrency: int, rate: float, iterations: int, duration: float) -> dict:
+    """
+    Runs the scenario from 'concurrency' workers until each has done 'iterations'
+    iterations or 'duration' seconds have passed, whichever comes first.
+
+    Returns:
+        dict: The throughput and per-endpoint latency report.
+    """
+    recorder = Recorder()
+    limiter = RateLimiter(rate)
+    deadline = time.monotonic() + duration if duration else None
+
+    def worker(worker_id: int):
+        client = Client(base_url, recorder, limiter)
+        iteration = 0
+        while (not iterations or iteration < iterations) and (deadline is None or time.monotonic() < deadline):
+            run_scenario(client, worker_id, iteration)
+            iteration += 1
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.monotonic() - start)
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors")
+    print(f"{'endpoint':48} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in report['endpoints'].items():
+        print(f"{endpoint:48} {stats['requests']:>9} {stats['errors']:>7} {stats['throughput_rps']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="API base URL of a running app; if omitted the app is started locally")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of concurrent workers")
+    parser.add_argument("--rate", type=float, default=0, help="global request rate limit in req/s (0 = unlimited)")
+    parser.add_argument("--iterations", type=int, default=20, help="scenario iterations per worker (0 = until --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    parser.add_argument("--random-org-latency", default="fixed:0", help="latency of the local random.org stand-in, e.g. lognormal:80,0.5")
+    parser.add_argument("--random-org-error-rate", type=float, default=0.0, help="share of stand-in requests answered with 503")
+    parser.add_argument("--random-org-quota", type=int, help="stand-in requests served before it answers 503 for exhausted quota")
+    parser.add_argument("--shards", type=int, default=1, help="SQLite files the local app splits the catalog across")
+    args = parser.parse_args()
+
+    if not args.iterations and not args.duration:
+        parser.error("one of --iterations or --duration must be non-zero")
+
+    process = stub = None
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            stub = RandomOrgStandIn(StandInConfig(
+                latency=args.random_org_latency, error_rate=args.random_org_error_rate, quota=args.random_org_quota
+            )).start()
+            db_path = os.path.join(tempfile.mkdtemp(prefix="loadgen_"), "song_catalog.db")
+            process, base_url = start_app(db_path, stub.base_url, args.shards)
+
+        report = generate_load(base_url, args.concurrency, args.rate, args.iterations, args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if stub is not None:
+            stub.stop()
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
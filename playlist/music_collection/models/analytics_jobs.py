@@ -0,0 +1,528 @@
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import uuid
+import zlib
+
+from music_collection.models import song_model
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
+from music_collection.utils import shard_utils
+from music_collection.utils import sql_utils
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("analytics_jobs_total", "counter", "Analytics jobs by kind and outcome: complete, failed, cached or rejected.")
+metrics.describe("analytics_job_seconds", "histogram", "Time from submitting an analytics job to its result.")
+
+
+# Worker processes running analytics partitions
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "2"))
+
+# Rows of the catalog each partition covers; a job is split into one task per partition
+ANALYTICS_PARTITION_ROWS = int(os.getenv("ANALYTICS_PARTITION_ROWS", "50000"))
+
+# Jobs computing at once before submissions are rejected
+ANALYTICS_MAX_PENDING = int(os.getenv("ANALYTICS_MAX_PENDING", "16"))
+
+# A finished job's result is reused by new submissions of the same kind for this many seconds,
+# unless this process writes to the catalog first
+ANALYTICS_CACHE_MAX_AGE = float(os.getenv("ANALYTICS_CACHE_MAX_AGE", "60"))
+
+# Seconds a finished job's result can still be polled
+ANALYTICS_JOB_RESULT_TTL = float(os.getenv("ANALYTICS_JOB_RESULT_TTL", "300"))
+
+# The longest a poll may wait for a job to finish
+ANALYTICS_JOB_MAX_WAIT = float(os.getenv("ANALYTICS_JOB_MAX_WAIT", "30"))
+
+# Percentiles of song durations reported by the 'statistics' job
+DURATION_PERCENTILES = (50, 90, 99)
+
+
+############################################################
+#
+# Partitions, run in the worker processes
+#
+############################################################
+
+# Read-only connections of a worker process, by database path
+_worker_connections: Dict[str, sqlite3.Connection] = {}
+
+def _read_only_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Returns the worker process's read-only connection to a database, opening it on first use.
+    """
+    conn = _worker_connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+        _worker_connections[db_path] = conn
+    return conn
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+def _count_by(column: str) -> Callable[[sqlite3.Connection, int, int], Dict[Any, List[int]]]:
+    query = f"""
+        SELECT {column}, COUNT(*), SUM(COALESCE(play_count, 0)), SUM(duration)
+        FROM songs
+        WHERE id BETWEEN ? AND ? AND NOT COALESCE(deleted, FALSE)
+        GROUP BY {column}
+    """
+
+    def count(conn: sqlite3.Connection, first_id: int, last_id: int) -> Dict[Any, List[int]]:
+        return {row[0]: list(row[1:]) for row in conn.execute(query, (first_id, last_id))}
+
+    return count
+
+def _title_key(artist: str, title: str) -> str:
+    return f"{_normalize(artist)}\x1f{_normalize(title)}"
+
+def _hash_titles(conn: sqlite3.Connection, first_id: int, last_id: int) -> array:
+    cursor = conn.execute(
+        "SELECT artist, title FROM songs WHERE id BETWEEN ? AND ? AND NOT COALESCE(deleted, FALSE)",
+        (first_id, last_id),
+    )
+    return array("L", [zlib.crc32(_title_key(artist, title).encode()) for artist, title in cursor])
+
+def _find_titles(conn: sqlite3.Connection, first_id: int, last_id: int, hashes: FrozenSet[int]) -> List[tuple]:
+    cursor = conn.execute(
+        "SELECT id, artist, title FROM songs WHERE id BETWEEN ? AND ? AND NOT COALESCE(deleted, FALSE)",
+        (first_id, last_id),
+    )
+    titles = []
+    for song_id, artist, title in cursor:
+        key = _title_key(artist, title)
+        if zlib.crc32(key.encode()) in hashes:
+            titles.append((key, artist, title, song_id))
+    return titles
+
+def _count_durations(conn: sqlite3.Connection, first_id: int, last_id: int) -> Dict[str, Any]:
+    cursor = conn.execute(
+        """
+        SELECT duration, COUNT(*), SUM(COALESCE(play_count, 0)), MIN(year), MAX(year)
+        FROM songs
+        WHERE id BETWEEN ? AND ? AND NOT COALESCE(deleted, FALSE)
+        GROUP BY duration
+        """,
+        (first_id, last_id),
+    )
+    durations: Dict[int, int] = {}
+    plays = 0
+    years: List[int] = []
+    for duration, songs, duration_plays, first_year, last_year in cursor:
+        durations[duration] = songs
+        plays += duration_plays
+        years += (first_year, last_year)
+    return {'durations': durations, 'plays': plays, 'years': [min(years), max(years)] if years else []}
+
+def _run_partition(kind: str, step: int, db_path: str, first_id: int, last_id: int, *args: Any) -> Any:
+    """
+    Runs one partition of a job's pass on the worker process's read-only connection.
+
+    Args:
+        kind (str): The job kind, a key of ANALYSES.
+        step (int): The pass of the job.
+        db_path (str): The database, DB_PATH or a shard.
+        first_id (int): The first song id of the partition.
+        last_id (int): The last song id of the partition, inclusive.
+        *args: The previous pass's merged result, for every pass but the first.
+
+    Returns:
+        Any: The partition's partial result, combined by the pass's merge function.
+    """
+    return ANALYSES[kind][step].partition(_read_only_connection(db_path), first_id, last_id, *args)
+
+
+############################################################
+#
+# Merging partial results, in the app process
+#
+############################################################
+
+def _merge_counts(field: str, order: Callable[[Dict[str, Any]], Any]) -> Callable[[List[Dict[Any, List[int]]]], Dict[str, Any]]:
+    def merge(partials: List[Dict[Any, List[int]]]) -> Dict[str, Any]:
+        totals: Dict[Any, List[int]] = {}
+        for partial in partials:
+            for key, counts in partial.items():
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = counts
+                else:
+                    total[0] += counts[0]
+                    total[1] += counts[1]
+                    total[2] += counts[2]
+        groups = [
+            {field: key, 'songs': songs, 'plays': plays, 'total_duration': duration,
+             'avg_duration': round(duration / songs, 2)}
+            for key, (songs, plays, duration) in totals.items()
+        ]
+        groups.sort(key=order)
+        return {'groups': groups}
+
+    return merge
+
+def _repeated_hashes(partials: List[array]) -> FrozenSet[int]:
+    return frozenset(title_hash for title_hash, count in Counter(chain.from_iterable(partials)).items() if count > 1)
+
+def _merge_titles(partials: List[List[tuple]]) -> Dict[str, Any]:
+    titles: Dict[str, list] = {}
+    for partial in partials:
+        for key, artist, title, song_id in partial:
+            entry = titles.get(key)
+            if entry is None:
+                titles[key] = [artist, title, [song_id]]
+            else:
+                entry[2].append(song_id)
+    duplicates = [
+        {'artist': artist, 'title': title, 'count': len(ids), 'ids': sorted(ids)}
+        for artist, title, ids in titles.values()
+        if len(ids) > 1
+    ]
+    duplicates.sort(key=lambda duplicate: (-duplicate['count'], duplicate['artist'].casefold(), duplicate['title'].casefold()))
+    return {'duplicates': duplicates}
+
+def _merge_durations(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    durations: Counter = Counter()
+    plays = 0
+    years: List[int] = []
+    for partial in partials:
+        durations.update(partial['durations'])
+        plays += partial['plays']
+        years += partial['years']
+
+    songs = sum(durations.values())
+    if not songs:
+        return {'songs': 0}
+
+    total = sum(duration * count for duration, count in durations.items())
+    mean = total / songs
+    variance = sum(count * (duration - mean) ** 2 for duration, count in durations.items()) / songs
+    percentiles = {}
+    targets = iter(DURATION_PERCENTILES)
+    target = next(targets)
+    seen = 0
+    for duration in sorted(durations):
+        seen += durations[duration]
+        # Nearest-rank percentiles, read off the cumulative duration counts
+        while target is not None and seen * 100 >= target * songs:
+            percentiles[f"p{target}"] = duration
+            target = next(targets, None)
+
+    return {
+        'songs': songs,
+        'plays': plays,
+        'first_year': min(years),
+        'last_year': max(years),
+        'duration': {
+            'total': total,
+            'mean': round(mean, 2),
+            'std': round(variance ** 0.5, 2),
+            'min': min(durations),
+            'max': max(durations),
+            **percentiles,
+        },
+    }
+
+
+class Pass(NamedTuple):
+    """
+    One pass of a job over the catalog: 'partition' runs on one id range in a worker
+    process and 'merge' combines every partition's result in the app process.
+    """
+    partition: Callable[..., Any]
+    merge: Callable[[List[Any]], Any]
+
+
+# Job kind -> its passes. Each pass after the first is handed the previous pass's merged
+# result, and is skipped if that is empty. Duplicates are found in two passes, so that only
+# compact title hashes and then the few candidate rows are sent back to the app process.
+ANALYSES: Dict[str, Tuple[Pass, ...]] = {
+    'genre_histogram': (Pass(_count_by("genre"), _merge_counts("genre", lambda group: (-group['songs'], group['genre']))),),
+    'year_histogram': (Pass(_count_by("year"), _merge_counts("year", lambda group: group['year'])),),
+    'duplicates': (Pass(_hash_titles, _repeated_hashes), Pass(_find_titles, _merge_titles)),
+    'statistics': (Pass(_count_durations, _merge_durations),),
+}
+
+
+############################################################
+#
+# Jobs
+#
+############################################################
+
+class AnalyticsJob:
+    """
+    An aggregation over the whole catalog, computed in partitions by the worker processes.
+
+    Attributes:
+        id (str): The job id.
+        kind (str): The job kind, a key of ANALYSES.
+        status (str): 'running', 'complete' or 'failed'.
+        partitions (int): The number of id ranges the catalog was split into.
+        result (dict, optional): The aggregation once complete.
+        error (str, optional): Why the job failed.
+        future (Future): Resolves to the job once it is complete or failed.
+    """
+
+    def __init__(self, kind: str, generation: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.generation = generation
+        self.status = "running"
+        self.partitions = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the job's status and, once finished, its result or error.
+        """
+        job = {'job_id': self.id, 'kind': self.kind, 'status': self.status, 'partitions': self.partitions}
+        if self.result is not None:
+            job['result'] = self.result
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+
+class AnalyticsJobQueue:
+    """
+    Runs catalog aggregations on a pool of worker processes, so they neither hold a
+    request thread nor compete with requests for the GIL.
+
+    Each job is run by a coordinating thread, which splits the catalog into ranges of
+    about partition_rows song ids per database file (DB_PATH, or every shard) and hands
+    one task per range to the process pool, started on the first submission. Each worker
+    process reads through its own read-only connection, and the partial results are
+    merged in this process. A finished result is reused by submissions of the same kind
+    for cache_max_age seconds, or until song_model reports a catalog write, and can be
+    polled for result_ttl seconds.
+
+    Jobs live in the process that accepted them: behind a pre-fork server, a job can only
+    be polled from the worker that accepted it.
+
+    Attributes:
+        workers (int): The number of worker processes.
+        partition_rows (int): The number of rows each task covers.
+        max_pending (int): The number of running jobs at which submissions are rejected.
+        cache_max_age (float): Seconds a finished result is reused.
+        result_ttl (float): Seconds a finished job can still be polled.
+    """
+
+    def __init__(self, workers: Optional[int] = None, partition_rows: Optional[int] = None,
+                 max_pending: Optional[int] = None, cache_max_age: Optional[float] = None,
+                 result_ttl: Optional[float] = None):
+        self.workers = ANALYTICS_WORKERS if workers is None else workers
+        self.partition_rows = ANALYTICS_PARTITION_ROWS if partition_rows is None else partition_rows
+        self.max_pending = ANALYTICS_MAX_PENDING if max_pending is None else max_pending
+        self.cache_max_age = ANALYTICS_CACHE_MAX_AGE if cache_max_age is None else cache_max_age
+        self.result_ttl = ANALYTICS_JOB_RESULT_TTL if result_ttl is None else result_ttl
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._coordinators = ThreadPoolExecutor(max_workers=max(self.max_pending, 1), thread_name_prefix="analytics-job")
+        # job id -> job, oldest submission first
+        self._jobs: "OrderedDict[str, AnalyticsJob]" = OrderedDict()
+        # kind -> the latest job of that kind, whose result new submissions may reuse
+        self._latest: Dict[str, AnalyticsJob] = {}
+        self._running = 0
+        # Bumped on every catalog write, making earlier results stale
+        self._generation = 0
+        song_model.register_listener(self._on_catalog_write)
+
+    def close(self) -> None:
+        """
+        Stops following catalog writes and shuts the worker processes down.
+        """
+        song_model.unregister_listener(self._on_catalog_write)
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._coordinators.shutdown(wait=True)
+
+    def submit(self, kind: str) -> AnalyticsJob:
+        """
+        Starts a job, or returns the running or recently finished job of the same kind.
+
+        Args:
+            kind (str): The job kind: 'genre_histogram', 'year_histogram', 'duplicates' or 'statistics'.
+
+        Returns:
+            AnalyticsJob: The job.
+
+        Raises:
+            ValueError: If the kind is not supported.
+            queue.Full: If max_pending jobs are already running.
+        """
+        if kind not in ANALYSES:
+            raise ValueError(f"Unsupported analytics job '{kind}', expected one of: {', '.join(ANALYSES)}")
+
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            latest = self._latest.get(kind)
+            if latest is not None and latest.generation == self._generation and latest.status != "failed" and (
+                    latest.finished_at is None or now - latest.finished_at <= self.cache_max_age):
+                metrics.inc("analytics_jobs_total", kind=kind, status="cached")
+                return latest
+            if self._running >= self.max_pending:
+                metrics.inc("analytics_jobs_total", kind=kind, status="rejected")
+                logger.error("Too many analytics jobs are running, rejected %s job", kind)
+                raise queue.Full
+            job = AnalyticsJob(kind, self._generation)
+            self._running += 1
+            self._jobs[job.id] = job
+            self._latest[kind] = job
+
+        self._coordinators.submit(self._run, job)
+        logger.info("Started %s job %s", kind, job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[AnalyticsJob]:
+        """
+        Returns a job by id, or None if it is unknown or its result has expired.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job: AnalyticsJob, timeout: float) -> AnalyticsJob:
+        """
+        Waits up to 'timeout' seconds for a job to finish and returns it, finished or not.
+        """
+        wait([job.future], timeout=timeout)
+        return job
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the number of running jobs, the capacity and their ratio, for monitoring.
+        """
+        running = self._running
+        return {'running': running, 'capacity': self.max_pending, 'workers': self.workers,
+                'saturation': round(running / max(self.max_pending, 1), 3)}
+
+    def _run(self, job: AnalyticsJob) -> None:
+        """
+        Runs every pass of a job over the catalog's partitions and records its result.
+        """
+        try:
+            partitions = self._partitions()
+            job.partitions = len(partitions)
+            result = None
+            for step, analysis_pass in enumerate(ANALYSES[job.kind]):
+                if step and not result:
+                    # Nothing for this pass to look at
+                    partials = []
+                else:
+                    partials = self._map(job.kind, step, partitions, (result,) if step else ())
+                result = analysis_pass.merge(partials)
+        except Exception as e:
+            logger.error("Analytics job %s failed: %s", job.id, str(e))
+            self._finish(job, error=str(e))
+            return
+        self._finish(job, result=result)
+
+    def _partitions(self) -> List[Tuple[str, int, int]]:
+        """
+        Splits every database file of the catalog into id ranges of about partition_rows rows.
+
+        Returns:
+            List[Tuple[str, int, int]]: The database path, first and last id of each range.
+
+        Raises:
+            sqlite3.Error: If a database cannot be read.
+        """
+        if shard_utils.is_sharded():
+            paths = [shard_utils.shard_path(shard) for shard in range(shard_utils.DB_SHARDS)]
+        else:
+            paths = [sql_utils.DB_PATH]
+        # A shard holds every DB_SHARDS-th id, so its ranges span DB_SHARDS times as many ids
+        span = self.partition_rows * shard_utils.DB_SHARDS
+
+        partitions = []
+        for path in paths:
+            with sql_utils.get_db_connection(db_path=path) as conn:
+                # Two subqueries, so each bound is a single index lookup
+                first_id, last_id = conn.execute("SELECT (SELECT MIN(id) FROM songs), (SELECT MAX(id) FROM songs)").fetchone()
+            if first_id is None:
+                continue
+            partitions += [(path, start, min(start + span - 1, last_id)) for start in range(first_id, last_id + 1, span)]
+        return partitions
+
+    def _map(self, kind: str, step: int, partitions: List[Tuple[str, int, int]], args: tuple) -> List[Any]:
+        """
+        Runs a pass on every partition in the worker processes and returns the partial results.
+
+        If a worker process dies, before or while the pass runs, the pool is replaced and the pass
+        run once more on the new pool.
+        """
+        for attempt in range(2):
+            pool = self._get_pool()
+            futures = []
+            try:
+                futures = [pool.submit(_run_partition, kind, step, *partition, *args) for partition in partitions]
+                return [future.result() for future in futures]
+            except BrokenProcessPool:
+                logger.warning("Analytics worker pool is broken, restarting it")
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                if attempt:
+                    raise
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Started on first use, so a pre-fork server starts one in each worker rather than the parent.
+        # Workers are spawned, not forked, so they inherit none of this process's threads or connections
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _finish(self, job: AnalyticsJob, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        if error is None:
+            job.result = result
+            job.status = "complete"
+        else:
+            job.error = error
+            job.status = "failed"
+        job.finished_at = time.monotonic()
+        with self._lock:
+            self._running -= 1
+        metrics.inc("analytics_jobs_total", kind=job.kind, status=job.status)
+        metrics.observe("analytics_job_seconds", job.finished_at - job.submitted_at, kind=job.kind)
+        job.future.set_result(job)
+
+    def _purge_expired(self, now: float) -> None:
+        """
+        Drops the oldest finished jobs whose results expired. Must be called with the lock held.
+        """
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if job.finished_at is None or now - job.finished_at <= self.result_ttl:
+                break
+            del self._jobs[job.id]
+            if self._latest.get(job.kind) is job:
+                del self._latest[job.kind]
+
+    def _on_catalog_write(self, event: str, data: Dict[str, Any]) -> None:
+        # Any committed write can change any aggregation
+        with self._lock:
+            self._generation += 1
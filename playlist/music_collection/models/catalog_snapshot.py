@@ -0,0 +1,298 @@
+from itertools import islice
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from music_collection.models import song_model
+from music_collection.utils.logger import configure_logger
+from music_collection.utils import shard_utils
+from music_collection.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# A snapshot older than this is reloaded in full, to pick up writes made by other processes
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "60"))
+
+# Rows fetched per round trip when loading the snapshot
+SNAPSHOT_FETCH_SIZE = 10000
+
+GROUP_KEYS = ("genre", "decade", "artist")
+
+COLUMNS = ("ids", "years", "durations", "play_counts", "genre_codes", "artist_codes", "live")
+
+SNAPSHOT_QUERY = """
+    SELECT id, artist, year, genre, duration, COALESCE(play_count, 0), NOT COALESCE(deleted, FALSE)
+    FROM songs
+    ORDER BY id
+"""
+
+
+class CatalogSnapshot:
+    """
+    A NumPy column store of the song catalog for vectorized analytics.
+
+    Holds the id, year, duration and play count of every song, with genre and artist
+    dictionary-encoded as integer codes. It is loaded on first use, then kept current by
+    song_model's write listeners: creates append a row, deletes clear its 'live' flag and
+    plays increment its play count. Writes made by other processes are picked up by a
+    full reload once the snapshot is older than max_age seconds.
+
+    Attributes:
+        max_age (float): Seconds after which the snapshot is reloaded in full.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.max_age = SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._size = 0
+        self._allocate(0)
+        song_model.register_listener(self._on_catalog_write)
+
+    def close(self) -> None:
+        """
+        Stops following catalog writes.
+        """
+        song_model.unregister_listener(self._on_catalog_write)
+
+    ##################################################
+    # Loading
+    ##################################################
+
+    def _allocate(self, capacity: int) -> None:
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.years = np.zeros(capacity, dtype=np.int32)
+        self.durations = np.zeros(capacity, dtype=np.int32)
+        self.play_counts = np.zeros(capacity, dtype=np.int64)
+        self.genre_codes = np.zeros(capacity, dtype=np.int32)
+        self.artist_codes = np.zeros(capacity, dtype=np.int32)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.genres: List[str] = []
+        self.artists: List[str] = []
+        self._genre_index: Dict[str, int] = {}
+        self._artist_index: Dict[str, int] = {}
+
+    def _grow(self, capacity: int) -> None:
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _encode(self, values: List[str], index: Dict[str, int], value: str) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def refresh(self) -> None:
+        """
+        Reloads the whole catalog from the database.
+
+        Raises:
+            sqlite3.Error: If the catalog cannot be read; the previous snapshot is kept.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            previous = self.__dict__.copy()
+            try:
+                if shard_utils.is_sharded():
+                    self._load_shards()
+                else:
+                    with get_db_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("SELECT COUNT(*) FROM songs")
+                        self._size = 0
+                        self._allocate(cursor.fetchone()[0])
+
+                        cursor.execute(SNAPSHOT_QUERY)
+                        rows = cursor.fetchmany(SNAPSHOT_FETCH_SIZE)
+                        while rows:
+                            self._extend(rows)
+                            rows = cursor.fetchmany(SNAPSHOT_FETCH_SIZE)
+            except sqlite3.Error as e:
+                self.__dict__.update(previous)
+                logger.error("Database error while loading the catalog snapshot: %s", str(e))
+                raise e
+
+            self._loaded_at = time.monotonic()
+            logger.info("Loaded catalog snapshot of %d songs in %.1f ms", self._size, (time.perf_counter() - start) * 1000)
+
+    def _load_shards(self) -> None:
+        """
+        Loads every shard of a sharded catalog, merging their rows by id.
+        """
+        counts = shard_utils.fetch_all_shards("SELECT COUNT(*) FROM songs")
+        self._size = 0
+        self._allocate(sum(rows[0][0] for rows in counts))
+
+        rows = shard_utils.stream_all_shards(SNAPSHOT_QUERY, (), lambda row: row[0], SNAPSHOT_FETCH_SIZE)
+        chunk = list(islice(rows, SNAPSHOT_FETCH_SIZE))
+        while chunk:
+            self._extend(chunk)
+            chunk = list(islice(rows, SNAPSHOT_FETCH_SIZE))
+
+    def _extend(self, rows: List[tuple]) -> None:
+        """
+        Appends a chunk of (id, artist, year, genre, duration, play_count, live) rows.
+        """
+        ids, artists, years, genres, durations, play_counts, live = zip(*rows)
+        end = self._size + len(rows)
+        if end > len(self.ids):
+            self._grow(max(16, end, self._size * 2))
+        chunk = slice(self._size, end)
+        self.ids[chunk] = ids
+        self.years[chunk] = years
+        self.durations[chunk] = durations
+        self.play_counts[chunk] = play_counts
+        self.genre_codes[chunk] = [self._encode(self.genres, self._genre_index, genre) for genre in genres]
+        self.artist_codes[chunk] = [self._encode(self.artists, self._artist_index, artist) for artist in artists]
+        self.live[chunk] = live
+        self._size = end
+
+    def _insert(self, row: tuple) -> None:
+        """
+        Adds one (id, artist, year, genre, duration, play_count, live) row, keeping the ids sorted.
+        """
+        self._extend([row])
+        position = int(np.searchsorted(self.ids[:self._size - 1], row[0]))
+        if position < self._size - 1:
+            # A sharded catalog hands out ids per shard, so a new id can fall before the last one
+            for name in COLUMNS:
+                column = getattr(self, name)
+                column[position:self._size] = np.roll(column[position:self._size], 1)
+
+    def _ensure_fresh(self) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            self.refresh()
+
+    def _position(self, song_id: int) -> Optional[int]:
+        # ids are kept sorted, see _insert
+        position = int(np.searchsorted(self.ids[:self._size], song_id))
+        if position < self._size and self.ids[position] == song_id:
+            return position
+        return None
+
+    def _on_catalog_write(self, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            position = self._position(data["id"])
+            if event == "create":
+                if position is None:
+                    self._insert((data["id"], data["artist"], data["year"], data["genre"], data["duration"], 0, True))
+            elif position is not None:
+                if event == "delete":
+                    self.live[position] = False
+                elif event == "play":
+                    self.play_counts[position] += 1
+
+    ##################################################
+    # Aggregates
+    ##################################################
+
+    def __len__(self) -> int:
+        """
+        Returns the number of live songs in the snapshot, loading it if needed.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return int(self.live[:self._size].sum())
+
+    def group_by(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Aggregates the live songs by genre, decade or artist.
+
+        Args:
+            key (str): 'genre', 'decade' or 'artist'.
+
+        Returns:
+            List[Dict[str, Any]]: One entry per group with the song count, total plays,
+                total duration and average duration in seconds, sorted by total plays descending.
+
+        Raises:
+            ValueError: If the key is not supported.
+        """
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Invalid group key: {key}. Must be one of {', '.join(GROUP_KEYS)}.")
+
+        with self._lock:
+            self._ensure_fresh()
+            live = self.live[:self._size]
+            if key == "genre":
+                codes, labels = self.genre_codes[:self._size][live], self.genres
+            elif key == "artist":
+                codes, labels = self.artist_codes[:self._size][live], self.artists
+            else:
+                decades = self.years[:self._size][live] // 10 * 10
+                if len(decades) == 0:
+                    return []
+                first = int(decades.min())
+                codes = (decades - first) // 10
+                labels = [f"{decade}s" for decade in range(first, int(decades.max()) + 10, 10)]
+            plays = self.play_counts[:self._size][live]
+            durations = self.durations[:self._size][live]
+
+        length = len(labels)
+        counts = np.bincount(codes, minlength=length)
+        total_plays = np.bincount(codes, weights=plays, minlength=length)
+        total_durations = np.bincount(codes, weights=durations, minlength=length)
+
+        groups = np.flatnonzero(counts)
+        groups = groups[np.argsort(-total_plays[groups], kind="stable")]
+        return [
+            {
+                key: labels[group],
+                "songs": int(counts[group]),
+                "plays": int(total_plays[group]),
+                "total_duration": int(total_durations[group]),
+                "avg_duration": round(float(total_durations[group] / counts[group]), 1),
+            }
+            for group in groups
+        ]
+
+    def duration_distribution(self, bins: int = 10) -> Dict[str, Any]:
+        """
+        Summarizes the durations of the live songs.
+
+        Args:
+            bins (int): The number of equal-width histogram bins.
+
+        Returns:
+            Dict[str, Any]: The histogram (bin edges and counts) and the min, max, mean
+                and 50th/90th/99th percentile durations in seconds.
+
+        Raises:
+            ValueError: If bins is not positive or the catalog is empty.
+        """
+        if bins < 1:
+            raise ValueError(f"Invalid number of bins: {bins}. Must be a positive integer.")
+
+        with self._lock:
+            self._ensure_fresh()
+            durations = self.durations[:self._size][self.live[:self._size]]
+
+        if len(durations) == 0:
+            raise ValueError("The song catalog is empty.")
+
+        counts, edges = np.histogram(durations, bins=bins)
+        p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+        return {
+            "songs": int(len(durations)),
+            "min": int(durations.min()),
+            "max": int(durations.max()),
+            "mean": round(float(durations.mean()), 1),
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "histogram": {"edges": [round(float(edge), 1) for edge in edges], "counts": counts.tolist()},
+        }
@@ -1,10 +1,12 @@
+from dataclasses import asdict
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 from music_collection.models.song_model import Song, update_play_count
-from music_collection.utils.logger import configure_logger
+from music_collection.utils.logger import LOG_SAMPLE_LIMIT, configure_logger
+from music_collection.utils.shared_state import SharedStateStore, shared_method
 
 logger = logging.getLogger(__name__)
-configure_logger(logger)
+configure_logger(logger, sample_limit=LOG_SAMPLE_LIMIT)
 
 
 class PlaylistModel:
@@ -369,4 +371,65 @@ class PlaylistModel:
         """
         if not self.playlist:
             logger.error("Playlist is empty")
-            raise ValueError("Playlist is empty")
\ No newline at end of file
+            raise ValueError("Playlist is empty")
+
+class SharedPlaylistModel(PlaylistModel):
+    """
+    A PlaylistModel whose playlist and current track number live in a SharedStateStore,
+    so that every worker process of a pre-fork server sees the same playlist.
+
+    Each public method runs as one transaction: the shared state is loaded into 'playlist' and
+    'current_track_number', the PlaylistModel method runs unchanged, and writes are saved atomically.
+
+    Attributes:
+        store (SharedStateStore): The store holding the playlist state.
+    """
+
+    def __init__(self, store: Optional[SharedStateStore] = None):
+        """
+        Initializes the SharedPlaylistModel on the given store, or on the default shared state database.
+        """
+        super().__init__()
+        self.store = store or SharedStateStore("playlist")
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """
+        Replaces the playlist and current track number with the shared state.
+
+        The songs were validated when they were added, so they are rebuilt as from database rows.
+        """
+        self.playlist = [
+            Song.from_row((song["id"], song["artist"], song["title"], song["year"], song["genre"], song["duration"]))
+            for song in state.get("playlist", [])
+        ]
+        self.current_track_number = state.get("current_track_number", 1)
+
+    def save_state(self, state: Dict[str, Any]) -> None:
+        """
+        Writes the playlist and current track number into the shared state.
+        """
+        state["playlist"] = [asdict(song) for song in self.playlist]
+        state["current_track_number"] = self.current_track_number
+
+    add_song_to_playlist = shared_method()(PlaylistModel.add_song_to_playlist)
+    remove_song_by_song_id = shared_method()(PlaylistModel.remove_song_by_song_id)
+    remove_song_by_track_number = shared_method()(PlaylistModel.remove_song_by_track_number)
+    clear_playlist = shared_method()(PlaylistModel.clear_playlist)
+
+    get_all_songs = shared_method(write=False)(PlaylistModel.get_all_songs)
+    get_song_by_song_id = shared_method(write=False)(PlaylistModel.get_song_by_song_id)
+    get_song_by_track_number = shared_method(write=False)(PlaylistModel.get_song_by_track_number)
+    get_current_song = shared_method(write=False)(PlaylistModel.get_current_song)
+    get_playlist_length = shared_method(write=False)(PlaylistModel.get_playlist_length)
+    get_playlist_duration = shared_method(write=False)(PlaylistModel.get_playlist_duration)
+
+    go_to_track_number = shared_method()(PlaylistModel.go_to_track_number)
+    move_song_to_beginning = shared_method()(PlaylistModel.move_song_to_beginning)
+    move_song_to_end = shared_method()(PlaylistModel.move_song_to_end)
+    move_song_to_track_number = shared_method()(PlaylistModel.move_song_to_track_number)
+    swap_songs_in_playlist = shared_method()(PlaylistModel.swap_songs_in_playlist)
+
+    play_current_song = shared_method()(PlaylistModel.play_current_song)
+    play_entire_playlist = shared_method()(PlaylistModel.play_entire_playlist)
+    play_rest_of_playlist = shared_method()(PlaylistModel.play_rest_of_playlist)
+    rewind_playlist = shared_method()(PlaylistModel.rewind_playlist)
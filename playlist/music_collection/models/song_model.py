@@ -1,15 +1,29 @@
+from array import array
 from dataclasses import dataclass
+from itertools import islice
 import logging
+from operator import itemgetter
 import sqlite3
-from typing import Any
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence
 
-from music_collection.utils.logger import configure_logger
+from music_collection.utils.logger import LOG_SAMPLE_LIMIT, configure_logger
 from music_collection.utils.random_utils import get_random
+from music_collection.utils import shard_utils
 from music_collection.utils.sql_utils import get_db_connection
 
 
 logger = logging.getLogger(__name__)
-configure_logger(logger)
+configure_logger(logger, sample_limit=LOG_SAMPLE_LIMIT)
+
+# Rows fetched per round trip when loading the catalog into columns
+SONG_COLUMNS_FETCH_SIZE = 1000
+
+# Default rows fetched per round trip by iter_all_songs
+SONG_STREAM_FETCH_SIZE = 500
+
+# Callbacks told about committed catalog writes, see register_listener
+_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
 
 
 @dataclass
@@ -25,9 +39,12 @@ class Song:
             duration (int): Duration of the song in seconds.
 
             Raises:
-                ValueError: If 'duration' is not positive or 'year' is not after 1900.
+                ValueError: If 'duration' is not positive or 'year' is before 1900.
         
     """
+    # No per-instance __dict__: a catalog's worth of songs stays small
+    __slots__ = ("id", "artist", "title", "year", "genre", "duration")
+
     id: int
     artist: str
     title: str
@@ -39,12 +56,138 @@ class Song:
         """ Validates the song details after the instance is created.
 
             Raises:
-                ValueError: If 'duration' is non-positive or 'year' is not greater than 1900.
+                ValueError: If 'duration' is non-positive or 'year' is less than 1900, as create_song requires.
         """
         if self.duration <= 0:
             raise ValueError(f"Duration must be greater than 0, got {self.duration}")
-        if self.year <= 1900:
-            raise ValueError(f"Year must be greater than 1900, got {self.year}")
+        if self.year < 1900:
+            raise ValueError(f"Year must be greater than or equal to 1900, got {self.year}")
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Song":
+        """ Builds a song from a row starting with (id, artist, title, year, genre, duration),
+            skipping __post_init__ since the table's CHECK constraints already hold for stored rows.
+
+            Args:
+                row (Sequence[Any]): The database row.
+
+            Returns:
+                Song: The song.
+        """
+        song = object.__new__(cls)
+        song.id, song.artist, song.title, song.year, song.genre, song.duration = row[:6]
+        return song
+
+
+class SongColumns:
+    """ A column-oriented list of catalog songs, for loading the whole catalog with little memory.
+
+        Numbers are stored in typed arrays and repeated artist and genre strings are shared,
+        so a loaded song costs a few dozen bytes instead of a dict and its boxed values.
+        Indexing returns a Song and to_dicts() gives the rows in the get_all_songs format.
+
+        Attributes:
+            ids, years, durations, play_counts (array): The numeric columns.
+            artists, titles, genres (List[str]): The text columns.
+    """
+    __slots__ = ("ids", "artists", "titles", "years", "genres", "durations", "play_counts")
+
+    def __init__(self, rows: Iterable[Sequence[Any]] = ()):
+        """ Initializes the columns from (id, artist, title, year, genre, duration, play_count) rows.
+        """
+        self.ids = array("q")
+        self.artists: List[str] = []
+        self.titles: List[str] = []
+        self.years = array("l")
+        self.genres: List[str] = []
+        self.durations = array("l")
+        self.play_counts = array("q")
+        self.extend(rows)
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        """ Appends (id, artist, title, year, genre, duration, play_count) rows.
+        """
+        columns = list(zip(*rows))
+        if not columns:
+            return
+        ids, artists, titles, years, genres, durations, play_counts = columns
+        self.ids.extend(ids)
+        self.artists.extend(map(sys.intern, artists))
+        self.titles.extend(titles)
+        self.years.extend(years)
+        self.genres.extend(map(sys.intern, genres))
+        self.durations.extend(durations)
+        self.play_counts.extend(play_count or 0 for play_count in play_counts)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Song:
+        song = object.__new__(Song)
+        song.id, song.artist, song.title = self.ids[index], self.artists[index], self.titles[index]
+        song.year, song.genre, song.duration = self.years[index], self.genres[index], self.durations[index]
+        return song
+
+    def __iter__(self) -> Iterator[Song]:
+        return (self[index] for index in range(len(self)))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """ Returns the songs as dictionaries with play_count, as get_all_songs does.
+        """
+        return [
+            {"id": song_id, "artist": artist, "title": title, "year": year, "genre": genre, "duration": duration, "play_count": play_count}
+            for song_id, artist, title, year, genre, duration, play_count in zip(
+                self.ids, self.artists, self.titles, self.years, self.genres, self.durations, self.play_counts
+            )
+        ]
+
+
+def register_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """
+    Registers a callback to be told about every committed write to the catalog, so
+    in-memory views of the catalog can update incrementally instead of reloading it.
+
+    The listener is called as listener(event, data) after the commit, where event is
+    'create' (data holds the new song's id and columns), 'delete' or 'play' (data holds the id).
+
+    Args:
+        listener (Callable[[str, Dict[str, Any]], None]): The callback.
+    """
+    _listeners.append(listener)
+
+def unregister_listener(listener: Callable[[str, Dict[str, Any]], None]) -> None:
+    """
+    Removes a callback added with register_listener, if it is registered.
+    """
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def _notify_listeners(event: str, data: Dict[str, Any]) -> None:
+    """
+    Calls every registered listener. A failing listener is logged and never fails the write.
+    """
+    for listener in list(_listeners):
+        try:
+            listener(event, data)
+        except Exception as e:
+            logger.error("Catalog listener %r failed on %s: %s", listener, event, str(e))
+
+
+def _connection_for_id(song_id: int):
+    """
+    Connects to the shard holding a song id, or to the catalog database when it is not sharded.
+    """
+    if shard_utils.is_sharded():
+        return shard_utils.get_shard_connection(shard_utils.shard_for_id(song_id))
+    return get_db_connection()
+
+def _connection_for_key(artist: str, title: str, year: int):
+    """
+    Connects to the shard owning a compound key, or to the catalog database when it is not sharded.
+    """
+    if shard_utils.is_sharded():
+        return shard_utils.get_shard_connection(shard_utils.shard_for_key(artist, title, year))
+    return get_db_connection()
 
 
 def create_song(artist: str, title: str, year: int, genre: str, duration: int) -> None:
@@ -71,16 +214,28 @@ def create_song(artist: str, title: str, year: int, genre: str, duration: int) -
 
     try:
         # Use the context manager to handle the database connection
-        with get_db_connection() as conn:
+        with _connection_for_key(artist, title, year) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO songs (artist, title, year, genre, duration)
-                VALUES (?, ?, ?, ?, ?)
-            """, (artist, title, year, genre, duration))
+            if shard_utils.is_sharded():
+                # Ids step by the shard count from the shard's first id, so an id names its shard
+                shard = shard_utils.shard_for_key(artist, title, year)
+                cursor.execute("""
+                    INSERT INTO songs (id, artist, title, year, genre, duration)
+                    VALUES ((SELECT COALESCE(MAX(id), ?) + ? FROM songs), ?, ?, ?, ?, ?)
+                """, (shard_utils.first_id(shard) - shard_utils.DB_SHARDS, shard_utils.DB_SHARDS, artist, title, year, genre, duration))
+            else:
+                cursor.execute("""
+                    INSERT INTO songs (artist, title, year, genre, duration)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (artist, title, year, genre, duration))
             conn.commit()
 
             logger.info("Song created successfully: %s - %s (%d)", artist, title, year)
 
+        _notify_listeners("create", {
+            "id": cursor.lastrowid, "artist": artist, "title": title, "year": year, "genre": genre, "duration": duration
+        })
+
     except sqlite3.IntegrityError as e:
         logger.error("Song with artist '%s', title '%s', and year %d already exists.", artist, title, year)
         raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} already exists.") from e
@@ -101,7 +256,7 @@ def delete_song(song_id: int) -> None:
         sqlite3.Error: If any database error occurs.
     """
     try:
-        with get_db_connection() as conn:
+        with _connection_for_id(song_id) as conn:
             cursor = conn.cursor()
 
             # Check if the song exists and if it's already deleted
@@ -121,6 +276,8 @@ def delete_song(song_id: int) -> None:
 
             logger.info("Song with ID %s marked as deleted.", song_id)
 
+        _notify_listeners("delete", {"id": song_id})
+
     except sqlite3.Error as e:
         logger.error("Database error while deleting song: %s", str(e))
         raise e
@@ -139,7 +296,7 @@ def get_song_by_id(song_id: int) -> Song:
         ValueError: If the song is not found or is marked as deleted.
     """
     try:
-        with get_db_connection() as conn:
+        with _connection_for_id(song_id) as conn:
             cursor = conn.cursor()
             logger.info("Attempting to retrieve song with ID %s", song_id)
             cursor.execute("""
@@ -154,7 +311,7 @@ def get_song_by_id(song_id: int) -> Song:
                     logger.info("Song with ID %s has been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s found", song_id)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                return Song.from_row(row)
             else:
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
@@ -179,7 +336,7 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         ValueError: If the song is not found or is marked as deleted.
     """
     try:
-        with get_db_connection() as conn:
+        with _connection_for_key(artist, title, year) as conn:
             cursor = conn.cursor()
             logger.info("Attempting to retrieve song with artist '%s', title '%s', and year %d", artist, title, year)
             cursor.execute("""
@@ -194,7 +351,7 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
                     logger.info("Song with artist '%s', title '%s', and year %d has been deleted", artist, title, year)
                     raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} has been deleted")
                 logger.info("Song with artist '%s', title '%s', and year %d found", artist, title, year)
-                return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+                return Song.from_row(row)
             else:
                 logger.info("Song with artist '%s', title '%s', and year %d not found", artist, title, year)
                 raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} not found")
@@ -203,10 +360,142 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
+def build_search_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query matching songs that contain every word as a prefix,
+    so 'bohem rhap' finds 'Bohemian Rhapsody'. Each word is quoted, so FTS5 syntax in the
+    text is matched literally.
+
+    Args:
+        query (str): The text to search for.
+
+    Returns:
+        str: The FTS5 MATCH expression.
+
+    Raises:
+        ValueError: If the text contains no words.
+    """
+    words = query.split()
+    if not words:
+        raise ValueError("Search query must not be empty.")
+    return " ".join('"%s"*' % word.replace('"', '""') for word in words)
+
+def search_songs(query: str, limit: int = 20, offset: int = 0) -> list[dict]:
+    """
+    Searches the artist, title and genre of non-deleted songs with the songs_fts index.
+
+    Results are ranked by BM25 relevance, weighting title matches above artist matches
+    above genre matches. When the catalog is sharded, every shard returns its best
+    offset + limit matches and these are merged by rank; each shard ranks with its own
+    term statistics, which for evenly hashed shards are close to the catalog's.
+
+    Args:
+        query (str): The text to search for; every word must match the start of a word in the song.
+        limit (int): The maximum number of songs to return.
+        offset (int): The number of ranked songs to skip, for pagination.
+
+    Returns:
+        list[dict]: The matching songs with play_count, best match first.
+
+    Raises:
+        ValueError: If the query is empty or limit/offset are invalid.
+        sqlite3.Error: If there is a database error.
+    """
+    if limit < 1 or offset < 0:
+        raise ValueError(f"Invalid pagination: limit {limit}, offset {offset} (limit must be positive and offset non-negative).")
+    match = build_search_query(query)
+
+    try:
+        if shard_utils.is_sharded():
+            logger.info("Searching %d shards for '%s' (limit %d, offset %d)", shard_utils.DB_SHARDS, query, limit, offset)
+            shard_rows = shard_utils.fetch_all_shards("""
+                SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration, songs.play_count,
+                    bm25(songs_fts, 5.0, 10.0, 1.0) AS rank
+                FROM songs_fts
+                JOIN songs ON songs.id = songs_fts.rowid
+                WHERE songs_fts MATCH ? AND songs.deleted = FALSE
+                ORDER BY rank, songs.id
+                LIMIT ?
+            """, (match, offset + limit))
+            ranked = shard_utils.merge_sorted_lists(shard_rows, key=itemgetter(7, 0))
+            rows = ranked[offset:offset + limit]
+        else:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                logger.info("Searching songs for '%s' (limit %d, offset %d)", query, limit, offset)
+                cursor.execute("""
+                    SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration, songs.play_count
+                    FROM songs_fts
+                    JOIN songs ON songs.id = songs_fts.rowid
+                    WHERE songs_fts MATCH ? AND songs.deleted = FALSE
+                    ORDER BY bm25(songs_fts, 5.0, 10.0, 1.0)
+                    LIMIT ? OFFSET ?
+                """, (match, limit, offset))
+                rows = cursor.fetchall()
+
+        songs = [
+            {
+                "id": row[0],
+                "artist": row[1],
+                "title": row[2],
+                "year": row[3],
+                "genre": row[4],
+                "duration": row[5],
+                "play_count": row[6],
+            }
+            for row in rows
+        ]
+        logger.info("Found %d songs matching '%s'", len(songs), query)
+        return songs
+
+    except sqlite3.Error as e:
+        logger.error("Database error while searching songs for '%s': %s", query, str(e))
+        raise e
+
+def _all_songs_query(sort_by_play_count: bool, sharded: bool = False) -> str:
+    """
+    Builds the query selecting all non-deleted songs, optionally by play count.
+    The query for a shard orders every row, ties by id, so shards merge with _song_sort_key.
+    """
+    query = """
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    if sort_by_play_count:
+        query += " ORDER BY play_count DESC"
+        if sharded:
+            query += ", id"
+    elif sharded:
+        query += " ORDER BY id"
+    return query
+
+def _song_sort_key(sort_by_play_count: bool) -> Callable[[Sequence[Any]], Any]:
+    """
+    Returns the key of an (id, ..., play_count) row in the order of _all_songs_query.
+    """
+    if sort_by_play_count:
+        return lambda row: (-(row[6] or 0), row[0])
+    return itemgetter(0)
+
+def _song_row_to_dict(row: Sequence[Any]) -> dict:
+    return {
+        "id": row[0],
+        "artist": row[1],
+        "title": row[2],
+        "year": row[3],
+        "genre": row[4],
+        "duration": row[5],
+        "play_count": row[6],
+    }
+
 def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
 
+    When the catalog is sharded, the shards are read in parallel and their sorted
+    rows k-way merged, so the songs come back in the same order.
+
     Args:
         sort_by_play_count (bool): If True, sort the songs by play count in descending order.
 
@@ -216,46 +505,173 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     Logs:
         Warning: If the catalog is empty.
     """
+    try:
+        if shard_utils.is_sharded():
+            logger.info("Attempting to retrieve all non-deleted songs from %d shards", shard_utils.DB_SHARDS)
+            shard_rows = shard_utils.fetch_all_shards(_all_songs_query(sort_by_play_count, sharded=True))
+            rows = shard_utils.merge_sorted_lists(shard_rows, key=_song_sort_key(sort_by_play_count))
+        else:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                logger.info("Attempting to retrieve all non-deleted songs from the catalog")
+
+                # Determine the sort order based on the 'sort_by_play_count' flag
+                cursor.execute(_all_songs_query(sort_by_play_count))
+                rows = cursor.fetchall()
+
+        if not rows:
+            logger.warning("The song catalog is empty.")
+            return []
+
+        songs = [_song_row_to_dict(row) for row in rows]
+        logger.info("Retrieved %d songs from the catalog", len(songs))
+        return songs
+
+    except sqlite3.Error as e:
+        logger.error("Database error while retrieving all songs: %s", str(e))
+        raise e
+
+def iter_all_songs(sort_by_play_count: bool = False, chunk_size: int = SONG_STREAM_FETCH_SIZE) -> Iterator[dict]:
+    """
+    Streams the songs that are not marked as deleted from the catalog, as get_all_songs returns them.
+
+    Rows are fetched 'chunk_size' at a time, so memory use does not grow with the catalog
+    and the first song is available once the first chunk is read. The database connection
+    stays open until the iterator is exhausted or closed. When the catalog is sharded,
+    every shard is streamed at once and the rows merged as they are read.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Returns:
+        Iterator[dict]: The non-deleted songs with play_count.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+        sqlite3.Error: If the songs cannot be read, raised while iterating.
+    """
+    if chunk_size < 1:
+        logger.error("Invalid chunk size: %s", chunk_size)
+        raise ValueError(f"Invalid chunk size: {chunk_size}. Must be a positive integer.")
+    return _stream_songs(sort_by_play_count, chunk_size)
+
+def _stream_songs(sort_by_play_count: bool, chunk_size: int) -> Iterator[dict]:
+    if shard_utils.is_sharded():
+        yield from _stream_sharded_songs(sort_by_play_count, chunk_size)
+        return
+
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            logger.info("Attempting to retrieve all non-deleted songs from the catalog")
+            logger.info("Streaming all non-deleted songs from the catalog")
 
-            # Determine the sort order based on the 'sort_by_play_count' flag
-            query = """
-                SELECT id, artist, title, year, genre, duration, play_count
-                FROM songs
-                WHERE deleted = FALSE
-            """
-            if sort_by_play_count:
-                query += " ORDER BY play_count DESC"
+            cursor.execute(_all_songs_query(sort_by_play_count))
+            count = 0
+            rows = cursor.fetchmany(chunk_size)
+            while rows:
+                for row in rows:
+                    yield _song_row_to_dict(row)
+                count += len(rows)
+                rows = cursor.fetchmany(chunk_size)
 
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-            if not rows:
-                logger.warning("The song catalog is empty.")
-                return []
-
-            songs = [
-                {
-                    "id": row[0],
-                    "artist": row[1],
-                    "title": row[2],
-                    "year": row[3],
-                    "genre": row[4],
-                    "duration": row[5],
-                    "play_count": row[6],
-                }
-                for row in rows
-            ]
+            logger.info("Streamed %d songs from the catalog", count)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming all songs: %s", str(e))
+        raise e
+
+def _stream_sharded_songs(sort_by_play_count: bool, chunk_size: int) -> Iterator[dict]:
+    try:
+        logger.info("Streaming all non-deleted songs from %d shards", shard_utils.DB_SHARDS)
+        rows = shard_utils.stream_all_shards(
+            _all_songs_query(sort_by_play_count, sharded=True), (), _song_sort_key(sort_by_play_count), chunk_size
+        )
+        count = 0
+        for row in rows:
+            yield _song_row_to_dict(row)
+            count += 1
+
+        logger.info("Streamed %d songs from %d shards", count, shard_utils.DB_SHARDS)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming all songs: %s", str(e))
+        raise e
+
+def get_song_columns(sort_by_play_count: bool = False) -> SongColumns:
+    """
+    Retrieves all songs that are not marked as deleted from the catalog into a SongColumns.
+
+    Rows are read in chunks of SONG_COLUMNS_FETCH_SIZE, so the catalog is never held
+    as a full list of row tuples. When the catalog is sharded, each shard is loaded
+    into its own columns in parallel, and these are merged in order.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+
+    Returns:
+        SongColumns: The non-deleted songs.
+
+    Logs:
+        Warning: If the catalog is empty.
+    """
+    try:
+        if shard_utils.is_sharded():
+            logger.info("Attempting to retrieve all non-deleted songs from %d shards into columns", shard_utils.DB_SHARDS)
+            songs = _load_sharded_columns(sort_by_play_count)
+        else:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                logger.info("Attempting to retrieve all non-deleted songs from the catalog into columns")
+
+                cursor.execute(_all_songs_query(sort_by_play_count))
+                songs = _read_columns(cursor)
+
+        if not songs:
+            logger.warning("The song catalog is empty.")
+        else:
             logger.info("Retrieved %d songs from the catalog", len(songs))
-            return songs
+        return songs
 
     except sqlite3.Error as e:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def _read_columns(cursor: sqlite3.Cursor) -> SongColumns:
+    """
+    Reads the rows of an executed _all_songs_query into columns, SONG_COLUMNS_FETCH_SIZE at a time.
+    """
+    songs = SongColumns()
+    rows = cursor.fetchmany(SONG_COLUMNS_FETCH_SIZE)
+    while rows:
+        songs.extend(rows)
+        rows = cursor.fetchmany(SONG_COLUMNS_FETCH_SIZE)
+    return songs
+
+def _load_sharded_columns(sort_by_play_count: bool) -> SongColumns:
+    """
+    Loads every shard into columns in parallel, then merges them chunk by chunk.
+    """
+    query = _all_songs_query(sort_by_play_count, sharded=True)
+
+    def load(shard: int) -> SongColumns:
+        with shard_utils.get_shard_connection(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            return _read_columns(cursor)
+
+    shard_rows = [
+        zip(part.ids, part.artists, part.titles, part.years, part.genres, part.durations, part.play_counts)
+        for part in shard_utils.fan_out(load)
+    ]
+    rows = shard_utils.merge_sorted(shard_rows, key=_song_sort_key(sort_by_play_count))
+    songs = SongColumns()
+    chunk = list(islice(rows, SONG_COLUMNS_FETCH_SIZE))
+    while chunk:
+        songs.extend(chunk)
+        chunk = list(islice(rows, SONG_COLUMNS_FETCH_SIZE))
+    return songs
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -267,7 +683,7 @@ def get_random_song() -> Song:
         ValueError: If the catalog is empty.
     """
     try:
-        all_songs = get_all_songs()
+        all_songs = get_song_columns()
 
         if not all_songs:
             logger.info("Cannot retrieve random song because the song catalog is empty.")
@@ -278,15 +694,7 @@ def get_random_song() -> Song:
         logger.info("Random index selected: %d (total songs: %d)", random_index, len(all_songs))
 
         # Return the song at the random index, adjust for 0-based indexing
-        song_data = all_songs[random_index - 1]
-        return Song(
-            id=song_data["id"],
-            artist=song_data["artist"],
-            title=song_data["title"],
-            year=song_data["year"],
-            genre=song_data["genre"],
-            duration=song_data["duration"]
-        )
+        return all_songs[random_index - 1]
 
     except Exception as e:
         logger.error("Error while retrieving random song: %s", str(e))
@@ -304,7 +712,7 @@ def update_play_count(song_id: int) -> None:
         sqlite3.Error: If there is a database error.
     """
     try:
-        with get_db_connection() as conn:
+        with _connection_for_id(song_id) as conn:
             cursor = conn.cursor()
             logger.info("Attempting to update play count for song with ID %d", song_id)
 
@@ -325,6 +733,8 @@ def update_play_count(song_id: int) -> None:
 
             logger.info("Play count incremented for song with ID: %d", song_id)
 
+        _notify_listeners("play", {"id": song_id})
+
     except sqlite3.Error as e:
         logger.error("Database error while updating play count for song with ID %d: %s", song_id, str(e))
         raise e
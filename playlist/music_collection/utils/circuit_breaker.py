@@ -0,0 +1,151 @@
+from collections import deque
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("circuit_breaker_transitions_total", "counter", "Circuit breaker state changes by breaker and new state.")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency until it has had time to recover.
+
+    The breaker is closed while calls mostly succeed. Once at least 'min_calls' of the last
+    'window' calls were made and 'failure_rate' of them failed, it opens: allow() returns
+    False, so callers fail fast instead of waiting on timeouts. After 'reset_timeout'
+    seconds it is half open and lets a single trial call through; success closes it
+    and failure opens it again. A trial released without an outcome, or that reports nothing
+    within 'trial_timeout' seconds, is written off and another is let through.
+
+    Attributes:
+        name (str): The dependency's name, used in logs and metrics.
+        window (int): The number of recent call outcomes the failure rate is computed over.
+        failure_rate (float): The failure ratio at which the breaker opens.
+        min_calls (int): The number of outcomes needed before the breaker can open.
+        reset_timeout (float): Seconds the breaker stays open before a trial call.
+        trial_timeout (float): Seconds after which an unfinished trial call no longer blocks
+            the next one. Defaults to reset_timeout.
+    """
+
+    def __init__(self, name: str, window: int = 20, failure_rate: float = 0.5, min_calls: int = 5, reset_timeout: float = 30,
+                 trial_timeout: Optional[float] = None):
+        self.name = name
+        self.window = window
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = reset_timeout if trial_timeout is None else trial_timeout
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True for each success, False for each failure
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started_at: Optional[float] = None
+
+    def _transition(self, state: str) -> None:
+        """
+        Changes state. Must be called with the lock held.
+        """
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+            logger.warning("Circuit breaker for %s opened, failing fast for %.0f seconds", self.name, self.reset_timeout)
+        elif state == CLOSED:
+            self._outcomes.clear()
+            self._opened_at = None
+            logger.info("Circuit breaker for %s closed", self.name)
+        metrics.inc("circuit_breaker_transitions_total", breaker=self.name, state=state)
+
+    @property
+    def state(self) -> str:
+        """
+        The current state: 'closed', 'open' or 'half_open'.
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Returns whether a call may be made now. In the half open state only the first caller
+        gets through, as the trial call, until the trial reports back or trial_timeout passes.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        with self._lock:
+            if self._state != HALF_OPEN:
+                return False
+            now = time.monotonic()
+            if self._trial_in_flight:
+                if now - self._trial_started_at < self.trial_timeout:
+                    return False
+                logger.warning("Trial call to %s did not report back within %.0f seconds, letting another through",
+                               self.name, self.trial_timeout)
+            self._trial_in_flight = True
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the breaker after a successful trial.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(CLOSED)
+            else:
+                self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the breaker if the failure rate is reached or the trial failed.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._transition(OPEN)
+
+    def release_trial(self) -> None:
+        """
+        Ends a call that was interrupted before it had an outcome, e.g. because its caller was
+        cancelled, without recording anything; a half open trial lets the next caller through.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the state and recent failure rate, for monitoring.
+        """
+        state = self.state
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = self._outcomes.count(False)
+            snapshot = {
+                'state': state,
+                'recent_calls': calls,
+                'recent_failures': failures,
+                'failure_rate': round(failures / calls, 3) if calls else 0.0,
+            }
+            if state == OPEN:
+                snapshot['retry_in_seconds'] = round(max(self.reset_timeout - (time.monotonic() - self._opened_at), 0), 3)
+        return snapshot
@@ -0,0 +1,159 @@
+import dataclasses
+import json
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only where orjson is not installed
+    orjson = None
+
+
+# Items encoded into each chunk of a streamed NDJSON response, see iter_ndjson
+NDJSON_BATCH_SIZE = 100
+
+
+def _encode_dataclass(obj: Any) -> Any:
+    """
+    Encodes the flat model dataclasses (Song, Meal) without the deep copy done by dataclasses.asdict.
+    """
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding responses with orjson when it is installed, and with the standard
+    library otherwise. Quart uses Flask's provider interface, so the ASGI apps install it too.
+
+    orjson serializes dataclasses natively and writes bytes straight into the response.
+    Output decodes to the same data as with Flask's default provider: dict keys are sorted
+    and the body is compact, or indented in debug mode. orjson keeps dataclass fields in
+    declaration order and writes non-ASCII characters as UTF-8 rather than escapes.
+    """
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """
+        Serializes data as UTF-8 JSON bytes.
+
+        Args:
+            obj (Any): The data to serialize.
+            indent (bool): Whether to indent the output. Defaults to False.
+
+        Returns:
+            bytes: The encoded JSON.
+        """
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option)
+
+        separators = None if indent else (",", ":")
+        return json.dumps(
+            obj, default=_encode_dataclass, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+            indent=2 if indent else None, separators=separators
+        ).encode()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode()
+        kwargs.setdefault("default", _encode_dataclass)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+class PreEncodedJSON:
+    """
+    A JSON payload that never changes, encoded once and served from the cached bytes.
+
+    Attributes:
+        payload (Any): The data to serve.
+    """
+
+    def __init__(self, payload: Any):
+        self.payload = payload
+        self._body: Optional[bytes] = None
+
+    def response(self, app: Flask, status: int = 200) -> Response:
+        """
+        Returns a JSON response with the cached body, encoding it with the app's provider on first use.
+
+        Args:
+            app (Flask): The application, whose JSON provider encodes the payload.
+            status (int): The response status code. Defaults to 200.
+        """
+        if self._body is None:
+            # Match the provider's own responses, which are indented in debug mode
+            indent = (app.json.compact is None and app.debug) or app.json.compact is False
+            if isinstance(app.json, FastJSONProvider):
+                self._body = app.json.dumps_bytes(self.payload, indent) + b"\n"
+            else:
+                self._body = (app.json.dumps(self.payload, indent=2 if indent else None) + "\n").encode()
+        return app.response_class(self._body, status=status, mimetype=app.json.mimetype)
+
+
+def _line_encoder(app: Flask) -> Callable[[Any], bytes]:
+    """
+    Returns a function encoding an item as one compact line of JSON with the app's provider.
+    """
+    if isinstance(app.json, FastJSONProvider):
+        return app.json.dumps_bytes
+    return lambda obj: app.json.dumps(obj).encode()
+
+def encode_ndjson(app: Flask, items: Iterable[Any]) -> bytes:
+    """
+    Encodes items as newline-delimited JSON, one compact item per line, e.g. a chunk of a
+    streamed response whose items are read in batches.
+
+    Args:
+        app (Flask): The application, whose JSON provider encodes the items.
+        items (Iterable[Any]): The items.
+
+    Returns:
+        bytes: The encoded lines, each ending with a newline.
+    """
+    dumps_bytes = _line_encoder(app)
+    return b"".join(dumps_bytes(item) + b"\n" for item in items)
+
+def iter_ndjson(app: Flask, items: Iterable[Any], batch_size: int = NDJSON_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Encodes items as newline-delimited JSON, one compact item per line, for streamed responses.
+
+    Items are encoded as they are read, and 'batch_size' lines are written per chunk so the
+    server sends fewer, larger writes.
+
+    Args:
+        app (Flask): The application, whose JSON provider encodes the items.
+        items (Iterable[Any]): The items, typically a model iterator such as iter_all_songs.
+        batch_size (int): The number of lines per chunk. Defaults to NDJSON_BATCH_SIZE.
+
+    Yields:
+        bytes: Chunks of encoded lines.
+    """
+    dumps_bytes = _line_encoder(app)
+
+    lines = []
+    for item in items:
+        lines.append(dumps_bytes(item))
+        if len(lines) >= batch_size:
+            lines.append(b"")
+            yield b"\n".join(lines)
+            lines = []
+    if lines:
+        lines.append(b"")
+        yield b"\n".join(lines)
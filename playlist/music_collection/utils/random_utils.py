@@ -1,48 +1,196 @@
 import logging
-import requests
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, List
 
+from music_collection.utils.circuit_breaker import CircuitBreaker
 from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+metrics.describe("random_org_request_seconds", "histogram", "Latency of random.org requests by outcome.")
+metrics.describe("random_org_fallbacks_total", "counter", "Random numbers drawn locally because random.org was unavailable.")
 
-def get_random(num_songs: int) -> int:
+# load the random.org base url from the environment so a local stand-in can replace it
+RANDOM_ORG_BASE_URL = os.getenv("RANDOM_ORG_BASE_URL", "https://www.random.org").rstrip("/")
+
+# Per-attempt timeout, and how many times a timed out or failed (5xx, 429) request is retried
+RANDOM_ORG_TIMEOUT = float(os.getenv("RANDOM_ORG_TIMEOUT", "5"))
+RANDOM_ORG_RETRIES = int(os.getenv("RANDOM_ORG_RETRIES", "2"))
+# Base of the exponential backoff between retries, in seconds; each delay is jittered
+RANDOM_ORG_BACKOFF = float(os.getenv("RANDOM_ORG_BACKOFF", "0.1"))
+# Kept-alive connections to random.org in the shared session's pool
+RANDOM_ORG_POOL_SIZE = int(os.getenv("RANDOM_ORG_POOL_SIZE", "10"))
+# 'local' draws from the operating system's entropy source when random.org is unavailable,
+# 'none' raises instead
+RANDOM_ORG_FALLBACK = os.getenv("RANDOM_ORG_FALLBACK", "none").lower()
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Shared by the sync and async clients, so both stop calling random.org while it is failing
+breaker = CircuitBreaker(
+    "random_org",
+    failure_rate=float(os.getenv("RANDOM_ORG_BREAKER_FAILURE_RATE", "0.5")),
+    reset_timeout=float(os.getenv("RANDOM_ORG_BREAKER_RESET_TIMEOUT", "30")),
+    trial_timeout=RANDOM_ORG_TIMEOUT,
+)
+
+local_random = random.SystemRandom()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
     """
-    Fetches a random int between 1 and the number of songs in the catalog from random.org.
+    Returns the shared requests session, creating it on first use. Its pooled connections are
+    kept alive between calls, so only the first request pays for DNS, TCP and TLS setup.
 
     Returns:
-        int: The random number fetched from random.org.
+        requests.Session: The session.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # requests takes a noticeable share of startup, so it is imported on the first draw
+            import requests
+            from requests.adapters import HTTPAdapter
 
-    Raises:
-        RuntimeError: If the request to random.org fails or returns an invalid response.
-        ValueError: If the response from random.org is not a valid float.
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RANDOM_ORG_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Returns the delay before retry number 'attempt' (from 0): a random fraction of the
+    exponential backoff, so clients that failed together do not retry together.
+    """
+    return random.uniform(0, RANDOM_ORG_BACKOFF * 2 ** attempt)
+
+def parse_numbers(body: str, count: int, number_type: Callable[[str], Any]) -> List[Any]:
     """
-    url = f"https://www.random.org/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
+    Parses a plain text random.org response holding one number per line.
+
+    Args:
+        body (str): The response body.
+        count (int): How many numbers the response must hold.
+        number_type (Callable[[str], Any]): Converts each line, e.g. int or float.
+
+    Returns:
+        List[Any]: The numbers.
 
+    Raises:
+        ValueError: If a line is not a valid number, or there are not 'count' of them.
+    """
     try:
+        numbers = [number_type(line) for line in body.split()]
+    except ValueError:
+        raise ValueError("Invalid response from random.org: %s" % body)
+    if len(numbers) != count:
+        raise ValueError("Expected %d numbers from random.org, received %d" % (count, len(numbers)))
+    return numbers
+
+def fetch(url: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Fetches a random.org URL through the circuit breaker, retrying timeouts and server errors.
+
+    The body is parsed before the call is reported to the breaker, so a response that cannot
+    be parsed counts as a failure.
+
+    Args:
+        url (str): The URL to fetch.
+        parse (Callable[[str], Any]): Parses the stripped response body.
+
+    Returns:
+        Any: The parsed response.
+
+    Raises:
+        RuntimeError: If the breaker is open, or the request still fails after the retries.
+        ValueError: If the response cannot be parsed; it is not retried.
+    """
+    import requests
+
+    if not breaker.allow():
+        logger.error("Circuit breaker for random.org is open, not sending the request.")
+        raise RuntimeError("Request to random.org failed: circuit breaker is open")
+
+    attempt = 0
+    while True:
         # Log the request to random.org
         logger.info("Fetching random number from %s", url)
 
-        response = requests.get(url, timeout=5)
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, timeout=RANDOM_ORG_TIMEOUT)
 
-        # Check if the request was successful
-        response.raise_for_status()
+            # Check if the request was successful
+            response.raise_for_status()
+            result = parse(response.text.strip())
+        except requests.exceptions.RequestException as e:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
 
-        random_number_str = response.text.strip()
+            status_code = getattr(e.response, "status_code", None)
+            retryable = isinstance(e, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)) or status_code in RETRY_STATUS_CODES
+            if retryable and attempt < RANDOM_ORG_RETRIES and breaker.allow():
+                delay = backoff_delay(attempt)
+                logger.warning("Request to random.org failed (%s), retrying in %.3f seconds", e, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
 
-        try:
-            random_number = int(random_number_str)
-        except ValueError:
-            raise ValueError("Invalid response from random.org: %s" % random_number_str)
+            if isinstance(e, requests.exceptions.Timeout):
+                logger.error("Request to random.org timed out.")
+                raise RuntimeError("Request to random.org timed out.")
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+        except Exception:
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="error")
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted, not failed: record nothing, but never leave a half open trial in flight
+            metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="cancelled")
+            breaker.release_trial()
+            raise
 
-        logger.info("Received random number: %.3f", random_number)
-        return random_number
+        metrics.observe("random_org_request_seconds", time.perf_counter() - start, outcome="success")
+        breaker.record_success()
+        return result
+
+
+def get_random(num_songs: int) -> int:
+    """
+    Fetches a random int between 1 and the number of songs in the catalog from random.org.
 
-    except requests.exceptions.Timeout:
-        logger.error("Request to random.org timed out.")
-        raise RuntimeError("Request to random.org timed out.")
+    If random.org is unavailable or its response is invalid and RANDOM_ORG_FALLBACK is 'local',
+    the number is drawn from the operating system's entropy source instead.
+
+    Returns:
+        int: The random number fetched from random.org.
+
+    Raises:
+        RuntimeError: If the request to random.org fails or returns an invalid response.
+        ValueError: If the response from random.org is not a valid float.
+    """
+    url = f"{RANDOM_ORG_BASE_URL}/integers/?num=1&min=1&max={num_songs}&col=1&base=10&format=plain&rnd=new"
+
+    try:
+        random_number = fetch(url, lambda body: parse_numbers(body, 1, int)[0])
+    except (RuntimeError, ValueError) as e:
+        if RANDOM_ORG_FALLBACK != "local":
+            raise
+        metrics.inc("random_org_fallbacks_total")
+        random_number = local_random.randint(1, num_songs)
+        logger.warning("random.org unavailable (%s), drew %d locally", e, random_number)
+        return random_number
 
-    except requests.exceptions.RequestException as e:
-        logger.error("Request to random.org failed: %s", e)
-        raise RuntimeError("Request to random.org failed: %s" % e)
+    logger.info("Received random number: %.3f", random_number)
+    return random_number
@@ -0,0 +1,201 @@
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+from itertools import chain
+import logging
+import os
+import sqlite3
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+import zlib
+
+from music_collection.utils.logger import configure_logger
+from music_collection.utils.metrics import metrics
+from music_collection.utils import sql_utils
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+metrics.describe("db_shard_fanout_seconds", "histogram", "Time to run one query on every shard and collect the results.")
+
+# Number of SQLite files the song catalog is split across. 1 keeps it in DB_PATH alone.
+# Song ids encode their shard, so the count cannot change once songs are stored.
+DB_SHARDS = int(os.getenv("DB_SHARDS", "1"))
+
+# Threads querying shards at once when a scan fans out over every shard
+SHARD_FANOUT_WORKERS = int(os.getenv("SHARD_FANOUT_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=SHARD_FANOUT_WORKERS, thread_name_prefix="shard")
+
+
+def is_sharded() -> bool:
+    """
+    Returns whether the catalog is split across several shard files.
+    """
+    return DB_SHARDS > 1
+
+def shard_path(shard: int) -> str:
+    """
+    Returns the file of a shard, next to DB_PATH: song_catalog.db becomes song_catalog.shard0.db and so on.
+
+    Args:
+        shard (int): The shard number, from 0 to DB_SHARDS - 1.
+
+    Returns:
+        str: The path of the shard's database.
+    """
+    root, ext = os.path.splitext(sql_utils.DB_PATH)
+    return f"{root}.shard{shard}{ext}"
+
+def shard_for_key(*key: Any) -> int:
+    """
+    Returns the shard owning a key, from a hash that is the same in every process and run.
+
+    Args:
+        *key: The key's parts, e.g. a song's artist, title and year.
+
+    Returns:
+        int: The shard number.
+    """
+    return zlib.crc32("\x1f".join(map(str, key)).encode()) % DB_SHARDS
+
+def shard_for_id(row_id: int) -> int:
+    """
+    Returns the shard holding a row id. Shard s stores ids s + 1, s + 1 + DB_SHARDS, ...
+    so the id alone routes a lookup, see first_id.
+
+    Args:
+        row_id (int): The row id.
+
+    Returns:
+        int: The shard number.
+    """
+    return (row_id - 1) % DB_SHARDS
+
+def first_id(shard: int) -> int:
+    """
+    Returns the smallest id stored in a shard; each next id is DB_SHARDS higher.
+    """
+    return shard + 1
+
+def get_shard_connection(shard: int, trace: Optional[bool] = None):
+    """
+    Context manager for a connection to one shard, see sql_utils.get_db_connection.
+    """
+    return sql_utils.get_db_connection(trace, db_path=shard_path(shard))
+
+def fan_out(func: Callable[[int], Any]) -> List[Any]:
+    """
+    Calls func(shard) for every shard on the fan-out thread pool and waits for all of them.
+
+    sqlite3 releases the GIL while a statement runs, so the shards are queried in parallel.
+
+    Args:
+        func (Callable[[int], Any]): Queries one shard.
+
+    Returns:
+        List[Any]: The results, in shard order.
+
+    Raises:
+        Exception: The first shard's error, once every shard has finished.
+    """
+    with metrics.timer("db_shard_fanout_seconds"):
+        futures = [_executor.submit(func, shard) for shard in range(DB_SHARDS)]
+        errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
+
+def fetch_all_shards(query: str, parameters: Sequence[Any] = ()) -> List[List[tuple]]:
+    """
+    Runs a query on every shard in parallel.
+
+    Args:
+        query (str): The query.
+        parameters (Sequence[Any]): Its parameters.
+
+    Returns:
+        List[List[tuple]]: Each shard's rows, in shard order.
+
+    Raises:
+        sqlite3.Error: If a shard cannot be queried.
+    """
+    def fetch(shard: int) -> List[tuple]:
+        with get_shard_connection(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, parameters)
+            return cursor.fetchall()
+
+    return fan_out(fetch)
+
+def merge_sorted(sources: Sequence[Iterator[Any]], key: Callable[[Any], Any]) -> Iterator[Any]:
+    """
+    Lazily k-way merges per-shard results that are each sorted by 'key' into one sorted stream.
+    """
+    return heapq.merge(*sources, key=key)
+
+def merge_sorted_lists(lists: Sequence[List[Any]], key: Callable[[Any], Any]) -> List[Any]:
+    """
+    K-way merges per-shard lists that are each sorted by 'key' into one sorted list.
+
+    The lists are concatenated and sorted: Timsort finds the k sorted runs and merges
+    them in C in O(n log k), several times faster than merge_sorted for whole results.
+    """
+    merged = list(chain.from_iterable(lists))
+    merged.sort(key=key)
+    return merged
+
+def stream_all_shards(query: str, parameters: Sequence[Any], key: Callable[[tuple], Any], chunk_size: int) -> Iterator[tuple]:
+    """
+    Streams the rows of a query run on every shard, merged by 'key'.
+
+    Each shard's query must return its rows sorted by 'key'. Every shard keeps a
+    connection open and reads 'chunk_size' rows at a time, so memory use does not
+    grow with the catalog. The connections close once the iterator is exhausted
+    or closed.
+
+    Args:
+        query (str): The query.
+        parameters (Sequence[Any]): Its parameters.
+        key (Callable[[tuple], Any]): The sort key of a row.
+        chunk_size (int): The number of rows fetched per round trip on each shard.
+
+    Returns:
+        Iterator[tuple]: The rows of every shard, sorted by 'key'.
+
+    Raises:
+        sqlite3.Error: If a shard cannot be read, raised while iterating.
+    """
+    def stream(shard: int) -> Iterator[tuple]:
+        with get_shard_connection(shard) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, parameters)
+            rows = cursor.fetchmany(chunk_size)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunk_size)
+
+    sources = [stream(shard) for shard in range(DB_SHARDS)]
+    try:
+        yield from merge_sorted(sources, key)
+    finally:
+        for source in sources:
+            source.close()
+
+def create_shards(schema: str) -> None:
+    """
+    Creates every shard's tables from a schema script, replacing any existing ones.
+
+    Args:
+        schema (str): The SQL script, e.g. sql/create_song_table.sql.
+
+    Raises:
+        sqlite3.Error: If a shard cannot be created.
+    """
+    for shard in range(DB_SHARDS):
+        conn = sqlite3.connect(shard_path(shard))
+        try:
+            conn.executescript(schema)
+        finally:
+            conn.close()
+        logger.info("Created shard %d at %s", shard, shard_path(shard))
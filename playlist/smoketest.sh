@@ -46,6 +46,18 @@ check_db() {
   fi
 }
 
+# Function to check that the service is ready for traffic
+check_ready() {
+  echo "Checking readiness..."
+  curl -s -X GET "$BASE_URL/ready" | grep -q '"ready": true'
+  if [ $? -eq 0 ]; then
+    echo "Service is ready."
+  else
+    echo "Readiness check failed."
+    exit 1
+  fi
+}
+
 
 ##########################################################
 #
@@ -136,6 +148,22 @@ get_song_by_compound_key() {
   fi
 }
 
+search_songs() {
+  query=$1
+  echo "Searching songs for ($query)..."
+  response=$(curl -s -X GET "$BASE_URL/search-songs?q=$(echo $query | sed 's/ /%20/g')")
+  if echo "$response" | grep -q '"status": "success"'; then
+    echo "Songs searched successfully."
+    if [ "$ECHO_JSON" = true ]; then
+      echo "Search Results JSON:"
+      echo "$response" | jq .
+    fi
+  else
+    echo "Failed to search songs."
+    exit 1
+  fi
+}
+
 get_random_song() {
   echo "Getting a random song from the catalog..."
   response=$(curl -s -X GET "$BASE_URL/get-random-song")
@@ -464,6 +492,7 @@ get_song_leaderboard() {
 # Health checks
 check_health
 check_db
+check_ready
 
 # Create songs
 create_song "The Beatles" "Hey Jude" 1968 "Rock" 180
@@ -478,6 +507,7 @@ get_all_songs
 get_song_by_id 2
 get_song_by_compound_key "The Beatles" "Let It Be" 1970
 get_random_song
+search_songs "queen bohem"
 
 add_song_to_playlist "The Rolling Stones" "Paint It Black" 1966
 add_song_to_playlist "Queen" "Bohemian Rhapsody" 1975
@@ -11,4 +11,13 @@ else
     # Create the database for the first time
     sqlite3 "$DB_PATH" < /app/sql/create_song_table.sql
     echo "Database created successfully."
-fi
\ No newline at end of file
+fi
+
+# With DB_SHARDS above 1 the catalog is split across one file per shard next to DB_PATH
+if [ "${DB_SHARDS:-1}" -gt 1 ]; then
+    for ((shard = 0; shard < DB_SHARDS; shard++)); do
+        shard_path="${DB_PATH%.*}.shard$shard.${DB_PATH##*.}"
+        echo "Creating shard $shard at $shard_path."
+        sqlite3 "$shard_path" < /app/sql/create_song_table.sql
+    done
+fi
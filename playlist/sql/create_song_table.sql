@@ -1,3 +1,4 @@
+DROP TABLE IF EXISTS songs_fts;
 DROP TABLE IF EXISTS songs;
 CREATE TABLE songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -9,4 +10,27 @@ CREATE TABLE songs (
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+
+-- Full-text index over the searchable columns of non-deleted songs, stored in songs itself
+CREATE VIRTUAL TABLE songs_fts USING fts5(
+    artist,
+    title,
+    genre,
+    content='songs',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER songs_fts_insert AFTER INSERT ON songs WHEN NOT NEW.deleted BEGIN
+    INSERT INTO songs_fts (rowid, artist, title, genre) VALUES (NEW.id, NEW.artist, NEW.title, NEW.genre);
+END;
+
+-- delete_song is a soft delete, so marking a song deleted removes it from the index
+CREATE TRIGGER songs_fts_soft_delete AFTER UPDATE OF deleted ON songs WHEN NEW.deleted AND NOT OLD.deleted BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
+
+CREATE TRIGGER songs_fts_delete AFTER DELETE ON songs WHEN NOT OLD.deleted BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
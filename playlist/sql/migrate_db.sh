@@ -0,0 +1,10 @@
+#!/bin/bash
+
+# Applies the idempotent schema migrations to an existing catalog, and to its shards,
+# so databases created by an older create_song_table.sql gain the newer tables and triggers
+for db in "$DB_PATH" "${DB_PATH%.*}".shard*."${DB_PATH##*.}"; do
+    if [ -f "$db" ]; then
+        echo "Migrating database at $db."
+        sqlite3 "$db" < /app/sql/migrate_song_table.sql
+    fi
+done
@@ -0,0 +1,28 @@
+-- Brings a songs table created before full-text search up to date. Safe to run on any
+-- catalog, any number of times: see create_song_table.sql for the tables it matches.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+    artist,
+    title,
+    genre,
+    content='songs',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON songs WHEN NOT NEW.deleted BEGIN
+    INSERT INTO songs_fts (rowid, artist, title, genre) VALUES (NEW.id, NEW.artist, NEW.title, NEW.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_soft_delete AFTER UPDATE OF deleted ON songs WHEN NEW.deleted AND NOT OLD.deleted BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
+
+CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON songs WHEN NOT OLD.deleted BEGIN
+    INSERT INTO songs_fts (songs_fts, rowid, artist, title, genre) VALUES ('delete', OLD.id, OLD.artist, OLD.title, OLD.genre);
+END;
+
+-- Reindex the non-deleted songs. A plain 'rebuild' would also index soft-deleted songs,
+-- which the triggers above never remove.
+INSERT INTO songs_fts (songs_fts) VALUES ('delete-all');
+INSERT INTO songs_fts (rowid, artist, title, genre) SELECT id, artist, title, genre FROM songs WHERE NOT deleted;
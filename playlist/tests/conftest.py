@@ -0,0 +1,51 @@
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from music_collection.utils import random_utils
+from music_collection.utils.circuit_breaker import CircuitBreaker
+from music_collection.utils.random_org_standin import RandomOrgStandIn
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql"
+
+
+@pytest.fixture
+def random_org(mocker):
+    """Fixture running the local random.org stand-in, with random_utils pointed at it.
+
+    Tests set random_org.config to make it slow, failing or throttled. Each test gets a
+    fresh circuit breaker, and retries are not delayed.
+    """
+    with RandomOrgStandIn() as standin:
+        mocker.patch.object(random_utils, "RANDOM_ORG_BASE_URL", standin.base_url)
+        mocker.patch.object(random_utils, "RANDOM_ORG_BACKOFF", 0)
+        mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org"))
+        yield standin
+
+@pytest.fixture
+def song_db(tmp_path, mocker):
+    """Fixture pointing song_model at a fresh database built from sql/create_song_table.sql."""
+    db_path = tmp_path / "song_catalog.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture
+def asgi_app_module(song_db, mocker):
+    """Fixture providing the ASGI app's module, with a fresh playlist and metrics on the test database.
+
+    Tests run their requests through serve(), which needs the event loop the app is served on.
+    """
+    import asgi_app
+    from music_collection.models.playlist_model import PlaylistModel
+    from music_collection.utils import metrics as metrics_module
+
+    registry = metrics_module.MetricsRegistry()
+    mocker.patch.object(metrics_module, "metrics", registry)
+    mocker.patch.object(asgi_app, "metrics", registry)
+    mocker.patch.object(asgi_app, "playlist_model", PlaylistModel())
+    return asgi_app
@@ -0,0 +1,152 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import queue
+import sqlite3
+
+import pytest
+
+from music_collection.models import song_model
+from music_collection.models.analytics_jobs import AnalyticsJobQueue
+from music_collection.utils import shard_utils
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql"
+
+SONGS = [
+    ("Artist A", "Song A", 1975, "Rock", 200, 10),
+    ("Artist A", "Song B", 1979, "Rock", 300, 5),
+    ("Artist B", "Song C", 1985, "Pop", 180, 30),
+    ("Artist C", "Song D", 2001, "Jazz", 400, 1),
+    ("artist a", "song  a", 1991, "Rock", 220, 0),
+]
+
+@pytest.fixture
+def catalog_db(tmp_path, mocker):
+    """Fixture pointing song_model at a real database holding SONGS."""
+    db_path = tmp_path / "song_catalog.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO songs (artist, title, year, genre, duration, play_count) VALUES (?, ?, ?, ?, ?, ?)", SONGS
+    )
+    conn.commit()
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture
+def jobs():
+    """Fixture providing a job queue with two rows per partition, shut down afterwards."""
+    jobs = AnalyticsJobQueue(workers=2, partition_rows=2, cache_max_age=3600)
+    yield jobs
+    jobs.close()
+
+def run(jobs, kind):
+    job = jobs.wait(jobs.submit(kind), timeout=30)
+    assert job.status == "complete", job.error
+    return job
+
+
+def test_genre_histogram(catalog_db, jobs):
+    """Test that partial counts from every partition are merged, sorted by song count."""
+    job = run(jobs, "genre_histogram")
+    assert job.partitions == 3
+    assert job.result["groups"] == [
+        {"genre": "Rock", "songs": 3, "plays": 15, "total_duration": 720, "avg_duration": 240.0},
+        {"genre": "Jazz", "songs": 1, "plays": 1, "total_duration": 400, "avg_duration": 400.0},
+        {"genre": "Pop", "songs": 1, "plays": 30, "total_duration": 180, "avg_duration": 180.0},
+    ]
+
+def test_year_histogram(catalog_db, jobs):
+    """Test that the year histogram is sorted by year."""
+    groups = run(jobs, "year_histogram").result["groups"]
+    assert [(group["year"], group["songs"]) for group in groups] == [(1975, 1), (1979, 1), (1985, 1), (1991, 1), (2001, 1)]
+
+def test_duplicates_across_partitions(catalog_db, jobs):
+    """Test that titles differing only in case and spacing are found in different partitions."""
+    assert run(jobs, "duplicates").result["duplicates"] == [
+        {"artist": "Artist A", "title": "Song A", "count": 2, "ids": [1, 5]},
+    ]
+
+def test_statistics(catalog_db, jobs):
+    """Test the catalog statistics, with nearest-rank duration percentiles."""
+    result = run(jobs, "statistics").result
+    assert result["songs"] == 5
+    assert result["plays"] == 46
+    assert (result["first_year"], result["last_year"]) == (1975, 2001)
+    assert result["duration"] == {
+        "total": 1300, "mean": 260.0, "std": 80.99, "min": 180, "max": 400, "p50": 220, "p90": 400, "p99": 400,
+    }
+
+def test_deleted_songs_are_skipped(catalog_db, jobs):
+    """Test that soft-deleted songs are left out of every aggregation."""
+    song_model.delete_song(5)
+    assert run(jobs, "duplicates").result["duplicates"] == []
+    assert run(jobs, "statistics").result["songs"] == 4
+
+def test_empty_catalog(tmp_path, mocker, jobs):
+    """Test that a job over an empty catalog completes without any partition."""
+    db_path = tmp_path / "empty.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+
+    job = run(jobs, "statistics")
+    assert job.partitions == 0
+    assert job.result == {"songs": 0}
+
+def test_result_is_reused_until_catalog_write(catalog_db, jobs):
+    """Test that a finished result is reused by new submissions until song_model reports a write."""
+    job = run(jobs, "genre_histogram")
+    assert jobs.submit("genre_histogram") is job
+    assert jobs.get(job.id) is job
+
+    song_model.create_song("Artist D", "Song E", 2010, "Pop", 150)
+    refreshed = run(jobs, "genre_histogram")
+    assert refreshed is not job
+    assert {group["genre"]: group["songs"] for group in refreshed.result["groups"]}["Pop"] == 2
+
+def test_invalid_kind(catalog_db, jobs):
+    """Test that an unsupported job kind raises a ValueError."""
+    with pytest.raises(ValueError, match="Unsupported analytics job 'titles'"):
+        jobs.submit("titles")
+
+def test_rejects_when_full(catalog_db):
+    """Test that submissions are rejected once max_pending jobs are running."""
+    jobs = AnalyticsJobQueue(workers=1, max_pending=0)
+    try:
+        with pytest.raises(queue.Full):
+            jobs.submit("statistics")
+        assert jobs.snapshot()["running"] == 0
+    finally:
+        jobs.close()
+
+def test_sharded_catalog(tmp_path, mocker, jobs):
+    """Test that every shard is partitioned on its own and the partial results merged."""
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(tmp_path / "song_catalog.db"))
+    mocker.patch.object(shard_utils, "DB_SHARDS", 3)
+    shard_utils.create_shards(SCHEMA_PATH.read_text())
+    for i in range(10):
+        song_model.create_song("Artist", f"Song {i}", 2000 + i, "Rock" if i % 2 else "Pop", 100 + i)
+
+    job = run(jobs, "statistics")
+    assert job.partitions == 6
+    assert job.result["songs"] == 10
+    assert job.result["duration"]["total"] == sum(100 + i for i in range(10))
+
+def test_pass_is_rerun_when_a_worker_dies(catalog_db, jobs, mocker):
+    """Test that a pool whose worker died while a pass ran is replaced and the pass run again."""
+    def submit(*args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+        return future
+
+    broken_pool = mocker.Mock()
+    broken_pool.submit.side_effect = submit
+    jobs._pool = broken_pool
+
+    job = run(jobs, "statistics")
+    assert job.result["songs"] == 5
+    assert jobs._pool is not broken_pool
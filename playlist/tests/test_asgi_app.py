@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+import pytest
+
+from music_collection.models import song_model
+from music_collection.utils.json_provider import FastJSONProvider
+
+
+SONGS = [
+    {"artist": "Artist A", "title": "Song A", "year": 1975, "genre": "Rock", "duration": 200},
+    {"artist": "Artist B", "title": "Song B", "year": 1985, "genre": "Pop", "duration": 180},
+]
+
+def serve(asgi_app_module, scenario):
+    """Runs scenario(client) against the ASGI app, started and shut down around it as by an ASGI server."""
+    async def run():
+        async with asgi_app_module.app.test_app() as test_app:
+            await scenario(test_app.test_client())
+
+    asyncio.run(run())
+
+def create_songs():
+    """Stores SONGS in the catalog."""
+    for song in SONGS:
+        song_model.create_song(**song)
+
+
+######################################################
+#
+#    Healthchecks and metrics
+#
+######################################################
+
+
+def test_health_routes(asgi_app_module):
+    """Test that the health routes answer with their pre-encoded bodies, through the orjson provider."""
+    async def scenario(client):
+        response = await client.get("/api/health")
+        assert response.status_code == 200
+        assert await response.get_data() == b'{"status":"healthy"}\n'
+
+        response = await client.get("/api/db-check")
+        assert response.status_code == 200
+        assert await response.get_json() == {"database_status": "healthy"}
+
+    assert isinstance(asgi_app_module.app.json, FastJSONProvider)
+    serve(asgi_app_module, scenario)
+
+def test_requests_are_counted(asgi_app_module):
+    """Test that requests are recorded under their route, as by the WSGI app."""
+    async def scenario(client):
+        await client.get("/api/health")
+        await client.get("/api/get-song-from-catalog-by-id/1")
+
+        response = await client.get("/api/metrics")
+        text = (await response.get_data()).decode()
+        assert 'http_requests_total{method="GET",route="/api/health",status="200"} 1\n' in text
+        assert 'http_request_errors_total{method="GET",route="/api/get-song-from-catalog-by-id/<int:song_id>"} 1\n' in text
+
+    serve(asgi_app_module, scenario)
+
+
+######################################################
+#
+#    Catalog
+#
+######################################################
+
+
+def test_create_and_get_song(asgi_app_module):
+    """Test that a created song can be read back by id."""
+    async def scenario(client):
+        response = await client.post("/api/create-song", json=SONGS[0])
+        assert response.status_code == 201
+
+        response = await client.get("/api/get-song-from-catalog-by-id/1")
+        assert response.status_code == 200
+        song = (await response.get_json())["song"]
+        assert {key: song[key] for key in SONGS[0]} == SONGS[0]
+
+    serve(asgi_app_module, scenario)
+
+@pytest.mark.parametrize("body", [{}, {"artist": "Artist A", "title": "Song A", "year": 1975, "genre": "Rock"}])
+def test_create_song_invalid_request(asgi_app_module, body):
+    """Test that a song missing a field is rejected."""
+    async def scenario(client):
+        assert (await client.post("/api/create-song", json=body)).status_code == 400
+
+    serve(asgi_app_module, scenario)
+
+def test_get_random_song(asgi_app_module, random_org):
+    """Test that the random song is picked with a number drawn from random.org."""
+    create_songs()
+
+    async def scenario(client):
+        response = await client.get("/api/get-random-song")
+        assert response.status_code == 200
+        assert (await response.get_json())["song"]["title"] in ("Song A", "Song B")
+
+    serve(asgi_app_module, scenario)
+    assert random_org.stats["ok"] == 1
+
+def test_export_catalog_streams_ndjson(asgi_app_module):
+    """Test that the catalog export streams one JSON song per line."""
+    create_songs()
+
+    async def scenario(client):
+        response = await client.get("/api/export-catalog")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+
+        lines = (await response.get_data()).decode().splitlines()
+        assert sorted(json.loads(line)["title"] for line in lines) == ["Song A", "Song B"]
+
+    serve(asgi_app_module, scenario)
+
+
+######################################################
+#
+#    Playlist
+#
+######################################################
+
+
+def test_add_songs_to_playlist(asgi_app_module):
+    """Test that songs added by compound key are listed in order, with the playlist length and duration."""
+    create_songs()
+
+    async def scenario(client):
+        for song in SONGS:
+            response = await client.post("/api/add-song-to-playlist", json={key: song[key] for key in ("artist", "title", "year")})
+            assert response.status_code == 201
+
+        songs = (await (await client.get("/api/get-all-songs-from-playlist")).get_json())["songs"]
+        assert [song["title"] for song in songs] == ["Song A", "Song B"]
+        totals = await (await client.get("/api/get-playlist-length-duration")).get_json()
+        assert (totals["playlist_length"], totals["playlist_duration"]) == (2, 380)
+
+    serve(asgi_app_module, scenario)
+
+def test_add_unknown_song_to_playlist(asgi_app_module):
+    """Test that adding a song missing from the catalog fails and leaves the playlist empty."""
+    async def scenario(client):
+        response = await client.post("/api/add-song-to-playlist", json={"artist": "Nobody", "title": "Nothing", "year": 2000})
+        assert response.status_code == 500
+
+    serve(asgi_app_module, scenario)
+    assert asgi_app_module.playlist_model.get_playlist_length() == 0
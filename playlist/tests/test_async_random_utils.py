@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+import pytest
+
+from music_collection.utils import async_random_utils, random_utils
+from music_collection.utils.async_random_utils import get_random
+from music_collection.utils.circuit_breaker import CircuitBreaker
+
+
+RANDOM_NUMBER = 42
+NUM_SONGS = 100
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(mocker):
+    """Fixture giving each test its own circuit breaker and skipping the backoff sleeps."""
+    mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org"))
+    mocker.patch.object(async_random_utils.asyncio, "sleep", mocker.AsyncMock())
+
+@pytest.fixture
+def mock_random_org(mocker):
+    """Fixture routing the shared async client to a handler the test controls."""
+    handler = mocker.Mock(side_effect=lambda request: httpx.Response(200, text=f"{RANDOM_NUMBER}\n"))
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: handler(request)))
+    mocker.patch.object(async_random_utils, "_client", client)
+    return handler
+
+
+def test_get_random(mock_random_org):
+    """Test retrieving a random number from random.org."""
+    result = asyncio.run(get_random(NUM_SONGS))
+
+    # Assert that the result is the mocked random number
+    assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
+
+    # Ensure that the correct URL was called
+    request = mock_random_org.call_args.args[0]
+    assert str(request.url) == "https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new"
+
+def test_get_random_request_failure(mock_random_org):
+    """Simulate a request failure."""
+    mock_random_org.side_effect = httpx.ConnectError("Connection error")
+
+    with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
+        asyncio.run(get_random(NUM_SONGS))
+
+def test_get_random_timeout(mock_random_org):
+    """Simulate a timeout."""
+    mock_random_org.side_effect = httpx.ReadTimeout("timed out")
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        asyncio.run(get_random(NUM_SONGS))
+
+def test_get_random_invalid_response(mock_random_org):
+    """Simulate an invalid response (non-digit)."""
+    mock_random_org.side_effect = lambda request: httpx.Response(200, text="invalid_response")
+
+    with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
+        asyncio.run(get_random(NUM_SONGS))
+
+def test_get_random_invalid_response_local_fallback(mock_random_org, mocker):
+    """Test that an invalid body counts as a breaker failure and, with the fallback enabled, is replaced by a local draw."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_FALLBACK", "local")
+    mock_random_org.side_effect = lambda request: httpx.Response(200, text="invalid_response")
+
+    assert 1 <= asyncio.run(get_random(NUM_SONGS)) <= NUM_SONGS
+    assert random_utils.breaker.snapshot()["recent_failures"] == 1
+
+def test_get_random_retries_server_errors(mock_random_org):
+    """Test that a 5xx answer is retried."""
+    responses = iter([httpx.Response(503), httpx.Response(200, text=f"{RANDOM_NUMBER}\n")])
+    mock_random_org.side_effect = lambda request: next(responses)
+
+    assert asyncio.run(get_random(NUM_SONGS)) == RANDOM_NUMBER
+    assert mock_random_org.call_count == 2
+
+def test_cancelled_trial_is_released_without_an_outcome(mocker):
+    """Test that cancelling the half open trial call neither reopens the breaker nor blocks the next trial."""
+    breaker = CircuitBreaker("random_org", min_calls=1, reset_timeout=60, trial_timeout=60)
+    mocker.patch.object(random_utils, "breaker", breaker)
+    breaker.record_failure()
+    breaker._opened_at -= 60
+
+    async def cancel_trial():
+        started = asyncio.Event()
+
+        async def hang(request):
+            started.set()
+            await asyncio.Event().wait()
+
+        mocker.patch.object(async_random_utils, "_client", httpx.AsyncClient(transport=httpx.MockTransport(hang)))
+        task = asyncio.ensure_future(get_random(NUM_SONGS))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
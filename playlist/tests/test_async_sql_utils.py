@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from music_collection.utils import async_sql_utils
+from music_collection.utils.async_sql_utils import iterate_db
+
+
+def count_up(limit: int, closed: list):
+    """A blocking generator standing in for a streaming model function."""
+    try:
+        for number in range(limit):
+            yield number
+    finally:
+        closed.append(True)
+
+
+async def collect(func, *args) -> list:
+    return [batch async for batch in iterate_db(func, *args)]
+
+
+def test_iterate_db_batches(mocker):
+    """Test that the generator's items arrive in order, in batches of ASYNC_DB_STREAM_BATCH."""
+    mocker.patch.object(async_sql_utils, "ASYNC_DB_STREAM_BATCH", 4)
+    closed = []
+
+    batches = asyncio.run(collect(count_up, 10, closed))
+
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert closed == [True]
+
+def test_iterate_db_stops_early(mocker):
+    """Test that the generator is closed when the consumer stops reading."""
+    mocker.patch.object(async_sql_utils, "ASYNC_DB_STREAM_BATCH", 1)
+    closed = []
+
+    async def first_batch():
+        batches = iterate_db(count_up, 1000, closed)
+        batch = await batches.__anext__()
+        await batches.aclose()
+        # Let the pool thread notice the consumer is gone
+        for _ in range(100):
+            if closed:
+                break
+            await asyncio.sleep(0.01)
+        return batch
+
+    assert asyncio.run(first_batch()) == [0]
+    assert closed == [True]
+
+def test_iterate_db_propagates_errors():
+    """Test that an exception raised by the generator reaches the consumer."""
+    def failing():
+        yield 1
+        raise ValueError("Database error")
+
+    with pytest.raises(ValueError, match="Database error"):
+        asyncio.run(collect(failing))
@@ -0,0 +1,107 @@
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from music_collection.models import song_model
+from music_collection.models.catalog_snapshot import CatalogSnapshot
+from music_collection.utils import shard_utils
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql"
+
+SONGS = [
+    ("Artist A", "Song A", 1975, "Rock", 200, 10),
+    ("Artist A", "Song B", 1979, "Rock", 300, 5),
+    ("Artist B", "Song C", 1985, "Pop", 180, 30),
+    ("Artist C", "Song D", 2001, "Jazz", 400, 1),
+]
+
+@pytest.fixture
+def catalog_db(tmp_path, mocker):
+    """Fixture pointing song_model at a real database holding SONGS."""
+    db_path = tmp_path / "song_catalog.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.executemany(
+        "INSERT INTO songs (artist, title, year, genre, duration, play_count) VALUES (?, ?, ?, ?, ?, ?)", SONGS
+    )
+    conn.commit()
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+    return db_path
+
+@pytest.fixture
+def snapshot(catalog_db):
+    """Fixture providing a CatalogSnapshot that is detached from song_model afterwards."""
+    snapshot = CatalogSnapshot(max_age=3600)
+    yield snapshot
+    snapshot.close()
+
+
+def test_group_by_genre(snapshot):
+    """Test aggregating by genre, sorted by plays."""
+    assert snapshot.group_by("genre") == [
+        {"genre": "Pop", "songs": 1, "plays": 30, "total_duration": 180, "avg_duration": 180.0},
+        {"genre": "Rock", "songs": 2, "plays": 15, "total_duration": 500, "avg_duration": 250.0},
+        {"genre": "Jazz", "songs": 1, "plays": 1, "total_duration": 400, "avg_duration": 400.0},
+    ]
+
+def test_group_by_decade(snapshot):
+    """Test aggregating by decade, skipping decades without songs."""
+    groups = {group["decade"]: group["songs"] for group in snapshot.group_by("decade")}
+    assert groups == {"1970s": 2, "1980s": 1, "2000s": 1}
+
+def test_group_by_invalid_key(snapshot):
+    """Test that an unsupported group key raises a ValueError."""
+    with pytest.raises(ValueError, match="Invalid group key: title"):
+        snapshot.group_by("title")
+
+def test_duration_distribution(snapshot):
+    """Test the duration histogram and summary statistics."""
+    distribution = snapshot.duration_distribution(bins=2)
+
+    assert distribution["songs"] == 4
+    assert distribution["min"] == 180 and distribution["max"] == 400
+    assert distribution["mean"] == 270.0
+    assert distribution["histogram"] == {"edges": [180.0, 290.0, 400.0], "counts": [2, 2]}
+
+def test_snapshot_follows_catalog_writes(snapshot):
+    """Test that creates, deletes and plays update a loaded snapshot without reloading it."""
+    assert len(snapshot) == 4
+    loaded_at = snapshot._loaded_at
+
+    song_model.create_song("Artist D", "Song E", 2005, "Jazz", 100)
+    song_model.delete_song(1)
+    song_model.update_play_count(4)
+
+    assert snapshot._loaded_at == loaded_at
+    jazz = next(group for group in snapshot.group_by("genre") if group["genre"] == "Jazz")
+    assert jazz == {"genre": "Jazz", "songs": 2, "plays": 2, "total_duration": 500, "avg_duration": 250.0}
+    assert len(snapshot) == 4
+
+def test_closed_snapshot_stops_listening(snapshot):
+    """Test that close() unregisters the snapshot's listener."""
+    snapshot.close()
+    assert snapshot._on_catalog_write not in song_model._listeners
+
+def test_sharded_snapshot(tmp_path, mocker):
+    """Test loading a sharded catalog in id order and following creates whose ids fall before the last one."""
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(tmp_path / "song_catalog.db"))
+    mocker.patch.object(shard_utils, "DB_SHARDS", 3)
+    shard_utils.create_shards(SCHEMA_PATH.read_text())
+    for artist, title, year, genre, duration, _ in SONGS:
+        song_model.create_song(artist, title, year, genre, duration)
+
+    snapshot = CatalogSnapshot(max_age=3600)
+    try:
+        assert len(snapshot) == 4
+        assert list(snapshot.ids[:4]) == sorted(snapshot.ids[:4])
+
+        for i in range(6):
+            song_model.create_song("Artist D", f"Song {i}", 2005, "Jazz", 100)
+        assert len(snapshot) == 10
+        assert list(snapshot.ids[:10]) == sorted(snapshot.ids[:10])
+        assert {group["genre"]: group["songs"] for group in snapshot.group_by("genre")} == {"Rock": 2, "Pop": 1, "Jazz": 7}
+    finally:
+        snapshot.close()
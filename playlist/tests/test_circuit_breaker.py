@@ -0,0 +1,120 @@
+import pytest
+
+from music_collection.utils import circuit_breaker
+from music_collection.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture providing a controllable monotonic clock for the breaker."""
+    now = [1000.0]
+    mocker.patch.object(circuit_breaker.time, "monotonic", side_effect=lambda: now[0])
+    return now
+
+@pytest.fixture
+def breaker(clock):
+    """Fixture providing a breaker opening at 50% failures over at least 4 of the last 10 calls."""
+    return CircuitBreaker("test", window=10, failure_rate=0.5, min_calls=4, reset_timeout=30)
+
+
+def test_breaker_stays_closed_below_failure_rate(breaker):
+    """Test that occasional failures do not open the breaker."""
+    for _ in range(3):
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_breaker_needs_min_calls(breaker):
+    """Test that a few failures right after startup do not open the breaker."""
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+def test_breaker_opens_on_failure_rate(breaker):
+    """Test that the breaker opens and rejects calls once the failure rate is reached."""
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.snapshot() == {
+        "state": "open",
+        "recent_calls": 4,
+        "recent_failures": 2,
+        "failure_rate": 0.5,
+        "retry_in_seconds": 30,
+    }
+
+def test_breaker_half_open_allows_one_trial(breaker, clock):
+    """Test that after the reset timeout a single trial call is let through."""
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_breaker_closes_after_successful_trial(breaker, clock):
+    """Test that a successful trial closes the breaker and forgets the failures."""
+    for _ in range(4):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["recent_calls"] == 0
+
+def test_breaker_reopens_after_failed_trial(breaker, clock):
+    """Test that a failed trial opens the breaker for another reset timeout."""
+    for _ in range(4):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    clock[0] += 29
+    assert not breaker.allow()
+
+def test_breaker_lets_another_trial_through_after_trial_timeout(clock):
+    """Test that a trial that never reports back stops blocking calls after trial_timeout."""
+    breaker = CircuitBreaker("test", window=10, min_calls=4, reset_timeout=30, trial_timeout=5)
+    for _ in range(4):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+
+    clock[0] += 4
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+
+def test_breaker_release_trial_lets_next_trial_through(breaker, clock):
+    """Test that a trial released without an outcome frees the trial at once and leaves the breaker half open."""
+    for _ in range(4):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow()
+
+    breaker.release_trial()
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_breaker_release_trial_records_nothing_when_closed(breaker):
+    """Test that releasing a call in the closed state does not count it."""
+    breaker.release_trial()
+
+    assert breaker.snapshot()["recent_calls"] == 0
@@ -0,0 +1,148 @@
+import sqlite3
+
+from flask import Flask, Response
+import pytest
+
+from music_collection.utils import health
+from music_collection.utils.health import InFlightRequests, ReadinessProbe, check_database
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture providing a controllable monotonic clock for the readiness probe."""
+    now = [1000.0]
+    mocker.patch.object(health.time, "monotonic", side_effect=lambda: now[0])
+    return now
+
+@pytest.fixture
+def mock_check(mocker):
+    """Fixture replacing the database check, so tests count how often it runs."""
+    return mocker.patch.object(health, "check_database")
+
+@pytest.fixture
+def inline_refresh(mocker):
+    """Fixture running background refreshes inline so tests can observe them."""
+    def start(self):
+        self._target()
+    mocker.patch.object(health.threading.Thread, "start", start)
+
+
+def test_check_database(tmp_path, mocker):
+    """Test checking a database with and without the required table."""
+    db_path = tmp_path / "health.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER)")
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+
+    check_database(["songs"])
+    with pytest.raises(Exception, match="Database check error: no such table: playlists"):
+        check_database(["songs", "playlists"])
+
+def test_readiness_is_cached_within_ttl(clock, mock_check):
+    """Test that probes within the TTL are answered without checking the database again."""
+    probe = ReadinessProbe(["songs"], ttl=5)
+
+    for _ in range(3):
+        status = probe.status()
+        clock[0] += 1
+
+    assert status["ready"] is True
+    assert status["database_status"] == "healthy"
+    mock_check.assert_called_once_with(("songs",))
+
+def test_readiness_refreshes_in_background_after_ttl(clock, mock_check, inline_refresh):
+    """Test that a stale result is served while a refresh replaces it."""
+    probe = ReadinessProbe(["songs"], ttl=5)
+    probe.status()
+
+    clock[0] += 6
+    mock_check.side_effect = Exception("Database check error: disk I/O error")
+    stale = probe.status()
+
+    assert stale["ready"] is True
+    assert mock_check.call_count == 2
+    assert probe.status() == {
+        "ready": False,
+        "database_status": "unhealthy",
+        "checked_seconds_ago": 0,
+        "error": "Database check error: disk I/O error",
+    }
+
+def test_readiness_distrusts_old_results(clock, mock_check, mocker):
+    """Test that a result older than max_staleness reports not ready, e.g. when the refresh hangs."""
+    mocker.patch.object(health.threading.Thread, "start")
+    probe = ReadinessProbe(["songs"], ttl=5, max_staleness=30)
+    probe.status()
+
+    clock[0] += 31
+    status = probe.status()
+
+    assert status["ready"] is False
+    assert status["error"] == "Database check is 31 seconds old"
+
+def test_readiness_reports_gauges(clock, mock_check):
+    """Test that registered gauges are read on every status."""
+    probe = ReadinessProbe(["songs"])
+    probe.register_gauge("db_pool", lambda: {"queued": 3})
+
+    assert probe.status()["db_pool"] == {"queued": 3}
+
+def test_in_flight_requests():
+    """Test counting the requests being served, including failing ones."""
+    app = Flask(__name__)
+    in_flight = InFlightRequests(capacity=4)
+    in_flight.track(app)
+    seen = []
+
+    @app.route("/ok")
+    def ok():
+        seen.append(in_flight.gauge())
+        return "ok"
+
+    @app.route("/fail")
+    def fail():
+        raise RuntimeError("boom")
+
+    # A WSGI server closes every response once it has been sent
+    client = app.test_client()
+    client.get("/ok").close()
+    client.get("/fail").close()
+
+    assert seen == [{"in_flight": 1, "capacity": 4, "saturation": 0.25}]
+    assert in_flight.gauge()["in_flight"] == 0
+
+def test_in_flight_requests_short_circuited_by_hook():
+    """Test that a request answered by an earlier before_request hook is still counted in and out."""
+    app = Flask(__name__)
+
+    @app.before_request
+    def reject():
+        return "unauthorized", 401
+
+    in_flight = InFlightRequests(capacity=4)
+    in_flight.track(app)
+
+    with app.test_client().get("/anything") as response:
+        assert response.status_code == 401
+    assert in_flight.gauge()["in_flight"] == 0
+
+def test_in_flight_requests_counts_streamed_bodies():
+    """Test that a streamed response counts as in flight until its body has been sent."""
+    app = Flask(__name__)
+    in_flight = InFlightRequests(capacity=4)
+    in_flight.track(app)
+    seen = []
+
+    @app.route("/stream")
+    def stream():
+        def chunks():
+            yield "a"
+            seen.append(in_flight.gauge()["in_flight"])
+            yield "b"
+        return Response(chunks())
+
+    with app.test_client().get("/stream") as response:
+        assert response.get_data(as_text=True) == "ab"
+        assert seen == [1]
+    assert in_flight.gauge()["in_flight"] == 0
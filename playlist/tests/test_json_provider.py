@@ -0,0 +1,89 @@
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import pytest
+
+from music_collection.models.song_model import Song
+from music_collection.utils import json_provider
+from music_collection.utils.json_provider import FastJSONProvider, PreEncodedJSON, iter_ndjson
+
+
+PAYLOAD = {
+    'status': 'success',
+    'songs': [
+        Song(1, 'Artist 1', 'Song 1', 2022, 'Pop', 180),
+        {'id': 2, 'artist': 'Artist 2', 'title': 'Song 2', 'year': 2021, 'genre': 'Rock', 'duration': 155, 'play_count': 3},
+    ],
+}
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def app(request, mocker):
+    """Fixture providing an app using FastJSONProvider, with and without orjson."""
+    if request.param == "stdlib":
+        mocker.patch.object(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+@pytest.fixture
+def default_app():
+    """Fixture providing an app using Flask's default JSON provider."""
+    app = Flask(__name__)
+    app.json = DefaultJSONProvider(app)
+    return app
+
+
+def test_response_matches_default_provider(app, default_app):
+    """Test that responses decode to the same data as Flask's default provider."""
+    with app.app_context():
+        fast = app.json.response(PAYLOAD)
+    with default_app.app_context():
+        default = default_app.json.response(PAYLOAD)
+
+    assert fast.mimetype == "application/json"
+    assert fast.get_json() == default.get_json()
+
+def test_response_is_indented_in_debug_mode(app):
+    """Test that debug mode indents the output like the default provider."""
+    app.debug = True
+    with app.app_context():
+        response = app.json.response({'status': 'healthy'})
+    assert response.get_data(as_text=True) == '{\n  "status": "healthy"\n}\n'
+
+def test_dumps_and_loads_round_trip(app):
+    """Test that dumps serializes dataclasses and loads reverses it."""
+    encoded = app.json.dumps(PAYLOAD)
+    assert app.json.loads(encoded)['songs'][0]['title'] == 'Song 1'
+
+def test_pre_encoded_json_is_encoded_once(app, mocker):
+    """Test that a pre-encoded payload is only serialized on first use."""
+    payload = PreEncodedJSON({'status': 'healthy'})
+    dumps_bytes = mocker.spy(app.json, "dumps_bytes")
+
+    with app.app_context():
+        first = payload.response(app)
+        second = payload.response(app, 503)
+
+    assert dumps_bytes.call_count == 1
+    assert first.get_json() == second.get_json() == {'status': 'healthy'}
+    assert second.status_code == 503
+
+def test_pre_encoded_json_is_indented_in_debug_mode(app):
+    """Test that a pre-encoded payload is formatted like the provider's own responses."""
+    app.debug = True
+    with app.app_context():
+        response = PreEncodedJSON({'status': 'healthy'}).response(app)
+    assert response.get_data(as_text=True) == '{\n  "status": "healthy"\n}\n'
+
+def test_iter_ndjson(app, default_app):
+    """Test that items are encoded one per line, in chunks of the batch size, with either provider."""
+    songs = [{"id": i, "title": f"Song {i}"} for i in range(5)]
+
+    for target in (app, default_app):
+        chunks = list(iter_ndjson(target, iter(songs), batch_size=2))
+
+        assert len(chunks) == 3
+        lines = b"".join(chunks).decode().split("\n")
+        assert lines[-1] == ""
+        assert [target.json.loads(line) for line in lines[:-1]] == songs
@@ -0,0 +1,105 @@
+import logging
+import time
+
+import pytest
+
+from music_collection.utils import logger as logger_module
+from music_collection.utils.logger import SamplingFilter
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture providing a controllable monotonic clock for the sampling filter."""
+    now = [1000.0]
+    mocker.patch.object(logger_module.time, "monotonic", side_effect=lambda: now[0])
+    return now
+
+@pytest.fixture
+def sampled_logger(clock):
+    """Fixture providing a logger with a sampling filter allowing 2 records per 10s window."""
+    logger = logging.getLogger("tests.sampled")
+    logger.setLevel(logging.DEBUG)
+    sampling_filter = SamplingFilter(limit=2, interval=10)
+    logger.addFilter(sampling_filter)
+    yield logger
+    logger.removeFilter(sampling_filter)
+    sampling_filter.close()
+
+
+def test_sampling_limits_records_per_template(sampled_logger, caplog):
+    """Test that only 'limit' records per template are emitted within a window."""
+    for track_number in range(5):
+        sampled_logger.info("Playing track number: %d", track_number)
+    sampled_logger.info("A different message")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == ["Playing track number: 0", "Playing track number: 1", "A different message"]
+
+def test_sampling_never_drops_warnings(sampled_logger, caplog):
+    """Test that records at WARNING and above bypass sampling."""
+    for _ in range(5):
+        sampled_logger.error("Database error: %s", "locked")
+
+    assert len(caplog.records) == 5
+
+def test_sampling_emits_summary_after_window(sampled_logger, clock, caplog):
+    """Test that a summary of suppressed records is emitted once the window closes."""
+    for track_number in range(5):
+        sampled_logger.info("Playing track number: %d", track_number)
+
+    clock[0] += 11
+    sampled_logger.info("Playing track number: %d", 6)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "5 occurrences of 'Playing track number: %d' in the last 11 seconds (3 suppressed)" in messages
+    assert messages[-1] == "Playing track number: 6"
+
+def test_sampling_flush(sampled_logger, caplog):
+    """Test that flush emits summaries for open windows."""
+    for track_number in range(4):
+        sampled_logger.info("Playing track number: %d", track_number)
+
+    sampled_logger.filters[-1].flush()
+
+    assert "4 occurrences of 'Playing track number: %d' in the last 0 seconds (2 suppressed)" in caplog.text
+
+def test_sampling_summarizes_quiet_logger_on_timer(caplog):
+    """Test that a window's summary is emitted when it closes even if nothing is logged afterwards."""
+    logger = logging.getLogger("tests.sampled_timer")
+    logger.setLevel(logging.DEBUG)
+    sampling_filter = SamplingFilter(limit=1, interval=0.05)
+    logger.addFilter(sampling_filter)
+    try:
+        for track_number in range(3):
+            logger.info("Playing track number: %d", track_number)
+
+        deadline = time.monotonic() + 5
+        while "(2 suppressed)" not in caplog.text and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert "3 occurrences of 'Playing track number: %d' in the last 0 seconds (2 suppressed)" in caplog.text
+    finally:
+        logger.removeFilter(sampling_filter)
+        sampling_filter.close()
+
+def test_sampling_flushes_at_exit(mocker):
+    """Test that each sampling filter registers its flush with atexit, and close unregisters it."""
+    register = mocker.spy(logger_module.atexit, "register")
+    unregister = mocker.spy(logger_module.atexit, "unregister")
+
+    sampling_filter = SamplingFilter(limit=2, interval=10)
+    register.assert_called_once_with(sampling_filter.flush)
+
+    sampling_filter.close()
+    unregister.assert_called_once_with(sampling_filter.flush)
+
+def test_configure_logger_is_idempotent():
+    """Test that configuring a logger twice adds the shared handler and the sampling filter only once."""
+    logger = logging.getLogger("tests.configured")
+    logger_module.configure_logger(logger, sample_limit=2)
+    logger_module.configure_logger(logger, sample_limit=2)
+
+    assert logger.handlers == [logger_module._get_handler()]
+    assert len([f for f in logger.filters if isinstance(f, SamplingFilter)]) == 1
+    logger.handlers.clear()
+    logger.filters.clear()
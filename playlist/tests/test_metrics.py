@@ -0,0 +1,121 @@
+from multiprocessing import get_context
+import sqlite3
+import threading
+
+from flask import Flask
+import pytest
+
+from music_collection.utils.metrics import MetricsRegistry, SharedMetrics, instrument_app
+from music_collection.utils.shared_state import SharedStateStore
+
+
+@pytest.fixture
+def registry():
+    """Fixture to provide a new MetricsRegistry with small buckets for each test."""
+    return MetricsRegistry(buckets=(0.1, 1.0))
+
+def publish_worker_metrics(db_path: str, requests: int) -> None:
+    """Counts requests in a separate worker process and publishes its metrics."""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("requests_total", requests, route="/api/health")
+    registry.observe("latency_seconds", 0.5)
+    SharedMetrics(registry, SharedStateStore("metrics", db_path)).publish()
+
+
+def test_counter_render(registry):
+    """Test that counters are rendered with their labels and help text."""
+    registry.describe("requests_total", "counter", "Requests served.")
+    registry.inc("requests_total", route="/api/health")
+    registry.inc("requests_total", route="/api/health")
+    registry.inc("requests_total", 3, route='/api/"odd"')
+
+    text = registry.render()
+
+    assert "# HELP requests_total Requests served.\n# TYPE requests_total counter\n" in text
+    assert 'requests_total{route="/api/health"} 2\n' in text
+    assert 'requests_total{route="/api/\\"odd\\""} 3\n' in text
+
+def test_histogram_render(registry):
+    """Test that histogram buckets are cumulative and include sum and count."""
+    registry.observe("latency_seconds", 0.05)
+    registry.observe("latency_seconds", 0.5)
+    registry.observe("latency_seconds", 5)
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_sum 5.55\n" in text
+    assert "latency_seconds_count 3\n" in text
+
+def test_shards_are_merged_across_threads(registry):
+    """Test that values recorded by other threads, including exited ones, are collected."""
+    def work():
+        for _ in range(100):
+            registry.inc("events_total")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.inc("events_total")
+
+    assert "events_total 401\n" in registry.render()
+    # Exited threads are folded into the retired shard and keep counting
+    assert "events_total 401\n" in registry.render()
+
+def test_instrument_app(mocker):
+    """Test that instrumented routes record counts, errors and latency."""
+    registry = MetricsRegistry()
+    mocker.patch("music_collection.utils.metrics.metrics", registry)
+
+    app = Flask(__name__)
+    instrument_app(app)
+
+    @app.route("/api/ok/<int:item_id>")
+    def ok(item_id):
+        return "ok"
+
+    @app.route("/api/fail")
+    def fail():
+        return "fail", 500
+
+    client = app.test_client()
+    client.get("/api/ok/1")
+    client.get("/api/ok/2")
+    client.get("/api/fail")
+
+    text = registry.render()
+    assert 'http_requests_total{method="GET",route="/api/ok/<int:item_id>",status="200"} 2\n' in text
+    assert 'http_request_errors_total{method="GET",route="/api/fail"} 1\n' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/ok/<int:item_id>"} 2\n' in text
+
+def test_shared_metrics_merge_every_worker(registry, tmp_path):
+    """Test that the metrics published by other worker processes are merged with this process's."""
+    db_path = str(tmp_path / "shared_state.db")
+    context = get_context("spawn")
+    workers = [context.Process(target=publish_worker_metrics, args=(db_path, requests)) for requests in (2, 3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    registry.inc("requests_total", route="/api/health")
+    registry.observe("latency_seconds", 0.05)
+
+    text = SharedMetrics(registry, SharedStateStore("metrics", db_path), publish_interval=60).render()
+
+    assert 'requests_total{route="/api/health"} 6\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert "latency_seconds_count 3\n" in text
+
+def test_shared_metrics_fall_back_to_this_process(registry, mocker):
+    """Test that this process's metrics are still rendered when the shared state cannot be used."""
+    store = mocker.Mock()
+    store.transaction.side_effect = sqlite3.OperationalError("database is locked")
+    registry.inc("requests_total", route="/api/health")
+
+    text = SharedMetrics(registry, store, publish_interval=60).render()
+
+    assert 'requests_total{route="/api/health"} 1\n' in text
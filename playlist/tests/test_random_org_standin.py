@@ -0,0 +1,81 @@
+import random
+
+import pytest
+import requests
+
+from music_collection.utils import random_utils
+from music_collection.utils.circuit_breaker import CircuitBreaker
+from music_collection.utils.random_org_standin import StandInConfig, parse_latency
+from music_collection.utils.random_utils import get_random
+
+
+NUM_SONGS = 100
+
+
+def test_get_random_from_standin(random_org):
+    """Test drawing numbers through the stand-in."""
+    numbers = [get_random(NUM_SONGS) for _ in range(20)]
+
+    assert all(1 <= number <= NUM_SONGS for number in numbers)
+    assert random_org.stats["ok"] == 20
+
+def test_standin_answers_like_random_org(random_org):
+    """Test the plain-text answers of both endpoints, one number per line."""
+    integers = requests.get(f"{random_org.base_url}/integers/?num=3&min=5&max=6&col=1&base=10&format=plain&rnd=new")
+    fractions = requests.get(f"{random_org.base_url}/decimal-fractions/?num=2&dec=2&col=1&format=plain&rnd=new")
+
+    assert all(line in ("5", "6") for line in integers.text.split())
+    assert len(integers.text.split()) == 3
+    assert all(len(line) == 4 and 0 <= float(line) < 1 for line in fractions.text.split())
+    assert requests.get(f"{random_org.base_url}/strings/").status_code == 404
+
+def test_get_random_times_out_on_slow_standin(random_org, mocker):
+    """Test that a response slower than the timeout fails after the retries."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_TIMEOUT", 0.05)
+    random_org.config = StandInConfig(latency="fixed:200")
+
+    with pytest.raises(RuntimeError, match="Request to random.org timed out."):
+        get_random(NUM_SONGS)
+
+def test_get_random_retries_injected_errors(random_org, mocker):
+    """Test that injected server errors are retried until the stand-in answers."""
+    # A breaker that never opens, so every draw goes through the retries
+    mocker.patch.object(random_utils, "breaker", CircuitBreaker("random_org", min_calls=1000))
+    random_org.config = StandInConfig(error_rate=0.5, seed=3)
+
+    numbers = [get_random(NUM_SONGS) for _ in range(5)]
+
+    assert len(numbers) == 5
+    assert random_org.stats["error"] > 0
+
+def test_get_random_garbage_response(random_org):
+    """Test that a 200 answer that is not a number is rejected."""
+    random_org.config = StandInConfig(garbage_rate=1.0)
+
+    with pytest.raises(ValueError, match="Invalid response from random.org: <html>garbage</html>"):
+        get_random(NUM_SONGS)
+
+def test_get_random_quota_exhausted(random_org):
+    """Test that once the quota is used up the breaker opens and draws fail fast."""
+    random_org.config = StandInConfig(quota=2)
+    get_random(NUM_SONGS)
+    get_random(NUM_SONGS)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            get_random(NUM_SONGS)
+
+    assert random_utils.breaker.state == "open"
+    assert random_org.stats["quota"] == random_utils.breaker.snapshot()["recent_failures"]
+
+@pytest.mark.parametrize("spec", ["fixed:5", "uniform:1,10", "normal:5,1", "lognormal:5,0.5", "exponential:5"])
+def test_parse_latency(spec):
+    """Test that every latency distribution parses and draws non-negative latencies."""
+    sampler = parse_latency(spec)
+    assert sampler(random.Random(0)) >= 0
+
+@pytest.mark.parametrize("spec", ["pareto:1", "uniform:1", "fixed:x"])
+def test_parse_latency_invalid(spec):
+    """Test that unknown distributions and bad parameters are rejected."""
+    with pytest.raises(ValueError):
+        parse_latency(spec)
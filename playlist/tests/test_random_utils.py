@@ -1,24 +1,37 @@
 import pytest
 import requests
 
+from music_collection.utils import random_utils
+from music_collection.utils.circuit_breaker import CircuitBreaker
 from music_collection.utils.random_utils import get_random
 
 
 RANDOM_NUMBER = 42
 NUM_SONGS = 100
+URL = "https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new"
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(mocker):
+    """Fixture giving each test its own circuit breaker and skipping the backoff sleeps."""
+    breaker = CircuitBreaker("random_org", min_calls=3)
+    mocker.patch.object(random_utils, "breaker", breaker)
+    mocker.patch.object(random_utils.time, "sleep")
+    return breaker
+
+@pytest.fixture
+def mock_session(mocker):
+    # Replace the shared session, whose get returns a mock response with a text attribute
+    session = mocker.Mock()
+    session.get.return_value.text = f"{RANDOM_NUMBER}"
+    mocker.patch.object(random_utils, "get_session", return_value=session)
+    return session
 
 @pytest.fixture
-def mock_random_org(mocker):
-    # Patch the requests.get call
-    # requests.get returns an object, which we have replaced with a mock object
-    mock_response = mocker.Mock()
-    # We are giving that object a text attribute
-    mock_response.text = f"{RANDOM_NUMBER}"
-    mocker.patch("requests.get", return_value=mock_response)
-    return mock_response
+def mock_random_org(mock_session):
+    return mock_session.get.return_value
 
 
-def test_get_random(mock_random_org):
+def test_get_random(mock_session):
     """Test retrieving a random number from random.org."""
     result = get_random(NUM_SONGS)
 
@@ -26,18 +39,18 @@ def test_get_random(mock_random_org):
     assert result == RANDOM_NUMBER, f"Expected random number {RANDOM_NUMBER}, but got {result}"
 
     # Ensure that the correct URL was called
-    requests.get.assert_called_once_with("https://www.random.org/integers/?num=1&min=1&max=100&col=1&base=10&format=plain&rnd=new", timeout=5)
+    mock_session.get.assert_called_once_with(URL, timeout=5)
 
-def test_get_random_request_failure(mocker):
+def test_get_random_request_failure(mock_session):
     """Simulate  a request failure."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.RequestException("Connection error"))
+    mock_session.get.side_effect = requests.exceptions.RequestException("Connection error")
 
     with pytest.raises(RuntimeError, match="Request to random.org failed: Connection error"):
         get_random(NUM_SONGS)
 
-def test_get_random_timeout(mocker):
+def test_get_random_timeout(mock_session):
     """Simulate  a timeout."""
-    mocker.patch("requests.get", side_effect=requests.exceptions.Timeout)
+    mock_session.get.side_effect = requests.exceptions.Timeout
 
     with pytest.raises(RuntimeError, match="Request to random.org timed out."):
         get_random(NUM_SONGS)
@@ -47,4 +60,74 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random(NUM_SONGS)
\ No newline at end of file
+        get_random(NUM_SONGS)
+
+def test_get_random_retries_timeouts(mock_session, mock_random_org):
+    """Test that a timed out request is retried after a jittered backoff."""
+    mock_session.get.side_effect = [requests.exceptions.Timeout, mock_random_org]
+
+    assert get_random(NUM_SONGS) == RANDOM_NUMBER
+    assert mock_session.get.call_count == 2
+    random_utils.time.sleep.assert_called_once()
+    assert 0 <= random_utils.time.sleep.call_args.args[0] <= random_utils.RANDOM_ORG_BACKOFF
+
+def test_get_random_gives_up_after_retries(mock_session):
+    """Test that retries are bounded."""
+    mock_session.get.side_effect = requests.exceptions.ConnectionError("Connection refused")
+
+    with pytest.raises(RuntimeError, match="Connection refused"):
+        get_random(NUM_SONGS)
+    assert mock_session.get.call_count == random_utils.RANDOM_ORG_RETRIES + 1
+
+def test_get_random_does_not_retry_client_errors(mock_session, mock_random_org):
+    """Test that a 4xx answer is not retried."""
+    response = requests.Response()
+    response.status_code = 400
+    mock_random_org.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Client Error", response=response)
+
+    with pytest.raises(RuntimeError, match="400 Client Error"):
+        get_random(NUM_SONGS)
+    assert mock_session.get.call_count == 1
+
+def test_get_random_fails_fast_when_breaker_opens(mock_session, fresh_breaker):
+    """Test that once the breaker has opened, no more requests are sent."""
+    mock_session.get.side_effect = requests.exceptions.Timeout
+
+    with pytest.raises(RuntimeError):
+        get_random(NUM_SONGS)
+    assert fresh_breaker.state == "open"
+    calls = mock_session.get.call_count
+
+    with pytest.raises(RuntimeError, match="circuit breaker is open"):
+        get_random(NUM_SONGS)
+    assert mock_session.get.call_count == calls
+
+def test_get_random_local_fallback(mock_session, mocker):
+    """Test drawing a number locally when random.org is unavailable and the fallback is enabled."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_FALLBACK", "local")
+    mock_session.get.side_effect = requests.exceptions.Timeout
+
+    assert 1 <= get_random(NUM_SONGS) <= NUM_SONGS
+
+def test_get_random_invalid_response_is_a_breaker_failure(mock_random_org, fresh_breaker):
+    """Test that a 200 answer with an invalid body counts against random.org, not as a success."""
+    mock_random_org.text = "invalid_response"
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            get_random(NUM_SONGS)
+
+    assert fresh_breaker.state == "open"
+
+def test_get_random_invalid_response_local_fallback(mock_random_org, mocker):
+    """Test drawing a number locally when random.org answers with an invalid body and the fallback is enabled."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_FALLBACK", "local")
+    mock_random_org.text = "invalid_response"
+
+    assert 1 <= get_random(NUM_SONGS) <= NUM_SONGS
+
+def test_get_session_is_shared(mocker):
+    """Test that every call reuses the same pooled session."""
+    mocker.patch.object(random_utils, "_session", None)
+
+    assert random_utils.get_session() is random_utils.get_session()
@@ -0,0 +1,69 @@
+from pathlib import Path
+import sqlite3
+
+import pytest
+
+from music_collection.utils import shard_utils
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql"
+
+@pytest.fixture
+def shards(tmp_path, mocker):
+    """Fixture splitting the catalog across three empty shards next to a temporary DB_PATH."""
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(tmp_path / "song_catalog.db"))
+    mocker.patch.object(shard_utils, "DB_SHARDS", 3)
+    shard_utils.create_shards(SCHEMA_PATH.read_text())
+    return tmp_path
+
+
+def test_not_sharded_by_default():
+    """Test that a single shard means the catalog lives in DB_PATH alone."""
+    assert shard_utils.DB_SHARDS == 1
+    assert not shard_utils.is_sharded()
+
+def test_shard_path(shards):
+    """Test that shard files sit next to DB_PATH with the shard number before the extension."""
+    assert shard_utils.shard_path(1) == str(shards / "song_catalog.shard1.db")
+    assert all((shards / f"song_catalog.shard{shard}.db").exists() for shard in range(3))
+
+def test_shard_for_key_is_stable(shards):
+    """Test that a key always hashes to the same shard, independently of PYTHONHASHSEED."""
+    shard = shard_utils.shard_for_key("Queen", "Bohemian Rhapsody", 1975)
+    assert shard == shard_utils.shard_for_key("Queen", "Bohemian Rhapsody", 1975)
+    assert 0 <= shard < 3
+    assert len({shard_utils.shard_for_key("Artist", f"Song {i}", 2000) for i in range(50)}) == 3
+
+def test_shard_for_id(shards):
+    """Test that ids are dealt round-robin over the shards, starting from each shard's first id."""
+    assert [shard_utils.shard_for_id(song_id) for song_id in range(1, 7)] == [0, 1, 2, 0, 1, 2]
+    assert [shard_utils.first_id(shard) for shard in range(3)] == [1, 2, 3]
+
+def test_fan_out(shards):
+    """Test that fan_out returns each shard's result in shard order."""
+    assert shard_utils.fan_out(lambda shard: shard * 10) == [0, 10, 20]
+
+def test_fan_out_raises_shard_error(shards):
+    """Test that a failing shard fails the fan-out once every shard has finished."""
+    def query(shard):
+        if shard == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return shard
+
+    with pytest.raises(sqlite3.OperationalError, match="database is locked"):
+        shard_utils.fan_out(query)
+
+def test_stream_all_shards_merges_sorted_rows(shards):
+    """Test that rows sorted within each shard are merged into one sorted stream, a chunk at a time."""
+    for shard in range(3):
+        conn = sqlite3.connect(shard_utils.shard_path(shard))
+        conn.executemany(
+            "INSERT INTO songs (id, artist, title, year, genre, duration) VALUES (?, 'A', ?, 2000, 'Rock', 100)",
+            [(song_id, f"Song {song_id}") for song_id in range(shard + 1, 20, 3)],
+        )
+        conn.commit()
+        conn.close()
+
+    rows = shard_utils.stream_all_shards("SELECT id FROM songs ORDER BY id", (), lambda row: row[0], chunk_size=2)
+    assert [row[0] for row in rows] == list(range(1, 20))
+    assert [len(rows) for rows in shard_utils.fetch_all_shards("SELECT id FROM songs")] == [7, 6, 6]
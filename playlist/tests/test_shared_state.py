@@ -0,0 +1,135 @@
+from multiprocessing import get_context
+
+import pytest
+
+from music_collection.models.playlist_model import SharedPlaylistModel
+from music_collection.models.song_model import Song
+from music_collection.utils.shared_state import SharedStateStore
+
+
+@pytest.fixture
+def state_db(tmp_path):
+    """Fixture providing the path of an empty shared state database."""
+    return str(tmp_path / "shared_state.db")
+
+@pytest.fixture
+def shared_playlist_model(state_db):
+    """Fixture to provide a SharedPlaylistModel on an empty shared state database."""
+    return SharedPlaylistModel(SharedStateStore("playlist", state_db))
+
+@pytest.fixture
+def mock_update_play_count(mocker):
+    """Mock the update_play_count function for testing purposes."""
+    return mocker.patch("music_collection.models.playlist_model.update_play_count")
+
+"""Fixtures providing sample songs for the tests."""
+@pytest.fixture
+def sample_song1():
+    return Song(1, 'Artist 1', 'Song 1', 2022, 'Pop', 180)
+
+@pytest.fixture
+def sample_song2():
+    return Song(2, 'Artist 2', 'Song 2', 2021, 'Rock', 155)
+
+
+def add_songs(db_path: str, first_id: int, count: int) -> None:
+    """Adds songs from a separate worker process."""
+    model = SharedPlaylistModel(SharedStateStore("playlist", db_path))
+    for song_id in range(first_id, first_id + count):
+        model.add_song_to_playlist(Song(song_id, f"Artist {song_id}", f"Song {song_id}", 2000, "Rock", 100))
+
+
+##################################################
+# Shared State Store Test Cases
+##################################################
+
+def test_transaction_saves_changes(state_db):
+    """Test that a write transaction's changes are visible to a new store."""
+    with SharedStateStore("test", state_db).transaction() as state:
+        state["value"] = [1, 2, 3]
+
+    with SharedStateStore("test", state_db).transaction(write=False) as state:
+        assert state == {"value": [1, 2, 3]}
+
+def test_transaction_rolls_back_on_error(state_db):
+    """Test that a failed transaction saves nothing."""
+    store = SharedStateStore("test", state_db)
+    with pytest.raises(ValueError):
+        with store.transaction() as state:
+            state["value"] = 1
+            raise ValueError("boom")
+
+    with store.transaction(write=False) as state:
+        assert state == {}
+
+def test_namespaces_are_separate(state_db):
+    """Test that stores with different namespaces do not see each other's keys."""
+    with SharedStateStore("first", state_db).transaction() as state:
+        state["value"] = 1
+
+    with SharedStateStore("second", state_db).transaction(write=False) as state:
+        assert state == {}
+
+##################################################
+# Shared Playlist Model Test Cases
+##################################################
+
+def test_shared_playlist_is_seen_by_other_instances(state_db, shared_playlist_model, sample_song1, sample_song2):
+    """Test that a playlist changed through one model is seen by another on the same store."""
+    shared_playlist_model.add_song_to_playlist(sample_song1)
+    shared_playlist_model.add_song_to_playlist(sample_song2)
+    shared_playlist_model.go_to_track_number(2)
+
+    other_model = SharedPlaylistModel(SharedStateStore("playlist", state_db))
+    assert other_model.get_all_songs() == [sample_song1, sample_song2]
+    assert other_model.get_current_song() == sample_song2
+
+def test_shared_playlist_validation_error_saves_nothing(shared_playlist_model, sample_song1):
+    """Test that a method raising an error leaves the shared playlist unchanged."""
+    shared_playlist_model.add_song_to_playlist(sample_song1)
+    with pytest.raises(ValueError, match="Song with ID 1 already exists in the playlist"):
+        shared_playlist_model.add_song_to_playlist(sample_song1)
+
+    assert shared_playlist_model.get_playlist_length() == 1
+
+def test_shared_play_entire_playlist(state_db, shared_playlist_model, sample_song1, sample_song2, mock_update_play_count):
+    """Test that nested method calls run in the outer transaction."""
+    shared_playlist_model.add_song_to_playlist(sample_song1)
+    shared_playlist_model.add_song_to_playlist(sample_song2)
+
+    shared_playlist_model.play_entire_playlist()
+
+    assert mock_update_play_count.call_count == 2
+    assert SharedPlaylistModel(SharedStateStore("playlist", state_db)).get_current_song() == sample_song1
+
+def test_shared_playlist_reloads_stored_songs(state_db, shared_playlist_model):
+    """Test that songs in the shared state are rebuilt as stored, so any song create_song accepts reloads."""
+    song = Song(1, "Artist 1", "Song 1", 1900, "Jazz", 180)
+    shared_playlist_model.add_song_to_playlist(song)
+
+    other_model = SharedPlaylistModel(SharedStateStore("playlist", state_db))
+    assert other_model.get_all_songs() == [song]
+    assert other_model.get_playlist_length() == 1
+
+def test_shared_playlist_concurrent_processes(state_db, shared_playlist_model):
+    """Test that additions from several processes are all kept."""
+    context = get_context("spawn")
+    workers = [context.Process(target=add_songs, args=(state_db, worker * 100 + 1, 20)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert shared_playlist_model.get_playlist_length() == 80
+
+def test_clear_keeps_recently_written_namespace(state_db, sample_song1):
+    """Test that clear with idle_for only deletes a namespace no process has written to for that long."""
+    store = SharedStateStore("playlist", state_db)
+    SharedPlaylistModel(store).add_song_to_playlist(sample_song1)
+    with store.transaction(write=False) as state:
+        assert set(state) == {"playlist", "current_track_number"}
+
+    assert not store.clear(idle_for=60)
+    assert SharedPlaylistModel(store).get_playlist_length() == 1
+    assert store.clear(idle_for=0)
+    assert SharedPlaylistModel(store).get_playlist_length() == 0
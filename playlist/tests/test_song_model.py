@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+from pathlib import Path
 import re
 import sqlite3
 
@@ -6,14 +7,20 @@ import pytest
 
 from music_collection.models.song_model import (
     Song,
+    SongColumns,
     create_song,
     delete_song,
     get_song_by_id,
     get_song_by_compound_key,
     get_all_songs,
     get_random_song,
+    get_song_columns,
+    iter_all_songs,
+    build_search_query,
+    search_songs,
     update_play_count
 )
+from music_collection.utils import shard_utils
 
 ######################################################
 #
@@ -225,6 +232,85 @@ def test_get_song_by_compound_key(mock_cursor):
     expected_arguments = ("Artist Name", "Song Title", 2022)
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}."
 
+def test_build_search_query():
+    """Test that free text becomes quoted prefix terms."""
+    assert build_search_query("  bohem  rhap ") == '"bohem"* "rhap"*'
+    assert build_search_query('say "hi') == '"say"* """hi"*'
+
+def test_build_search_query_empty():
+    """Test that a query without words is rejected."""
+    with pytest.raises(ValueError, match="Search query must not be empty."):
+        build_search_query("   ")
+
+def test_search_songs(mock_cursor):
+    """Test searching songs returns ranked rows as dictionaries."""
+    mock_cursor.fetchall.return_value = [(2, "Queen", "Bohemian Rhapsody", 1975, "Rock", 355, 7)]
+
+    songs = search_songs("bohemian", limit=10, offset=20)
+
+    assert songs == [{"id": 2, "artist": "Queen", "title": "Bohemian Rhapsody", "year": 1975, "genre": "Rock", "duration": 355, "play_count": 7}]
+    expected_query = normalize_whitespace("""
+        SELECT songs.id, songs.artist, songs.title, songs.year, songs.genre, songs.duration, songs.play_count
+        FROM songs_fts
+        JOIN songs ON songs.id = songs_fts.rowid
+        WHERE songs_fts MATCH ? AND songs.deleted = FALSE
+        ORDER BY bm25(songs_fts, 5.0, 10.0, 1.0)
+        LIMIT ? OFFSET ?
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == ('"bohemian"*', 10, 20)
+
+def test_search_songs_invalid_pagination():
+    """Test that a non-positive limit is rejected before querying."""
+    with pytest.raises(ValueError, match="Invalid pagination"):
+        search_songs("queen", limit=0)
+
+def test_search_index_follows_creates_and_deletes(tmp_path, mocker):
+    """Test that the FTS triggers index created songs and drop soft-deleted ones."""
+    db_path = tmp_path / "song_catalog.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql").read_text())
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+
+    create_song("Queen", "Bohemian Rhapsody", 1975, "Rock", 355)
+    create_song("Queen", "Radio Ga Ga", 1984, "Rock", 343)
+    create_song("The Beatles", "Hey Jude", 1968, "Rock", 431)
+
+    assert [song["title"] for song in search_songs("queen rhap")] == ["Bohemian Rhapsody"]
+    assert len(search_songs("rock")) == 3
+
+    delete_song(1)
+    assert [song["title"] for song in search_songs("queen")] == ["Radio Ga Ga"]
+
+def test_search_migration_indexes_existing_catalog(tmp_path, mocker):
+    """Test that migrating a catalog created without search indexes its live songs, and can run again."""
+    db_path = tmp_path / "song_catalog.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE songs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, artist TEXT NOT NULL, title TEXT NOT NULL, year INTEGER NOT NULL,
+            genre TEXT NOT NULL, duration INTEGER NOT NULL, play_count INTEGER DEFAULT 0, deleted BOOLEAN DEFAULT FALSE,
+            UNIQUE(artist, title, year)
+        );
+        INSERT INTO songs (artist, title, year, genre, duration, deleted) VALUES
+            ('Queen', 'Bohemian Rhapsody', 1975, 'Rock', 355, FALSE),
+            ('Queen', 'Radio Ga Ga', 1984, 'Rock', 343, TRUE);
+    """)
+    migration = (Path(__file__).resolve().parent.parent / "sql" / "migrate_song_table.sql").read_text()
+    conn.executescript(migration)
+    conn.executescript(migration)
+    conn.close()
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(db_path))
+
+    assert [song["title"] for song in search_songs("queen")] == ["Bohemian Rhapsody"]
+    create_song("Queen", "Under Pressure", 1981, "Rock", 248)
+    assert [song["title"] for song in search_songs("queen pressure")] == ["Under Pressure"]
+    conn = sqlite3.connect(db_path)
+    # The soft-deleted song is not in the index, so the trigger never has to remove it
+    assert conn.execute("SELECT rowid FROM songs_fts WHERE songs_fts MATCH 'radio'").fetchall() == []
+    conn.close()
+
 def test_get_all_songs(mock_cursor):
     """Test retrieving all songs that are not marked as deleted."""
 
@@ -312,15 +398,86 @@ def test_get_all_songs_ordered_by_play_count(mock_cursor):
 
     assert actual_query == expected_query, "The SQL query did not match the expected structure."
 
+def test_get_song_columns(mock_cursor):
+    """Test loading the catalog into columns in chunks."""
+
+    # Simulate two chunks of songs
+    mock_cursor.fetchmany.side_effect = [
+        [(1, "Artist A", "Song A", 2020, "Rock", 210, 10), (2, "Artist B", "Song B", 2021, "Pop", 180, 20)],
+        [(3, "Artist A", "Song C", 2022, "Rock", 200, None)],
+        []
+    ]
+
+    songs = get_song_columns(sort_by_play_count=True)
+
+    assert len(songs) == 3
+    assert songs[2] == Song(3, "Artist A", "Song C", 2022, "Rock", 200)
+    assert songs.to_dicts()[0] == {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10}
+    assert songs.to_dicts()[2]["play_count"] == 0
+
+    # Ensure repeated artists share one string
+    assert songs.artists[0] is songs.artists[2]
+
+    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE ORDER BY play_count DESC")
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+def test_iter_all_songs(mock_cursor):
+    """Test streaming the catalog in chunks of the requested size."""
+
+    mock_cursor.fetchmany.side_effect = [
+        [(1, "Artist A", "Song A", 2020, "Rock", 210, 10), (2, "Artist B", "Song B", 2021, "Pop", 180, 20)],
+        [(3, "Artist A", "Song C", 2022, "Rock", 200, 5)],
+        []
+    ]
+
+    songs = iter_all_songs(sort_by_play_count=True, chunk_size=2)
+
+    # Nothing is read until the first song is requested
+    mock_cursor.execute.assert_not_called()
+    assert next(songs) == {"id": 1, "artist": "Artist A", "title": "Song A", "year": 2020, "genre": "Rock", "duration": 210, "play_count": 10}
+    assert [song["id"] for song in songs] == [2, 3]
+
+    mock_cursor.fetchmany.assert_called_with(2)
+    mock_cursor.fetchall.assert_not_called()
+    expected_query = normalize_whitespace("SELECT id, artist, title, year, genre, duration, play_count FROM songs WHERE deleted = FALSE ORDER BY play_count DESC")
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query == expected_query, "The SQL query did not match the expected structure."
+
+def test_iter_all_songs_invalid_chunk_size():
+    """Test that a chunk size below one is rejected when the iterator is created."""
+    with pytest.raises(ValueError, match="Invalid chunk size: 0"):
+        iter_all_songs(chunk_size=0)
+
+def test_song_columns_iteration():
+    """Test that iterating SongColumns yields Song objects in order."""
+    songs = SongColumns([(1, "Artist A", "Song A", 2020, "Rock", 210, 10), (2, "Artist B", "Song B", 2021, "Pop", 180, 20)])
+
+    assert list(songs) == [Song(1, "Artist A", "Song A", 2020, "Rock", 210), Song(2, "Artist B", "Song B", 2021, "Pop", 180)]
+    assert songs[-1].id == 2
+
+def test_song_from_row():
+    """Test building a Song from a database row, ignoring trailing columns."""
+    song = Song.from_row((1, "Artist A", "Song A", 2020, "Rock", 210, False))
+
+    assert song == Song(1, "Artist A", "Song A", 2020, "Rock", 210)
+    assert not hasattr(song, "__dict__"), "Song instances should be slotted"
+
+def test_song_year_rule_matches_create_song():
+    """Test that Song accepts every year create_song accepts, and rejects the ones it rejects."""
+    assert Song(1, "Artist A", "Song A", 1900, "Rock", 210).year == 1900
+    with pytest.raises(ValueError, match="Year must be greater than or equal to 1900, got 1899"):
+        Song(1, "Artist A", "Song A", 1899, "Rock", 210)
+
 def test_get_random_song(mock_cursor, mocker):
     """Test retrieving a random song from the catalog."""
 
-    # Simulate that there are multiple songs in the database
-    mock_cursor.fetchall.return_value = [
+    # Simulate that there are multiple songs in the database, read in one chunk
+    mock_cursor.fetchmany.side_effect = [[
         (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
         (2, "Artist B", "Song B", 2021, "Pop", 180, 20),
         (3, "Artist C", "Song C", 2022, "Jazz", 200, 5)
-    ]
+    ], []]
 
     # Mock random number generation to return the 2nd song
     mock_random = mocker.patch("music_collection.models.song_model.get_random", return_value=2)
@@ -348,7 +505,7 @@ def test_get_random_song_empty_catalog(mock_cursor, mocker):
     """Test retrieving a random song when the catalog is empty."""
 
     # Simulate that the catalog is empty
-    mock_cursor.fetchall.return_value = []
+    mock_cursor.fetchmany.return_value = []
 
     # Expect a ValueError to be raised when calling get_random_song with an empty catalog
     with pytest.raises(ValueError, match="The song catalog is empty"):
@@ -405,3 +562,82 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+######################################################
+#
+#    Sharded catalog
+#
+######################################################
+
+SHARDED_SONGS = [
+    ("Queen", "Bohemian Rhapsody", 1975, "Rock", 355),
+    ("Queen", "Radio Ga Ga", 1984, "Rock", 343),
+    ("The Beatles", "Hey Jude", 1968, "Rock", 431),
+    ("Miles Davis", "So What", 1959, "Jazz", 562),
+    ("Madonna", "Vogue", 1990, "Pop", 317),
+    ("Nirvana", "Lithium", 1991, "Grunge", 257),
+]
+
+@pytest.fixture
+def sharded_catalog(tmp_path, mocker):
+    """Fixture splitting a real catalog of SHARDED_SONGS across three shards."""
+    mocker.patch("music_collection.utils.sql_utils.DB_PATH", str(tmp_path / "song_catalog.db"))
+    mocker.patch.object(shard_utils, "DB_SHARDS", 3)
+    shard_utils.create_shards((Path(__file__).resolve().parent.parent / "sql" / "create_song_table.sql").read_text())
+    for song in SHARDED_SONGS:
+        create_song(*song)
+    return shard_utils
+
+def test_sharded_songs_are_routed_by_key(sharded_catalog):
+    """Test that each song is stored in the shard of its compound key, under an id naming that shard."""
+    shards_used = set()
+    for artist, title, year, genre, duration in SHARDED_SONGS:
+        shard = sharded_catalog.shard_for_key(artist, title, year)
+        song = get_song_by_compound_key(artist, title, year)
+        assert sharded_catalog.shard_for_id(song.id) == shard
+        assert get_song_by_id(song.id) == song
+        shards_used.add(shard)
+
+        conn = sqlite3.connect(sharded_catalog.shard_path(shard))
+        assert conn.execute("SELECT COUNT(*) FROM songs WHERE id = ?", (song.id,)).fetchone()[0] == 1
+        conn.close()
+    assert len(shards_used) > 1
+
+def test_sharded_duplicate_song(sharded_catalog):
+    """Test that the compound key stays unique, since a key always hashes to the same shard."""
+    with pytest.raises(ValueError, match="already exists"):
+        create_song("Queen", "Bohemian Rhapsody", 1975, "Rock", 355)
+
+def test_sharded_scans_merge_in_order(sharded_catalog):
+    """Test that listing, streaming and loading columns merge the shards in id or play count order."""
+    songs = get_all_songs()
+    assert len(songs) == len(SHARDED_SONGS)
+    assert [song["id"] for song in songs] == sorted(song["id"] for song in songs)
+
+    vogue = get_song_by_compound_key("Madonna", "Vogue", 1990)
+    lithium = get_song_by_compound_key("Nirvana", "Lithium", 1991)
+    for _ in range(3):
+        update_play_count(vogue.id)
+    update_play_count(lithium.id)
+
+    by_plays = get_all_songs(sort_by_play_count=True)
+    assert [song["title"] for song in by_plays[:2]] == ["Vogue", "Lithium"]
+    assert [song["play_count"] for song in by_plays] == sorted((song["play_count"] for song in by_plays), reverse=True)
+
+    assert list(iter_all_songs(sort_by_play_count=True, chunk_size=1)) == by_plays
+    assert get_song_columns(sort_by_play_count=True).to_dicts() == by_plays
+    assert list(iter_all_songs()) == get_song_columns().to_dicts() == get_all_songs()
+
+def test_sharded_search_and_delete(sharded_catalog):
+    """Test that search merges every shard's matches and deletes reach the owning shard."""
+    assert sorted(song["title"] for song in search_songs("queen")) == ["Bohemian Rhapsody", "Radio Ga Ga"]
+    assert len(search_songs("rock")) == 3
+    assert len(search_songs("rock", limit=2)) == 2
+    assert len(search_songs("rock", limit=2, offset=2)) == 1
+
+    song = get_song_by_compound_key("Queen", "Radio Ga Ga", 1984)
+    delete_song(song.id)
+    assert [song["title"] for song in search_songs("queen")] == ["Bohemian Rhapsody"]
+    with pytest.raises(ValueError, match="has been deleted"):
+        get_song_by_id(song.id)
+    assert len(get_all_songs()) == len(SHARDED_SONGS) - 1
@@ -0,0 +1,139 @@
+import sqlite3
+
+from flask import Flask
+import pytest
+
+from music_collection.utils import sql_utils
+from music_collection.utils.sql_utils import get_db_connection, normalize_sql, statement_stats, use_request_connections
+
+
+@pytest.fixture
+def song_db(tmp_path, mocker):
+    """Fixture providing a real SQLite database with a small songs table."""
+    db_path = tmp_path / "songs.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE songs (id INTEGER PRIMARY KEY, title TEXT, play_count INTEGER DEFAULT 0)")
+    conn.executemany("INSERT INTO songs (title) VALUES (?)", [("Song %d" % i,) for i in range(10)])
+    conn.commit()
+    conn.close()
+
+    mocker.patch.object(sql_utils, "DB_PATH", str(db_path))
+    statement_stats.reset()
+    yield db_path
+    statement_stats.reset()
+
+
+def read_songs():
+    with get_db_connection(trace=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, title
+            FROM songs
+        """)
+        return cursor.fetchall()
+
+
+def test_normalize_sql():
+    """Test that whitespace is collapsed and literals are replaced."""
+    sql = """
+        SELECT id FROM songs
+        WHERE title = 'It''s' AND year = 1999 AND t1 = 2.5
+    """
+    assert normalize_sql(sql) == "SELECT id FROM songs WHERE title = ? AND year = ? AND t1 = ?"
+
+def test_traced_connection_records_statements(song_db):
+    """Test that traced connections record count and timings per normalized statement."""
+    read_songs()
+    read_songs()
+
+    summary = statement_stats.summary()
+
+    assert len(summary) == 1
+    assert summary[0]['sql'] == "SELECT id, title FROM songs"
+    assert summary[0]['count'] == 2
+    assert summary[0]['p95_ms'] >= 0
+
+def test_untraced_connection_records_nothing(song_db):
+    """Test that statements are not timed when tracing is off."""
+    with get_db_connection(trace=False) as conn:
+        conn.cursor().execute("SELECT id FROM songs").fetchall()
+
+    assert statement_stats.summary() == []
+
+def test_slow_query_log(song_db, mocker, caplog):
+    """Test that statements over the threshold go to the slow-query log with their caller."""
+    mocker.patch.object(sql_utils, "SLOW_QUERY_THRESHOLD_MS", 0)
+
+    read_songs()
+
+    slow_queries = list(statement_stats.slow_queries)
+    assert len(slow_queries) == 1
+    assert slow_queries[0]['caller'] == f"{__name__}.read_songs"
+    assert slow_queries[0]['sql'] == "SELECT id, title FROM songs"
+    assert "Slow query" in caplog.text
+
+
+@pytest.fixture
+def request_app():
+    """Fixture providing an app whose requests share a database connection."""
+    app = Flask(__name__)
+    use_request_connections(app)
+    return app
+
+
+def test_request_shares_one_connection(song_db, request_app):
+    """Test that calls within a request reuse its connection, which is closed at teardown."""
+    with request_app.test_request_context():
+        with get_db_connection() as first:
+            first.execute("SELECT id FROM songs")
+        with get_db_connection() as second:
+            assert second is first
+            second.execute("SELECT id FROM songs")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT id FROM songs")
+
+def test_connections_not_shared_outside_requests(song_db, request_app):
+    """Test that calls outside a request, or in an app not set up for it, get their own connection."""
+    with get_db_connection() as first:
+        pass
+    with get_db_connection() as second:
+        assert second is not first
+
+    with Flask(__name__).test_request_context():
+        with get_db_connection() as first:
+            pass
+        with get_db_connection() as second:
+            assert second is not first
+
+def test_request_connection_rolls_back_uncommitted_work(song_db, request_app):
+    """Test that a block's uncommitted writes do not leak into the next block of the request."""
+    with request_app.test_request_context():
+        with get_db_connection() as conn:
+            conn.execute("DELETE FROM songs")
+            with get_db_connection() as nested:
+                # Nested blocks share the transaction
+                assert nested.execute("SELECT COUNT(*) FROM songs").fetchone()[0] == 0
+            assert conn.in_transaction
+
+        with get_db_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0] == 10
+
+        with pytest.raises(ValueError):
+            with get_db_connection() as conn:
+                conn.execute("UPDATE songs SET play_count = 1")
+                raise ValueError("Song not found")
+
+        with get_db_connection() as conn:
+            assert conn.execute("SELECT SUM(play_count) FROM songs").fetchone()[0] == 0
+
+def test_request_connection_with_other_tracing(song_db, request_app):
+    """Test that a call asking for different tracing than the request's connection gets its own."""
+    with request_app.test_request_context():
+        with get_db_connection(trace=False) as untraced:
+            pass
+        with get_db_connection(trace=True) as traced:
+            assert traced is not untraced
+            traced.cursor().execute("SELECT id FROM songs").fetchall()
+
+    assert statement_stats.summary()[0]['count'] == 1